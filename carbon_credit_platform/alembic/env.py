@@ -1,6 +1,9 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.elements import TextClause
 from alembic import context
 import os
 import sys
@@ -8,7 +11,7 @@ import sys
 # Add the app directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import Base
+from app.database import Base, DATABASE_URL
 from app.models import User, CarbonCredit, Project, Bounty, SolarPanelApplication, ForestationApplication
 
 # this is the Alembic Config object, which provides
@@ -20,6 +23,23 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the database the app uses (DATABASE_URL), not a URL of its own;
+# "%" is escaped for the ini-style interpolation
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+
+
+@compiles(CreateColumn, "sqlite")
+def _parenthesize_sqlite_expression_defaults(element, compiler, **kw):
+    """SQLite only accepts expression defaults in parentheses, e.g. revision xxx's now()"""
+    spec = compiler.visit_create_column(element, **kw)
+    default = element.element.server_default
+    arg = getattr(default, "arg", None)
+    if isinstance(arg, TextClause) and arg.text.endswith(")") and not arg.text.startswith("("):
+        spec = spec.replace(f"DEFAULT {arg.text}", f"DEFAULT ({arg.text})")
+    return spec
+
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
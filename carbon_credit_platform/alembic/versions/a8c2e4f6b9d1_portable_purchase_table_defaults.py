@@ -0,0 +1,42 @@
+"""Use portable timestamp defaults on the credit purchase tables
+
+Revision xxx gave user_wallets and credit_transactions a server default of
+now(), which only PostgreSQL has; on SQLite any insert that relies on it
+fails with "unknown function: now()". CURRENT_TIMESTAMP works on both.
+
+Revision ID: a8c2e4f6b9d1
+Revises: f7b1d3e5a9c2
+Create Date: 2026-10-19 21:36:52.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c2e4f6b9d1'
+down_revision = 'f7b1d3e5a9c2'
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_COLUMNS = {
+    'user_wallets': ('created_at', 'updated_at'),
+    'credit_transactions': ('created_at',),
+}
+
+
+def _set_defaults(server_default) -> None:
+    for table_name, columns in TIMESTAMP_COLUMNS.items():
+        with op.batch_alter_table(table_name) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column, existing_type=sa.DateTime(), existing_nullable=True, server_default=server_default
+                )
+
+
+def upgrade() -> None:
+    _set_defaults(sa.func.now())
+
+
+def downgrade() -> None:
+    _set_defaults(sa.text('now()'))
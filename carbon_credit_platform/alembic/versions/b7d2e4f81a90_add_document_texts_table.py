@@ -0,0 +1,57 @@
+"""Add document_texts table for extracted document text
+
+Revision ID: b7d2e4f81a90
+Revises: f3a1c9d27b64
+Create Date: 2026-10-19 14:03:17.552910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f81a90'
+down_revision = 'f3a1c9d27b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The app may already have created the table via create_all
+    if 'document_texts' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'document_texts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('application_type', sa.String(length=20), nullable=False),
+        sa.Column('application_id', sa.Integer(), nullable=False),
+        sa.Column('document_type', sa.String(length=40), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('search_text', sa.Text(), nullable=True),
+        sa.Column('owner_name', sa.String(length=200), nullable=True),
+        sa.Column('survey_number', sa.String(length=100), nullable=True),
+        sa.Column('extracted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('application_type', 'application_id', 'document_type', name='uq_document_texts_document')
+    )
+    op.create_index(op.f('ix_document_texts_id'), 'document_texts', ['id'], unique=False)
+    op.create_index(op.f('ix_document_texts_sha256'), 'document_texts', ['sha256'], unique=False)
+    op.create_index(op.f('ix_document_texts_owner_name'), 'document_texts', ['owner_name'], unique=False)
+    op.create_index(op.f('ix_document_texts_survey_number'), 'document_texts', ['survey_number'], unique=False)
+    op.create_index('ix_document_texts_application', 'document_texts', ['application_type', 'application_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_texts_application', table_name='document_texts')
+    op.drop_index(op.f('ix_document_texts_survey_number'), table_name='document_texts')
+    op.drop_index(op.f('ix_document_texts_owner_name'), table_name='document_texts')
+    op.drop_index(op.f('ix_document_texts_sha256'), table_name='document_texts')
+    op.drop_index(op.f('ix_document_texts_id'), table_name='document_texts')
+    op.drop_table('document_texts')
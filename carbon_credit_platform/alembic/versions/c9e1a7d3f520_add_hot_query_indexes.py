@@ -0,0 +1,63 @@
+"""Add composite indexes for hot listing and stats queries
+
+Revision ID: c9e1a7d3f520
+Revises: b7d2e4f81a90
+Create Date: 2026-10-19 16:42:08.193604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1a7d3f520'
+down_revision = 'b7d2e4f81a90'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_forestation_applications_user_status_created', 'forestation_applications', ['user_id', 'status', 'created_at']),
+    ('ix_forestation_applications_status_created', 'forestation_applications', ['status', 'created_at']),
+    ('ix_forestation_applications_created', 'forestation_applications', ['created_at']),
+    ('ix_marketplace_credits_status_source_created', 'marketplace_credits', ['verification_status', 'source_type', 'created_at']),
+    ('ix_marketplace_credits_issuer_status', 'marketplace_credits', ['issuer_id', 'verification_status']),
+    ('ix_marketplace_credits_created', 'marketplace_credits', ['created_at']),
+    ('ix_carbon_coin_issues_user_source_date', 'carbon_coin_issues', ['user_id', 'source', 'issue_date']),
+    ('ix_carbon_coin_issues_source_date', 'carbon_coin_issues', ['source', 'issue_date']),
+    ('ix_credit_retirements_user_status_date', 'credit_retirements', ['user_id', 'retirement_status', 'retirement_date']),
+    ('ix_credit_transactions_user_created', 'credit_transactions', ['user_id', 'created_at']),
+    ('ix_solar_panel_applications_v2_user_created', 'solar_panel_applications_v2', ['user_id', 'created_at']),
+    ('ix_solar_analysis_results_v2_application', 'solar_analysis_results_v2', ['application_id']),
+    ('ix_carbon_tokens_v2_application', 'carbon_tokens_v2', ['application_id']),
+    ('ix_carbon_tokens_v2_name', 'carbon_tokens_v2', ['name']),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in INDEXES:
+        # Tables may be missing on partial schemas; create_all may already have built the index
+        if table not in tables or name in _existing_indexes(inspector, table):
+            continue
+        op.create_index(name, table, columns, unique=False)
+
+    # Refresh planner statistics so the new indexes are picked up
+    if op.get_bind().dialect.name in ('sqlite', 'postgresql'):
+        op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,50 @@
+"""Add timestamp indexes for keyset pagination of unfiltered lists
+
+Revision ID: d4f8b2c6e913
+Revises: c9e1a7d3f520
+Create Date: 2026-10-19 18:05:51.407316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f8b2c6e913'
+down_revision = 'c9e1a7d3f520'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_solar_panel_applications_v2_created', 'solar_panel_applications_v2', ['created_at']),
+    ('ix_solar_analysis_results_v2_created', 'solar_analysis_results_v2', ['created_at']),
+    ('ix_carbon_tokens_v2_tokenized', 'carbon_tokens_v2', ['tokenized_date']),
+    # issue_date alone is already indexed (ix_carbon_coin_issues_issue_date); the cursor
+    # orders by (issue_date, issue_id)
+    ('ix_carbon_coin_issues_date_id', 'carbon_coin_issues', ['issue_date', 'issue_id']),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in INDEXES:
+        if table not in tables or name in _existing_indexes(inspector, table):
+            continue
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,83 @@
+"""Add rollup tables for dashboard totals
+
+The tables start empty; the app builds them on startup (or run
+scripts/rebuild_rollups.py) and keeps them current from then on.
+
+Revision ID: e6a3c8f1d472
+Revises: d4f8b2c6e913
+Create Date: 2026-10-19 19:12:40.118264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3c8f1d472'
+down_revision = 'd4f8b2c6e913'
+branch_labels = None
+depends_on = None
+
+
+def _credit_columns():
+    return [
+        sa.Column('credits_total', sa.Integer(), nullable=False),
+        sa.Column('credits_verified', sa.Integer(), nullable=False),
+        sa.Column('coins_verified', sa.Float(), nullable=False),
+        sa.Column('forestation_credits', sa.Integer(), nullable=False),
+        sa.Column('forestation_coins', sa.Float(), nullable=False),
+        sa.Column('solar_credits', sa.Integer(), nullable=False),
+        sa.Column('solar_coins', sa.Float(), nullable=False),
+    ]
+
+
+def _updated_at():
+    return sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True)
+
+
+def upgrade() -> None:
+    # The app may already have created the tables via create_all
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'marketplace_rollups' not in tables:
+        op.create_table(
+            'marketplace_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            *_credit_columns(),
+            sa.Column('verified_issuers', sa.Integer(), nullable=False),
+            sa.Column('coins_retired', sa.Float(), nullable=False),
+            _updated_at(),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'issuer_rollups' not in tables:
+        op.create_table(
+            'issuer_rollups',
+            sa.Column('issuer_id', sa.Integer(), nullable=False),
+            *_credit_columns(),
+            _updated_at(),
+            sa.ForeignKeyConstraint(['issuer_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('issuer_id')
+        )
+
+    if 'user_rollups' not in tables:
+        op.create_table(
+            'user_rollups',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('coin_issues', sa.Integer(), nullable=False),
+            sa.Column('coins_minted', sa.Float(), nullable=False),
+            sa.Column('solar_coins_minted', sa.Float(), nullable=False),
+            sa.Column('forestation_coins_minted', sa.Float(), nullable=False),
+            sa.Column('coins_retired', sa.Float(), nullable=False),
+            sa.Column('retirements_completed', sa.Integer(), nullable=False),
+            sa.Column('retirements_pending', sa.Integer(), nullable=False),
+            _updated_at(),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('user_rollups')
+    op.drop_table('issuer_rollups')
+    op.drop_table('marketplace_rollups')
@@ -0,0 +1,38 @@
+"""Add upload_blobs table for content-addressed uploads
+
+Revision ID: f3a1c9d27b64
+Revises: 4e4660f3f711
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a1c9d27b64'
+down_revision = '4e4660f3f711'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The app may already have created the table via create_all
+    if 'upload_blobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'upload_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_blobs')
@@ -0,0 +1,136 @@
+"""Create the tables that were only ever made by create_all
+
+The app no longer creates tables on startup, so every table has to come
+from a migration. Existing databases already have these (and are skipped).
+
+Revision ID: f7b1d3e5a9c2
+Revises: e6a3c8f1d472
+Create Date: 2026-10-19 20:41:07.305518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b1d3e5a9c2'
+down_revision = 'e6a3c8f1d472'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'solar_panel_applications_v2' not in tables:
+        op.create_table(
+            'solar_panel_applications_v2',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('full_name', sa.String(), nullable=False),
+            sa.Column('company_name', sa.String(), nullable=True),
+            sa.Column('aadhar_card', sa.String(), nullable=False),
+            sa.Column('api_link', sa.String(), nullable=False),
+            sa.Column('ownership_document_path', sa.String(), nullable=True),
+            sa.Column('energy_certification_path', sa.String(), nullable=True),
+            sa.Column('geotag_photo_path', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_solar_panel_applications_v2_created', 'solar_panel_applications_v2', ['created_at'], unique=False)
+        op.create_index(op.f('ix_solar_panel_applications_v2_id'), 'solar_panel_applications_v2', ['id'], unique=False)
+        op.create_index('ix_solar_panel_applications_v2_user_created', 'solar_panel_applications_v2', ['user_id', 'created_at'], unique=False)
+
+    if 'solar_analysis_results_v2' not in tables:
+        op.create_table(
+            'solar_analysis_results_v2',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('application_id', sa.Integer(), nullable=False),
+            sa.Column('latitude', sa.Float(), nullable=True),
+            sa.Column('longitude', sa.Float(), nullable=True),
+            sa.Column('co2_emission_saved', sa.Float(), nullable=True),
+            sa.Column('annual_mwh', sa.Float(), nullable=True),
+            sa.Column('annual_carbon_credits', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['application_id'], ['solar_panel_applications_v2.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_solar_analysis_results_v2_application', 'solar_analysis_results_v2', ['application_id'], unique=False)
+        op.create_index('ix_solar_analysis_results_v2_created', 'solar_analysis_results_v2', ['created_at'], unique=False)
+        op.create_index(op.f('ix_solar_analysis_results_v2_id'), 'solar_analysis_results_v2', ['id'], unique=False)
+
+    if 'carbon_tokens_v2' not in tables:
+        op.create_table(
+            'carbon_tokens_v2',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('application_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('credits', sa.Float(), nullable=False),
+            sa.Column('source', sa.String(), nullable=True),
+            sa.Column('tokenized_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['application_id'], ['solar_panel_applications_v2.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_carbon_tokens_v2_application', 'carbon_tokens_v2', ['application_id'], unique=False)
+        op.create_index(op.f('ix_carbon_tokens_v2_id'), 'carbon_tokens_v2', ['id'], unique=False)
+        op.create_index('ix_carbon_tokens_v2_name', 'carbon_tokens_v2', ['name'], unique=False)
+        op.create_index('ix_carbon_tokens_v2_tokenized', 'carbon_tokens_v2', ['tokenized_date'], unique=False)
+
+    if 'marketplace_credits' not in tables:
+        op.create_table(
+            'marketplace_credits',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('issuer_name', sa.String(), nullable=False),
+            sa.Column('issuer_id', sa.Integer(), nullable=False),
+            sa.Column('coins_issued', sa.Float(), nullable=False),
+            sa.Column('issue_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('verification_status', sa.Enum('PENDING', 'VERIFIED', 'REJECTED', name='verificationstatus'), nullable=True),
+            sa.Column('verified_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('source_type', sa.Enum('FORESTATION', 'SOLAR_PANEL', name='sourcetype'), nullable=False),
+            sa.Column('source_project_id', sa.Integer(), nullable=True),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.Column('price_per_coin', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['issuer_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_marketplace_credits_created', 'marketplace_credits', ['created_at'], unique=False)
+        op.create_index(op.f('ix_marketplace_credits_id'), 'marketplace_credits', ['id'], unique=False)
+        op.create_index('ix_marketplace_credits_issuer_status', 'marketplace_credits', ['issuer_id', 'verification_status'], unique=False)
+        op.create_index('ix_marketplace_credits_status_source_created', 'marketplace_credits', ['verification_status', 'source_type', 'created_at'], unique=False)
+
+    if 'credit_retirements' not in tables:
+        op.create_table(
+            'credit_retirements',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('retirement_id', sa.String(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('coins_retired', sa.Float(), nullable=False),
+            sa.Column('co2_offset_tons', sa.Float(), nullable=False),
+            sa.Column('retirement_status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'CANCELLED', name='retirementstatus'), nullable=True),
+            sa.Column('retirement_reason', sa.String(), nullable=True),
+            sa.Column('certificate_number', sa.String(), nullable=True),
+            sa.Column('certificate_issued', sa.Boolean(), nullable=True),
+            sa.Column('retirement_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('certificate_number'),
+            sa.UniqueConstraint('retirement_id')
+        )
+        op.create_index(op.f('ix_credit_retirements_id'), 'credit_retirements', ['id'], unique=False)
+        op.create_index('ix_credit_retirements_user_status_date', 'credit_retirements', ['user_id', 'retirement_status', 'retirement_date'], unique=False)
+
+    # Added to the model without a migration
+    if 'coins_balance' not in {column['name'] for column in inspector.get_columns('users')}:
+        op.add_column('users', sa.Column('coins_balance', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    # These tables predate migrations; leave them to the databases that have them
+    pass
@@ -1,8 +1,15 @@
-from fastapi import HTTPException, Depends
+import hmac
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Depends, Header
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 
+# Shared secret for maintenance endpoints (X-Admin-Token header); unset, those endpoints don't exist
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
 def get_current_user(db: Session = Depends(get_db)) -> User:
     """
     Mock authentication dependency that returns a default user.
@@ -30,3 +37,10 @@ def get_current_user(db: Session = Depends(get_db)) -> User:
         db.refresh(user)
     
     return user
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Guard for maintenance endpoints until real authentication exists"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
+from app.core.pagination import InvalidCursorError
+from app.database import get_db, get_read_db
 from app.api.deps import get_current_user
 from app.services.carbon_coin_service import CarbonCoinService
 from app.schemas.carbon_coins import (
@@ -21,7 +22,8 @@ async def get_user_carbon_coins(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     source: Optional[str] = Query(None, description="Filter by source: solar_panel or forestation"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get all carbon coin issues for the current user"""
@@ -33,15 +35,12 @@ async def get_user_carbon_coins(
             user_id=current_user.id,
             skip=skip,
             limit=limit,
-            source_filter=source
+            source_filter=source,
+            cursor=cursor
         )
         
         # Get total count for pagination
-        total_query = service.db.query(service.db.query(
-            service.db.query(CarbonCoinIssue).filter(
-                CarbonCoinIssue.user_id == current_user.id
-            )
-        ).count())
+        from app.models.carbon_coins import CarbonCoinIssue, CoinSource
         
         # Apply source filter to total count if provided
         if source:
@@ -65,18 +64,21 @@ async def get_user_carbon_coins(
             ).count()
         
         return CarbonCoinIssueList(
-            issues=issues,
+            issues=issues.items,
             total=total,
             page=skip // limit + 1,
-            size=limit
+            size=limit,
+            next_cursor=issues.next_cursor
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving carbon coins: {str(e)}")
 
 @router.get("/stats", response_model=CarbonCoinStats)
 async def get_carbon_coin_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get carbon coin statistics for the current user"""
@@ -91,7 +93,7 @@ async def get_carbon_coin_stats(
 @router.get("/{issue_id}", response_model=CarbonCoinIssueResponse)
 async def get_carbon_coin_issue(
     issue_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get a specific carbon coin issue by ID"""
@@ -145,7 +147,8 @@ async def get_all_carbon_coins_admin(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     source: Optional[str] = Query(None, description="Filter by source: solar_panel or forestation"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    db: Session = Depends(get_read_db)
     # TODO: Add admin authentication dependency
 ):
     """Get all carbon coin issues (admin only)"""
@@ -156,7 +159,8 @@ async def get_all_carbon_coins_admin(
         issues = service.get_all_carbon_coins(
             skip=skip,
             limit=limit,
-            source_filter=source
+            source_filter=source,
+            cursor=cursor
         )
         
         # Get total count
@@ -172,12 +176,15 @@ async def get_all_carbon_coins_admin(
         total = query.count()
         
         return CarbonCoinIssueList(
-            issues=issues,
+            issues=issues.items,
             total=total,
             page=skip // limit + 1,
-            size=limit
+            size=limit,
+            next_cursor=issues.next_cursor
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving carbon coins: {str(e)}")
 
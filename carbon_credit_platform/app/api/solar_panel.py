@@ -15,7 +15,7 @@ async def create_application(
         service = SolarPanelService(db)
         
         # Create application
-        application = service.create_application(
+        application = await service.create_application(
             user_id=current_user.id,
             application_data={
                 'full_name': full_name,
@@ -1,6 +1,6 @@
 # app/api/v1/api.py
 from fastapi import APIRouter
-from app.api.v1 import users, credits, projects, bounties, forestation, marketplace, coins
+from app.api.v1 import users, credits, projects, bounties, forestation, marketplace, coins, storage, documents
 from app.api.endpoints import carbon_coins
 from app.api.v1.solar_panel import router as solar_panel_router
 from app.api.v1.endpoints import credit_purchase
@@ -20,4 +20,6 @@ api_router.include_router(credit_retirement_router, prefix="/credit-retirement",
 # We'll remove solar_analysis since it's now integrated in solar_panel
 api_router.include_router(marketplace.router)
 api_router.include_router(coins.router)
-api_router.include_router(carbon_coins.router)
\ No newline at end of file
+api_router.include_router(carbon_coins.router)
+api_router.include_router(storage.router)
+api_router.include_router(documents.router)
\ No newline at end of file
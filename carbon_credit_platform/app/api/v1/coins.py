@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.core.serialization import FIELDS_DESCRIPTION, FastJSONResponse, InvalidFieldsError
+from app.database import get_db, get_read_db
 from app.models.marketplace import MarketplaceCredit
 from app.schemas.marketplace import MarketplaceCreditResponse, MarketplaceCreditCreate
 from app.api.deps import get_current_user
+from app.services.marketplace_service import MarketplaceService
+from app.services.rollups import RollupService
 
 router = APIRouter(prefix="/coins", tags=["coins"])
 
@@ -37,73 +40,67 @@ def create_coin(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _coin_rows(db: Session, fields: Optional[str], *criteria):
+    """Listed coins as plain dicts encoded straight to JSON (column-only select)"""
+    try:
+        rows = MarketplaceService(db).get_credit_rows(*criteria, fields=fields, newest_first=False)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(rows)
+
 @router.get("/", response_model=List[MarketplaceCreditResponse])
-def get_all_coins(db: Session = Depends(get_db)):
+def get_all_coins(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """Get all coins from database"""
-    coins = db.query(MarketplaceCredit).all()
-    return coins
+    return _coin_rows(db, fields)
 
 @router.get("/verified", response_model=List[MarketplaceCreditResponse])
-def get_verified_coins(db: Session = Depends(get_db)):
+def get_verified_coins(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """Get only verified coins"""
-    coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.verification_status == "verified"
-    ).all()
-    return coins
+    return _coin_rows(db, fields, MarketplaceCredit.verification_status == "verified")
 
 @router.get("/forestation", response_model=List[MarketplaceCreditResponse])
-def get_forestation_coins(db: Session = Depends(get_db)):
+def get_forestation_coins(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """Get forestation coins"""
-    coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.source_type == "forestation"
-    ).all()
-    return coins
+    return _coin_rows(db, fields, MarketplaceCredit.source_type == "forestation")
 
 @router.get("/solar", response_model=List[MarketplaceCreditResponse])
-def get_solar_coins(db: Session = Depends(get_db)):
+def get_solar_coins(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """Get solar panel coins"""
-    coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.source_type == "solar_panel"
-    ).all()
-    return coins
+    return _coin_rows(db, fields, MarketplaceCredit.source_type == "solar_panel")
 
 @router.get("/issuer/{issuer_id}", response_model=List[MarketplaceCreditResponse])
-def get_coins_by_issuer(issuer_id: int, db: Session = Depends(get_db)):
+def get_coins_by_issuer(
+    issuer_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
     """Get coins by issuer ID"""
-    coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.issuer_id == issuer_id
-    ).all()
-    return coins
+    return _coin_rows(db, fields, MarketplaceCredit.issuer_id == issuer_id)
 
 @router.get("/stats")
-def get_coin_stats(db: Session = Depends(get_db)):
+def get_coin_stats(db: Session = Depends(get_read_db)):
     """Get coin statistics"""
-    total_coins = db.query(MarketplaceCredit).count()
-    verified_coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.verification_status == "verified"
-    ).count()
-    
-    total_coins_issued = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.verification_status == "verified"
-    ).with_entities(MarketplaceCredit.coins_issued).all()
-    
-    total_amount = sum([coin[0] for coin in total_coins_issued]) if total_coins_issued else 0
-    
-    forestation_coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.source_type == "forestation",
-        MarketplaceCredit.verification_status == "verified"
-    ).count()
-    
-    solar_coins = db.query(MarketplaceCredit).filter(
-        MarketplaceCredit.source_type == "solar_panel",
-        MarketplaceCredit.verification_status == "verified"
-    ).count()
+    rollup = RollupService(db).get_marketplace()
+    total_coins = rollup.credits_total
+    verified_coins = rollup.credits_verified
     
     return {
         "total_coins": total_coins,
         "verified_coins": verified_coins,
-        "total_coins_issued": total_amount,
-        "forestation_coins": forestation_coins,
-        "solar_coins": solar_coins,
+        "total_coins_issued": rollup.coins_verified,
+        "forestation_coins": rollup.forestation_credits,
+        "solar_coins": rollup.solar_credits,
         "verification_rate": (verified_coins / total_coins * 100) if total_coins > 0 else 0
     }
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.services.retirement_service import CreditRetirementService
 from app.schemas.retirement_schemas import (
     RetirementRequestSchema,
@@ -19,66 +20,57 @@ router = APIRouter(prefix="/credit-retirement", tags=["Credit Retirement"])
 @router.post("/retire", response_model=RetirementResponseSchema)
 async def retire_credits(
     retirement_request: RetirementRequestSchema,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retire credits for carbon offset"""
     service = CreditRetirementService(db)
-    result = service.retire_credits(retirement_request)
+    result = await service.retire_credits(retirement_request)
     
     if not result['success']:
         raise HTTPException(status_code=400, detail=result['error'])
     
-    return RetirementResponseSchema(**result)
+    return RetirementResponseSchema.model_validate(result['retirement'])
 
 @router.get("/summary/{user_id}", response_model=DashboardStatsSchema)
 async def get_retirement_summary(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get user's retirement summary"""
     service = CreditRetirementService(db)
-    summary = service.get_user_retirement_summary(user_id)
+    summary = await service.get_user_retirement_summary(user_id)
     return summary
 
 @router.get("/history/{user_id}", response_model=List[RetirementHistorySchema])
 async def get_retirement_history(
     user_id: int,
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get user's retirement history"""
     service = CreditRetirementService(db)
-    history = service.get_retirement_history(user_id, limit)
+    history = await service.get_retirement_history(user_id, limit)
     return history
 
 @router.get("/dashboard-stats/{user_id}", response_model=DashboardStatsSchema)
 async def get_dashboard_stats(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get retirement stats for dashboard"""
     service = CreditRetirementService(db)
-    stats = service.get_dashboard_stats(user_id)
-    
-    return DashboardStatsSchema(
-        total_retired=stats['total_retired'],
-        available_for_retirement=stats['available_for_retirement'],
-        co2_offset_tons=stats['co2_offset_tons'],
-        progress_percentage=stats['progress_percentage']
-    )
+    return await service.get_user_retirement_summary(user_id)
 
 @router.get("/certificate/{retirement_id}")
 async def get_retirement_certificate(
     retirement_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get retirement certificate details"""
-    service = CreditRetirementService(db)
-    
     # Get retirement record
-    retirement = db.query(CreditRetirement).filter(
+    retirement = await db.scalar(select(CreditRetirement).where(
         CreditRetirement.retirement_id == retirement_id
-    ).first()
+    ))
     
     if not retirement:
         raise HTTPException(status_code=404, detail="Retirement certificate not found")
@@ -98,11 +90,11 @@ async def update_retirement_request(
     retirement_id: str,
     update_request: RetirementUpdateSchema,
     user_id: int = Query(..., description="User ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a pending retirement request"""
     service = CreditRetirementService(db)
-    result = service.update_retirement_request(retirement_id, user_id, update_request)
+    result = await service.update_retirement_request(retirement_id, user_id, update_request)
     
     if not result['success']:
         raise HTTPException(status_code=400, detail=result['error'])
@@ -113,11 +105,11 @@ async def update_retirement_request(
 async def confirm_retirement(
     retirement_id: str,
     user_id: int = Query(..., description="User ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Confirm a pending retirement request"""
     service = CreditRetirementService(db)
-    result = service.confirm_retirement(retirement_id, user_id)
+    result = await service.confirm_retirement(retirement_id, user_id)
     
     if not result['success']:
         raise HTTPException(status_code=400, detail=result['error'])
@@ -128,11 +120,11 @@ async def confirm_retirement(
 async def cancel_retirement(
     retirement_id: str,
     user_id: int = Query(..., description="User ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel a pending retirement request"""
     service = CreditRetirementService(db)
-    result = service.cancel_retirement(retirement_id, user_id)
+    result = await service.cancel_retirement(retirement_id, user_id)
     
     if not result['success']:
         raise HTTPException(status_code=400, detail=result['error'])
@@ -142,9 +134,9 @@ async def cancel_retirement(
 @router.get("/pending/{user_id}", response_model=List[RetirementHistorySchema])
 async def get_pending_retirements(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get user's pending retirement requests"""
     service = CreditRetirementService(db)
-    pending_retirements = service.get_pending_retirements(user_id)
+    pending_retirements = await service.get_pending_retirements(user_id)
     return pending_retirements
\ No newline at end of file
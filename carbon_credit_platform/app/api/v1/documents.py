@@ -0,0 +1,86 @@
+# app/api/v1/documents.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.api.deps import require_admin_token
+from app.database import get_db, get_read_db
+from app.schemas.document_text import DocumentTextResponse, DocumentSearchResult, DocumentSearchResponse
+from app.services.document_index import (
+    APPLICATION_MODELS,
+    INDEXED_DOCUMENTS,
+    DocumentIndexService,
+    get_document_indexer
+)
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+@router.get("/search", response_model=DocumentSearchResponse)
+async def search_documents(
+    q: Optional[str] = Query(None, description="Words that must all appear in the document text"),
+    owner_name: Optional[str] = None,
+    survey_number: Optional[str] = None,
+    application_type: Optional[str] = Query(None, pattern="^(forestation|solar_panel)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Search indexed application documents (admin review)"""
+    try:
+        service = DocumentIndexService(db)
+        documents, total = service.search(q, owner_name, survey_number, application_type, skip, limit)
+        
+        results = [
+            DocumentSearchResult(
+                id=document.id,
+                application_type=document.application_type,
+                application_id=document.application_id,
+                document_type=document.document_type,
+                owner_name=document.owner_name,
+                survey_number=document.survey_number,
+                page_count=document.page_count,
+                snippet=service.snippet(document, q)
+            )
+            for document in documents
+        ]
+        return DocumentSearchResponse(results=results, total=total, page=skip // limit + 1, size=limit)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+
+@router.get("/{application_type}/{application_id}", response_model=List[DocumentTextResponse])
+async def get_application_documents(
+    application_type: str,
+    application_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """Extracted text and key fields for an application's documents"""
+    if application_type not in APPLICATION_MODELS:
+        raise HTTPException(status_code=404, detail="Unknown application type")
+    
+    try:
+        return DocumentIndexService(db).get_application_documents(application_type, application_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving documents: {str(e)}")
+
+@router.post("/{application_type}/{application_id}/reindex", dependencies=[Depends(require_admin_token)])
+async def reindex_application_documents(
+    application_type: str,
+    application_id: int,
+    db: Session = Depends(get_db)
+):
+    """Queue an application's documents for text extraction again; needs X-Admin-Token (ADMIN_API_TOKEN)"""
+    model = APPLICATION_MODELS.get(application_type)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown application type")
+    
+    application = db.query(model).filter(model.id == application_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    queued = get_document_indexer().schedule_application(application_type, application)
+    return {
+        "message": f"Queued {len(queued)} document(s) for indexing",
+        "documents": [document_type for document_type, column in INDEXED_DOCUMENTS[application_type]
+                      if getattr(application, column)]
+    }
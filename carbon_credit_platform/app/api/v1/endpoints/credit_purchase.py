@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.serialization import FIELDS_DESCRIPTION, FastJSONResponse, InvalidFieldsError
+from app.database import get_async_db, get_async_read_db
 from app.schemas.credit_purchase import (
     CreditPurchaseRequest, 
     CreditPurchaseResponse, 
@@ -15,12 +16,12 @@ router = APIRouter()
 @router.post("/purchase", response_model=CreditPurchaseResponse)
 async def purchase_credits(
     purchase_request: CreditPurchaseRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Purchase carbon credits from marketplace"""
     try:
         service = CreditPurchaseService(db)
-        result = service.purchase_credits(purchase_request)
+        result = await service.purchase_credits(purchase_request)
         
         if not result.get('success', False):
             raise HTTPException(
@@ -30,6 +31,8 @@ async def purchase_credits(
         
         return CreditPurchaseResponse(**result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -37,11 +40,11 @@ async def purchase_credits(
         )
 
 @router.get("/wallet/{user_id}", response_model=UserWalletResponse)
-async def get_user_wallet(user_id: int, db: Session = Depends(get_db)):
+async def get_user_wallet(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get user's current coin balance"""
     try:
         service = CreditPurchaseService(db)
-        wallet_info = service.get_user_wallet(user_id)
+        wallet_info = await service.get_user_wallet(user_id)
         
         return UserWalletResponse(**wallet_info)
         
@@ -52,14 +55,19 @@ async def get_user_wallet(user_id: int, db: Session = Depends(get_db)):
         )
 
 @router.get("/marketplace/available", response_model=List[MarketplaceCreditResponse])
-async def get_available_credits(db: Session = Depends(get_db)):
+async def get_available_credits(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get all available credits in marketplace (credits > 0)"""
     try:
         service = CreditPurchaseService(db)
-        available_credits = service.get_available_marketplace_credits()
+        available_credits = await service.get_available_marketplace_credits(fields=fields)
         
-        return [MarketplaceCreditResponse(**credit) for credit in available_credits]
+        return FastJSONResponse(available_credits)
         
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -67,14 +75,19 @@ async def get_available_credits(db: Session = Depends(get_db)):
         )
 
 @router.get("/marketplace/all", response_model=List[MarketplaceCreditResponse])
-async def get_all_marketplace_credits(db: Session = Depends(get_db)):
+async def get_all_marketplace_credits(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get all marketplace credits (including those with 0 credits)"""
     try:
         service = CreditPurchaseService(db)
-        all_credits = service.get_all_marketplace_credits()
+        all_credits = await service.get_all_marketplace_credits(fields=fields)
         
-        return [MarketplaceCreditResponse(**credit) for credit in all_credits]
+        return FastJSONResponse(all_credits)
         
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
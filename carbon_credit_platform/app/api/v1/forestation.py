@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import json
 
-from app.database import get_db
+from app.core.pagination import InvalidCursorError
+from app.database import get_db, get_read_db
 from app.models.forestation import ForestationApplication
 from app.services.forestation_service import ForestationService
 from app.schemas.forestation import (
@@ -23,9 +24,11 @@ async def create_forestation_application(
     aadhar_card: str = Form(...),
     ownership_document: Optional[UploadFile] = File(None),
     geotag_photo: Optional[UploadFile] = File(None),
+    ownership_document_key: Optional[str] = Form(None),
+    geotag_photo_key: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
-    """Create a new forestation application"""
+    """Create a new forestation application (files as uploads or as keys from /storage/presign)"""
     try:
         # Create application data
         application_data = ForestationApplicationCreate(
@@ -40,11 +43,13 @@ async def create_forestation_application(
         user_id = 1  # TODO: Get from authenticated user
         
         # Create application
-        application = service.create_application(
+        application = await service.create_application(
             user_id=user_id,
             application_data=application_data,
             ownership_document=ownership_document,
-            geotag_photo=geotag_photo
+            geotag_photo=geotag_photo,
+            ownership_document_key=ownership_document_key,
+            geotag_photo_key=geotag_photo_key
         )
         
         return application
@@ -58,32 +63,36 @@ async def create_forestation_application(
 async def get_user_applications(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """Get all forestation applications for the current user"""
     try:
         service = ForestationService(db)
         user_id = 1  # TODO: Get from authenticated user
         
-        applications = service.get_user_applications(user_id, skip, limit)
+        applications = service.get_user_applications(user_id, skip, limit, cursor=cursor)
         total = db.query(ForestationApplication).filter(
             ForestationApplication.user_id == user_id
         ).count()
         
         return ForestationApplicationList(
-            applications=applications,
+            applications=applications.items,
             total=total,
             page=skip // limit + 1,
-            size=limit
+            size=limit,
+            next_cursor=applications.next_cursor
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/applications/{application_id}", response_model=ForestationApplicationResponse)
 async def get_application(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific forestation application"""
     try:
@@ -152,9 +161,11 @@ async def validate_geotag_photo(
     """Validate if uploaded photo contains geotag data"""
     try:
         service = ForestationService(db)
-        validation_result = service.validate_geotag_photo(photo)
+        validation_result = await service.validate_geotag_photo(photo)
         return validation_result
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validating photo: {str(e)}")
 
@@ -184,8 +195,10 @@ async def upload_document(
                 detail=f"Invalid file format. Allowed: {', '.join(allowed_types[file_type])}"
             )
         
-        # Save file
-        file_path = service._save_file(file, file_extension)
+        # Save file; derivatives are queued once the reference is committed
+        file_path = await service._save_file(file, file_extension)
+        db.commit()
+        service._schedule_derivatives()
         
         return FileUploadResponse(
             message="File uploaded successfully",
@@ -195,12 +208,14 @@ async def upload_document(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
 @router.get("/stats")
 async def get_application_stats(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get application statistics for the current user"""
     try:
@@ -219,12 +234,13 @@ async def get_all_applications_admin(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """Get all forestation applications (admin only)"""
     try:
         service = ForestationService(db)
-        applications = service.get_all_applications(skip, limit, status)
+        applications = service.get_all_applications(skip, limit, status, cursor=cursor)
         
         # Get total count
         query = db.query(ForestationApplication)
@@ -233,12 +249,15 @@ async def get_all_applications_admin(
         total = query.count()
         
         return ForestationApplicationList(
-            applications=applications,
+            applications=applications.items,
             total=total,
             page=skip // limit + 1,
-            size=limit
+            size=limit,
+            next_cursor=applications.next_cursor
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -671,7 +690,7 @@ async def get_forestation_analysis_results(
     application_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get forestation analysis results with optional filtering"""
     try:
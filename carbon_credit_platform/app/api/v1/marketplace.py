@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.core.pagination import InvalidCursorError
+from app.core.serialization import FIELDS_DESCRIPTION, FastJSONResponse, InvalidFieldsError
+from app.database import get_db, get_read_db
 from app.services.marketplace_service import MarketplaceService
 from app.schemas.marketplace import (
     MarketplaceCreditCreate,
@@ -30,31 +32,37 @@ def get_marketplace_credits(
     verification_status: Optional[VerificationStatus] = Query(None, description="Filter by verification status"),
     source_type: Optional[SourceType] = Query(None, description="Filter by source type"),
     issuer_id: Optional[int] = Query(None, description="Filter by issuer ID"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    db: Session = Depends(get_read_db)
 ):
     """Get marketplace credits with optional filtering"""
     service = MarketplaceService(db)
     skip = (page - 1) * size
     
-    credits, total = service.get_marketplace_credits(
-        skip=skip,
-        limit=size,
-        verification_status=verification_status,
-        source_type=source_type,
-        issuer_id=issuer_id
-    )
+    try:
+        credits, total = service.get_marketplace_credits(
+            skip=skip,
+            limit=size,
+            verification_status=verification_status,
+            source_type=source_type,
+            issuer_id=issuer_id,
+            cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return MarketplaceCreditListResponse(
-        credits=credits,
+        credits=credits.items,
         total=total,
         page=page,
-        size=size
+        size=size,
+        next_cursor=credits.next_cursor
     )
 
 @router.get("/credits/{credit_id}", response_model=MarketplaceCreditResponse)
 def get_marketplace_credit(
     credit_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific marketplace credit by ID"""
     service = MarketplaceService(db)
@@ -90,25 +98,33 @@ def delete_marketplace_credit(
 
 @router.get("/verified", response_model=List[MarketplaceCreditResponse])
 def get_verified_credits_for_marketplace(
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """Get all verified credits suitable for marketplace display"""
     service = MarketplaceService(db)
-    return service.get_verified_credits_for_marketplace()
+    try:
+        return FastJSONResponse(service.get_verified_credits_for_marketplace(fields=fields))
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/by-source/{source_type}", response_model=List[MarketplaceCreditResponse])
 def get_credits_by_source_type(
     source_type: SourceType,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """Get verified credits filtered by source type (forestation or solar_panel)"""
     service = MarketplaceService(db)
-    return service.get_credits_by_source_type(source_type)
+    try:
+        return FastJSONResponse(service.get_credits_by_source_type(source_type, fields=fields))
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/issuer/{issuer_id}/stats")
 def get_issuer_stats(
     issuer_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get statistics for a specific issuer"""
     service = MarketplaceService(db)
@@ -116,35 +132,8 @@ def get_issuer_stats(
 
 @router.get("/summary")
 def get_marketplace_summary(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get marketplace summary statistics"""
     service = MarketplaceService(db)
-    
-    # Get all verified credits
-    verified_credits, _ = service.get_marketplace_credits(
-        verification_status=VerificationStatus.VERIFIED
-    )
-    
-    # Calculate totals
-    total_coins = sum(credit.coins_issued for credit in verified_credits)
-    forestation_coins = sum(
-        credit.coins_issued for credit in verified_credits 
-        if credit.source_type == SourceType.FORESTATION
-    )
-    solar_coins = sum(
-        credit.coins_issued for credit in verified_credits 
-        if credit.source_type == SourceType.SOLAR_PANEL
-    )
-    
-    # Count unique issuers
-    unique_issuers = len(set(credit.issuer_id for credit in verified_credits))
-    
-    return {
-        "total_verified_credits": len(verified_credits),
-        "total_coins_issued": total_coins,
-        "forestation_coins": forestation_coins,
-        "solar_panel_coins": solar_coins,
-        "unique_issuers": unique_issuers,
-        "average_coins_per_credit": total_coins / len(verified_credits) if verified_credits else 0
-    }
+    return service.get_marketplace_summary()
@@ -1,12 +1,21 @@
 # app/api/v1/solar_panel.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
+import os
+import json
+import asyncio
+import zipfile
 
-from app.database import get_db
+from app.core.pagination import InvalidCursorError, set_next_cursor_header
+from app.core.serialization import FIELDS_DESCRIPTION, FastJSONResponse, InvalidFieldsError
+from app.database import get_db, get_read_db
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.services.gps_extraction_service import GPSExtractionService
+from app.services.gps_extraction_service import GPSExtractionService, get_gps_extraction_service
+from app.services.image_context import ImageContext
+from app.services.image_ingest import MAX_IMAGE_BYTES, MAX_IMAGE_PIXELS
 from app.services.solar_panel_service import SolarPanelService
 from app.services.marketplace_service import MarketplaceService
 from app.models.solar_panel import CarbonToken
@@ -23,6 +32,58 @@ from app.schemas.marketplace import MarketplaceCreditCreate, SourceType
 
 router = APIRouter(prefix="/solar-panel", tags=["solar-panel"])
 
+# Batch GPS extraction limits
+MAX_GPS_FILE_SIZE = MAX_IMAGE_BYTES  # per image
+FILE_TOO_LARGE_MESSAGE = f"File size too large. Maximum {MAX_GPS_FILE_SIZE // (1024 * 1024)}MB allowed."
+MAX_BATCH_FILES = 200
+BATCH_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp')
+
+
+def _read_upload(photo):
+    """Build a reader for one multipart image, checked before its bytes are loaded"""
+    def read():
+        if not (photo.content_type or '').startswith('image/'):
+            raise ValueError("File must be an image")
+        photo.file.seek(0, 2)
+        if photo.file.tell() > MAX_GPS_FILE_SIZE:
+            raise ValueError(FILE_TOO_LARGE_MESSAGE)
+        photo.file.seek(0)
+        return photo.file.read()
+    return read
+
+
+def _read_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+    """Build a reader for one archive member; decompression stops at the size limit"""
+    def read():
+        if info.file_size > MAX_GPS_FILE_SIZE:
+            raise ValueError(FILE_TOO_LARGE_MESSAGE)
+        with archive.open(info) as member:
+            content = member.read(MAX_GPS_FILE_SIZE + 1)
+        if len(content) > MAX_GPS_FILE_SIZE:
+            raise ValueError(FILE_TOO_LARGE_MESSAGE)
+        return content
+    return read
+
+
+def _iter_batch_sources(photos, archive_file):
+    """Yield (filename, read) pairs for every image in the batch"""
+    for photo in photos:
+        yield photo.filename, _read_upload(photo)
+
+    if archive_file is not None:
+        # ZipFile only reads the central directory up front; members are read on demand
+        with zipfile.ZipFile(archive_file) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and info.filename.lower().endswith(BATCH_IMAGE_EXTENSIONS)
+                and not os.path.basename(info.filename).startswith('.')
+            ]
+            if len(photos) + len(members) > MAX_BATCH_FILES:
+                raise ValueError(f"Too many images. Maximum {MAX_BATCH_FILES} per batch.")
+            for info in members:
+                yield info.filename, _read_zip_member(archive, info)
+
 @router.get("/extract-gps")
 async def get_gps_extraction_info():
     """Get information about GPS extraction service and supported methods"""
@@ -56,10 +117,13 @@ async def get_gps_extraction_info():
             }
         ],
         "supported_formats": ["JPEG", "PNG", "TIFF", "WebP"],
-        "max_file_size": "10MB",
+        "max_file_size": f"{MAX_GPS_FILE_SIZE // (1024 * 1024)}MB",
+        "max_image_pixels": MAX_IMAGE_PIXELS,
         "api_endpoints": {
             "post": "/solar-panel/extract-gps",
-            "description": "Upload an image file to extract GPS coordinates"
+            "description": "Upload an image file to extract GPS coordinates",
+            "batch": "/solar-panel/extract-gps/batch",
+            "batch_description": "Upload many images ('photos') or a zip ('archive'); one NDJSON result line is streamed per image"
         },
         "response_format": {
             "success": "boolean",
@@ -90,7 +154,8 @@ async def get_gps_extraction_info():
 @router.post("/extract-gps")
 async def extract_gps_from_photo(
     photo: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    gps_service: GPSExtractionService = Depends(get_gps_extraction_service)
 ):
     """Extract GPS coordinates from uploaded geotagged photo using AI"""
     try:
@@ -98,20 +163,12 @@ async def extract_gps_from_photo(
         if not photo.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Check file size (limit to 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        photo.file.seek(0, 2)  # Seek to end
-        file_size = photo.file.tell()
-        photo.file.seek(0)  # Reset to beginning
-        
-        if file_size > max_size:
-            raise HTTPException(status_code=400, detail="File size too large. Maximum 10MB allowed.")
-        
-        # Initialize GPS extraction service
-        gps_service = GPSExtractionService()
+        # Check file size, then pixel dimensions from the header (nothing is decoded yet)
+        context = await asyncio.to_thread(ImageContext.from_upload, photo, MAX_GPS_FILE_SIZE)
+        await asyncio.to_thread(context.check)
         
         # Process the image
-        result = gps_service.process_uploaded_file(photo)
+        result = await gps_service.extract_gps_with_openai(context)
         
         return {
             "success": result['success'],
@@ -125,11 +182,56 @@ async def extract_gps_from_photo(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import logging
         logging.error(f"GPS extraction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error extracting GPS: {str(e)}")
 
+@router.post("/extract-gps/batch")
+async def extract_gps_batch(
+    request: Request,
+    gps_service: GPSExtractionService = Depends(get_gps_extraction_service)
+):
+    """Extract GPS coordinates from many photos (multipart `photos` and/or a zip `archive`), streamed as NDJSON"""
+    # The form is parsed here rather than through File() parameters because FastAPI
+    # closes those uploads as soon as the handler returns, before the stream is read
+    form = await request.form(max_files=MAX_BATCH_FILES + 1)
+    try:
+        photos = [item for item in form.getlist("photos") if hasattr(item, "file")]
+        archive = form.get("archive")
+        archive_file = archive.file if hasattr(archive, "file") else None
+
+        if not photos and archive_file is None:
+            raise HTTPException(status_code=400, detail="Upload images as 'photos' or a zip file as 'archive'")
+        if len(photos) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many images. Maximum {MAX_BATCH_FILES} per batch.")
+        if archive_file is not None and not zipfile.is_zipfile(archive_file):
+            raise HTTPException(status_code=400, detail="Archive must be a zip file")
+    except Exception:
+        await form.close()
+        raise
+
+    async def stream_results():
+        total = 0
+        succeeded = 0
+        try:
+            async for result in gps_service.process_batch(_iter_batch_sources(photos, archive_file)):
+                total += 1
+                succeeded += 1 if result['success'] else 0
+                yield json.dumps(result) + "\n"
+
+            yield json.dumps({"summary": True, "total": total, "succeeded": succeeded, "failed": total - succeeded}) + "\n"
+        except Exception as e:
+            import logging
+            logging.error(f"Batch GPS extraction error: {str(e)}")
+            yield json.dumps({"summary": True, "error": f"Error extracting GPS: {str(e)}", "total": total, "succeeded": succeeded}) + "\n"
+        finally:
+            await form.close()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 # Add this endpoint to calculate solar energy potential
 @router.post("/calculate-solar-energy")
 async def calculate_solar_energy(
@@ -200,9 +302,12 @@ async def create_solar_panel_application(
     ownership_document: Optional[UploadFile] = File(None),
     energy_certification: Optional[UploadFile] = File(None),
     geotag_photo: Optional[UploadFile] = File(None),
+    ownership_document_key: Optional[str] = Form(None),
+    energy_certification_key: Optional[str] = Form(None),
+    geotag_photo_key: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
-    """Create a new solar panel application with document uploads"""
+    """Create a new solar panel application with document uploads (or keys from /storage/presign)"""
     try:
         # Create application data
         application_data = SolarPanelApplicationCreate(
@@ -219,32 +324,42 @@ async def create_solar_panel_application(
         user_id = 1
         
         # Create application
-        application = service.create_application(
+        application = await service.create_application(
             user_id=user_id,
             application_data=application_data,
             ownership_document=ownership_document,
             energy_certification=energy_certification,
-            geotag_photo=geotag_photo
+            geotag_photo=geotag_photo,
+            ownership_document_key=ownership_document_key,
+            energy_certification_key=energy_certification_key,
+            geotag_photo_key=geotag_photo_key
         )
         
         return application
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating application: {str(e)}")
 
 # Get all applications
 @router.get("/applications", response_model=List[SolarPanelApplicationResponse])
 async def get_all_applications(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Get all solar panel applications with pagination"""
+    """Get all solar panel applications with pagination (next cursor in X-Next-Cursor)"""
     try:
         service = SolarPanelService(db)
-        applications = service.get_all_applications(skip, limit)
-        return applications
+        applications = service.get_all_applications(skip, limit, cursor=cursor)
+        set_next_cursor_header(response, applications)
+        return applications.items
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving applications: {str(e)}")
 
@@ -252,7 +367,7 @@ async def get_all_applications(
 @router.get("/applications/{application_id}", response_model=SolarPanelApplicationResponse)
 async def get_application(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific solar panel application"""
     try:
@@ -297,16 +412,21 @@ async def save_solar_analysis(
 # Get all analysis results
 @router.get("/analysis", response_model=List[SolarAnalysisResponse])
 async def get_all_analysis(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Get all analysis results with pagination"""
+    """Get all analysis results with pagination (next cursor in X-Next-Cursor)"""
     try:
         service = SolarPanelService(db)
-        analysis_list = service.get_all_analysis(skip, limit)
-        return analysis_list
+        analysis_list = service.get_all_analysis(skip, limit, cursor=cursor)
+        set_next_cursor_header(response, analysis_list)
+        return analysis_list.items
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving analysis results: {str(e)}")
 
@@ -314,7 +434,7 @@ async def get_all_analysis(
 @router.get("/analysis/{application_id}", response_model=SolarAnalysisResponse)
 async def get_analysis(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get analysis results for a specific application"""
     try:
@@ -366,16 +486,19 @@ async def create_carbon_token(
 async def get_all_tokens(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """Get all carbon tokens with pagination"""
     try:
         service = SolarPanelService(db)
-        tokens = service.get_all_tokens(skip, limit)
+        tokens = service.get_all_tokens(skip, limit, cursor=cursor)
         total = service.get_token_count()
         
-        return CarbonTokenList(tokens=tokens, total=total)
+        return CarbonTokenList(tokens=tokens.items, total=total, next_cursor=tokens.next_cursor)
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving tokens: {str(e)}")
 
@@ -383,7 +506,7 @@ async def get_all_tokens(
 @router.get("/tokens/id/{token_id}", response_model=CarbonTokenResponse)
 async def get_token_by_id(
     token_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get carbon token by its ID"""
     try:
@@ -404,7 +527,7 @@ async def get_token_by_id(
 @router.get("/tokens/application/{application_id}", response_model=CarbonTokenResponse)
 async def get_token_by_application(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get carbon token for a specific application"""
     try:
@@ -427,54 +550,37 @@ async def get_tokens_by_name(
     name: str,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """Get carbon tokens by name with pagination"""
     try:
         service = SolarPanelService(db)
         
-        tokens = service.get_tokens_by_name(name, skip, limit)
+        tokens = service.get_tokens_by_name(name, skip, limit, cursor=cursor)
         total = db.query(CarbonToken).filter(CarbonToken.name == name).count()
         
-        if not tokens:
+        if not tokens.items:
             raise HTTPException(status_code=404, detail="No tokens found with this name")
         
-        return CarbonTokenList(tokens=tokens, total=total)
+        return CarbonTokenList(tokens=tokens.items, total=total, next_cursor=tokens.next_cursor)
         
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving tokens: {str(e)}")
 
 # Get Token Summary Statistics
 @router.get("/tokens/summary")
 async def get_tokens_summary(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get summary statistics of carbon tokens"""
     try:
         service = SolarPanelService(db)
-        
-        # Get total count
-        total_tokens = service.get_token_count()
-        
-        # Get total credits
-        total_credits = service.get_total_credits()
-        
-        # Get source distribution
-        from sqlalchemy import func
-        source_counts = db.query(
-            CarbonToken.source,
-            func.count(CarbonToken.id)
-        ).group_by(CarbonToken.source).all()
-        
-        source_distribution = {source: count for source, count in source_counts}
-        
-        return {
-            "total_tokens": total_tokens,
-            "total_credits": total_credits,
-            "source_distribution": source_distribution
-        }
+        return service.get_token_summary()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving token summary: {str(e)}")
@@ -596,6 +702,7 @@ async def get_mint_coin_info(
     source: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """GET endpoint to retrieve minted coin information with optional filtering"""
@@ -603,11 +710,11 @@ async def get_mint_coin_info(
         service = SolarPanelService(db)
         
         # Get all tokens with optional filtering
-        tokens = service.get_all_tokens(skip, limit)
+        tokens = service.get_all_tokens(skip, limit, cursor=cursor)
         
         # Apply filters if provided
         filtered_tokens = []
-        for token in tokens:
+        for token in tokens.items:
             # Filter by name if provided
             if name and name.lower() not in token.name.lower():
                 continue
@@ -630,6 +737,7 @@ async def get_mint_coin_info(
             "success": True,
             "minted_coins": filtered_tokens,
             "total": len(filtered_tokens),
+            "next_cursor": tokens.next_cursor,
             "filters_applied": {
                 "name": name,
                 "source": source,
@@ -639,6 +747,8 @@ async def get_mint_coin_info(
             "message": f"Retrieved {len(filtered_tokens)} minted coins"
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving minted coins: {str(e)}")
 
@@ -647,32 +757,27 @@ async def get_mint_coin_info(
 async def get_minted_coins(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
     """Get all minted carbon coins"""
     try:
         service = SolarPanelService(db)
-        tokens = service.get_all_tokens(skip, limit)
+        # Column-only page encoded straight to JSON; no ORM objects are built
+        tokens = service.get_token_rows(skip, limit, cursor=cursor, fields=fields)
+        minted_coins = tokens.items
         
-        # Format response
-        minted_coins = []
-        for token in tokens:
-            minted_coins.append({
-                "id": token.id,
-                "name": token.name,
-                "credits": token.credits,
-                "source": token.source,
-                "tokenized_date": token.tokenized_date.isoformat(),
-                "application_id": token.application_id
-            })
-        
-        return {
+        return FastJSONResponse({
             "success": True,
             "minted_coins": minted_coins,
             "total": len(minted_coins),
+            "next_cursor": tokens.next_cursor,
             "message": f"Retrieved {len(minted_coins)} minted coins"
-        }
+        })
         
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving minted coins: {str(e)}")
 
@@ -680,7 +785,7 @@ async def get_minted_coins(
 @router.get("/minted-coins/{coin_id}")
 async def get_minted_coin(
     coin_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific minted carbon coin by ID"""
     try:
@@ -0,0 +1,236 @@
+# app/api/v1/storage.py
+import asyncio
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_admin_token
+from app.database import get_db
+from app.models.upload_blob import UploadBlob
+from app.schemas.upload import (
+    PresignUploadRequest,
+    PresignUploadResponse,
+    ResumableUploadCreate,
+    ResumableUploadStatus,
+    ResumableUploadResult
+)
+from app.services.blob_store import BlobStore, STAGING_DIR, object_key, sha256_for_key
+from app.services.derivatives import DERIVATIVES, IMMUTABLE_CACHE_CONTROL, derivative_key, get_derivative_generator
+from app.services.resumable_upload import (
+    ResumableUploadStore,
+    UploadBusyError,
+    UploadNotFoundError,
+    UploadOffsetError
+)
+from app.services.storage import LocalStorage, get_storage, verify_local_upload
+from app.services.upload_gc import SweepInProgressError, UPLOAD_GC_MAX_FILES, get_upload_sweeper
+from app.services.upload_writer import stage_chunks, discard, MAX_UPLOAD_SIZE, UploadTooLargeError
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+@router.post("/presign", response_model=PresignUploadResponse)
+async def presign_upload(
+    request: PresignUploadRequest,
+    db: Session = Depends(get_db)
+):
+    """Get a direct-upload URL for a file; pass the returned key as `*_key` when creating an application"""
+    try:
+        if request.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=400, detail=f"File size too large. Maximum {MAX_UPLOAD_SIZE // (1024 * 1024)}MB allowed.")
+        
+        return BlobStore(db).presign(request.sha256, request.size, request.content_type)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating upload URL: {str(e)}")
+
+@router.put("/upload")
+async def upload_object(
+    request: Request,
+    key: str,
+    size: int,
+    sha256: str,
+    expires: int,
+    signature: str
+):
+    """Receive a presigned upload when using local storage (S3 uploads go straight to the bucket)"""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Direct uploads go to object storage")
+    if not verify_local_upload(key, size, sha256, expires, signature) or sha256_for_key(key) != sha256:
+        raise HTTPException(status_code=403, detail="Invalid or expired upload signature")
+    
+    try:
+        # Stream the body to staging while hashing; nothing is held in memory
+        staged = await stage_chunks(request.stream(), STAGING_DIR, max_size=min(size, MAX_UPLOAD_SIZE))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    if staged.size != size or staged.sha256 != sha256:
+        discard(staged.path)
+        raise HTTPException(status_code=400, detail="Upload does not match the declared size and checksum")
+    
+    try:
+        storage.put_file(staged, key)
+    except Exception as e:
+        discard(staged.path)
+        raise HTTPException(status_code=500, detail=f"Error storing upload: {str(e)}")
+    
+    return {"key": key, "size": staged.size}
+
+def _resumable_status(upload) -> ResumableUploadStatus:
+    return ResumableUploadStatus(
+        upload_id=upload.upload_id,
+        offset=upload.offset,
+        size=upload.size,
+        expires_at=upload.expires_at
+    )
+
+def _resumable_error(e: ValueError) -> HTTPException:
+    if isinstance(e, UploadNotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, UploadOffsetError):
+        # Tell the client where to resume from
+        return HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    if isinstance(e, UploadBusyError):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, UploadTooLargeError):
+        return HTTPException(status_code=413, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+@router.post("/uploads", response_model=ResumableUploadStatus, status_code=201)
+async def create_resumable_upload(request: ResumableUploadCreate):
+    """Start a resumable upload; send the file with PATCH requests, then complete it"""
+    try:
+        upload = ResumableUploadStore().create(
+            filename=request.filename,
+            content_type=request.content_type,
+            size=request.size,
+            sha256=request.sha256
+        )
+        return _resumable_status(upload)
+    except ValueError as e:
+        raise _resumable_error(e)
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(upload_id: str):
+    """Current offset of a resumable upload (where the next PATCH must start)"""
+    try:
+        return _resumable_status(ResumableUploadStore().get(upload_id))
+    except ValueError as e:
+        raise _resumable_error(e)
+
+@router.head("/uploads/{upload_id}")
+async def head_resumable_upload(upload_id: str):
+    """Current offset as tus-style Upload-Offset/Upload-Length headers"""
+    try:
+        upload = ResumableUploadStore().get(upload_id)
+    except ValueError as e:
+        raise _resumable_error(e)
+    return Response(headers={
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.size),
+        "Cache-Control": "no-store"
+    })
+
+@router.patch("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset")
+):
+    """Append the request body at Upload-Offset; partial bodies are kept"""
+    store = ResumableUploadStore()
+    try:
+        await store.append(upload_id, upload_offset, request.stream())
+        return _resumable_status(store.get(upload_id))
+    except ValueError as e:
+        raise _resumable_error(e)
+
+@router.post("/uploads/{upload_id}/complete", response_model=ResumableUploadResult)
+async def complete_resumable_upload(upload_id: str):
+    """Finish an upload; pass the returned key as `*_key` when creating an application"""
+    store = ResumableUploadStore()
+    try:
+        upload = store.get(upload_id)
+        staged = await asyncio.to_thread(store.complete, upload_id)
+    except ValueError as e:
+        raise _resumable_error(e)
+    
+    key = object_key(staged.sha256)
+    try:
+        await asyncio.to_thread(get_storage().put_file, staged, key, upload.content_type)
+    except Exception as e:
+        discard(staged.path)
+        raise HTTPException(status_code=500, detail=f"Error storing upload: {str(e)}")
+    
+    return ResumableUploadResult(key=key, size=staged.size, sha256=staged.sha256)
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_resumable_upload(upload_id: str):
+    """Abandon a resumable upload and free its staged data"""
+    store = ResumableUploadStore()
+    try:
+        store.get(upload_id)
+    except ValueError as e:
+        raise _resumable_error(e)
+    store.delete(upload_id)
+    return Response(status_code=204)
+
+@router.get("/objects/{sha256}/{variant}")
+async def get_derivative(
+    sha256: str,
+    variant: str,
+    db: Session = Depends(get_db)
+):
+    """Serve a thumbnail, normalized JPEG or OCR variant of a stored photo"""
+    if variant not in DERIVATIVES:
+        raise HTTPException(status_code=404, detail=f"Unknown variant. Available: {', '.join(DERIVATIVES)}")
+    blob = db.get(UploadBlob, sha256)
+    if blob is None or blob.ref_count <= 0:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    storage = get_storage()
+    key = derivative_key(object_key(sha256), variant)
+    
+    if not await asyncio.to_thread(storage.exists, key):
+        # Not rendered yet (or uploaded before derivatives existed): join or start the job
+        try:
+            await asyncio.wrap_future(get_derivative_generator().schedule(object_key(sha256)))
+        except Exception:
+            raise HTTPException(status_code=415, detail="File is not a supported image")
+    
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    download_url = storage.presign_download(key)
+    if download_url:
+        # The object carries its own Cache-Control; the redirect must not outlive the signature
+        return RedirectResponse(download_url, status_code=307, headers={"Cache-Control": "private, max-age=300"})
+    return FileResponse(storage.path_for(key), media_type=DERIVATIVES[variant].content_type, headers=headers)
+
+@router.get("/gc")
+async def get_upload_gc_stats():
+    """Orphaned-upload sweeper status and cumulative reclaimed bytes"""
+    return get_upload_sweeper().snapshot()
+
+@router.post("/gc/run", dependencies=[Depends(require_admin_token)])
+async def run_upload_gc(
+    dry_run: bool = False,
+    max_files: int = Query(UPLOAD_GC_MAX_FILES, ge=1, le=1000000)
+):
+    """Sweep the next `max_files` stored files for orphans; needs X-Admin-Token (ADMIN_API_TOKEN)"""
+    sweeper = get_upload_sweeper()
+    try:
+        report = await asyncio.to_thread(sweeper.sweep, max_files=max_files, dry_run=dry_run)
+        return {
+            "dry_run": dry_run,
+            "mode": sweeper.mode,
+            "cursor": sweeper.cursor,
+            "report": asdict(report)
+        }
+    except SweepInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error sweeping uploads: {str(e)}")
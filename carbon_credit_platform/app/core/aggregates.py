@@ -0,0 +1,59 @@
+# app/core/aggregates.py
+"""
+Conditional aggregates for stats endpoints.
+
+A dashboard widget usually needs several counts/sums over the same rows
+(total, pending, approved, ...). Instead of one query per number, each is
+written as a CASE inside the aggregate and all of them are computed in a
+single pass:
+
+    aggregate(db, ForestationApplication.user_id == user_id,
+              total=count_where(),
+              pending=count_where(ForestationApplication.status == "pending"))
+"""
+from typing import Any, Dict
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+
+def count_where(*conditions):
+    """Number of rows matching all conditions (all rows when none are given)"""
+    if not conditions:
+        return func.count()
+    return func.count(case((and_(*conditions), 1)))
+
+
+def sum_where(column, *conditions):
+    """Sum of a column over rows matching all conditions; 0 rather than NULL when nothing matches"""
+    if conditions:
+        column = case((and_(*conditions), column))
+    return func.coalesce(func.sum(column), 0)
+
+
+def aggregate_statement(*criteria, **measures) -> Select:
+    statement = select(*[expression.label(name) for name, expression in measures.items()])
+    if criteria:
+        statement = statement.where(*criteria)
+    return statement
+
+
+def aggregate(db: Session, *criteria, **measures) -> Dict[str, Any]:
+    """Compute every measure over the rows matching the criteria in one statement"""
+    return dict(db.execute(aggregate_statement(*criteria, **measures)).one()._mapping)
+
+
+async def aggregate_async(db: AsyncSession, *criteria, **measures) -> Dict[str, Any]:
+    return dict((await db.execute(aggregate_statement(*criteria, **measures))).one()._mapping)
+
+
+def aggregate_by(db: Session, group_column, *criteria, **measures) -> Dict[Any, Dict[str, Any]]:
+    """Measures per distinct value of group_column, in one GROUP BY statement"""
+    statement = aggregate_statement(*criteria, **measures).add_columns(group_column.label("_group"))
+    rows = db.execute(statement.group_by(group_column)).all()
+    return {
+        row._mapping["_group"]: {name: row._mapping[name] for name in measures}
+        for row in rows
+    }
@@ -0,0 +1,107 @@
+# app/core/pagination.py
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Lists are ordered newest first on (timestamp, id). A cursor encodes the sort
+key of the last row returned; the next page is the rows strictly after it,
+which the database finds by seeking the index instead of reading and
+discarding OFFSET rows. Offset paging (`skip`) still works for old clients.
+Rows without a sort key (NULL timestamps) come after all the others, by id.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import Response
+from sqlalchemy import String, literal, tuple_, type_coerce
+from sqlalchemy.orm import Query
+
+# Response header carrying the next cursor for endpoints that return a bare list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """The cursor is malformed or was issued for a different list"""
+
+
+@dataclass
+class Page:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+def encode_cursor(sort_key, row_id: int) -> str:
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    payload = json.dumps([sort_key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(sort key, id) from a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError("Invalid pagination cursor")
+    if not isinstance(row_id, int) or (sort_key is not None and not isinstance(sort_key, str)):
+        raise InvalidCursorError("Invalid pagination cursor")
+    return sort_key, row_id
+
+
+def paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    rows: bool = False
+) -> Page:
+    """Newest-first page of an ORM query keyed on (sort_column, id_column); a cursor takes precedence over skip.
+    With rows=True the items are tuples of the query's columns (column-only queries) instead of its first entity"""
+    # The key is read and compared as stored: SQLite keeps timestamps as text whose
+    # format can differ from how SQLAlchemy would render the same datetime
+    sort_key = type_coerce(sort_column, String)
+
+    # NULL keys never compare less than a cursor and sort differently per database, so
+    # rows without one are read separately, after the keyed rows run out
+    keyed = query.filter(sort_column.isnot(None))
+    unkeyed = query.filter(sort_column.is_(None))
+    offset = skip if skip and not cursor else 0
+    if cursor:
+        after_key, after_id = decode_cursor(cursor)
+        if after_key is None:
+            keyed = None
+            unkeyed = unkeyed.filter(id_column < after_id)
+        else:
+            keyed = keyed.filter(tuple_(sort_column, id_column) < tuple_(literal(after_key, String), after_id))
+
+    # One extra row tells whether there is a next page
+    results = []
+    if keyed is not None:
+        results = (
+            keyed.add_columns(sort_key, id_column).order_by(sort_column.desc(), id_column.desc())
+            .offset(offset or None).limit(limit + 1).all()
+        )
+        # An offset past the keyed rows continues into the unkeyed ones
+        offset = max(offset - keyed.count(), 0) if offset and not results else 0
+    if len(results) <= limit:
+        results += (
+            unkeyed.add_columns(sort_key, id_column).order_by(id_column.desc())
+            .offset(offset or None).limit(limit + 1 - len(results)).all()
+        )
+
+    page = Page(items=[result[:-2] if rows else result[0] for result in results[:limit]])
+    if len(results) > limit:
+        last_key, last_id = results[limit - 1][-2:]
+        page.next_cursor = encode_cursor(last_key, last_id)
+    return page
+
+
+def set_next_cursor_header(response: Response, page: Page):
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
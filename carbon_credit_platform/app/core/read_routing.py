@@ -0,0 +1,84 @@
+# app/core/read_routing.py
+"""
+Read-your-writes for replica reads.
+
+Read-only endpoints read from the replica (app.database.get_read_db), which
+can trail the primary. After a request writes, the same client reads from
+the primary for READ_YOUR_WRITES_SECONDS so it sees its own changes. The
+client is remembered by this process (keyed on its Authorization header, or
+address) and by a cookie, which carries the window across workers.
+"""
+import hashlib
+import math
+import os
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Dict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.database import read_routing_state
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+# Recent writers remembered in memory; expired entries are dropped past this size
+MAX_TRACKED_CLIENTS = 10000
+
+
+class ReadYourWritesMiddleware:
+    """Routes a client's reads to the primary for a short window after it writes"""
+
+    def __init__(self, app, window: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+        self._recent_writers: Dict[str, float] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = _client_key(scope, headers)
+        sticky_until = max(self._recent_writers.get(client, 0.0), _cookie_deadline(headers))
+        state = {"prefer_primary": time.time() < sticky_until, "wrote": False}
+        token = read_routing_state.set(state)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state["wrote"]:
+                until = time.time() + self.window
+                self._remember(client, until)
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            read_routing_state.reset(token)
+
+    def _remember(self, client: str, until: float):
+        if len(self._recent_writers) >= MAX_TRACKED_CLIENTS:
+            now = time.time()
+            self._recent_writers = {key: value for key, value in self._recent_writers.items() if value > now}
+        self._recent_writers[client] = until
+
+
+def _client_key(scope, headers: Headers) -> str:
+    authorization = headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    client = scope.get("client")
+    return f"addr:{client[0]}" if client else "addr:unknown"
+
+
+def _cookie_deadline(headers: Headers) -> float:
+    cookie = SimpleCookie()
+    try:
+        cookie.load(headers.get("cookie", ""))
+        return float(cookie[READ_YOUR_WRITES_COOKIE].value)
+    except (KeyError, ValueError, CookieError):
+        return 0.0
@@ -0,0 +1,180 @@
+# app/core/request_metrics.py
+"""
+Per-route latency and database time, for load tests and capacity planning.
+
+With REQUEST_METRICS=1 every HTTP request is timed and the statements it runs
+are attributed to its route template (e.g. GET /api/v1/credit-retirement/
+dashboard-stats/{user_id}): how many, how long they took, how long they
+waited for write locks and how many failed on a lock. The totals are
+cumulative; GET /health/requests reports them and scripts/load_test.py
+subtracts a snapshot taken before the run from one taken after.
+
+Lock waits are the time spent in the statement that takes a transaction's
+first write lock. On SQLite that statement waits out busy_timeout while
+another connection holds the database write lock, so it is almost all lock
+wait; on PostgreSQL it also includes the statement's own work.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "").lower() in ("1", "true")
+
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# SQLSTATEs for deadlock_detected and lock_not_available (lock_timeout, NOWAIT)
+LOCK_SQLSTATES = {"40P01", "55P03"}
+
+
+@dataclass
+class DatabaseUsage:
+    statements: int = 0
+    seconds: float = 0.0
+    lock_wait_seconds: float = 0.0
+    lock_errors: int = 0
+
+
+# Database work of the request being handled, set by RequestMetricsMiddleware
+request_database_usage: ContextVar[Optional[DatabaseUsage]] = ContextVar("request_database_usage", default=None)
+
+
+def _is_lock_error(error) -> bool:
+    code = getattr(error, "pgcode", None) or getattr(error, "sqlstate", None)
+    if code in LOCK_SQLSTATES:
+        return True
+    message = str(error).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    usage = request_database_usage.get()
+    started = conn.info.pop("statement_started", None)
+    if usage is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    usage.statements += 1
+    usage.seconds += elapsed
+    if not conn.info.get("holds_write_lock") and statement.lstrip()[:7].upper().startswith(WRITE_VERBS):
+        conn.info["holds_write_lock"] = True
+        usage.lock_wait_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    started = conn.info.pop("statement_started", None) if conn is not None else None
+    usage = request_database_usage.get()
+    if usage is None:
+        return
+    locked = _is_lock_error(exception_context.original_exception)
+    usage.lock_errors += locked
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        usage.statements += 1
+        usage.seconds += elapsed
+        if locked:
+            # Gave up waiting for the lock
+            usage.lock_wait_seconds += elapsed
+
+
+def _end_transaction(conn):
+    conn.info.pop("holds_write_lock", None)
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info.pop("holds_write_lock", None)
+
+
+_statement_metrics_enabled = False
+
+
+def enable_statement_metrics():
+    """Time statements on every engine (sync, async and replica); idempotent"""
+    global _statement_metrics_enabled
+    if _statement_metrics_enabled:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    event.listen(Engine, "commit", _end_transaction)
+    event.listen(Engine, "rollback", _end_transaction)
+    event.listen(Pool, "checkout", _checkout)
+    _statement_metrics_enabled = True
+
+
+class RequestMetrics:
+    """Running per-route totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, status_code: int, seconds: float, usage: DatabaseUsage):
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = {
+                    "requests": 0, "client_errors": 0, "server_errors": 0, "seconds": 0.0, **asdict(DatabaseUsage())
+                }
+            totals["requests"] += 1
+            totals["client_errors"] += 400 <= status_code < 500
+            totals["server_errors"] += status_code >= 500
+            totals["seconds"] += seconds
+            for key, value in asdict(usage).items():
+                totals[key] += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"enabled": _statement_metrics_enabled, "routes": {route: dict(totals) for route, totals in self._routes.items()}}
+
+
+class RequestMetricsMiddleware:
+    """Times each request and attributes its database work to the matched route"""
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics or get_request_metrics()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = DatabaseUsage()
+        token = request_database_usage.set(usage)
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_database_usage.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one entry
+            route = scope.get("route")
+            name = f"{scope['method']} {route.path}" if route is not None else "unmatched"
+            self.metrics.record(name, status["code"], time.perf_counter() - started, usage)
+
+
+_request_metrics: Optional[RequestMetrics] = None
+
+
+def get_request_metrics() -> RequestMetrics:
+    global _request_metrics
+    if _request_metrics is None:
+        _request_metrics = RequestMetrics()
+    return _request_metrics
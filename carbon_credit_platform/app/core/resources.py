@@ -0,0 +1,176 @@
+# app/core/resources.py
+"""
+Process-wide clients, pools and background workers.
+
+Each resource is registered once with how to start it, stop it and report on
+it. The FastAPI lifespan starts them all before the first request, so no
+request pays for constructing one, and stops them in reverse order on
+shutdown; /health/resources reports their state and utilization. Services
+and route dependencies reach the same instances through their get_* accessors.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest a single resource may take to drain and stop on shutdown
+RESOURCE_SHUTDOWN_TIMEOUT = float(os.getenv("RESOURCE_SHUTDOWN_TIMEOUT", "30"))
+
+Hook = Callable[[Any], Any]
+
+
+@dataclass
+class Resource:
+    name: str
+    get: Callable[[], Any]
+    start: Optional[Hook] = None
+    stop: Optional[Hook] = None
+    stats: Optional[Hook] = None
+    instance: Any = None
+    state: str = "registered"
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+
+
+async def _call(hook: Hook, instance):
+    """Await async hooks; run blocking ones (pool drains, thread joins) off the event loop"""
+    if inspect.iscoroutinefunction(hook):
+        return await hook(instance)
+    return await asyncio.to_thread(hook, instance)
+
+
+class ResourceRegistry:
+    """Starts registered resources in order and stops them in reverse"""
+
+    def __init__(self, shutdown_timeout: float = RESOURCE_SHUTDOWN_TIMEOUT):
+        self.shutdown_timeout = shutdown_timeout
+        self._resources: Dict[str, Resource] = {}
+
+    def register(self, name: str, get: Callable[[], Any], start: Optional[Hook] = None,
+                 stop: Optional[Hook] = None, stats: Optional[Hook] = None):
+        """Register a resource; `get` returns its instance, or None when it isn't configured"""
+        if name in self._resources:
+            raise ValueError(f"Resource {name} is already registered")
+        self._resources[name] = Resource(name=name, get=get, start=start, stop=stop, stats=stats)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._resources)
+
+    async def startup(self):
+        """Start every resource; one that fails is reported, not fatal"""
+        for resource in self._resources.values():
+            try:
+                resource.instance = resource.get()
+                if resource.instance is None:
+                    resource.state = "disabled"
+                    continue
+                # A start hook returning False means the resource is switched off by its settings
+                if resource.start is not None and await _call(resource.start, resource.instance) is False:
+                    resource.state = "disabled"
+                    continue
+                resource.state = "running"
+                resource.error = None
+                resource.started_at = time.time()
+            except Exception as e:
+                resource.state = "failed"
+                resource.error = str(e)
+                logger.error(f"Could not start resource {resource.name}: {str(e)}")
+
+    async def shutdown(self):
+        """Stop running resources in reverse order, each within shutdown_timeout"""
+        for resource in reversed(list(self._resources.values())):
+            if resource.state != "running":
+                continue
+            try:
+                if resource.stop is not None:
+                    await asyncio.wait_for(_call(resource.stop, resource.instance), timeout=self.shutdown_timeout)
+                resource.state = "stopped"
+            except asyncio.TimeoutError:
+                resource.state = "failed"
+                resource.error = f"Did not stop within {self.shutdown_timeout}s"
+                logger.warning(f"Resource {resource.name} did not stop within {self.shutdown_timeout}s")
+            except Exception as e:
+                resource.state = "failed"
+                resource.error = str(e)
+                logger.error(f"Error stopping resource {resource.name}: {str(e)}")
+
+    def snapshot(self) -> Dict:
+        resources = {}
+        for resource in self._resources.values():
+            status = {"state": resource.state, "started_at": resource.started_at}
+            if resource.error:
+                status["error"] = resource.error
+            if resource.instance is not None and resource.stats is not None:
+                try:
+                    status["stats"] = resource.stats(resource.instance)
+                except Exception as e:
+                    status["stats_error"] = str(e)
+            resources[resource.name] = status
+
+        healthy = all(status["state"] in ("running", "disabled") for status in resources.values())
+        return {"status": "healthy" if healthy else "degraded", "resources": resources}
+
+
+def build_resource_registry() -> ResourceRegistry:
+    """The application's resources; databases first, so they stop after everything that uses them"""
+    from sqlalchemy.engine import Engine
+
+    from app import database
+    from app.database import ReplicaLagMonitor
+    from app.services.carbon_calculator import CarbonCalculator, get_carbon_calculator
+    from app.services.derivatives import DerivativeGenerator, get_derivative_generator
+    from app.services.document_index import DocumentIndexer, get_document_indexer
+    from app.services.http_client import HttpClient, get_http_client
+    from app.services.upload_gc import UploadSweeper, get_upload_sweeper
+    from app.services.vision_client import VisionClient, get_vision_client
+
+    async def stop_async_database(engine):
+        await database.dispose_async_engine()
+
+    registry = ResourceRegistry()
+    registry.register("database", lambda: database.engine, stop=Engine.dispose, stats=database.pool_status)
+    registry.register(
+        "async_database", database.get_async_engine,
+        stop=stop_async_database, stats=lambda engine: database.async_pool_status()
+    )
+    # Read replica lag checks (DATABASE_REPLICA_URL, off by default)
+    registry.register(
+        "read_replica", database.get_replica_monitor,
+        start=ReplicaLagMonitor.start, stop=ReplicaLagMonitor.stop, stats=lambda monitor: database.replica_status()
+    )
+    registry.register("http", get_http_client, start=HttpClient.open, stop=HttpClient.close, stats=HttpClient.snapshot)
+    registry.register("vision", get_vision_client, start=VisionClient.open, stop=VisionClient.close, stats=VisionClient.snapshot)
+    registry.register(
+        "carbon_calculator", get_carbon_calculator,
+        start=lambda calculator: calculator.client, stop=CarbonCalculator.close, stats=CarbonCalculator.snapshot
+    )
+    registry.register(
+        "document_index", get_document_indexer,
+        start=DocumentIndexer.start, stop=DocumentIndexer.shutdown, stats=DocumentIndexer.snapshot
+    )
+    registry.register(
+        "derivatives", get_derivative_generator,
+        start=DerivativeGenerator.start, stop=DerivativeGenerator.shutdown, stats=DerivativeGenerator.snapshot
+    )
+    # Background sweep of orphaned uploads (UPLOAD_GC_INTERVAL, off by default)
+    registry.register(
+        "upload_gc", get_upload_sweeper,
+        start=UploadSweeper.start, stop=UploadSweeper.stop, stats=UploadSweeper.snapshot
+    )
+    return registry
+
+
+_registry: Optional[ResourceRegistry] = None
+
+
+def get_resource_registry() -> ResourceRegistry:
+    global _registry
+    if _registry is None:
+        _registry = build_resource_registry()
+    return _registry
@@ -0,0 +1,112 @@
+# app/core/serialization.py
+"""
+Fast path for large list responses.
+
+A Projection names the fields of a listed row and the column each one comes
+from. List endpoints select only those columns (all of them, or the subset
+asked for with ?fields=), build plain dicts from the row tuples and encode
+them with orjson, skipping ORM hydration and response-model validation. The
+JSON is the same as the response model would produce for the same rows.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import null, select
+from sqlalchemy.sql import Select
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+# Query parameter description shared by list endpoints that accept ?fields=
+FIELDS_DESCRIPTION = "Comma-separated fields to return (default: all)"
+
+
+class InvalidFieldsError(ValueError):
+    """?fields= names a field the list doesn't have"""
+
+
+@dataclass(frozen=True)
+class Field:
+    column: Any
+    convert: Optional[Callable[[Any], Any]] = None  # applied to non-null values
+
+
+class Projection:
+    """Listed fields of a row and the columns they are read from"""
+
+    def __init__(self, fields: Dict[str, Any]):
+        # A bare column is a field read as-is; None is a field that is always null
+        self.fields: Dict[str, Field] = {
+            name: spec if isinstance(spec, Field) else Field(null() if spec is None else spec)
+            for name, spec in fields.items()
+        }
+
+    @classmethod
+    def for_schema(cls, schema, model, **overrides) -> "Projection":
+        """Every field of a response schema, read from the model column of the same name"""
+        return cls({name: overrides.get(name, getattr(model, name)) for name in schema.model_fields})
+
+    def plan(self, fields: Optional[str] = None) -> "ProjectionPlan":
+        """Plan for a comma-separated ?fields= value (None or empty: every field)"""
+        if not fields:
+            return ProjectionPlan(self, list(self.fields))
+
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if not names:
+            raise InvalidFieldsError(f"No fields given. Available: {', '.join(self.fields)}")
+        if unknown:
+            raise InvalidFieldsError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}")
+        return ProjectionPlan(self, names)
+
+
+class ProjectionPlan:
+    """The columns to select for a set of fields, and how to turn the rows back into dicts"""
+
+    def __init__(self, projection: Projection, names: List[str]):
+        self.names = names
+        self.columns = []
+        self._readers = []
+        for name in names:
+            field = projection.fields[name]
+            # Fields read from the same column share one selected value
+            index = next((i for i, column in enumerate(self.columns) if column is field.column), None)
+            if index is None:
+                index = len(self.columns)
+                self.columns.append(field.column)
+            self._readers.append((name, index, field.convert))
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def to_dicts(self, rows: Iterable) -> List[Dict]:
+        items = []
+        readers = self._readers
+        for row in rows:
+            item = {}
+            for name, index, convert in readers:
+                value = row[index]
+                item[name] = value if convert is None or value is None else convert(value)
+            items.append(item)
+        return items
+
+
+def dumps(content) -> bytes:
+    """JSON-encode plain data; datetimes, enums and UUIDs are written as the response models write them"""
+    if orjson is not None:
+        # Pydantic writes UTC as "Z"
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for plain dicts and lists, encoded with orjson when it is installed"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,21 +1,465 @@
 # app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+import logging
 import os
+import time
+import threading
+
+logger = logging.getLogger(__name__)
 
 # Database URL - using SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./carbon_credits.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async sessions use the same database through an asyncio driver unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Optional read replica for read-only endpoints (get_read_db / get_async_read_db);
+# unset, every session uses the primary. The async URL defaults like ASYNC_DATABASE_URL
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL")
+
+# Reads stay on the primary while the replica is further behind than this, or unreachable
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int  # seconds to wait for a free connection
+    pool_recycle: int  # seconds before a connection is replaced
+    statement_timeout_ms: int  # PostgreSQL only; 0 = none
+    sqlite_busy_timeout_ms: int  # wait on a locked database instead of failing
+    sqlite_cache_size_kb: int
+    sqlite_mmap_size: int
+
+
+# DB_PROFILE=development|production; any field can be overridden with DB_<FIELD> (e.g. DB_POOL_SIZE)
+ENGINE_PROFILES = {
+    "development": EngineProfile(
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=3600,
+        statement_timeout_ms=0,
+        sqlite_busy_timeout_ms=5000,
+        sqlite_cache_size_kb=16 * 1024,
+        sqlite_mmap_size=64 * 1024 * 1024
+    ),
+    "production": EngineProfile(
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=10,
+        pool_recycle=1800,  # below typical server/proxy idle timeouts
+        statement_timeout_ms=30000,
+        sqlite_busy_timeout_ms=15000,
+        sqlite_cache_size_kb=64 * 1024,
+        sqlite_mmap_size=256 * 1024 * 1024
+    ),
+}
+
+
+def load_engine_profile(name: Optional[str] = None) -> EngineProfile:
+    """Named profile with DB_* environment overrides applied"""
+    name = name or os.getenv("DB_PROFILE", "development")
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE: {name}. Available: {', '.join(ENGINE_PROFILES)}")
+    profile = ENGINE_PROFILES[name]
+    overrides = {
+        field: int(os.environ[f"DB_{field.upper()}"])
+        for field in profile.__dataclass_fields__
+        if os.getenv(f"DB_{field.upper()}")
+    }
+    return replace(profile, **overrides)
+
+
+class PoolStats:
+    """Connection checkout wait times and timeouts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin that times how long each checkout waits for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _set_sqlite_pragmas(dbapi_connection, profile: EngineProfile, in_memory: bool):
+    cursor = dbapi_connection.cursor()
+    try:
+        if not in_memory:
+            # Readers don't block the writer (or each other); the mode is stored in the file
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; in WAL mode a crash can't corrupt the database
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={profile.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={profile.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA cache_size=-{profile.sqlite_cache_size_kb}")  # negative = KiB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _engine_options(url: str, profile: EngineProfile, poolclass, is_async: bool = False) -> Dict:
+    """create_engine keyword arguments for a URL and profile"""
+    backend = make_url(url).get_backend_name()
+    options = {"echo": os.getenv("DB_ECHO", "").lower() in ("1", "true")}
+    pooled = {
+        "poolclass": poolclass,
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout
+    }
+
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": profile.sqlite_busy_timeout_ms / 1000}
+        if _sqlite_in_memory(url):
+            # Every connection would get its own empty database otherwise
+            options["poolclass"] = StaticPool
+        else:
+            options.update(pooled)
+        return options
+
+    options.update(pooled, pool_recycle=profile.pool_recycle, pool_pre_ping=True)
+    if backend == "postgresql" and profile.statement_timeout_ms:
+        # Runaway queries are cancelled server-side instead of holding a pooled connection
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(profile.statement_timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={profile.statement_timeout_ms}"}
+    return options
+
+
+def _sqlite_in_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def _install_sqlite_pragmas(engine: Engine, url: str, profile: EngineProfile):
+    in_memory = _sqlite_in_memory(url)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, profile, in_memory)
+
+
+def create_db_engine(url: str = DATABASE_URL, profile: Optional[EngineProfile] = None) -> Engine:
+    """Engine with pool settings and per-dialect tuning from the profile"""
+    profile = profile or load_engine_profile()
+    engine = create_engine(url, **_engine_options(url, profile, InstrumentedQueuePool))
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(engine, url, profile)
+    return engine
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """The same database addressed through its asyncio driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: Optional[str] = None, profile: Optional[EngineProfile] = None) -> AsyncEngine:
+    """Async counterpart of create_db_engine (aiosqlite / asyncpg)"""
+    url = url or ASYNC_DATABASE_URL or async_database_url()
+    profile = profile or load_engine_profile()
+    async_engine = create_async_engine(url, **_engine_options(url, profile, InstrumentedAsyncQueuePool, is_async=True))
+    if async_engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(async_engine.sync_engine, url, profile)
+    return async_engine
+
+
+def pool_status(engine: Engine) -> Dict:
+    """Pool occupancy, saturation and checkout wait times"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return status
+
+    # max_overflow of -1 means unbounded, so there is no saturation point
+    capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    status.update({
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else None
+    })
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.stats.snapshot())
+    return status
+
+
+def measure_replica_lag(connection: Connection) -> float:
+    """Seconds the replica is behind its primary"""
+    if connection.dialect.name == "postgresql":
+        # Replay timestamps age on an idle primary too, so a fully replayed WAL counts as caught up
+        return float(connection.exec_driver_sql(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        ).scalar())
+    # No replication status to read (e.g. a second SQLite file in development); reachable is enough
+    connection.exec_driver_sql("SELECT 1")
+    return 0.0
+
+
+class ReplicaLagMonitor:
+    """Measures replica lag in a daemon thread so routing a read never waits on it"""
+
+    def __init__(self, replica: Engine, max_lag: float = REPLICA_MAX_LAG_SECONDS,
+                 interval: float = REPLICA_LAG_CHECK_INTERVAL):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: Optional[float] = None  # None until measured, and while the replica is unreachable
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def check(self) -> Optional[float]:
+        try:
+            with self.replica.connect() as connection:
+                lag = measure_replica_lag(connection)
+            self.error = None
+        except Exception as e:
+            lag = None
+            if self.error is None:
+                logger.warning(f"Read replica unavailable, reading from the primary: {str(e)}")
+            self.error = str(e)
+        self.lag, self.checked_at = lag, time.monotonic()
+        return lag
+
+    def usable(self) -> bool:
+        """Caught up as of a recent check"""
+        lag, checked_at = self.lag, self.checked_at
+        if lag is None or checked_at is None:
+            return False
+        # An old measurement (checks stopped or stuck) says nothing about the replica now
+        if time.monotonic() - checked_at > max(self.interval * 3, 1.0):
+            return False
+        return lag <= self.max_lag
+
+    def start(self) -> bool:
+        if self._thread is not None:
+            return False
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, name="replica-lag", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run_forever(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "usable": self.usable(),
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 3) if self.checked_at else None,
+            "error": self.error
+        }
+
+
+# Per-request routing state, set by ReadYourWritesMiddleware:
+# {"prefer_primary": the client wrote recently, "wrote": this request wrote}
+read_routing_state: ContextVar[Optional[Dict]] = ContextVar("read_routing_state", default=None)
+
+
+class RoutingSession(Session):
+    """Session that can send its reads to the read replica.
+
+    Writes always go to the primary. A session opened for a read-only
+    dependency (use_replica=True) reads from the replica until it flushes;
+    from then on it stays on the primary so it reads its own writes.
+    """
+
+    def __init__(self, *args, replica=None, use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+        self.use_replica = use_replica and replica is not None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.use_replica = False
+            state = read_routing_state.get()
+            if state is not None:
+                state["wrote"] = True
+        if self.use_replica:
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+engine = create_db_engine()
+replica_engine = create_db_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replica=replica_engine)
 
 Base = declarative_base()
 
+_replica_monitor: Optional[ReplicaLagMonitor] = None
+
+def get_replica_monitor() -> Optional[ReplicaLagMonitor]:
+    """Lag monitor for the replica (None without one); started with the app"""
+    global _replica_monitor
+    if _replica_monitor is None and replica_engine is not None:
+        _replica_monitor = ReplicaLagMonitor(replica_engine)
+    return _replica_monitor
+
+def replica_readable() -> bool:
+    """Whether a read-only session opened now should use the replica"""
+    monitor = get_replica_monitor()
+    if monitor is None or not monitor.usable():
+        return False
+    state = read_routing_state.get()
+    return not (state and state["prefer_primary"])
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Dependency for read-only endpoints: reads from the replica when it is caught up"""
+    db = SessionLocal(use_replica=replica_readable())
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Created on first use, so the async driver is only needed by code that uses it
+_async_engine: Optional[AsyncEngine] = None
+_async_replica_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_replica_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+        if replica_engine is not None:
+            _async_replica_engine = create_async_db_engine(
+                ASYNC_DATABASE_REPLICA_URL or async_database_url(DATABASE_REPLICA_URL)
+            )
+        # Attributes stay loaded after commit; expiring them would need implicit (sync) IO
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine,
+            sync_session_class=RoutingSession,
+            autoflush=False,
+            expire_on_commit=False,
+            replica=_async_replica_engine.sync_engine if _async_replica_engine is not None else None
+        )
+    return _async_engine
+
+def AsyncSessionLocal(use_replica: bool = False) -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker(use_replica=use_replica)
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """Async counterpart of get_read_db"""
+    async with AsyncSessionLocal(use_replica=replica_readable()) as db:
+        yield db
+
+def async_pool_status() -> Optional[Dict]:
+    return pool_status(_async_engine.sync_engine) if _async_engine is not None else None
+
+def replica_status() -> Optional[Dict]:
+    """Replica lag and pool state (None without a replica)"""
+    monitor = get_replica_monitor()
+    if monitor is None:
+        return None
+    status = monitor.snapshot()
+    status["pool"] = pool_status(replica_engine)
+    if _async_replica_engine is not None:
+        status["async_pool"] = pool_status(_async_replica_engine.sync_engine)
+    return status
+
+async def dispose_async_engine():
+    global _async_engine, _async_replica_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
+    if _async_replica_engine is not None:
+        await _async_replica_engine.dispose()
+        _async_replica_engine = None
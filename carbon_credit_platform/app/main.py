@@ -1,27 +1,64 @@
 # app/main.py
 
 from dotenv import load_dotenv
-import os
 
 
 # Load environment variables at startup
 load_dotenv()
 
-# Verify environment variables are loaded
-print(f"OpenAI API Key loaded: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from app.api.v1.api import api_router
-from app.database import engine, Base
+from app.database import engine, SessionLocal
+from app.core.resources import get_resource_registry
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.request_metrics import REQUEST_METRICS, RequestMetricsMiddleware, enable_statement_metrics, get_request_metrics
 from app.api.v1.solar_panel import router as solar_panel_router
 from app.api.v1.credit_retirement import router as retirement_router
+from app.services.upload_gc import get_upload_sweeper
+from app.services.rollups import ensure_rollups
+from app.services.storage import check_signing_secret
+
+def _missing_schema(error) -> bool:
+    """Whether a database error is a missing table or column"""
+    # PostgreSQL undefined_table / undefined_column; SQLite only has the message
+    if getattr(error.orig, "pgcode", None) in ("42P01", "42703"):
+        return True
+    message = str(error.orig).lower()
+    return "no such table" in message or "no such column" in message
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Presigned upload URLs must verify on every worker
+    check_signing_secret()
+
+    # Dashboard rollups are maintained on every write; build them once on a fresh database.
+    # Tables come from migrations only (`alembic upgrade head`)
+    db = SessionLocal()
+    try:
+        ensure_rollups(db)
+    except (OperationalError, ProgrammingError) as e:
+        if not _missing_schema(e):
+            raise
+        raise RuntimeError(f"Database schema is missing or out of date; run `alembic upgrade head` ({str(e)})")
+    finally:
+        db.close()
+
+    # Clients, worker pools and background workers, opened before the first request
+    resources = get_resource_registry()
+    await resources.startup()
+    yield
+    await resources.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="Carbon Credit Platform API",
     version="1.0.0",
-    description="API for Carbon Credit Platform"
+    description="API for Carbon Credit Platform",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -33,8 +70,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Clients read from the primary for a few seconds after they write (replica reads)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Per-route latency and database time for load tests (REQUEST_METRICS, off by default)
+if REQUEST_METRICS:
+    enable_statement_metrics()
+    app.add_middleware(RequestMetricsMiddleware)
 
 # Include the main API router with v1 prefix
 app.include_router(api_router, prefix="/api/v1")
@@ -54,8 +96,25 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     from datetime import datetime
+    from app.database import pool_status, async_pool_status, replica_status
+    from app.services.image_ingest import decode_stats
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "service": "carbon_credit_platform"
-    }
\ No newline at end of file
+        "service": "carbon_credit_platform",
+        "database": pool_status(engine),
+        "async_database": async_pool_status(),
+        "read_replica": replica_status(),
+        "image_decoding": decode_stats(),
+        "upload_gc": get_upload_sweeper().snapshot()
+    }
+
+@app.get("/health/resources")
+async def resource_health():
+    """State and utilization of shared clients, pools and background workers"""
+    return get_resource_registry().snapshot()
+
+@app.get("/health/requests")
+async def request_health():
+    """Cumulative per-route request counts, latency and database time (REQUEST_METRICS=1)"""
+    return get_request_metrics().snapshot()
\ No newline at end of file
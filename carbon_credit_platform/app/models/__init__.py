@@ -5,5 +5,8 @@ from .bounty import Bounty
 from .solar_panel import SolarPanelApplication
 from .forestation import ForestationApplication
 from .marketplace import MarketplaceCredit
+from .upload_blob import UploadBlob
+from .document_text import DocumentText
+from .rollup import MarketplaceRollup, IssuerRollup, UserRollup
 
-__all__ = ["User", "CarbonCredit", "Project", "Bounty", "SolarPanelApplication", "ForestationApplication", "MarketplaceCredit"]
+__all__ = ["User", "CarbonCredit", "Project", "Bounty", "SolarPanelApplication", "ForestationApplication", "MarketplaceCredit", "UploadBlob", "DocumentText", "MarketplaceRollup", "IssuerRollup", "UserRollup"]
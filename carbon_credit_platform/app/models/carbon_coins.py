@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -36,3 +36,11 @@ class CarbonCoinIssue(Base):
     
     # Relationships
     user = relationship("User", back_populates="carbon_coin_issues")
+    
+    __table_args__ = (
+        # A user's coins (optionally by source) newest first and per-source sums; admin listing by source
+        # and by cursor, ordered by (issue_date, issue_id)
+        Index("ix_carbon_coin_issues_user_source_date", "user_id", "source", "issue_date"),
+        Index("ix_carbon_coin_issues_source_date", "source", "issue_date"),
+        Index("ix_carbon_coin_issues_date_id", "issue_date", "issue_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -52,5 +52,10 @@ class CreditRetirement(Base):
     
     # Relationships
     user = relationship("User", back_populates="credit_retirements")
+    
+    __table_args__ = (
+        # Retirement history/summary per user and status, newest first
+        Index("ix_credit_retirements_user_status_date", "user_id", "retirement_status", "retirement_date"),
+    )
 
 # CreditTransaction is defined in credit_transaction.py to avoid duplication
\ No newline at end of file
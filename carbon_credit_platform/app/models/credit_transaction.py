@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -42,4 +42,8 @@ class CreditTransaction(Base):
     # Relationships
     user = relationship("User")
     marketplace_credit = relationship("MarketplaceCredit", backref="transactions")
-    retirement = relationship("CreditRetirement", backref="transactions")
\ No newline at end of file
+    retirement = relationship("CreditRetirement", backref="transactions")
+    
+    __table_args__ = (
+        Index("ix_credit_transactions_user_created", "user_id", "created_at"),
+    )
\ No newline at end of file
@@ -0,0 +1,40 @@
+# app/models/document_text.py
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class DocumentText(Base):
+    __tablename__ = "document_texts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Owning application and which of its documents this is
+    application_type = Column(String(20), nullable=False)  # forestation, solar_panel
+    application_id = Column(Integer, nullable=False)
+    document_type = Column(String(40), nullable=False)  # ownership_document, energy_certification
+    
+    # Content address of the file the text came from
+    sha256 = Column(String(64), nullable=True, index=True)
+    
+    # Extraction state
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, done, failed, unsupported
+    error = Column(Text, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    
+    # Extracted content; search_text is lowercased with collapsed whitespace
+    text = Column(Text, nullable=True)
+    search_text = Column(Text, nullable=True)
+    
+    # Key fields parsed from the text
+    owner_name = Column(String(200), nullable=True, index=True)
+    survey_number = Column(String(100), nullable=True, index=True)
+    
+    # Timestamps
+    extracted_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("application_type", "application_id", "document_type", name="uq_document_texts_document"),
+        Index("ix_document_texts_application", "application_type", "application_id"),
+    )
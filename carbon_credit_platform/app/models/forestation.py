@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -34,3 +34,10 @@ class ForestationApplication(Base):
     
     # Relationships
     user = relationship("User", back_populates="forestation_applications")
+    
+    __table_args__ = (
+        # User listing and per-status counts; admin listing by status; unfiltered newest-first listing
+        Index("ix_forestation_applications_user_status_created", "user_id", "status", "created_at"),
+        Index("ix_forestation_applications_status_created", "status", "created_at"),
+        Index("ix_forestation_applications_created", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -44,3 +44,10 @@ class MarketplaceCredit(Base):
     
     # Relationships
     issuer = relationship("User", back_populates="marketplace_credits")
+    
+    __table_args__ = (
+        # Marketplace listings (verified, optionally by source) newest first; issuer stats
+        Index("ix_marketplace_credits_status_source_created", "verification_status", "source_type", "created_at"),
+        Index("ix_marketplace_credits_issuer_status", "issuer_id", "verification_status"),
+        Index("ix_marketplace_credits_created", "created_at"),
+    )
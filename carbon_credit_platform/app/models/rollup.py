@@ -0,0 +1,68 @@
+# app/models/rollup.py
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Running totals kept in step with the raw tables by app/services/rollups.py,
+# so dashboards read one row instead of aggregating every credit/coin/retirement.
+
+
+class MarketplaceRollup(Base):
+    """Marketplace-wide credit totals (a single row, id=1)"""
+    __tablename__ = "marketplace_rollups"
+
+    id = Column(Integer, primary_key=True)
+
+    # Marketplace credits; coin sums and per-source counts cover verified credits only
+    credits_total = Column(Integer, nullable=False, default=0)
+    credits_verified = Column(Integer, nullable=False, default=0)
+    coins_verified = Column(Float, nullable=False, default=0.0)
+    forestation_credits = Column(Integer, nullable=False, default=0)
+    forestation_coins = Column(Float, nullable=False, default=0.0)
+    solar_credits = Column(Integer, nullable=False, default=0)
+    solar_coins = Column(Float, nullable=False, default=0.0)
+
+    # Issuers with at least one verified credit
+    verified_issuers = Column(Integer, nullable=False, default=0)
+
+    # Completed retirements
+    coins_retired = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class IssuerRollup(Base):
+    """Per-issuer marketplace credit totals"""
+    __tablename__ = "issuer_rollups"
+
+    issuer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    credits_total = Column(Integer, nullable=False, default=0)
+    credits_verified = Column(Integer, nullable=False, default=0)
+    coins_verified = Column(Float, nullable=False, default=0.0)
+    forestation_credits = Column(Integer, nullable=False, default=0)
+    forestation_coins = Column(Float, nullable=False, default=0.0)
+    solar_credits = Column(Integer, nullable=False, default=0)
+    solar_coins = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class UserRollup(Base):
+    """Per-user minted coin and retirement totals"""
+    __tablename__ = "user_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Carbon coin issues
+    coin_issues = Column(Integer, nullable=False, default=0)
+    coins_minted = Column(Float, nullable=False, default=0.0)
+    solar_coins_minted = Column(Float, nullable=False, default=0.0)
+    forestation_coins_minted = Column(Float, nullable=False, default=0.0)
+
+    # Credit retirements
+    coins_retired = Column(Float, nullable=False, default=0.0)
+    retirements_completed = Column(Integer, nullable=False, default=0)
+    retirements_pending = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 # app/models/solar_panel.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -26,6 +26,11 @@ class SolarPanelApplication(Base):
     
     # Relationship
     user = relationship("User", back_populates="solar_panel_applications")
+    
+    __table_args__ = (
+        Index("ix_solar_panel_applications_v2_user_created", "user_id", "created_at"),
+        Index("ix_solar_panel_applications_v2_created", "created_at"),
+    )
 
 
 class SolarAnalysisResult(Base):
@@ -46,6 +51,11 @@ class SolarAnalysisResult(Base):
     
     # Relationship
     application = relationship("SolarPanelApplication")
+    
+    __table_args__ = (
+        Index("ix_solar_analysis_results_v2_application", "application_id"),
+        Index("ix_solar_analysis_results_v2_created", "created_at"),
+    )
 
 
 class CarbonToken(Base):
@@ -61,4 +71,10 @@ class CarbonToken(Base):
     tokenized_date = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
-    application = relationship("SolarPanelApplication")
\ No newline at end of file
+    application = relationship("SolarPanelApplication")
+    
+    __table_args__ = (
+        Index("ix_carbon_tokens_v2_application", "application_id"),
+        Index("ix_carbon_tokens_v2_name", "name"),
+        Index("ix_carbon_tokens_v2_tokenized", "tokenized_date"),
+    )
\ No newline at end of file
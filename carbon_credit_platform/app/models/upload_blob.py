@@ -0,0 +1,22 @@
+# app/models/upload_blob.py
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class UploadBlob(Base):
+    __tablename__ = "upload_blobs"
+    
+    # Content address (SHA-256 of the file contents)
+    sha256 = Column(String(64), primary_key=True)
+    
+    # Storage location and size
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=True)
+    
+    # Number of application fields pointing at this blob
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -36,6 +36,7 @@ class CarbonCoinIssueList(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None
 
 class CarbonCoinStats(BaseModel):
     total_coins_issued: float
@@ -0,0 +1,36 @@
+# app/schemas/document_text.py
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class DocumentTextResponse(BaseModel):
+    id: int
+    application_type: str
+    application_id: int
+    document_type: str
+    status: str
+    error: Optional[str] = None
+    page_count: Optional[int] = None
+    owner_name: Optional[str] = None
+    survey_number: Optional[str] = None
+    text: Optional[str] = None
+    extracted_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class DocumentSearchResult(BaseModel):
+    id: int
+    application_type: str
+    application_id: int
+    document_type: str
+    owner_name: Optional[str] = None
+    survey_number: Optional[str] = None
+    page_count: Optional[int] = None
+    snippet: Optional[str] = None
+
+class DocumentSearchResponse(BaseModel):
+    results: List[DocumentSearchResult]
+    total: int
+    page: int
+    size: int
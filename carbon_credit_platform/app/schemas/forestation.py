@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, computed_field, validator
 from typing import Optional
 from datetime import datetime
 import re
 
+from app.services.derivatives import derivative_url
+
 class ForestationApplicationBase(BaseModel):
     full_name: str = Field(..., min_length=2, max_length=100, description="Full name of the applicant")
     aadhar_card: str = Field(..., description="Aadhar card number")
@@ -45,6 +47,16 @@ class ForestationApplicationResponse(ForestationApplicationBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
+    @computed_field
+    @property
+    def geotag_photo_thumbnail_url(self) -> Optional[str]:
+        return derivative_url(self.geotag_photo_path, "thumb")
+    
+    @computed_field
+    @property
+    def geotag_photo_preview_url(self) -> Optional[str]:
+        return derivative_url(self.geotag_photo_path, "normalized")
+    
     class Config:
         from_attributes = True
 
@@ -53,6 +65,7 @@ class ForestationApplicationList(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None
 
 class FileUploadResponse(BaseModel):
     message: str
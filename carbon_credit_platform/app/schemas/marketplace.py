@@ -46,3 +46,4 @@ class MarketplaceCreditListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None
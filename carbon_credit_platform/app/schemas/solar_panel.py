@@ -1,8 +1,10 @@
 # app/schemas/solar_panel.py
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from typing import Optional, List
 from datetime import datetime
 
+from app.services.derivatives import derivative_url
+
 # API 1: Application Schemas
 class SolarPanelApplicationCreate(BaseModel):
     full_name: str
@@ -22,6 +24,16 @@ class SolarPanelApplicationResponse(BaseModel):
     geotag_photo_path: Optional[str] = None
     created_at: datetime
     
+    @computed_field
+    @property
+    def geotag_photo_thumbnail_url(self) -> Optional[str]:
+        return derivative_url(self.geotag_photo_path, "thumb")
+    
+    @computed_field
+    @property
+    def geotag_photo_preview_url(self) -> Optional[str]:
+        return derivative_url(self.geotag_photo_path, "normalized")
+    
     class Config:
         from_attributes = True
 
@@ -67,6 +79,7 @@ class CarbonTokenResponse(BaseModel):
 class CarbonTokenList(BaseModel):
     tokens: List[CarbonTokenResponse]
     total: int
+    next_cursor: Optional[str] = None
     
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+class PresignUploadRequest(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field("application/octet-stream", max_length=100)
+    size: int = Field(..., gt=0, description="File size in bytes")
+    sha256: str = Field(..., pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the file contents")
+
+class PresignedUpload(BaseModel):
+    url: str
+    method: str
+    headers: Dict[str, str]
+
+class PresignUploadResponse(BaseModel):
+    key: str
+    upload: PresignedUpload
+
+class ResumableUploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field("application/octet-stream", max_length=100)
+    size: int = Field(..., gt=0, description="Total file size in bytes")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$", description="Checked when the upload completes")
+
+class ResumableUploadStatus(BaseModel):
+    upload_id: str
+    offset: int
+    size: int
+    expires_at: float
+
+class ResumableUploadResult(BaseModel):
+    key: str
+    size: int
+    sha256: str
@@ -0,0 +1,188 @@
+# app/services/blob_store.py
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.upload_blob import UploadBlob
+from app.services.derivatives import delete_derivatives, get_derivative_generator
+from app.services.storage import StorageBackend, get_storage, LOCAL_STORAGE_ROOT
+from app.services.upload_writer import (
+    stage_stream,
+    discard,
+    MAX_UPLOAD_SIZE,
+    UPLOAD_CHUNK_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Uploads are staged here (same filesystem as local storage, so publishing is a rename)
+STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(LOCAL_STORAGE_ROOT, ".staging"))
+
+_OBJECT_KEY = re.compile(r"^objects/([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})$")
+
+
+def object_key(sha256: str) -> str:
+    """Content-addressed object key: objects/ab/cd/abcd..."""
+    return f"objects/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def sha256_for_key(key: Optional[str]) -> Optional[str]:
+    match = _OBJECT_KEY.match(key or "")
+    if not match or not match.group(3).startswith(match.group(1) + match.group(2)):
+        return None
+    return match.group(3)
+
+
+class BlobStore:
+    """Content-addressed upload storage.
+
+    Each distinct file is stored once under a key derived from its SHA-256
+    and reference-counted in `upload_blobs`. Reference changes are made in
+    the caller's session so they commit together with the application row.
+    Dropping the last reference leaves the row as a tombstone (ref_count 0);
+    after the commit, purge_released() deletes the tombstone and the object
+    together, under the row's lock, so a concurrent upload of the same
+    content either keeps the object or stores it again.
+    """
+
+    def __init__(self, db: Session, storage: Optional[StorageBackend] = None):
+        self.db = db
+        self.storage = storage or get_storage()
+        self._released: List[str] = []
+
+    def path_for(self, sha256: str) -> str:
+        return self.storage.path_for(object_key(sha256))
+
+    def sha256_for_path(self, path: Optional[str]) -> Optional[str]:
+        """Return the content hash if `path` points into this store"""
+        return sha256_for_key(self.storage.key_for(path))
+
+    async def put(self, upload_file, content_type: Optional[str] = None, max_size: int = MAX_UPLOAD_SIZE) -> UploadBlob:
+        """Store an upload (or reuse the existing copy) and add one reference to it"""
+        upload_file.file.seek(0)
+        staged = await asyncio.to_thread(stage_stream, upload_file.file, STAGING_DIR, max_size, UPLOAD_CHUNK_SIZE)
+        upload_file.file.seek(0)
+
+        content_type = content_type or getattr(upload_file, "content_type", None)
+        try:
+            # Reference first: it waits for a purge that has claimed the same content,
+            # so the object stored next can't be deleted from under the new row
+            blob = self.add_reference(staged.sha256, size=staged.size, content_type=content_type)
+            await asyncio.to_thread(self.storage.put_file, staged, object_key(staged.sha256), content_type)
+        except BaseException:
+            discard(staged.path)
+            raise
+        return blob
+
+    def schedule_derivatives(self, sha256: str):
+        """Render thumbnails and OCR variants for a stored photo in the background"""
+        get_derivative_generator().schedule(object_key(sha256))
+
+    def presign(self, sha256: str, size: int, content_type: str) -> Dict:
+        """Direct-upload instructions for a file the client has already hashed"""
+        # Always an upload URL, so the response doesn't reveal whether this content is stored;
+        # an upload of content that already is stored lands on the same key
+        key = object_key(sha256)
+        return {"key": key, "upload": self.storage.presign_upload(key, content_type, size, sha256)}
+
+    def register(self, key: str, max_size: int = MAX_UPLOAD_SIZE, content_type: Optional[str] = None) -> UploadBlob:
+        """Add a reference to an object the client uploaded directly"""
+        sha256 = sha256_for_key(key)
+        if sha256 is None:
+            raise ValueError(f"Invalid upload key: {key}")
+
+        size = self.storage.size(key)
+        if size is None:
+            raise ValueError(f"Upload not found: {key}")
+        if size > max_size:
+            raise ValueError(f"File size too large. Maximum {max_size // (1024 * 1024)}MB allowed.")
+
+        blob = self.add_reference(sha256, size=size, content_type=content_type)
+        # A purge that claimed this content before the reference was added has deleted the object
+        if not self.storage.exists(key):
+            raise ValueError(f"Upload not found: {key}")
+        return blob
+
+    def add_reference(self, sha256: str, size: int = 0, content_type: Optional[str] = None) -> UploadBlob:
+        """Increment the reference count, creating the blob row on first use"""
+        values = {
+            "sha256": sha256,
+            "path": self.path_for(sha256),
+            "size": size,
+            "content_type": content_type,
+            "ref_count": 1
+        }
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            # Single upsert so concurrent requests for the same content can't race
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            statement = insert(UploadBlob).values(**values).on_conflict_do_update(
+                index_elements=[UploadBlob.sha256],
+                set_={"ref_count": UploadBlob.ref_count + 1, "updated_at": func.now()}
+            )
+            self.db.execute(statement)
+        else:
+            updated = self.db.execute(
+                update(UploadBlob)
+                .where(UploadBlob.sha256 == sha256)
+                .values(ref_count=UploadBlob.ref_count + 1)
+            ).rowcount
+            if not updated:
+                self.db.add(UploadBlob(**values))
+                self.db.flush()
+
+        blob = self.db.get(UploadBlob, sha256)
+        self.db.refresh(blob)
+        return blob
+
+    def release(self, path: Optional[str]) -> bool:
+        """Drop one reference for a stored path; returns False for paths outside the store"""
+        sha256 = self.sha256_for_path(path)
+        if sha256 is None:
+            return False
+
+        self.db.execute(
+            update(UploadBlob)
+            .where(UploadBlob.sha256 == sha256, UploadBlob.ref_count > 0)
+            .values(ref_count=UploadBlob.ref_count - 1)
+        )
+        remaining = self.db.scalar(select(UploadBlob.ref_count).where(UploadBlob.sha256 == sha256))
+        if remaining is not None and remaining <= 0:
+            # The row stays as a tombstone until purge_released() claims it
+            self._released.append(sha256)
+        return True
+
+    def purge_released(self) -> int:
+        """Delete objects whose last reference was dropped; call after the session commits"""
+        removed = 0
+        for sha256 in self._released:
+            # Claim the tombstone. The conditional delete locks the row (the database, on SQLite)
+            # until the commit below, so add_reference() for the same content waits for the
+            # object to be gone, and a reference added since the release keeps it
+            claimed = self.db.execute(
+                delete(UploadBlob).where(UploadBlob.sha256 == sha256, UploadBlob.ref_count <= 0)
+            ).rowcount
+            if not claimed:
+                self.db.rollback()
+                continue
+            key = object_key(sha256)
+            try:
+                self.storage.delete(key)
+                delete_derivatives(self.storage, key)
+            except Exception as e:
+                # Leave the tombstone; the upload sweeper removes it and the object later
+                self.db.rollback()
+                logger.warning(f"Could not delete released upload {key}: {str(e)}")
+                continue
+            self.db.commit()
+            removed += 1
+        self._released = []
+        return removed
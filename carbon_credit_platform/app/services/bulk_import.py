@@ -0,0 +1,462 @@
+# app/services/bulk_import.py
+"""
+Bulk loading of users, wallets, marketplace credits, coin issues,
+transactions and applications from CSV, NDJSON or Parquet files, or from
+generated data.
+
+Rows are converted by column type and written in batches: multi-row
+executemany, or COPY on PostgreSQL with psycopg2. A whole import is one
+transaction. Foreign keys are not checked row by row; once everything is
+loaded, rows pointing at missing parents are counted and the import is
+rolled back if there are new ones. Core inserts bypass the ORM, so the
+dashboard rollups are rebuilt before commit.
+"""
+import csv
+import io
+import json
+import os
+import random
+import string
+import time
+import uuid
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from enum import Enum as PyEnum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Enum, Table, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.carbon_coins import CarbonCoinIssue, CoinSource
+from app.models.credit_transaction import CreditTransaction, TransactionStatus, TransactionType
+from app.models.forestation import ForestationApplication
+from app.models.marketplace import MarketplaceCredit, SourceType, VerificationStatus
+from app.models.solar_panel import CarbonToken, SolarAnalysisResult, SolarPanelApplication
+from app.models.user import User
+from app.models.user_wallets import UserWallet
+from app.services.rollups import TRACKED_COLUMNS, rebuild_rollups
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "5000"))
+
+# Importable tables by the name used on the command line
+IMPORT_TABLES: Dict[str, Table] = {
+    "users": User.__table__,
+    "user_wallets": UserWallet.__table__,
+    "marketplace_credits": MarketplaceCredit.__table__,
+    "carbon_coin_issues": CarbonCoinIssue.__table__,
+    "credit_transactions": CreditTransaction.__table__,
+    "forestation_applications": ForestationApplication.__table__,
+    "solar_panel_applications": SolarPanelApplication.__table__,
+    "solar_analysis_results": SolarAnalysisResult.__table__,
+    "carbon_tokens": CarbonToken.__table__,
+}
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+# Tables the dashboard rollups are computed from
+ROLLUP_SOURCES = {model.__tablename__ for model in TRACKED_COLUMNS}
+
+
+class BulkImportError(Exception):
+    """The input can't be imported; nothing from this run is committed"""
+
+
+# --- Reading ---------------------------------------------------------------
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "ndjson"
+    if extension in ("csv", "parquet"):
+        return extension
+    raise BulkImportError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}")
+
+
+def read_records(path: str, format: Optional[str] = None) -> Iterator[Dict]:
+    """Stream a file's rows as dicts"""
+    format = format or detect_format(path)
+    if format == "csv":
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            yield from csv.DictReader(csv_file)
+    elif format == "ndjson":
+        with open(path, encoding="utf-8") as ndjson_file:
+            for line_number, line in enumerate(ndjson_file, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise BulkImportError(f"{path} line {line_number}: {str(e)}")
+    elif format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise BulkImportError("Parquet input needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=BULK_IMPORT_BATCH_SIZE):
+            yield from batch.to_pylist()
+    else:
+        raise BulkImportError(f"Unknown format {format}; use one of {', '.join(FORMATS)}")
+
+
+# --- Converting ------------------------------------------------------------
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("1", "true", "t", "yes", "y"):
+            return True
+        if lowered in ("0", "false", "f", "no", "n"):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+
+def _parse_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+def _enum_parser(enum_class) -> Callable:
+    """Enum members by value or name, case-insensitively ("verified", "VERIFIED")"""
+    lookup = {}
+    for member in enum_class:
+        lookup[str(member.value).lower()] = member
+        lookup[member.name.lower()] = member
+
+    def parse(value):
+        if isinstance(value, enum_class):
+            return value
+        member = lookup.get(str(value).strip().lower())
+        if member is None:
+            raise ValueError(f"expected one of {', '.join(str(m.value) for m in enum_class)}, got {value!r}")
+        return member
+    return parse
+
+
+def _column_parser(column) -> Callable:
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        return _enum_parser(column.type.enum_class)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return str
+    if python_type is bool:
+        return _parse_bool
+    if python_type is datetime:
+        return _parse_datetime
+    if python_type in (int, float):
+        return python_type
+    return str
+
+
+class RecordConverter:
+    """Turns input records into complete insert rows for one table"""
+
+    def __init__(self, table: Table, fields: Iterable[str], renames: Optional[Dict[str, str]] = None):
+        self.table = table
+        self.renames = renames or {}
+        self.fields = list(fields)
+        self.columns = [self.renames.get(name, name) for name in self.fields]
+
+        unknown = [name for name in self.columns if name not in table.columns]
+        if unknown:
+            raise BulkImportError(
+                f"{table.name} has no column(s) {', '.join(unknown)}; columns are {', '.join(table.columns.keys())}"
+            )
+        missing = [
+            column.name for column in table.columns
+            if not column.nullable and column.name not in self.columns and not column.primary_key
+            and column.default is None and column.server_default is None
+        ]
+        if missing:
+            raise BulkImportError(f"{table.name} needs column(s) {', '.join(missing)}")
+
+        self._parsers = [(field_name, name, _column_parser(table.columns[name]), table.columns[name].nullable)
+                         for field_name, name in zip(self.fields, self.columns)]
+        # Python-side defaults are applied here so every row has the same keys (and COPY sees them too)
+        self._defaults = [
+            (column.name, column.default) for column in table.columns
+            if column.name not in self.columns and column.default is not None
+            and not column.primary_key and not column.default.is_sequence
+        ]
+        self.output_columns = self.columns + [name for name, _ in self._defaults]
+
+    def __call__(self, record: Dict) -> Dict:
+        row = {}
+        for field_name, name, parse, nullable in self._parsers:
+            value = record.get(field_name)
+            if isinstance(value, str) and value == "" and (nullable or parse is not str):
+                value = None
+            if value is not None:
+                try:
+                    value = parse(value)
+                except (TypeError, ValueError) as e:
+                    raise BulkImportError(f"column {name}: {str(e)}")
+            row[name] = value
+        for name, default in self._defaults:
+            row[name] = default.arg(None) if default.is_callable else default.arg
+        return row
+
+
+# --- Writing ---------------------------------------------------------------
+
+def _copy_text(value) -> str:
+    """A value in PostgreSQL COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, PyEnum):
+        value = value.name  # SQLAlchemy stores enum names
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+@dataclass
+class ImportReport:
+    table: str
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class BulkImporter:
+    """Loads batches into one open transaction; call finish() before committing"""
+
+    connection: Connection
+    batch_size: int = BULK_IMPORT_BATCH_SIZE
+    use_copy: bool = True
+    progress: Optional[Callable[[ImportReport], None]] = None
+    reports: List[ImportReport] = field(default_factory=list)
+    # Orphaned rows per loaded table before this import, so only new ones fail it
+    _orphans_before: Dict[Table, int] = field(default_factory=dict)
+    _explicit_keys: set = field(default_factory=set)
+
+    @property
+    def dialect(self) -> str:
+        return self.connection.dialect.name
+
+    @property
+    def copies(self) -> bool:
+        return self.use_copy and self.dialect == "postgresql" and self.connection.dialect.driver == "psycopg2"
+
+    def defer_constraints(self, disable_fk_triggers: bool = False):
+        """Skip per-row foreign key checks where the database allows it; finish() checks once at the end"""
+        if self.dialect == "sqlite":
+            self.connection.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+        elif self.dialect == "postgresql":
+            self.connection.exec_driver_sql("SET LOCAL statement_timeout = 0")
+            self.connection.exec_driver_sql("SET CONSTRAINTS ALL DEFERRED")
+            if disable_fk_triggers:
+                # Foreign keys are enforced by triggers, which replica mode skips (needs superuser)
+                self.connection.exec_driver_sql("SET LOCAL session_replication_role = replica")
+
+    def load(self, table_name: str, records: Iterable[Dict], renames: Optional[Dict[str, str]] = None) -> ImportReport:
+        if table_name not in IMPORT_TABLES:
+            raise BulkImportError(f"Unknown table {table_name}; use one of {', '.join(IMPORT_TABLES)}")
+        table = IMPORT_TABLES[table_name]
+        if table not in self._orphans_before:
+            self._orphans_before[table] = self._count_orphans(table)
+
+        report = ImportReport(table=table_name)
+        self.reports.append(report)
+        started = time.perf_counter()
+        converter = None
+        batch = []
+        for number, record in enumerate(records, 1):
+            if converter is None:
+                converter = RecordConverter(table, record.keys(), renames)
+                self._explicit_keys.update(
+                    (table.name, column.name) for column in table.primary_key.columns if column.name in converter.columns
+                )
+            try:
+                batch.append(converter(record))
+            except BulkImportError as e:
+                raise BulkImportError(f"{table_name} row {number}: {str(e)}")
+            if len(batch) >= self.batch_size:
+                self._write(table, converter.output_columns, batch, report, started)
+                batch = []
+        if batch:
+            self._write(table, converter.output_columns, batch, report, started)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _write(self, table: Table, columns: List[str], rows: List[Dict], report: ImportReport, started: float):
+        if self.copies:
+            self._copy(table, columns, rows)
+        else:
+            self.connection.execute(table.insert(), rows)
+        report.rows += len(rows)
+        report.batches += 1
+        report.seconds = time.perf_counter() - started
+        if self.progress is not None:
+            self.progress(report)
+
+    def _copy(self, table: Table, columns: List[str], rows: List[Dict]):
+        preparer = self.connection.dialect.identifier_preparer
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_text(row[name]) for name in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        statement = (f"COPY {preparer.format_table(table)} "
+                     f"({', '.join(preparer.quote(name) for name in columns)}) FROM STDIN")
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+    def _count_orphans(self, table: Table) -> int:
+        """Rows whose foreign keys point at missing parents"""
+        total = 0
+        for foreign_key in table.foreign_keys:
+            child, parent = foreign_key.parent, foreign_key.column
+            total += self.connection.scalar(
+                select(func.count()).select_from(table.outerjoin(parent.table, child == parent))
+                .where(child.is_not(None), parent.is_(None))
+            )
+        return total
+
+    def finish(self) -> Dict[str, int]:
+        """Check foreign keys once, fix id sequences and rebuild rollups; returns rebuilt rollup row counts"""
+        problems = []
+        for table, before in self._orphans_before.items():
+            after = self._count_orphans(table)
+            if after > before:
+                problems.append(f"{table.name}: {after - before} row(s) reference missing parents")
+        if problems:
+            raise BulkImportError("Foreign key check failed; " + "; ".join(problems))
+
+        if self.dialect == "postgresql":
+            # Explicit ids don't advance the serial sequence; the next ORM insert would collide
+            for table_name, column_name in sorted(self._explicit_keys):
+                self.connection.execute(
+                    text(f"SELECT setval(pg_get_serial_sequence(:table, :column), "
+                         f"COALESCE((SELECT MAX({column_name}) FROM {table_name}), 0) + 1, false)"),
+                    {"table": table_name, "column": column_name}
+                )
+
+        if ROLLUP_SOURCES & {table.name for table in self._orphans_before}:
+            return rebuild_rollups(Session(bind=self.connection))
+        return {}
+
+
+# --- Generated fixtures ----------------------------------------------------
+
+FIXTURE_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FIXTURE_SPAN_SECONDS = 2 * 365 * 24 * 60 * 60
+
+
+class FixtureGenerator:
+    """Plausible rows for performance fixtures; parents are read from what is already loaded"""
+
+    GENERATED_TABLES = ("users", "user_wallets", "marketplace_credits", "carbon_coin_issues", "credit_transactions",
+                        "forestation_applications", "solar_panel_applications")
+
+    def __init__(self, connection: Connection, seed: Optional[int] = None):
+        self.connection = connection
+        self.random = random.Random(seed)
+        self.run = "".join(self.random.choices(string.ascii_lowercase + string.digits, k=6))
+
+    def _ids(self, column) -> array:
+        ids = array("q", self.connection.execute(select(column)).scalars())
+        if not ids:
+            raise BulkImportError(f"Generate or import {column.table.name} first")
+        return ids
+
+    def _timestamp(self) -> datetime:
+        return FIXTURE_START + timedelta(seconds=self.random.randrange(FIXTURE_SPAN_SECONDS))
+
+    def records(self, table_name: str, count: int) -> Iterator[Dict]:
+        if table_name not in self.GENERATED_TABLES:
+            raise BulkImportError(f"Can't generate {table_name}; use one of {', '.join(self.GENERATED_TABLES)}")
+        return getattr(self, f"_{table_name}")(count)
+
+    def _users(self, count: int) -> Iterator[Dict]:
+        for n in range(count):
+            name = f"bulk-{self.run}-{n}"
+            yield {"username": name, "email": f"{name}@example.com", "hashed_password": "x",
+                   "created_at": self._timestamp()}
+
+    def _user_wallets(self, count: int) -> Iterator[Dict]:
+        # At most one wallet per user: the first `count` users that don't have one yet
+        users = self.connection.execute(
+            select(User.id).outerjoin(UserWallet, UserWallet.user_id == User.id)
+            .where(UserWallet.id.is_(None)).order_by(User.id).limit(count)
+        ).scalars().all()
+        if not users:
+            raise BulkImportError("Every user already has a wallet; generate or import users first")
+        for user_id in users:
+            coins = float(self.random.randrange(2500, 50000))
+            yield {"user_id": user_id, "total_coins": coins, "available_coins": coins,
+                   "created_at": self._timestamp()}
+
+    def _marketplace_credits(self, count: int) -> Iterator[Dict]:
+        users = self._ids(User.id)
+        rng = self.random
+        for n in range(count):
+            created = self._timestamp()
+            status = rng.choices(list(VerificationStatus), weights=(2, 7, 1))[0]
+            yield {
+                "issuer_id": rng.choice(users), "issuer_name": f"Issuer {n % 5000}",
+                "coins_issued": round(rng.uniform(1, 500), 2), "source_type": rng.choice(list(SourceType)),
+                "source_project_id": rng.randrange(1, 100000), "description": f"Generated credit {n}",
+                "price_per_coin": round(rng.uniform(5, 30), 2), "verification_status": status,
+                "verified_at": created + timedelta(days=1) if status == VerificationStatus.VERIFIED else None,
+                "issue_date": created, "created_at": created
+            }
+
+    def _carbon_coin_issues(self, count: int) -> Iterator[Dict]:
+        users = self._ids(User.id)
+        rng = self.random
+        for n in range(count):
+            issued = self._timestamp()
+            yield {
+                "user_id": rng.choice(users), "full_name": f"Applicant {n % 10000}",
+                "coins_issued": round(rng.uniform(1, 200), 2), "source": rng.choice(list(CoinSource)),
+                "source_application_id": rng.randrange(1, 100000), "issue_date": issued, "created_at": issued
+            }
+
+    def _credit_transactions(self, count: int) -> Iterator[Dict]:
+        users = self._ids(User.id)
+        credits = self._ids(MarketplaceCredit.id)
+        rng = self.random
+        for n in range(count):
+            amount = round(rng.uniform(1, 50), 2)
+            yield {
+                "transaction_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": rng.choice(users), "credit_id": rng.choice(credits),
+                "credits_amount": amount, "coins_amount": amount,
+                "transaction_type": TransactionType.PURCHASE, "status": TransactionStatus.COMPLETED,
+                "created_at": self._timestamp().replace(tzinfo=None)
+            }
+
+    def _forestation_applications(self, count: int) -> Iterator[Dict]:
+        users = self._ids(User.id)
+        rng = self.random
+        for n in range(count):
+            yield {
+                "user_id": rng.choice(users), "full_name": f"Applicant {n % 10000}",
+                "aadhar_card": f"{rng.randrange(10 ** 11, 10 ** 12)}",
+                "latitude": round(rng.uniform(8, 35), 6), "longitude": round(rng.uniform(68, 97), 6),
+                "status": rng.choice(("pending", "verified", "approved", "rejected")), "created_at": self._timestamp()
+            }
+
+    def _solar_panel_applications(self, count: int) -> Iterator[Dict]:
+        users = self._ids(User.id)
+        rng = self.random
+        for n in range(count):
+            yield {
+                "user_id": rng.choice(users), "full_name": f"Applicant {n % 10000}",
+                "company_name": f"Solar Co {n % 500}", "aadhar_card": f"{rng.randrange(10 ** 11, 10 ** 12)}",
+                "api_link": f"https://meter.example.com/{self.run}/{n}", "created_at": self._timestamp()
+            }
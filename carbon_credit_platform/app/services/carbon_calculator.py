@@ -1,67 +1,56 @@
 import os
-from openai import OpenAI
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 import json
 from datetime import datetime
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
+
+from app.services.image_context import ImageContext
 
 class CarbonCalculator:
     def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
             print("Warning: OPENAI_API_KEY not found in environment")
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use (None without an API key)"""
+        if self._client is None and self.api_key:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            client.close()
+
+    def snapshot(self) -> Dict:
+        return {"configured": bool(self.api_key), "client_open": self._client is not None}
     
-    def extract_gps_from_image(self, image_path: str) -> Tuple[Optional[float], Optional[float]]:
+    def extract_gps_from_image(self, image: Union[str, ImageContext]) -> Tuple[Optional[float], Optional[float]]:
         """Extract GPS coordinates from image EXIF data"""
         try:
-            image = Image.open(image_path)
-            exifdata = image.getexif()
+            context = ImageContext.ensure(image)
             
-            if not exifdata:
-                print(f"No EXIF data found in {image_path}")
+            if not context.exif:
+                print(f"No EXIF data found in {context.name}")
                 return None, None
             
             # Find GPS info
-            for tag_id, value in exifdata.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag == "GPSInfo":
-                    gps_data = {}
-                    for gps_tag_id, gps_value in value.items():
-                        gps_tag = GPSTAGS.get(gps_tag_id, gps_tag_id)
-                        gps_data[gps_tag] = gps_value
-                    
-                    # Extract coordinates
-                    if "GPSLatitude" in gps_data and "GPSLongitude" in gps_data:
-                        lat = self._convert_to_degrees(gps_data["GPSLatitude"])
-                        lon = self._convert_to_degrees(gps_data["GPSLongitude"])
-                        
-                        # Handle hemisphere
-                        if gps_data.get("GPSLatitudeRef") == "S":
-                            lat = -lat
-                        if gps_data.get("GPSLongitudeRef") == "W":
-                            lon = -lon
-                        
-                        print(f"Extracted coordinates: {lat}, {lon}")
-                        return lat, lon
+            coordinates = context.gps_coordinates
+            if coordinates:
+                lat, lon = coordinates
+                print(f"Extracted coordinates: {lat}, {lon}")
+                return lat, lon
             
-            print(f"No GPS data found in EXIF for {image_path}")
+            print(f"No GPS data found in EXIF for {context.name}")
             return None, None
             
         except Exception as e:
-            print(f"Error extracting GPS from {image_path}: {e}")
+            print(f"Error extracting GPS from {image if isinstance(image, str) else 'uploaded image'}: {e}")
             return None, None
     
-    def _convert_to_degrees(self, value):
-        """Convert GPS coordinates to degrees"""
-        try:
-            d, m, s = value
-            degrees = d + (m / 60.0) + (s / 3600.0)
-            return degrees
-        except:
-            return 0
-    
     def calculate_solar_carbon_credits(
         self,
         latitude: float,
@@ -173,4 +162,11 @@ class CarbonCalculator:
             }
         }
 
-carbon_calculator = CarbonCalculator()
\ No newline at end of file
+_carbon_calculator: Optional[CarbonCalculator] = None
+
+
+def get_carbon_calculator() -> CarbonCalculator:
+    global _carbon_calculator
+    if _carbon_calculator is None:
+        _carbon_calculator = CarbonCalculator()
+    return _carbon_calculator
\ No newline at end of file
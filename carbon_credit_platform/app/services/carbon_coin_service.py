@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from typing import List, Optional, Dict
 from datetime import datetime
 
+from app.core.pagination import Page, paginate
 from app.models.carbon_coins import CarbonCoinIssue, CoinSource
 from app.models.solar_panel import SolarPanelApplication
 from app.models.forestation import ForestationApplication
 from app.models.user import User
+from app.services.rollups import RollupService
 
 class CarbonCoinService:
     def __init__(self, db: Session):
@@ -87,8 +88,9 @@ class CarbonCoinService:
         user_id: int, 
         skip: int = 0, 
         limit: int = 100,
-        source_filter: Optional[str] = None
-    ) -> List[CarbonCoinIssue]:
+        source_filter: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get all carbon coin issues for a user"""
         query = self.db.query(CarbonCoinIssue).filter(
             CarbonCoinIssue.user_id == user_id
@@ -101,14 +103,15 @@ class CarbonCoinService:
             elif source_filter.lower() == 'forestation':
                 query = query.filter(CarbonCoinIssue.source == CoinSource.FORESTATION)
         
-        return query.order_by(desc(CarbonCoinIssue.issue_date)).offset(skip).limit(limit).all()
+        return paginate(query, CarbonCoinIssue.issue_date, CarbonCoinIssue.issue_id, limit, cursor=cursor, skip=skip)
     
     def get_all_carbon_coins(
         self, 
         skip: int = 0, 
         limit: int = 100,
-        source_filter: Optional[str] = None
-    ) -> List[CarbonCoinIssue]:
+        source_filter: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get all carbon coin issues (admin function)"""
         query = self.db.query(CarbonCoinIssue)
         
@@ -119,42 +122,17 @@ class CarbonCoinService:
             elif source_filter.lower() == 'forestation':
                 query = query.filter(CarbonCoinIssue.source == CoinSource.FORESTATION)
         
-        return query.order_by(desc(CarbonCoinIssue.issue_date)).offset(skip).limit(limit).all()
+        return paginate(query, CarbonCoinIssue.issue_date, CarbonCoinIssue.issue_id, limit, cursor=cursor, skip=skip)
     
     def get_carbon_coin_stats(self, user_id: int) -> Dict:
         """Get carbon coin statistics for a user"""
-        # Total coins issued
-        total_coins = self.db.query(CarbonCoinIssue).filter(
-            CarbonCoinIssue.user_id == user_id
-        ).with_entities(
-            self.db.func.sum(CarbonCoinIssue.coins_issued)
-        ).scalar() or 0
-        
-        # Coins by source
-        solar_coins = self.db.query(CarbonCoinIssue).filter(
-            CarbonCoinIssue.user_id == user_id,
-            CarbonCoinIssue.source == CoinSource.SOLAR_PANEL
-        ).with_entities(
-            self.db.func.sum(CarbonCoinIssue.coins_issued)
-        ).scalar() or 0
-        
-        forestation_coins = self.db.query(CarbonCoinIssue).filter(
-            CarbonCoinIssue.user_id == user_id,
-            CarbonCoinIssue.source == CoinSource.FORESTATION
-        ).with_entities(
-            self.db.func.sum(CarbonCoinIssue.coins_issued)
-        ).scalar() or 0
-        
-        # Total issues count
-        total_issues = self.db.query(CarbonCoinIssue).filter(
-            CarbonCoinIssue.user_id == user_id
-        ).count()
+        rollup = RollupService(self.db).get_user(user_id)
         
         return {
-            'total_coins_issued': float(total_coins),
-            'solar_panel_coins': float(solar_coins),
-            'forestation_coins': float(forestation_coins),
-            'total_issues': total_issues,
+            'total_coins_issued': float(rollup.coins_minted),
+            'solar_panel_coins': float(rollup.solar_coins_minted),
+            'forestation_coins': float(rollup.forestation_coins_minted),
+            'total_issues': rollup.coin_issues,
             'last_updated': datetime.now().isoformat()
         }
     
@@ -0,0 +1,216 @@
+# app/services/coordinate_parser.py
+"""
+Coordinate parsing for OCR and model output.
+
+All formats are recognised by one compiled scanner in a single pass over the
+text. Each number is then classified by position: a hemisphere letter or a
+nearby "Lat"/"Long" label decides whether it is a latitude or a longitude,
+and bare numbers are only paired when they sit next to each other and look
+like coordinates (degree sign, minutes/seconds or enough decimal places).
+Dates, times and other stray numbers are therefore never paired by accident.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Minimum decimal places for a bare "lat, lon" pair with no other coordinate hints
+MIN_BARE_DECIMALS = 3
+
+# Maximum characters between two halves of a pair
+MAX_PAIR_GAP = 40
+
+_SCANNER = re.compile(
+    r"""
+    (?P<label>(?i:\b(?:latitude|lat|longitude|long|lon|lng)\b))
+    |
+    (?<![\w.])
+    (?:(?P<hemi_pre>[NSEW])\s*)?
+    (?:(?P<sign>[-+\u2212])\s*)?
+    (?P<deg>\d{1,3}(?:\.\d+)?)(?![\d])
+    (?P<degsym>\s*(?:°|º|˚|(?i:deg)\b))?
+    (?:
+        \s*(?P<min>\d{1,2}(?:\.\d+)?)\s*['′’]
+        (?:\s*(?P<sec>\d{1,2}(?:\.\d+)?)\s*(?:"|″|”|''))?
+    )?
+    (?(hemi_pre)|(?:\s*(?P<hemi>[NSEW])\b)?)
+    """,
+    re.VERBOSE
+)
+
+# Text allowed between a label and its value: `Lat `, `Latitude: `, `"latitude": `
+_LABEL_GAP = re.compile(r"""^[\s:=\"'(]*$""")
+
+# Text allowed between the two values of a pair
+_PAIR_GAP = re.compile(r"^\s*[,;/|]?\s*(?:(?i:and)\s*)?$")
+
+# Numbers glued to these characters belong to dates, times or ranges
+_DATE_TIME_NEIGHBOURS = set("/:-")
+
+
+@dataclass
+class _Value:
+    start: int
+    end: int
+    value: float
+    axis: Optional[str]  # 'lat', 'lon' or None when unknown
+    hemisphere: Optional[str]
+    decimals: int
+    has_symbol: bool
+    is_dms: bool
+    labelled: bool = False
+
+    @property
+    def looks_like_coordinate(self) -> bool:
+        return (self.hemisphere is not None or self.has_symbol or self.is_dms
+                or self.labelled or self.decimals >= MIN_BARE_DECIMALS)
+
+
+def _axis_of_label(label: str) -> str:
+    return "lat" if label.lower().startswith("lat") else "lon"
+
+
+def _scan(text: str) -> List[_Value]:
+    """Single pass over the text producing classified coordinate values"""
+    values = []
+    pending_label = None  # (axis, end offset)
+
+    for match in _SCANNER.finditer(text):
+        if match.group("label"):
+            pending_label = (_axis_of_label(match.group("label")), match.end())
+            continue
+
+        start, end = match.span()
+
+        # Skip numbers that are part of a date, time or phone number ("25/09/2025", "10:28", "+05:30")
+        before = text[start - 1] if start > 0 else ""
+        after = text[end] if end < len(text) else ""
+        if (before in _DATE_TIME_NEIGHBOURS and not match.group("sign")) or after in _DATE_TIME_NEIGHBOURS:
+            pending_label = None
+            continue
+
+        degrees = float(match.group("deg"))
+        minutes = float(match.group("min") or 0)
+        seconds = float(match.group("sec") or 0)
+        is_dms = match.group("min") is not None
+        if minutes >= 60 or seconds >= 60:
+            pending_label = None
+            continue
+        value = degrees + minutes / 60.0 + seconds / 3600.0
+
+        hemisphere = match.group("hemi") or match.group("hemi_pre")
+        if match.group("sign") in ("-", "\u2212") or hemisphere in ("S", "W"):
+            value = -value
+
+        axis = None
+        if hemisphere:
+            axis = "lat" if hemisphere in ("N", "S") else "lon"
+
+        labelled = False
+        if pending_label and _LABEL_GAP.match(text[pending_label[1]:start]):
+            labelled = True
+            axis = axis or pending_label[0]
+        pending_label = None
+
+        deg_text = match.group("deg")
+        decimals = len(deg_text.split(".")[1]) if "." in deg_text else 0
+
+        values.append(_Value(
+            start=start,
+            end=end,
+            value=value,
+            axis=axis,
+            hemisphere=hemisphere,
+            decimals=decimals,
+            has_symbol=bool(match.group("degsym")),
+            is_dms=is_dms,
+            labelled=labelled
+        ))
+
+    return values
+
+
+def _method(first: _Value, second: _Value) -> str:
+    if first.labelled and second.labelled:
+        return "Lat Long labels"
+    if first.is_dms or second.is_dms:
+        return "DMS format"
+    if first.hemisphere or second.hemisphere:
+        return "Degrees with direction"
+    return "Decimal pair"
+
+
+def _score(first: _Value, second: _Value) -> float:
+    score = 0.0
+    for value in (first, second):
+        if value.labelled:
+            score += 3
+        if value.hemisphere:
+            score += 3
+        if value.is_dms:
+            score += 2
+        if value.has_symbol:
+            score += 1
+        score += min(value.decimals, 6) / 6
+    return score
+
+
+def _orient(first: _Value, second: _Value):
+    """Return (lat, lon) values for an adjacent pair, or None if the axes conflict"""
+    if first.axis and second.axis:
+        if first.axis == second.axis:
+            return None
+        return (first, second) if first.axis == "lat" else (second, first)
+    if first.axis:
+        return (first, second) if first.axis == "lat" else (second, first)
+    if second.axis:
+        return (second, first) if second.axis == "lon" else (first, second)
+    # No hints: conventional "lat, lon" order
+    return first, second
+
+
+def _in_range(lat: float, lon: float) -> bool:
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def parse_coordinates(text: str) -> Optional[Dict]:
+    """Return the best {'latitude', 'longitude', 'method', 'score'} found in the text, or None"""
+    if not text:
+        return None
+
+    values = _scan(text)
+    best = None
+
+    for index in range(len(values) - 1):
+        first, second = values[index], values[index + 1]
+        if second.start - first.end > MAX_PAIR_GAP:
+            continue
+        if not (first.looks_like_coordinate and second.looks_like_coordinate):
+            continue
+
+        # Unlabelled values must be directly next to each other ("28.58, 77.07")
+        gap = text[first.end:second.start]
+        if not (first.labelled or second.labelled) and not _PAIR_GAP.match(gap):
+            continue
+
+        oriented = _orient(first, second)
+        if oriented is None:
+            continue
+        lat, lon = oriented
+
+        score = _score(first, second)
+        if not _in_range(lat.value, lon.value):
+            # Bare pairs written "lon, lat" are accepted only if unambiguous
+            if lat.axis or lon.axis or not _in_range(lon.value, lat.value):
+                continue
+            lat, lon = lon, lat
+            score -= 1
+
+        if best is None or score > best["score"]:
+            best = {
+                "latitude": lat.value,
+                "longitude": lon.value,
+                "method": _method(first, second),
+                "score": score
+            }
+
+    return best
@@ -1,21 +1,35 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Dict, Optional
 from datetime import datetime
 import uuid
 
+from app.core.serialization import Field, Projection
 from app.models.user_wallets import UserWallet
 from app.models.marketplace import MarketplaceCredit
-from app.models.credit_transaction import CreditTransaction
+from app.models.credit_transaction import CreditTransaction, TransactionStatus, TransactionType
 from app.schemas.credit_purchase import CreditPurchaseRequest
 
+# Listed marketplace fields (schemas.credit_purchase.MarketplaceCreditResponse), selectable with ?fields=
+LISTING_FIELDS = Projection({
+    'id': MarketplaceCredit.id,
+    'name': MarketplaceCredit.issuer_name,
+    'description': MarketplaceCredit.description,
+    'credits': MarketplaceCredit.coins_issued,  # Using coins_issued as available credits
+    'coins': MarketplaceCredit.coins_issued,    # Same value for coins
+    'source': Field(MarketplaceCredit.source_type, lambda source_type: source_type.value.lower()),
+    'image': None,  # Not available in new model
+    'location': Field(MarketplaceCredit.source_project_id, lambda project_id: f"Project ID: {project_id}"),
+    'tokenized_date': Field(MarketplaceCredit.issue_date, datetime.isoformat)
+})
+
 class CreditPurchaseService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_user_wallet(self, user_id: int) -> Dict:
+    async def get_user_wallet(self, user_id: int) -> Dict:
         """Get or create user wallet with default 2500 coins"""
-        wallet = self.db.query(UserWallet).filter(UserWallet.user_id == user_id).first()
+        wallet = await self.db.scalar(select(UserWallet).where(UserWallet.user_id == user_id))
         
         if not wallet:
             # Create new wallet with default 2500 coins for MVP
@@ -25,8 +39,8 @@ class CreditPurchaseService:
                 available_coins=2500.0
             )
             self.db.add(wallet)
-            self.db.commit()
-            self.db.refresh(wallet)
+            await self.db.commit()
+            await self.db.refresh(wallet)
         
         return {
             'user_id': wallet.user_id,
@@ -35,55 +49,26 @@ class CreditPurchaseService:
             'last_updated': wallet.updated_at
         }
     
-    def get_available_marketplace_credits(self) -> List[Dict]:
+    async def get_available_marketplace_credits(self, fields: Optional[str] = None) -> List[Dict]:
         """Get all marketplace credits with coins_issued > 0"""
-        credits = self.db.query(MarketplaceCredit).filter(
-            MarketplaceCredit.coins_issued > 0
-        ).all()
-        
-        result = []
-        for credit in credits:
-            result.append({
-                'id': credit.id,
-                'name': credit.issuer_name,
-                'description': credit.description,
-                'credits': credit.coins_issued,  # Using coins_issued as available credits
-                'coins': credit.coins_issued,    # Same value for coins
-                'source': credit.source_type.value.lower(),
-                'image': None,  # Not available in new model
-                'location': f"Project ID: {credit.source_project_id}",
-                'tokenized_date': credit.issue_date.isoformat() if credit.issue_date else None
-            })
-        
-        return result
+        return await self._listing_rows(fields, MarketplaceCredit.coins_issued > 0)
     
-    def get_all_marketplace_credits(self) -> List[Dict]:
+    async def get_all_marketplace_credits(self, fields: Optional[str] = None) -> List[Dict]:
         """Get all marketplace credits (including those with 0 credits)"""
-        credits = self.db.query(MarketplaceCredit).all()
-        
-        result = []
-        for credit in credits:
-            result.append({
-                'id': credit.id,
-                'name': credit.issuer_name,
-                'description': credit.description,
-                'credits': credit.coins_issued,  # Using coins_issued as available credits
-                'coins': credit.coins_issued,    # Same value for coins
-                'source': credit.source_type.value.lower(),
-                'image': None,  # Not available in new model
-                'location': f"Project ID: {credit.source_project_id}",
-                'tokenized_date': credit.issue_date.isoformat() if credit.issue_date else None
-            })
-        
-        return result
+        return await self._listing_rows(fields)
+    
+    async def _listing_rows(self, fields: Optional[str], *criteria) -> List[Dict]:
+        """Marketplace listings as plain dicts, selecting only the listed columns"""
+        plan = LISTING_FIELDS.plan(fields)
+        return plan.to_dicts(await self.db.execute(plan.select().where(*criteria)))
     
-    def purchase_credits(self, purchase_request: CreditPurchaseRequest) -> Dict:
+    async def purchase_credits(self, purchase_request: CreditPurchaseRequest) -> Dict:
         """Purchase credits and update wallet and marketplace"""
         try:
             # Get user wallet
-            wallet = self.db.query(UserWallet).filter(
+            wallet = await self.db.scalar(select(UserWallet).where(
                 UserWallet.user_id == purchase_request.user_id
-            ).first()
+            ))
             
             if not wallet:
                 wallet = UserWallet(
@@ -92,8 +77,8 @@ class CreditPurchaseService:
                     available_coins=2500.0
                 )
                 self.db.add(wallet)
-                self.db.commit()
-                self.db.refresh(wallet)
+                await self.db.commit()
+                await self.db.refresh(wallet)
             
             # Check if user has enough coins
             if wallet.available_coins < purchase_request.coin_cost:
@@ -103,9 +88,9 @@ class CreditPurchaseService:
                 }
             
             # Get marketplace credit
-            marketplace_credit = self.db.query(MarketplaceCredit).filter(
+            marketplace_credit = await self.db.scalar(select(MarketplaceCredit).where(
                 MarketplaceCredit.id == purchase_request.credit_id
-            ).first()
+            ))
             
             if not marketplace_credit:
                 return {
@@ -125,10 +110,10 @@ class CreditPurchaseService:
                 transaction_id=str(uuid.uuid4()),
                 user_id=purchase_request.user_id,
                 credit_id=purchase_request.credit_id,
-                credits_purchased=purchase_request.credits_to_purchase,
-                coins_spent=purchase_request.coin_cost,
-                transaction_type='PURCHASE',
-                status='COMPLETED'
+                credits_amount=purchase_request.credits_to_purchase,
+                coins_amount=purchase_request.coin_cost,
+                transaction_type=TransactionType.PURCHASE,
+                status=TransactionStatus.COMPLETED
             )
             self.db.add(transaction)
             
@@ -141,7 +126,7 @@ class CreditPurchaseService:
             marketplace_credit.coins_issued -= purchase_request.credits_to_purchase
             
             # Commit all changes
-            self.db.commit()
+            await self.db.commit()
             
             return {
                 'success': True,
@@ -154,7 +139,7 @@ class CreditPurchaseService:
             }
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             return {
                 'success': False,
                 'error': f'Purchase transaction failed: {str(e)}'
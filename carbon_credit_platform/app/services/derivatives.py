@@ -0,0 +1,214 @@
+# app/services/derivatives.py
+"""
+Precomputed variants of uploaded photos.
+
+Each geotag photo gets a web thumbnail, an orientation-normalized JPEG for
+display and a downscaled grayscale PNG for OCR. They are rendered once per
+distinct upload in a small worker pool and stored next to the original as
+`<object key>.<variant>.<ext>`. Originals are content-addressed, so a
+derivative never changes once written and can be cached forever.
+"""
+import io
+import os
+import re
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.services.image_ingest import pil_image, probe_bytes
+from app.services.storage import StorageBackend, get_storage, PUBLIC_API_URL
+from app.services.upload_writer import stage_stream, discard
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Worker pool size; PIL releases the GIL while decoding and resizing
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Derivatives never change for a given key
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+OBJECTS_URL_PATH = "/api/v1/storage/objects"
+
+_SHA256_IN_PATH = re.compile(r"objects/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})$")
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    max_side: int
+    mode: str  # PIL mode of the output
+    format: str
+    extension: str
+    content_type: str
+    save_options: tuple = ()
+
+
+DERIVATIVES: Dict[str, DerivativeSpec] = {
+    "thumb": DerivativeSpec(
+        max_side=int(os.getenv("THUMBNAIL_MAX_SIDE", "320")),
+        mode="RGB", format="JPEG", extension="jpg", content_type="image/jpeg",
+        save_options=(("quality", 80), ("optimize", True), ("progressive", True))
+    ),
+    "normalized": DerivativeSpec(
+        max_side=int(os.getenv("NORMALIZED_MAX_SIDE", "2048")),
+        mode="RGB", format="JPEG", extension="jpg", content_type="image/jpeg",
+        save_options=(("quality", 88), ("optimize", True), ("progressive", True))
+    ),
+    # Lossless, so tesseract doesn't have to read through JPEG artifacts around text
+    "ocr": DerivativeSpec(
+        max_side=int(os.getenv("OCR_MAX_SIDE", "2000")),
+        mode="L", format="PNG", extension="png", content_type="image/png",
+        save_options=(("compress_level", 6),)
+    ),
+}
+
+
+def derivative_key(key: str, variant: str) -> str:
+    return f"{key}.{variant}.{DERIVATIVES[variant].extension}"
+
+
+def derivative_path(original_path: str, variant: str) -> str:
+    """Local path of a derivative stored next to an original file"""
+    return f"{original_path}.{variant}.{DERIVATIVES[variant].extension}"
+
+
+def derivative_url(stored_path: Optional[str], variant: str) -> Optional[str]:
+    """Public URL of a derivative for a stored upload path, or None for legacy paths"""
+    match = _SHA256_IN_PATH.search(stored_path or "")
+    if not match:
+        return None
+    return f"{PUBLIC_API_URL}{OBJECTS_URL_PATH}/{match.group(1)}/{variant}"
+
+
+def render_derivatives(data: bytes) -> Dict[str, bytes]:
+    """Decode an image once and encode every derivative from it"""
+    from PIL import ImageOps
+
+    # Rejects decompression bombs before any pixels are decoded
+    probe_bytes(data)
+    image = pil_image().open(io.BytesIO(data))
+
+    # JPEG can be decoded at 1/2, 1/4 or 1/8 scale directly, which is much
+    # cheaper than decoding full size and resizing
+    largest = max(spec.max_side for spec in DERIVATIVES.values())
+    image.draft("RGB", (largest, largest))
+
+    # Bake the EXIF orientation into the pixels
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    rendered = {}
+    # Largest first, so each smaller variant is resized from the previous one
+    for variant, spec in sorted(DERIVATIVES.items(), key=lambda item: -item[1].max_side):
+        if max(image.size) > spec.max_side:
+            image = _fit(image, spec.max_side)
+        output = image.convert(spec.mode) if image.mode != spec.mode else image
+        buffer = io.BytesIO()
+        output.save(buffer, spec.format, **dict(spec.save_options))
+        rendered[variant] = buffer.getvalue()
+    return rendered
+
+
+def _fit(image: "Image.Image", max_side: int) -> "Image.Image":
+    scale = max_side / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, pil_image().LANCZOS, reducing_gap=3.0)
+
+
+def delete_derivatives(storage: StorageBackend, key: str):
+    for variant in DERIVATIVES:
+        storage.delete(derivative_key(key, variant))
+
+
+class DerivativeGenerator:
+    """Renders derivatives for stored originals in a background worker pool"""
+
+    def __init__(self, storage: Optional[StorageBackend] = None, workers: int = DERIVATIVE_WORKERS):
+        self.storage = storage or get_storage()
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="derivatives")
+        return self._executor
+
+    def start(self):
+        with self._lock:
+            self._get_executor()
+
+    def schedule(self, key: str) -> Future:
+        """Queue derivative generation for an original; concurrent requests share one job"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._get_executor().submit(self.generate, key)
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._finished(key, done))
+            return future
+
+    def _finished(self, key: str, future: Future):
+        failed = not future.cancelled() and future.exception() is not None
+        with self._lock:
+            self._pending.pop(key, None)
+            self.completed += 1
+            self.failed += 1 if failed else 0
+        if failed:
+            # Not an image PIL can read, or storage failed; served on demand later
+            logger.warning(f"Derivative generation failed for {key}: {future.exception()}")
+
+    def generate(self, key: str) -> Dict[str, str]:
+        """Render and store any missing derivatives; returns {variant: key}"""
+        keys = {variant: derivative_key(key, variant) for variant in DERIVATIVES}
+        if all(self.storage.exists(variant_key) for variant_key in keys.values()):
+            return keys
+
+        rendered = render_derivatives(self.storage.read_bytes(key))
+        for variant, data in rendered.items():
+            self._store(keys[variant], data, DERIVATIVES[variant].content_type)
+        logger.info(f"Generated derivatives for {key}")
+        return keys
+
+    def _store(self, key: str, data: bytes, content_type: str):
+        from app.services.blob_store import STAGING_DIR
+
+        staged = stage_stream(io.BytesIO(data), STAGING_DIR, max_size=len(data))
+        try:
+            self.storage.put_file(staged, key, content_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+        except BaseException:
+            discard(staged.path)
+            raise
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "pending": len(self._pending),
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_generator: Optional[DerivativeGenerator] = None
+
+
+def get_derivative_generator() -> DerivativeGenerator:
+    global _generator
+    if _generator is None:
+        _generator = DerivativeGenerator()
+    return _generator
@@ -0,0 +1,368 @@
+# app/services/document_index.py
+"""
+Text index for uploaded application documents.
+
+Documents are read page by page in a background worker pool. The text and
+key fields (owner name, survey number) go into `document_texts`, so review
+and search screens query the table instead of opening files per request.
+"""
+import io
+import os
+import re
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.document_text import DocumentText
+from app.models.forestation import ForestationApplication
+from app.models.solar_panel import SolarPanelApplication
+from app.services import ocr
+from app.services.blob_store import BlobStore
+from app.services.image_ingest import pil_image
+from app.services.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_INDEX_WORKERS = int(os.getenv("DOCUMENT_INDEX_WORKERS", "2"))
+MAX_INDEX_PAGES = int(os.getenv("MAX_INDEX_PAGES", "200"))
+MAX_INDEX_CHARS = 1_000_000
+
+APPLICATION_MODELS = {
+    "forestation": ForestationApplication,
+    "solar_panel": SolarPanelApplication,
+}
+
+# Documents indexed for each application type: (document_type, path column)
+INDEXED_DOCUMENTS = {
+    "forestation": [("ownership_document", "ownership_document_path")],
+    "solar_panel": [
+        ("ownership_document", "ownership_document_path"),
+        ("energy_certification", "energy_certification_path")
+    ],
+}
+
+# Land records: "Owner Name: ...", "Name of the Land Owner - ...", "Khatedar: ...", "Pattadar Name: ..."
+_OWNER_NAME = re.compile(
+    r"""
+    \b(?:
+        name\s+of\s+(?:the\s+)?(?:land\s*)?(?:owner|holder|occupant|khatedar|pattadar)s?
+        |(?:land\s*)?owner(?:'s)?\s+name
+        |(?:pattadar|khatedar)(?:\s+name)?
+        |owner
+    )
+    \s*[:\-–]\s*
+    (?P<value>[A-Za-z][A-Za-z.' ]{1,100}?)
+    (?=\s{2,}|\s*[,;|(\n]|\s+(?:[SDW]/[Oo]|survey|sy\.|khasra|gat|village|age)\b|\s*$)
+    """,
+    re.IGNORECASE | re.MULTILINE | re.VERBOSE
+)
+
+# "Survey No. 45/2A", "Sy. No: 112", "Khasra No. 231/1", "Gat Number - 78", "Survey No./Hissa No.: 45/2"
+_SURVEY_NUMBER = re.compile(
+    r"""
+    \b(?:survey|sy|khasra|gat|dag|r\.?\s?s)\.?\s*(?:no|number|nos)\.?
+    (?:\s*/\s*(?:hissa|sub[\s-]?division)\s*(?:no|number)\.?)?
+    \s*[:\-–]?\s*
+    (?P<value>\d+[0-9A-Za-z]*(?:\s*[/\-]\s*[0-9A-Za-z]+)*)
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+
+class UnsupportedDocumentError(ValueError):
+    """The document format can't be indexed"""
+
+
+def normalize_search_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def extract_key_fields(text: str) -> Dict[str, Optional[str]]:
+    """Owner name and survey number from document text (first match wins)"""
+    owner = _OWNER_NAME.search(text)
+    survey = _SURVEY_NUMBER.search(text)
+    return {
+        "owner_name": re.sub(r"\s+", " ", owner.group("value")).strip(" .") if owner else None,
+        "survey_number": re.sub(r"\s+", "", survey.group("value")).upper() if survey else None
+    }
+
+
+def iter_document_pages(stream) -> Iterator[str]:
+    """Yield the text of each page. Stored files have no extension, so the format is sniffed."""
+    header = stream.read(8)
+    stream.seek(0)
+
+    if header.startswith(b"%PDF"):
+        # Optional: PDF text extraction
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise UnsupportedDocumentError("pypdf is required to index PDF documents")
+        # pypdf parses pages lazily, so only one page's objects are in memory at a time
+        reader = PdfReader(stream)
+        for index, page in enumerate(reader.pages):
+            if index >= MAX_INDEX_PAGES:
+                break
+            yield page.extract_text() or ""
+        return
+
+    data = stream.read()
+    try:
+        image_format = pil_image().open(io.BytesIO(data)).format
+    except Exception:
+        image_format = None
+
+    if image_format:
+        # Scanned document photographed or saved as an image
+        from app.services.image_context import ImageContext
+        context = ImageContext(data)
+        context.check()
+        ocr_source = context.ocr_source
+        if ocr_source is not None:
+            yield ocr.image_bytes_to_string(*ocr_source)
+        elif context.gray is not None:
+            yield ocr.array_to_string(context.gray)
+        else:
+            raise UnsupportedDocumentError(f"Cannot OCR {image_format} images")
+        return
+
+    if b"\x00" not in data[:1024]:
+        yield data.decode("utf-8", errors="ignore")
+        return
+
+    raise UnsupportedDocumentError("Unsupported document format")
+
+
+class DocumentIndexer:
+    """Extracts document text in a background worker pool"""
+
+    def __init__(self, session_factory=SessionLocal, storage: Optional[StorageBackend] = None,
+                 workers: int = DOCUMENT_INDEX_WORKERS):
+        self.session_factory = session_factory
+        self.storage = storage or get_storage()
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.processed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="document-index")
+            return self._executor
+
+    def start(self):
+        self._get_executor()
+
+    def schedule(self, application_type: str, application_id: int, document_type: str, path: Optional[str]) -> Optional[Future]:
+        """Queue a document for indexing; call after the application is committed"""
+        if not path:
+            return None
+        executor = self._get_executor()
+        with self._lock:
+            self.pending += 1
+        future = executor.submit(self.index_document, application_type, application_id, document_type, path)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+            self.processed += 1
+
+    def schedule_application(self, application_type: str, application) -> List[Future]:
+        """Queue every indexed document of an application"""
+        futures = []
+        for document_type, column in INDEXED_DOCUMENTS[application_type]:
+            future = self.schedule(application_type, application.id, document_type, getattr(application, column))
+            if future is not None:
+                futures.append(future)
+        return futures
+
+    def _open(self, db: Session, path: str) -> Tuple[Optional[str], object]:
+        """(sha256, file object) for a stored path; legacy paths are read from disk"""
+        blob_store = BlobStore(db, self.storage)
+        sha256 = blob_store.sha256_for_path(path)
+        key = self.storage.key_for(path)
+        if key is not None:
+            return sha256, self.storage.open_read(key)
+        return sha256, open(path, "rb")
+
+    def index_document(self, application_type: str, application_id: int, document_type: str, path: str) -> str:
+        """Extract and store one document's text; returns the resulting status"""
+        db = self.session_factory()
+        try:
+            # The application may have been deleted while the job was queued
+            model = APPLICATION_MODELS[application_type]
+            if db.query(model.id).filter(model.id == application_id).first() is None:
+                return "deleted"
+
+            row = db.query(DocumentText).filter(
+                DocumentText.application_type == application_type,
+                DocumentText.application_id == application_id,
+                DocumentText.document_type == document_type
+            ).first()
+            if row is None:
+                row = DocumentText(
+                    application_type=application_type,
+                    application_id=application_id,
+                    document_type=document_type
+                )
+                db.add(row)
+
+            sha256 = BlobStore(db, self.storage).sha256_for_path(path)
+            if sha256 and row.sha256 == sha256 and row.status == "done":
+                return row.status
+
+            # Identical content already indexed for another application
+            existing = None
+            if sha256:
+                existing = db.query(DocumentText).filter(
+                    DocumentText.sha256 == sha256,
+                    DocumentText.status == "done"
+                ).first()
+
+            if existing is not None:
+                for field in ("page_count", "text", "search_text", "owner_name", "survey_number"):
+                    setattr(row, field, getattr(existing, field))
+            else:
+                row.status = "processing"
+                db.commit()
+
+                sha256, stream = self._open(db, path)
+                pages = []
+                length = 0
+                with stream:
+                    for page_text in iter_document_pages(stream):
+                        pages.append(page_text)
+                        length += len(page_text)
+                        if length >= MAX_INDEX_CHARS:
+                            break
+
+                text = "\n\n".join(pages)[:MAX_INDEX_CHARS]
+                row.page_count = len(pages)
+                row.text = text
+                row.search_text = normalize_search_text(text)
+                fields = extract_key_fields(text)
+                row.owner_name = fields["owner_name"]
+                row.survey_number = fields["survey_number"]
+
+            row.sha256 = sha256
+            row.status = "done"
+            row.error = None
+            row.extracted_at = datetime.now(timezone.utc)
+            db.commit()
+            logger.info(f"Indexed {document_type} of {application_type} application {application_id}")
+            return row.status
+
+        except Exception as e:
+            db.rollback()
+            status = "unsupported" if isinstance(e, UnsupportedDocumentError) else "failed"
+            if status == "failed":
+                logger.error(f"Error indexing {document_type} of {application_type} application {application_id}: {str(e)}")
+            self._mark(db, application_type, application_id, document_type, status, str(e))
+            return status
+        finally:
+            db.close()
+
+    def _mark(self, db: Session, application_type: str, application_id: int, document_type: str, status: str, error: str):
+        row = db.query(DocumentText).filter(
+            DocumentText.application_type == application_type,
+            DocumentText.application_id == application_id,
+            DocumentText.document_type == document_type
+        ).first()
+        if row is None:
+            row = DocumentText(application_type=application_type, application_id=application_id, document_type=document_type)
+            db.add(row)
+        row.status = status
+        row.error = error[:1000]
+        db.commit()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "pending": self.pending,
+                "processed": self.processed
+            }
+
+    def shutdown(self):
+        # Drained outside the lock: finishing jobs take it to update the counters
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_indexer: Optional[DocumentIndexer] = None
+
+
+def get_document_indexer() -> DocumentIndexer:
+    global _indexer
+    if _indexer is None:
+        _indexer = DocumentIndexer()
+    return _indexer
+
+
+class DocumentIndexService:
+    """Queries over indexed document text"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_application_documents(self, application_type: str, application_id: int) -> List[DocumentText]:
+        return self.db.query(DocumentText).filter(
+            DocumentText.application_type == application_type,
+            DocumentText.application_id == application_id
+        ).order_by(DocumentText.document_type).all()
+
+    def delete_application_documents(self, application_type: str, application_id: int) -> int:
+        """Drop index rows of a deleted application (in the caller's transaction)"""
+        return self.db.query(DocumentText).filter(
+            DocumentText.application_type == application_type,
+            DocumentText.application_id == application_id
+        ).delete(synchronize_session=False)
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        owner_name: Optional[str] = None,
+        survey_number: Optional[str] = None,
+        application_type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[DocumentText], int]:
+        """Match documents by content words, owner name and/or survey number"""
+        query = self.db.query(DocumentText).filter(DocumentText.status == "done")
+
+        if application_type:
+            query = query.filter(DocumentText.application_type == application_type)
+        if survey_number:
+            query = query.filter(DocumentText.survey_number == re.sub(r"\s+", "", survey_number).upper())
+        if owner_name:
+            query = query.filter(DocumentText.owner_name.ilike(f"%{owner_name.strip()}%"))
+        for term in normalize_search_text(q or "").split():
+            query = query.filter(DocumentText.search_text.contains(term, autoescape=True))
+
+        total = query.count()
+        results = query.order_by(DocumentText.id.desc()).offset(skip).limit(limit).all()
+        return results, total
+
+    @staticmethod
+    def snippet(document: DocumentText, q: Optional[str], width: int = 160) -> Optional[str]:
+        """Short excerpt around the first search term (or the start of the text)"""
+        text = document.search_text or ""
+        if not text:
+            return None
+        terms = normalize_search_text(q or "").split()
+        position = text.find(terms[0]) if terms else 0
+        start = max(0, position - width // 2) if position > 0 else 0
+        excerpt = text[start:start + width]
+        return ("..." if start else "") + excerpt + ("..." if start + width < len(text) else "")
@@ -1,28 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Union
 import os
-import uuid
-import numpy as np
-import cv2
 import asyncio
-import aiohttp
 from datetime import datetime
 import random
 
+from app.core.aggregates import aggregate, count_where
+from app.core.pagination import Page, paginate
 from app.models.forestation import ForestationApplication
 from app.schemas.forestation import (
     ForestationApplicationCreate, 
     ForestationApplicationUpdate,
     GeotagValidationResponse
 )
-from app.services.geotag_extractor import GeotagExtractor
+from app.services.geotag_extractor import get_geotag_extractor
+from app.services.http_client import HttpClient, get_http_client
+from app.services.image_context import ImageContext
+from app.services.blob_store import BlobStore, sha256_for_key
+from app.services.document_index import DocumentIndexService, get_document_indexer
+from app.services.upload_writer import MAX_UPLOAD_SIZE, UploadTooLargeError
+from app.services.image_ingest import ImageTooLargeError
 
 class ForestationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, http_client: Optional[HttpClient] = None):
         self.db = db
         self.upload_dir = "uploads/forestation"
         self._ensure_upload_dir()
+        self.blob_store = BlobStore(db)
+        self._pending_derivatives: List[str] = []
+        self.http_client = http_client or get_http_client()
     
     async def download_satellite_image(self, lat, lon, zoom=16):
         """Download real-time satellite imagery from free sources"""
@@ -32,7 +38,7 @@ class ForestationService:
             # ESRI World Imagery (Free)
             tile_url = f"https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{zoom}/{y}/{x}"
             
-            async with aiohttp.ClientSession() as session:
+            async with self.http_client.session() as session:
                 async with session.get(tile_url) as response:
                     if response.status == 200:
                         image_data = await response.read()
@@ -55,6 +61,9 @@ class ForestationService:
     
     def analyze_vegetation_cv(self, image):
         """Enhanced computer vision vegetation analysis with tree counting"""
+        import cv2
+        import numpy as np
+
         try:
             img_array = np.array(image.convert('RGB'))
             img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
@@ -119,6 +128,8 @@ class ForestationService:
     
     def count_individual_trees(self, img, vegetation_mask):
         """Count individual trees using contour detection and clustering"""
+        import cv2
+
         try:
             # Apply morphological operations to separate tree crowns
             kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
@@ -160,7 +171,7 @@ class ForestationService:
                 'hourly': 'temperature_2m,relative_humidity_2m,cloud_cover,direct_radiation'
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with self.http_client.session() as session:
                 async with session.get(url, params=params) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -318,40 +329,57 @@ class ForestationService:
         os.makedirs(os.path.join(self.upload_dir, "documents"), exist_ok=True)
         os.makedirs(os.path.join(self.upload_dir, "photos"), exist_ok=True)
     
-    def _save_file(self, file, file_type: str) -> str:
+    async def _save_file(self, file, file_type: str) -> str:
         """Save uploaded file and return file path"""
-        try:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            
-            # Determine subdirectory based on file type
-            subdir = "documents" if file_type in ["pdf", "doc", "docx"] else "photos"
-            file_path = os.path.join(self.upload_dir, subdir, unique_filename)
-            
-            # Save file with proper resource management
-            file.file.seek(0)  # Reset file pointer
-            content = file.file.read()
-            
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
-            
-            # Return relative path for database storage
-            return file_path
-        except Exception as e:
-            # Log the error for debugging
-            print(f"Error saving file: {str(e)}")
-            # Return a placeholder path instead of failing
-            return f"error_saving_{file_type}_{uuid.uuid4()}"
+        # Content-addressed: identical files are stored once and reference-counted.
+        # Failures propagate: a row must never point at a file that wasn't stored
+        blob = await self.blob_store.put(file)
+        if file_type == "image" or (blob.content_type or "").startswith("image/"):
+            self._pending_derivatives.append(blob.sha256)
+        
+        # Return relative path for database storage
+        return blob.path
+    
+    def _register_upload(self, key: str, file_type: str) -> str:
+        """Reference a file the client uploaded directly to storage and return its path"""
+        blob = self.blob_store.register(key)
+        if file_type == "image":
+            self._pending_derivatives.append(blob.sha256)
+        return blob.path
+    
+    def _schedule_derivatives(self):
+        """Render thumbnails and the OCR variant of saved photos; call after the references commit"""
+        for sha256 in self._pending_derivatives:
+            self.blob_store.schedule_derivatives(sha256)
+        self._pending_derivatives = []
+    
+    async def _load_uploaded_image(self, key: str) -> ImageContext:
+        """Fetch a directly uploaded photo from storage for validation"""
+        # Read-only checks of the key and object; the reference is added once the photo is accepted
+        if sha256_for_key(key) is None:
+            raise ValueError(f"Invalid upload key: {key}")
+        size = await asyncio.to_thread(self.blob_store.storage.size, key)
+        if size is None:
+            raise ValueError(f"Upload not found: {key}")
+        if size > MAX_UPLOAD_SIZE:
+            raise ValueError(f"File size too large. Maximum {MAX_UPLOAD_SIZE // (1024 * 1024)}MB allowed.")
+        data = await asyncio.to_thread(self.blob_store.storage.read_bytes, key)
+        return ImageContext(data, os.path.basename(key))
     
-    def validate_geotag_photo(self, file) -> GeotagValidationResponse:
+    async def validate_geotag_photo(self, file) -> GeotagValidationResponse:
         """Validate geotag photo with fallback to default coordinates"""
         try:
-            # Save file temporarily
-            temp_path = self._save_file(file, "image")
+            # Read the upload into memory; validation never writes it to disk
+            if isinstance(file, ImageContext):
+                context = file
+            else:
+                context = await asyncio.to_thread(ImageContext.from_upload, file)
+            
+            # Reject oversized files and decompression bombs before anything is decoded
+            await asyncio.to_thread(context.check)
             
             # Try to extract GPS coordinates
-            coordinates = self._extract_gps_with_fallback(temp_path)
+            coordinates = await self._extract_gps_with_fallback(context)
             
             if coordinates:
                 lat, lon = coordinates
@@ -371,6 +399,8 @@ class ForestationService:
                     message="Using default location (Bangalore) - GPS not found in image"
                 )
                 
+        except (UploadTooLargeError, ImageTooLargeError):
+            raise
         except Exception as e:
             # Still return valid with defaults to allow application to proceed
             return GeotagValidationResponse(
@@ -380,15 +410,14 @@ class ForestationService:
                 message=f"Using default location due to error: {str(e)}"
             )
     
-    def _extract_gps_with_fallback(self, image_path: str) -> Optional[Tuple[float, float]]:
+    async def _extract_gps_with_fallback(self, image: Union[str, ImageContext]) -> Optional[Tuple[float, float]]:
         """Extract GPS using OpenAI Vision API as primary method"""
         try:
-            from app.services.geotag_extractor import GeotagExtractor
             
             # Method 1: OpenAI Vision API (Primary method)
-            if os.getenv('OPENAI_API_KEY'):
-                extractor = GeotagExtractor()
-                coordinates = extractor.extract_coordinates_with_openai(image_path)
+            extractor = get_geotag_extractor()
+            if extractor.vision_client.is_configured:
+                coordinates = await extractor.extract_coordinates_with_openai(image)
                 if coordinates:
                     print(f"OpenAI Vision API extracted GPS coordinates: {coordinates}")
                     return coordinates
@@ -400,12 +429,14 @@ class ForestationService:
             print(f"GPS extraction error: {e}")
             return None
     
-    def create_application(
+    async def create_application(
         self, 
         user_id: int, 
         application_data: ForestationApplicationCreate,
         ownership_document=None,
-        geotag_photo=None
+        geotag_photo=None,
+        ownership_document_key: Optional[str] = None,
+        geotag_photo_key: Optional[str] = None
     ) -> ForestationApplication:
         """Create a new forestation application"""
         
@@ -415,19 +446,31 @@ class ForestationService:
         latitude = None
         longitude = None
         
-        if ownership_document:
-            ownership_doc_path = self._save_file(ownership_document, "pdf")
+        # Validate the photo before storing or referencing anything: validation calls the
+        # vision API, and no write transaction may stay open across it
+        geotag_validation = None
+        if geotag_photo_key:
+            geotag_validation = await self.validate_geotag_photo(await self._load_uploaded_image(geotag_photo_key))
+        elif geotag_photo:
+            geotag_validation = await self.validate_geotag_photo(geotag_photo)
         
-        if geotag_photo:
-            # Validate geotag photo
-            geotag_validation = self.validate_geotag_photo(geotag_photo)
+        if geotag_validation is not None:
             if not geotag_validation.is_valid:
                 raise ValueError(f"Invalid geotagged photo: {geotag_validation.message}")
-            
-            geotag_photo_path = self._save_file(geotag_photo, "image")
             latitude = geotag_validation.latitude
             longitude = geotag_validation.longitude
         
+        if ownership_document_key:
+            # Uploaded directly to storage; only the key comes through the API
+            ownership_doc_path = self._register_upload(ownership_document_key, "document")
+        elif ownership_document:
+            ownership_doc_path = await self._save_file(ownership_document, "pdf")
+        
+        if geotag_photo_key:
+            geotag_photo_path = self._register_upload(geotag_photo_key, "image")
+        elif geotag_photo:
+            geotag_photo_path = await self._save_file(geotag_photo, "image")
+        
         # Create application record
         db_application = ForestationApplication(
             user_id=user_id,
@@ -444,6 +487,11 @@ class ForestationService:
         self.db.commit()
         self.db.refresh(db_application)
         
+        # Thumbnails and the OCR variant are rendered once, off the request path
+        self._schedule_derivatives()
+        # Extract document text for review/search in the background
+        get_document_indexer().schedule_application("forestation", db_application)
+        
         return db_application
     
     def get_application(self, application_id: int, user_id: int) -> Optional[ForestationApplication]:
@@ -457,26 +505,29 @@ class ForestationService:
         self, 
         user_id: int, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[ForestationApplication]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get all applications for a user"""
-        return self.db.query(ForestationApplication).filter(
+        query = self.db.query(ForestationApplication).filter(
             ForestationApplication.user_id == user_id
-        ).order_by(desc(ForestationApplication.created_at)).offset(skip).limit(limit).all()
+        )
+        return paginate(query, ForestationApplication.created_at, ForestationApplication.id, limit, cursor=cursor, skip=skip)
     
     def get_all_applications(
         self, 
         skip: int = 0, 
         limit: int = 100,
-        status: Optional[str] = None
-    ) -> List[ForestationApplication]:
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get all applications (admin function)"""
         query = self.db.query(ForestationApplication)
         
         if status:
             query = query.filter(ForestationApplication.status == status)
         
-        return query.order_by(desc(ForestationApplication.created_at)).offset(skip).limit(limit).all()
+        return paginate(query, ForestationApplication.created_at, ForestationApplication.id, limit, cursor=cursor, skip=skip)
     
     def update_application(
         self, 
@@ -509,40 +560,33 @@ class ForestationService:
         if not application:
             return False
         
-        # Delete associated files
+        # Release stored files (blobs are freed once nothing references them)
         for file_path in [
             application.ownership_document_path,
             application.geotag_photo_path
         ]:
+            if self.blob_store.release(file_path):
+                continue
+            # Files saved before the blob store existed
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
         
+        DocumentIndexService(self.db).delete_application_documents("forestation", application.id)
         self.db.delete(application)
         self.db.commit()
+        self.blob_store.purge_released()
         
         return True
     
     def get_application_stats(self, user_id: int) -> dict:
         """Get application statistics for a user"""
-        total_applications = self.db.query(ForestationApplication).filter(
-            ForestationApplication.user_id == user_id
-        ).count()
-        
-        pending_applications = self.db.query(ForestationApplication).filter(
-            ForestationApplication.user_id == user_id,
-            ForestationApplication.status == "pending"
-        ).count()
-        
-        approved_applications = self.db.query(ForestationApplication).filter(
+        return aggregate(
+            self.db,
             ForestationApplication.user_id == user_id,
-            ForestationApplication.status == "approved"
-        ).count()
-        
-        return {
-            "total_applications": total_applications,
-            "pending_applications": pending_applications,
-            "approved_applications": approved_applications
-        }
+            total_applications=count_where(),
+            pending_applications=count_where(ForestationApplication.status == "pending"),
+            approved_applications=count_where(ForestationApplication.status == "approved")
+        )
     
     async def perform_complete_forest_analysis(self, application_id: int, user_id: int) -> Dict:
         """Perform complete forest analysis with satellite imagery and carbon credit calculation"""
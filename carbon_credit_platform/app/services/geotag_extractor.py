@@ -1,58 +1,40 @@
 import os
-from typing import Optional, Tuple
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
-import exifread
+from typing import Optional, Tuple, Union
+
+from app.services.image_context import ImageContext
+from app.services.vision_client import VisionClient, get_vision_client
+
+# Prompt for the OpenAI Vision coordinate reader
+VISION_COORDINATES_PROMPT = (
+    "Analyze this image and extract GPS coordinates (latitude and longitude) if visible. Look for:\n"
+    "1. GPS metadata overlays\n"
+    "2. Location information in the image\n"
+    "3. Geographic coordinates displayed\n"
+    "4. Any location tags or markers\n\n"
+    "Return ONLY the coordinates in format 'latitude,longitude' (e.g., '28.123456,77.654321') or 'none' if no coordinates found."
+)
 
 class GeotagExtractor:
-    def __init__(self):
+    def __init__(self, vision_client: Optional[VisionClient] = None):
         # OpenAI is optional - system works without it
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = None
-        if self.api_key:
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-            except:
-                print("OpenAI client initialization failed - using fallback methods")
+        self.vision_client = vision_client or get_vision_client()
+        if not self.vision_client.is_configured:
+            print("OpenAI API key not configured - using fallback methods")
     
     @staticmethod
-    def extract_coordinates(image_path: str) -> Optional[Tuple[float, float]]:
+    def extract_coordinates(image: Union[str, ImageContext]) -> Optional[Tuple[float, float]]:
         """Extract GPS coordinates from image EXIF data - PRIMARY METHOD"""
         try:
-            # Method 1: Using PIL
-            image = Image.open(image_path)
-            exifdata = image.getexif()
+            context = ImageContext.ensure(image)
             
-            if not exifdata:
+            if not context.exif:
                 print(f"No EXIF data found in image")
                 return None
             
-            for tag_id, value in exifdata.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag == "GPSInfo":
-                    gps_info = {}
-                    for gps_tag_id, gps_value in value.items():
-                        gps_tag = GPSTAGS.get(gps_tag_id, gps_tag_id)
-                        gps_info[gps_tag] = gps_value
-                    
-                    lat = gps_info.get("GPSLatitude")
-                    lat_ref = gps_info.get("GPSLatitudeRef")
-                    lon = gps_info.get("GPSLongitude")
-                    lon_ref = gps_info.get("GPSLongitudeRef")
-                    
-                    if lat and lon:
-                        # Convert to decimal degrees
-                        lat_decimal = lat[0] + lat[1]/60 + lat[2]/3600
-                        lon_decimal = lon[0] + lon[1]/60 + lon[2]/3600
-                        
-                        if lat_ref == "S":
-                            lat_decimal = -lat_decimal
-                        if lon_ref == "W":
-                            lon_decimal = -lon_decimal
-                        
-                        print(f"Extracted GPS: {lat_decimal}, {lon_decimal}")
-                        return lat_decimal, lon_decimal
+            coordinates = context.gps_coordinates
+            if coordinates:
+                print(f"Extracted GPS: {coordinates[0]}, {coordinates[1]}")
+                return coordinates
             
             return None
             
@@ -60,11 +42,11 @@ class GeotagExtractor:
             print(f"Error extracting GPS with PIL: {e}")
             return None
     
-    def extract_coordinates_enhanced(self, image_path: str) -> Optional[Tuple[float, float]]:
+    async def extract_coordinates_enhanced(self, image: Union[str, ImageContext]) -> Optional[Tuple[float, float]]:
         """Enhanced extraction using OpenAI Vision API as primary method"""
         try:
             # Method 1: OpenAI Vision API (Primary method)
-            coordinates = self.extract_coordinates_with_openai(image_path)
+            coordinates = await self.extract_coordinates_with_openai(image)
             if coordinates:
                 print(f"OpenAI Vision API successfully extracted coordinates: {coordinates}")
                 return coordinates
@@ -86,41 +68,22 @@ class GeotagExtractor:
         except:
             return None
     
-    def extract_coordinates_with_openai(self, image_path: str) -> Optional[Tuple[float, float]]:
+    async def extract_coordinates_with_openai(self, image: Union[str, ImageContext]) -> Optional[Tuple[float, float]]:
         """Extract GPS coordinates using OpenAI Vision API - PRIMARY METHOD"""
-        if not self.client:
+        if not self.vision_client.is_configured:
             print("OpenAI client not available")
             return None
         
         try:
-            import base64
-            with open(image_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode()
+            context = ImageContext.ensure(image)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Analyze this image and extract GPS coordinates (latitude and longitude) if visible. Look for:\n1. GPS metadata overlays\n2. Location information in the image\n3. Geographic coordinates displayed\n4. Any location tags or markers\n\nReturn ONLY the coordinates in format 'latitude,longitude' (e.g., '28.123456,77.654321') or 'none' if no coordinates found."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=100
+            result = await self.vision_client.complete(
+                context.data,
+                VISION_COORDINATES_PROMPT,
+                max_tokens=100,
+                detail="high"
             )
-            
-            result = response.choices[0].message.content.strip()
+            result = result.strip()
             print(f"OpenAI Vision API response: {result}")
             
             if ',' in result and result.lower() != 'none':
@@ -137,4 +100,15 @@ class GeotagExtractor:
         except Exception as e:
             print(f"OpenAI extraction failed: {e}")
         
-        return None
\ No newline at end of file
+        return None
+
+
+_extractor: Optional[GeotagExtractor] = None
+
+
+def get_geotag_extractor() -> GeotagExtractor:
+    """Return the process-wide extractor (it holds no per-request state)"""
+    global _extractor
+    if _extractor is None:
+        _extractor = GeotagExtractor()
+    return _extractor
@@ -1,39 +1,52 @@
 # app/services/gps_extraction_service.py
 import os
-import base64
-import tempfile
-import re
-import cv2
-import numpy as np
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
-import openai
-from typing import Dict, Optional
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, Optional, Union
 import logging
 import json
-import pytesseract
 
-# Configure Tesseract path
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+from app.services import ocr
+from app.services.coordinate_parser import parse_coordinates
+from app.services.image_context import ImageContext
+from app.services.vision_client import VisionClient, get_vision_client
 
 logger = logging.getLogger(__name__)
 
+# Images processed at once by a batch request
+BATCH_MAX_CONCURRENCY = int(os.getenv("GPS_BATCH_MAX_CONCURRENCY", "4"))
+
+# Prompt for the OpenAI Vision fallback
+VISION_LOCATION_PROMPT = """Analyze this solar panel installation image and try to extract location information. 
+                                Look for:
+                                1. Any visible GPS coordinates or location stamps
+                                2. Geographical landmarks that could help identify the location
+                                3. Solar panel installation characteristics that might indicate region
+                                4. Any text or metadata visible in the image
+                                
+                                If you can determine a specific location, provide latitude and longitude in decimal degrees.
+                                
+                                Respond in this exact JSON format:
+                                {
+                                    "has_coordinates": true/false,
+                                    "latitude": number or null,
+                                    "longitude": number or null,
+                                    "confidence": "high/medium/low",
+                                    "method": "description of how you determined the location",
+                                    "location_description": "what you see in the image that helped identify location"
+                                }"""
+
 class GPSExtractionService:
-    def __init__(self):
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        
-        self.openai_client = openai.OpenAI(api_key=api_key)
+    def __init__(self, vision_client: Optional[VisionClient] = None):
+        # Shared OpenAI Vision client (one per process, not per request)
+        self.vision_client = vision_client or get_vision_client()
     
-    def extract_gps_from_exif(self, image_path: str) -> Optional[Dict]:
+    def extract_gps_from_exif(self, context: ImageContext) -> Optional[Dict]:
         """Extract GPS coordinates from image EXIF data using the carbon_calculator method"""
         try:
             # Use the existing carbon_calculator method
-            from app.services.carbon_calculator import carbon_calculator
+            from app.services.carbon_calculator import get_carbon_calculator
             
-            lat, lon = carbon_calculator.extract_gps_from_image(image_path)
+            lat, lon = get_carbon_calculator().extract_gps_from_image(context)
             
             if lat is not None and lon is not None:
                 logger.info(f"Successfully extracted GPS from EXIF: {lat}, {lon}")
@@ -62,27 +75,17 @@ class GPSExtractionService:
         except:
             return None
     
-    def encode_image_to_base64(self, image_path: str) -> str:
-        """Convert image to base64 for OpenAI API"""
-        try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
-        except Exception as e:
-            logger.error(f"Error encoding image: {str(e)}")
-            raise
-    
-    def extract_gps_with_opencv(self, image_path: str) -> Optional[Dict]:
+    def extract_gps_with_opencv(self, context: ImageContext) -> Optional[Dict]:
         """Extract GPS coordinates using OpenCV for better text detection and processing"""
+        import cv2
+
         try:
-            # Read image with OpenCV
-            img = cv2.imread(image_path)
-            if img is None:
-                logger.error(f"Could not read image: {image_path}")
+            # Grayscale from the shared context (decoded once per image)
+            gray = context.gray
+            if gray is None:
+                logger.error(f"Could not read image: {context.name}")
                 return None
             
-            # Convert to different color spaces for better text detection
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
             # Apply various preprocessing techniques
             processed_images = []
             
@@ -109,9 +112,8 @@ class GPSExtractionService:
             
             for i, processed_img in enumerate(processed_images):
                 try:
-                    # Convert OpenCV image to PIL for pytesseract
-                    pil_img = Image.fromarray(processed_img)
-                    text = pytesseract.image_to_string(pil_img, config='--psm 6')
+                    # OCR the processed array (spilled to tmpfs for the tesseract binary)
+                    text = ocr.array_to_string(processed_img, config='--psm 6')
                     
                     logger.info(f"OpenCV processed image {i+1} OCR text: {text[:200]}...")
                     
@@ -147,96 +149,20 @@ class GPSExtractionService:
             return None
     
     def _extract_coordinates_from_text(self, text: str) -> Optional[Dict]:
-        """Extract GPS coordinates from text using regex patterns with improved accuracy"""
-        patterns = [
-            # Pattern 1: JSON format with latitude/longitude fields (highest priority for API responses)
-            {
-                'pattern': r'"latitude":\s*([+-]?\d+\.?\d*).*?"longitude":\s*([+-]?\d+\.?\d*)',
-                'name': 'JSON format',
-                'priority': 1
-            },
-            # Pattern 2: "Lat 28.586847° Long 77.071348°" (from your image)
-            {
-                'pattern': r'Lat\s+([+-]?\d+\.?\d*)\s*°?\s*Long\s+([+-]?\d+\.?\d*)\s*°?',
-                'name': 'Lat Long format',
-                'priority': 2
-            },
-            # Pattern 3: "Latitude: 28.586847 Longitude: 77.071348"
-            {
-                'pattern': r'Latitude:\s*([+-]?\d+\.?\d*)\s*Longitude:\s*([+-]?\d+\.?\d*)',
-                'name': 'Latitude Longitude labels',
-                'priority': 3
-            },
-            # Pattern 4: "28.586847° N, 77.071348° E"
-            {
-                'pattern': r'([+-]?\d+\.?\d*)\s*°?\s*[NS]?\s*,\s*([+-]?\d+\.?\d*)\s*°?\s*[EW]?',
-                'name': 'Degrees with direction',
-                'priority': 4
-            },
-            # Pattern 5: "GPS: 28.586847, 77.071348"
-            {
-                'pattern': r'GPS:\s*([+-]?\d+\.?\d*)\s*,\s*([+-]?\d+\.?\d*)',
-                'name': 'GPS prefix',
-                'priority': 5
-            },
-            # Pattern 6: "28.586847, 77.071348"
-            {
-                'pattern': r'([+-]?\d+\.?\d*)\s*,\s*([+-]?\d+\.?\d*)',
-                'name': 'Simple decimal',
-                'priority': 6
-            },
-            # Pattern 7: "28° 35' 12.6\" N, 77° 4' 16.9\" E" (degrees, minutes, seconds)
-            {
-                'pattern': r'(\d+)\s*°\s*(\d+)\s*[\'′]\s*([\d.]+)\s*["″]\s*[NS]?\s*,\s*(\d+)\s*°\s*(\d+)\s*[\'′]\s*([\d.]+)\s*["″]\s*[EW]?',
-                'name': 'DMS format',
-                'priority': 7
-            }
-        ]
-        
-        # Sort patterns by priority (lower number = higher priority)
-        patterns.sort(key=lambda x: x['priority'])
-        
-        for pattern_info in patterns:
-            pattern = pattern_info['pattern']
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            
-            if matches:
-                match = matches[0]
-                logger.info(f"Found GPS coordinates using pattern '{pattern_info['name']}': {match}")
-                
-                try:
-                    if pattern_info['name'] == 'DMS format':  # DMS format (degrees, minutes, seconds)
-                        lat_deg, lat_min, lat_sec, lon_deg, lon_min, lon_sec = match
-                        lat = float(lat_deg) + float(lat_min)/60 + float(lat_sec)/3600
-                        lon = float(lon_deg) + float(lon_min)/60 + float(lon_sec)/3600
-                        
-                        # Check for N/S and E/W indicators in the text
-                        if 'S' in text.upper() and float(lat_deg) > 0:
-                            lat = -lat
-                        if 'W' in text.upper() and float(lon_deg) > 0:
-                            lon = -lon
-                    else:
-                        lat = float(match[0])
-                        lon = float(match[1])
-                    
-                    # Validate coordinate ranges
-                    if -90 <= lat <= 90 and -180 <= lon <= 180:
-                        logger.info(f"Valid GPS coordinates extracted: {lat}, {lon}")
-                        return {
-                            'latitude': lat, 
-                            'longitude': lon,
-                            'method': pattern_info['name'],
-                            'confidence': self._calculate_text_confidence(text, {'latitude': lat, 'longitude': lon})
-                        }
-                    else:
-                        logger.warning(f"Invalid coordinate ranges: lat={lat}, lon={lon}")
-                        
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Error parsing coordinates from pattern '{pattern_info['name']}': {e}")
-                    continue
+        """Extract GPS coordinates from text using the shared coordinate parser"""
+        coords = parse_coordinates(text)
+        if not coords:
+            logger.info("No valid GPS coordinates found in text")
+            return None
         
-        logger.info("No valid GPS coordinates found in text")
-        return None
+        lat, lon = coords['latitude'], coords['longitude']
+        logger.info(f"Valid GPS coordinates extracted using '{coords['method']}': {lat}, {lon}")
+        return {
+            'latitude': lat,
+            'longitude': lon,
+            'method': coords['method'],
+            'confidence': self._calculate_text_confidence(text, {'latitude': lat, 'longitude': lon})
+        }
     
     def _calculate_text_confidence(self, text: str, coords: Dict) -> float:
         """Calculate confidence score based on text quality and coordinate context"""
@@ -267,12 +193,16 @@ class GPSExtractionService:
         
         return min(confidence, 1.0)
 
-    def extract_gps_from_text(self, image_path: str) -> Optional[Dict]:
+    def extract_gps_from_text(self, context: ImageContext) -> Optional[Dict]:
         """Extract GPS coordinates from text written in the image using OCR"""
         try:
-            # Use pytesseract to extract text from image
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image)
+            # Use pytesseract to extract text from image; the OCR derivative or the
+            # original upload is passed through unchanged when tesseract can read it
+            ocr_source = context.ocr_source
+            if ocr_source:
+                text = ocr.image_bytes_to_string(*ocr_source)
+            else:
+                text = ocr.array_to_string(context.gray)
             
             logger.info(f"OCR extracted text: {text}")
             
@@ -295,11 +225,17 @@ class GPSExtractionService:
             logger.error(f"Error in OCR GPS extraction: {str(e)}")
             return None
 
-    def extract_gps_with_openai(self, image_path: str) -> Dict:
+    async def extract_gps_with_openai(self, image: Union[str, ImageContext]) -> Dict:
         """Extract GPS coordinates using multiple methods, prioritizing text extraction for written coordinates"""
         try:
+            # Every method below shares one context, so the image is decoded at most once
+            context = await asyncio.to_thread(ImageContext.ensure, image)
+            
+            # Dimensions are checked from the header; oversized images fail here, undecoded
+            await asyncio.to_thread(context.check)
+            
             # First try EXIF data extraction
-            exif_result = self.extract_gps_from_exif(image_path)
+            exif_result = await asyncio.to_thread(self.extract_gps_from_exif, context)
             if exif_result:
                 return {
                     'success': True,
@@ -311,7 +247,7 @@ class GPSExtractionService:
                 }
             
             # Try text-based extraction first (for images with written coordinates like yours)
-            text_result = self.extract_gps_from_text(image_path)
+            text_result = await asyncio.to_thread(self.extract_gps_from_text, context)
             if text_result:
                 return {
                     'success': True,
@@ -324,7 +260,7 @@ class GPSExtractionService:
                 }
             
             # Try OpenCV-based extraction for better text detection
-            opencv_result = self.extract_gps_with_opencv(image_path)
+            opencv_result = await asyncio.to_thread(self.extract_gps_with_opencv, context)
             if opencv_result:
                 return {
                     'success': True,
@@ -338,49 +274,24 @@ class GPSExtractionService:
             
             # If EXIF and OCR fail, use OpenAI Vision API
             logger.info("EXIF and OCR extraction failed, trying OpenAI Vision API")
-            base64_image = self.encode_image_to_base64(image_path)
+            if not self.vision_client.is_configured:
+                return {
+                    'success': False,
+                    'latitude': None,
+                    'longitude': None,
+                    'message': "No GPS data found and OPENAI_API_KEY is not configured for AI analysis",
+                    'method': 'openai_vision',
+                    'confidence': 'none'
+                }
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": """Analyze this solar panel installation image and try to extract location information. 
-                                Look for:
-                                1. Any visible GPS coordinates or location stamps
-                                2. Geographical landmarks that could help identify the location
-                                3. Solar panel installation characteristics that might indicate region
-                                4. Any text or metadata visible in the image
-                                
-                                If you can determine a specific location, provide latitude and longitude in decimal degrees.
-                                
-                                Respond in this exact JSON format:
-                                {
-                                    "has_coordinates": true/false,
-                                    "latitude": number or null,
-                                    "longitude": number or null,
-                                    "confidence": "high/medium/low",
-                                    "method": "description of how you determined the location",
-                                    "location_description": "what you see in the image that helped identify location"
-                                }"""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=500
+            ai_response = await self.vision_client.complete(
+                context.data,
+                VISION_LOCATION_PROMPT,
+                max_tokens=500,
+                detail="auto"
             )
             
             # Parse OpenAI response
-            ai_response = response.choices[0].message.content
             logger.info(f"OpenAI response: {ai_response}")
             
             # Try to parse JSON response
@@ -507,31 +418,14 @@ class GPSExtractionService:
                 'confidence': 'none'
             }
     
-    def process_uploaded_file(self, uploaded_file) -> Dict:
-        """Process uploaded file and extract GPS coordinates"""
+    async def process_image_bytes(self, content, filename: Optional[str] = None) -> Dict:
+        """Extract GPS coordinates from an in-memory image (bytes or memoryview)"""
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                # Read and write file content
-                uploaded_file.file.seek(0)
-                content = uploaded_file.file.read()
-                temp_file.write(content)
-                temp_path = temp_file.name
-            
-            try:
-                # Extract GPS coordinates
-                result = self.extract_gps_with_openai(temp_path)
-                return result
-                
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+            # Decoders read straight from the buffer; nothing is written to disk
+            return await self.extract_gps_with_openai(ImageContext(content, filename=filename))
                     
         except Exception as e:
-            logger.error(f"Error processing uploaded file: {str(e)}")
+            logger.error(f"Error processing image: {str(e)}")
             return {
                 'success': False,
                 'latitude': None,
@@ -539,4 +433,89 @@ class GPSExtractionService:
                 'message': f"Error processing image: {str(e)}",
                 'method': 'error',
                 'confidence': 'none'
-            }
\ No newline at end of file
+            }
+    
+    async def process_uploaded_file(self, uploaded_file) -> Dict:
+        """Process uploaded file and extract GPS coordinates"""
+        try:
+            context = await asyncio.to_thread(ImageContext.from_upload, uploaded_file)
+        except Exception as e:
+            logger.error(f"Error reading uploaded file: {str(e)}")
+            return {
+                'success': False,
+                'latitude': None,
+                'longitude': None,
+                'message': f"Error processing image: {str(e)}",
+                'method': 'error',
+                'confidence': 'none'
+            }
+        return await self.extract_gps_with_openai(context)
+    
+    async def process_batch(self, sources: Iterable, max_concurrency: int = BATCH_MAX_CONCURRENCY) -> AsyncIterator[Dict]:
+        """Extract GPS from many images concurrently, yielding each result as soon as it finishes.
+        
+        `sources` yields (filename, read) pairs where read() returns the image bytes
+        or raises ValueError. An image is only read once a worker slot is free, so at
+        most `max_concurrency` images are held in memory at a time.
+        """
+        queue = asyncio.Queue()
+        slots = asyncio.Semaphore(max_concurrency)
+        done = object()
+        
+        async def run_one(index: int, filename: str, content: bytes):
+            try:
+                result = await self.process_image_bytes(content, filename)
+            finally:
+                slots.release()
+            await queue.put({'index': index, 'filename': filename, **result})
+        
+        async def produce():
+            tasks = []
+            try:
+                for index, (filename, read) in enumerate(sources):
+                    await slots.acquire()
+                    try:
+                        content = await asyncio.to_thread(read)
+                    except ValueError as e:
+                        slots.release()
+                        await queue.put({
+                            'index': index,
+                            'filename': filename,
+                            'success': False,
+                            'latitude': None,
+                            'longitude': None,
+                            'message': str(e),
+                            'method': 'error',
+                            'confidence': 'none'
+                        })
+                        continue
+                    tasks.append(asyncio.create_task(run_one(index, filename, content)))
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await queue.put(done)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            # Surface errors raised while reading the sources (e.g. a corrupt archive)
+            await producer
+        finally:
+            # Client went away or consumer stopped early: stop outstanding work
+            producer.cancel()
+
+
+_gps_service: Optional[GPSExtractionService] = None
+
+
+def get_gps_extraction_service() -> GPSExtractionService:
+    """Return the process-wide GPS extraction service; also the route dependency"""
+    global _gps_service
+    if _gps_service is None:
+        _gps_service = GPSExtractionService()
+    return _gps_service
@@ -0,0 +1,83 @@
+# app/services/http_client.py
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+# Outbound HTTP settings (satellite tiles, weather data)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+
+
+class HttpClient:
+    """One pooled aiohttp session for outbound requests, opened with the app"""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, timeout_seconds: float = HTTP_TIMEOUT_SECONDS):
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_use = 0
+        self.requests = 0
+        self.transient_sessions = 0
+
+    def _new_session(self):
+        import aiohttp
+
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+        )
+
+    async def open(self):
+        """Create the shared session on the running (application) event loop"""
+        if self._session is None or self._session.closed:
+            self._session = self._new_session()
+            self._loop = asyncio.get_running_loop()
+
+    async def close(self):
+        if self._session is not None:
+            session, self._session, self._loop = self._session, None, None
+            await session.close()
+
+    @asynccontextmanager
+    async def session(self):
+        """Yield the shared session; code running on another event loop (asyncio.run
+        from sync code) gets a short-lived session, since sessions are bound to a loop"""
+        shared = (
+            self._session is not None
+            and not self._session.closed
+            and self._loop is asyncio.get_running_loop()
+        )
+        self.in_use += 1
+        self.requests += 1
+        try:
+            if shared:
+                yield self._session
+            else:
+                self.transient_sessions += 1
+                async with self._new_session() as session:
+                    yield session
+        finally:
+            self.in_use -= 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "open": self._session is not None and not self._session.closed,
+            "pool_size": self.pool_size,
+            "timeout_seconds": self.timeout_seconds,
+            "in_use": self.in_use,
+            "requests": self.requests,
+            "transient_sessions": self.transient_sessions
+        }
+
+
+_http_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide outbound HTTP client"""
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient()
+    return _http_client
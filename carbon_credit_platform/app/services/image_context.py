@@ -0,0 +1,312 @@
+# app/services/image_context.py
+import hashlib
+import logging
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+from app.services.derivatives import derivative_path
+from app.services.image_ingest import (
+    ImageInfo,
+    MAX_IMAGE_BYTES,
+    decoded_bytes,
+    open_header,
+    pil_image,
+    probe,
+    record_decode
+)
+from app.services.upload_writer import UploadTooLargeError
+
+# OpenCV, numpy and PIL are imported where pixels are first needed
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+# EXIF IFD pointers and text tags that may carry a written location
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+IMAGE_DESCRIPTION = 0x010E
+USER_COMMENT = 0x9286
+XP_COMMENT = 0x9C9C
+XP_SUBJECT = 0x9C9F
+
+logger = logging.getLogger(__name__)
+
+# OpenCV flags (cv2.IMREAD_REDUCED_*) that decode JPEGs at 1/2, 1/4 and 1/8 scale
+_REDUCED_COLOR = {2: "IMREAD_REDUCED_COLOR_2", 4: "IMREAD_REDUCED_COLOR_4", 8: "IMREAD_REDUCED_COLOR_8"}
+_REDUCED_GRAYSCALE = {
+    2: "IMREAD_REDUCED_GRAYSCALE_2",
+    4: "IMREAD_REDUCED_GRAYSCALE_4",
+    8: "IMREAD_REDUCED_GRAYSCALE_8"
+}
+
+# Formats tesseract can read straight from the original upload
+OCR_NATIVE_FORMATS = {"JPEG": ".jpg", "PNG": ".png", "TIFF": ".tif", "BMP": ".bmp", "GIF": ".gif"}
+
+
+def _to_degrees(value) -> Optional[float]:
+    """Convert an EXIF (degrees, minutes, seconds) triple to decimal degrees"""
+    try:
+        d, m, s = value
+        return float(d) + float(m) / 60.0 + float(s) / 3600.0
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _decode_exif_text(value) -> Optional[str]:
+    """Turn an EXIF text value (ASCII, UserComment or UTF-16 XP tag) into a str"""
+    if isinstance(value, str):
+        return value.strip("\x00 ").strip() or None
+    if isinstance(value, tuple):
+        value = bytes(value)
+    if not isinstance(value, (bytes, bytearray)):
+        return None
+
+    # UserComment starts with an 8 byte character code
+    if value[:8] in (b"ASCII\x00\x00\x00", b"UNICODE\x00", b"\x00" * 8):
+        encoding = "utf-16" if value[:8] == b"UNICODE\x00" else "latin-1"
+        text = value[8:].decode(encoding, errors="ignore")
+    else:
+        # XP* tags are UTF-16LE
+        text = value.decode("utf-16-le", errors="ignore")
+    return text.strip("\x00 ").strip() or None
+
+
+class ImageContext:
+    """One uploaded image shared by every extractor.
+
+    Holds the original buffer (bytes, bytearray or memoryview, never copied)
+    and decodes each representation (PIL image, BGR/grayscale arrays, EXIF)
+    lazily and at most once. When a precomputed OCR derivative is available
+    it is used for grayscale/OCR work instead of the full-size original.
+
+    Pixel dimensions are checked from the header before anything is decoded
+    (see image_ingest); very large JPEGs are decoded at reduced scale.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview], filename: Optional[str] = None,
+                 ocr_data: Optional[bytes] = None):
+        self.data = data
+        self.filename = filename
+        self.ocr_data = ocr_data
+        self._decoded_bytes = {}
+
+    @classmethod
+    def from_upload(cls, upload_file, max_bytes: int = MAX_IMAGE_BYTES) -> "ImageContext":
+        """Read an UploadFile straight into one preallocated buffer"""
+        upload_file.file.seek(0, 2)
+        size = upload_file.file.tell()
+        upload_file.file.seek(0)
+        if size > max_bytes:
+            raise UploadTooLargeError(f"File size too large. Maximum {max_bytes // (1024 * 1024)}MB allowed.")
+
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        read = 0
+        while read < size:
+            count = upload_file.file.readinto(view[read:])
+            if not count:
+                break
+            read += count
+        upload_file.file.seek(0)
+        return cls(view[:read], filename=upload_file.filename)
+
+    @classmethod
+    def from_path(cls, image_path: str) -> "ImageContext":
+        with open(image_path, "rb") as image_file:
+            data = image_file.read()
+
+        # Stored uploads may already have a small grayscale OCR variant next to them
+        ocr_data = None
+        try:
+            with open(derivative_path(image_path, "ocr"), "rb") as ocr_file:
+                ocr_data = ocr_file.read()
+        except OSError:
+            pass
+        return cls(data, filename=image_path, ocr_data=ocr_data)
+
+    @classmethod
+    def ensure(cls, image: Union[str, "ImageContext"]) -> "ImageContext":
+        """Accept either a context or a file path"""
+        if isinstance(image, ImageContext):
+            return image
+        return cls.from_path(image)
+
+    @property
+    def name(self) -> str:
+        return self.filename or "uploaded image"
+
+    @cached_property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    @property
+    def ocr_source(self) -> Optional[Tuple[Union[bytes, bytearray, memoryview], str]]:
+        """(buffer, suffix) tesseract can read directly: the OCR derivative, else the original"""
+        if self.ocr_data is not None:
+            return self.ocr_data, ".png"
+        suffix = self.ocr_suffix
+        if not suffix or self.info.scale > 1:
+            # Large originals are OCRed from the reduced decode instead
+            return None
+        return self.data, suffix
+
+    @property
+    def ocr_suffix(self) -> Optional[str]:
+        """File suffix if the original buffer can be handed to tesseract unchanged"""
+        try:
+            return OCR_NATIVE_FORMATS.get(self._image.format)
+        except Exception:
+            return None
+
+    @cached_property
+    def _image(self) -> "Image.Image":
+        # Only parses the header; pixels are decoded on first use of `pil`
+        return open_header(self.data)
+
+    @cached_property
+    def info(self) -> ImageInfo:
+        """Header dimensions and decode scale; raises ImageTooLargeError over the limits"""
+        return probe(self._image)
+
+    def check(self) -> ImageInfo:
+        """Validate dimensions up front, before any extractor starts decoding"""
+        from PIL import UnidentifiedImageError
+
+        try:
+            return self.info
+        except UnidentifiedImageError:
+            raise ValueError(f"{self.name} is not a readable image")
+
+    def _track(self, name: str, decoded):
+        """Record the memory held by one decoded representation"""
+        if hasattr(decoded, "nbytes"):  # numpy array
+            self._decoded_bytes[name] = decoded.nbytes
+        elif decoded is not None:  # PIL image
+            self._decoded_bytes[name] = decoded_bytes(decoded.width, decoded.height, len(decoded.getbands()))
+        record_decode(self.info, self.peak_decode_bytes)
+        logger.debug(
+            f"Decoded {self.name} as {name} at 1/{self.info.scale} scale; "
+            f"{self.peak_decode_bytes / (1024 * 1024):.1f}MB held by decoded images"
+        )
+        return decoded
+
+    @property
+    def peak_decode_bytes(self) -> int:
+        """Bytes held by all decoded representations of this image"""
+        return sum(self._decoded_bytes.values())
+
+    def decode_report(self) -> Dict:
+        info = self.info
+        return {
+            "format": info.format,
+            "width": info.width,
+            "height": info.height,
+            "decode_scale": info.scale,
+            "decoded_width": info.decoded_size[0],
+            "decoded_height": info.decoded_size[1],
+            "peak_decode_bytes": self.peak_decode_bytes
+        }
+
+    @cached_property
+    def pil(self) -> "Image.Image":
+        info = self.info
+        image = self._image
+        if info.scale > 1:
+            # JPEG decodes straight to 1/scale size; full-size pixels never exist
+            image.draft(image.mode, info.decoded_size)
+        image.load()
+        return self._track("pil", image)
+
+    def _imdecode(self, flags: int, reduced: Dict[int, str]) -> Optional["np.ndarray"]:
+        import cv2
+        import numpy as np
+
+        scale = self.info.scale
+        if scale > 1:
+            flags = getattr(cv2, reduced[scale])
+        return cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), flags)
+
+    @cached_property
+    def bgr(self) -> Optional["np.ndarray"]:
+        import cv2
+        import numpy as np
+
+        if "pil" in self.__dict__:
+            return self._track("bgr", cv2.cvtColor(np.asarray(self.pil.convert("RGB")), cv2.COLOR_RGB2BGR))
+        return self._track("bgr", self._imdecode(cv2.IMREAD_COLOR, _REDUCED_COLOR))
+
+    @cached_property
+    def gray(self) -> Optional["np.ndarray"]:
+        import cv2
+        import numpy as np
+
+        if self.ocr_data is not None:
+            # Already grayscale, upright and downscaled
+            return cv2.imdecode(np.frombuffer(self.ocr_data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        # Reuse whichever decode already happened; otherwise decode straight to grayscale
+        if "bgr" in self.__dict__:
+            return None if self.bgr is None else self._track("gray", cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+        if "pil" in self.__dict__:
+            return self._track("gray", np.asarray(self.pil.convert("L")))
+        return self._track("gray", self._imdecode(cv2.IMREAD_GRAYSCALE, _REDUCED_GRAYSCALE))
+
+    @cached_property
+    def exif(self) -> "Image.Exif":
+        try:
+            return self._image.getexif()
+        except Exception:
+            return pil_image().Exif()
+
+    @cached_property
+    def gps_info(self) -> Dict:
+        """GPS IFD keyed by tag name (GPSLatitude, GPSLatitudeRef, ...)"""
+        from PIL.ExifTags import GPSTAGS
+
+        try:
+            gps_ifd = self.exif.get_ifd(GPS_IFD)
+        except Exception:
+            return {}
+        return {GPSTAGS.get(tag_id, tag_id): value for tag_id, value in gps_ifd.items()}
+
+    @cached_property
+    def gps_coordinates(self) -> Optional[Tuple[float, float]]:
+        """Decimal (latitude, longitude) from EXIF, or None"""
+        gps_info = self.gps_info
+        if "GPSLatitude" not in gps_info or "GPSLongitude" not in gps_info:
+            return None
+
+        lat = _to_degrees(gps_info["GPSLatitude"])
+        lon = _to_degrees(gps_info["GPSLongitude"])
+        if lat is None or lon is None:
+            return None
+
+        # Handle hemisphere
+        if gps_info.get("GPSLatitudeRef") == "S":
+            lat = -lat
+        if gps_info.get("GPSLongitudeRef") == "W":
+            lon = -lon
+        return lat, lon
+
+    @cached_property
+    def metadata_text(self) -> str:
+        """Free text stored in EXIF comments or PNG text chunks (where camera apps often write the location)"""
+        values = []
+        try:
+            exif_ifd = self.exif.get_ifd(EXIF_IFD)
+        except Exception:
+            exif_ifd = {}
+
+        for tag_id, value in list(self.exif.items()) + list(exif_ifd.items()):
+            if tag_id in (IMAGE_DESCRIPTION, USER_COMMENT, XP_COMMENT, XP_SUBJECT):
+                values.append(_decode_exif_text(value))
+
+        try:
+            info = self._image.info
+        except Exception:
+            info = {}
+        for key, value in info.items():
+            if isinstance(value, str) and key.lower() not in ("exif", "icc_profile"):
+                values.append(value.strip())
+
+        return "\n".join(value for value in values if value)
+
@@ -0,0 +1,154 @@
+# app/services/image_ingest.py
+"""
+Limits for decoding untrusted images.
+
+A few megabytes of compressed data can describe hundreds of megapixels, so
+byte limits alone don't bound memory. Every image is probed from its header
+first. Anything above MAX_IMAGE_PIXELS is rejected. JPEGs above
+DECODE_PIXEL_BUDGET are decoded at 1/2, 1/4 or 1/8 scale (the decoder does
+this without materialising full-size pixels). Other formats above the budget
+are rejected, because they can only be decoded at full size.
+"""
+import io
+import os
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.services.upload_writer import MAX_UPLOAD_SIZE
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Image limits
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(MAX_UPLOAD_SIZE)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(80_000_000)))  # reject above this
+DECODE_PIXEL_BUDGET = int(os.getenv("DECODE_PIXEL_BUDGET", str(24_000_000)))  # downscale above this
+
+# JPEG decoders can scale by these factors while decoding
+DECODE_SCALES = (1, 2, 4, 8)
+
+
+def pil_image():
+    """PIL.Image, imported on first use with its decompression-bomb guard set to MAX_IMAGE_PIXELS"""
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    return Image
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image's dimensions exceed the decode limits"""
+
+
+@dataclass
+class ImageInfo:
+    format: Optional[str]
+    width: int
+    height: int
+    scale: int = 1
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    @property
+    def decoded_size(self):
+        # Decoders round partial blocks up
+        return -(-self.width // self.scale), -(-self.height // self.scale)
+
+
+def probe(image: "Image.Image") -> ImageInfo:
+    """Check an opened (header-only) image against the limits and pick its decode scale"""
+    width, height = image.size
+    info = ImageInfo(format=image.format, width=width, height=height)
+
+    if info.pixels > MAX_IMAGE_PIXELS:
+        _stats.record_rejection()
+        raise ImageTooLargeError(
+            f"Image is too large: {width}x{height} ({info.pixels / 1e6:.0f} MP, maximum {MAX_IMAGE_PIXELS / 1e6:.0f} MP)"
+        )
+
+    if info.pixels > DECODE_PIXEL_BUDGET:
+        if info.format != "JPEG":
+            _stats.record_rejection()
+            raise ImageTooLargeError(
+                f"{info.format or 'Image'} of {info.pixels / 1e6:.0f} MP exceeds the "
+                f"{DECODE_PIXEL_BUDGET / 1e6:.0f} MP decode budget"
+            )
+        for scale in DECODE_SCALES:
+            if info.pixels / (scale * scale) <= DECODE_PIXEL_BUDGET:
+                info.scale = scale
+                break
+        else:
+            _stats.record_rejection()
+            raise ImageTooLargeError(f"Image is too large to decode: {width}x{height}")
+
+    return info
+
+
+def open_header(data) -> "Image.Image":
+    """Open an encoded buffer without decoding pixels"""
+    Image = pil_image()
+    try:
+        return Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        # PIL refuses to even open images far beyond MAX_IMAGE_PIXELS
+        _stats.record_rejection()
+        raise ImageTooLargeError(f"Image is too large (maximum {MAX_IMAGE_PIXELS / 1e6:.0f} MP)")
+
+
+def probe_bytes(data) -> ImageInfo:
+    """Header-only probe of an encoded buffer"""
+    return probe(open_header(data))
+
+
+def decoded_bytes(width: int, height: int, channels: int) -> int:
+    return width * height * channels
+
+
+class DecodeStats:
+    """Process-wide decode counters, including the largest per-image decode footprint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.downscaled = 0
+        self.rejected = 0
+        self.peak_bytes = 0
+
+    def record_decode(self, info: ImageInfo, peak_bytes: int):
+        with self._lock:
+            self.decodes += 1
+            if info.scale > 1:
+                self.downscaled += 1
+            self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "decodes": self.decodes,
+                "downscaled": self.downscaled,
+                "rejected": self.rejected,
+                "peak_decode_bytes": self.peak_bytes,
+                "max_image_pixels": MAX_IMAGE_PIXELS,
+                "decode_pixel_budget": DECODE_PIXEL_BUDGET
+            }
+
+
+_stats = DecodeStats()
+
+
+def decode_stats() -> Dict:
+    return _stats.snapshot()
+
+
+def record_decode(info: ImageInfo, peak_bytes: int):
+    _stats.record_decode(info, peak_bytes)
@@ -1,14 +1,20 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, asc
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from app.core.pagination import Page, paginate
+from app.core.serialization import Projection
 from app.models.marketplace import MarketplaceCredit, SourceType, VerificationStatus
+from app.services.rollups import RollupService
 from app.schemas.marketplace import (
     MarketplaceCreditCreate, 
     MarketplaceCreditUpdate,
     MarketplaceCreditResponse
 )
 
+# Listed credit fields (MarketplaceCreditResponse), selectable with ?fields=
+CREDIT_FIELDS = Projection.for_schema(MarketplaceCreditResponse, MarketplaceCredit)
+
 class MarketplaceService:
     def __init__(self, db: Session):
         self.db = db
@@ -37,8 +43,9 @@ class MarketplaceService:
         limit: int = 100,
         verification_status: Optional[VerificationStatus] = None,
         source_type: Optional[SourceType] = None,
-        issuer_id: Optional[int] = None
-    ) -> tuple[List[MarketplaceCredit], int]:
+        issuer_id: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> tuple[Page, int]:
         """Get marketplace credits with optional filtering"""
         query = self.db.query(MarketplaceCredit)
         
@@ -54,9 +61,9 @@ class MarketplaceService:
         total = query.count()
         
         # Apply pagination and ordering
-        credits = query.order_by(desc(MarketplaceCredit.created_at)).offset(skip).limit(limit).all()
+        page = paginate(query, MarketplaceCredit.created_at, MarketplaceCredit.id, limit, cursor=cursor, skip=skip)
         
-        return credits, total
+        return page, total
 
     def get_marketplace_credit_by_id(self, credit_id: int) -> Optional[MarketplaceCredit]:
         """Get a specific marketplace credit by ID"""
@@ -101,36 +108,35 @@ class MarketplaceService:
         self.db.commit()
         return True
 
-    def get_verified_credits_for_marketplace(self) -> List[MarketplaceCredit]:
+    def get_credit_rows(self, *criteria, fields: Optional[str] = None, newest_first: bool = True) -> List[Dict]:
+        """Credits matching `criteria` as plain dicts, selecting only the listed columns"""
+        plan = CREDIT_FIELDS.plan(fields)
+        query = plan.select().where(*criteria)
+        if newest_first:
+            query = query.order_by(desc(MarketplaceCredit.created_at))
+        return plan.to_dicts(self.db.execute(query))
+
+    def get_verified_credits_for_marketplace(self, fields: Optional[str] = None) -> List[Dict]:
         """Get all verified credits suitable for marketplace display"""
-        return self.db.query(MarketplaceCredit).filter(
-            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
-        ).order_by(desc(MarketplaceCredit.created_at)).all()
+        return self.get_credit_rows(
+            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED,
+            fields=fields
+        )
 
-    def get_credits_by_source_type(self, source_type: SourceType) -> List[MarketplaceCredit]:
+    def get_credits_by_source_type(self, source_type: SourceType, fields: Optional[str] = None) -> List[Dict]:
         """Get credits filtered by source type (forestation or solar_panel)"""
-        return self.db.query(MarketplaceCredit).filter(
+        return self.get_credit_rows(
             MarketplaceCredit.source_type == source_type,
-            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
-        ).order_by(desc(MarketplaceCredit.created_at)).all()
+            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED,
+            fields=fields
+        )
 
     def get_issuer_stats(self, issuer_id: int) -> dict:
         """Get statistics for a specific issuer"""
-        total_credits = self.db.query(MarketplaceCredit).filter(
-            MarketplaceCredit.issuer_id == issuer_id
-        ).count()
-        
-        verified_credits = self.db.query(MarketplaceCredit).filter(
-            MarketplaceCredit.issuer_id == issuer_id,
-            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
-        ).count()
-        
-        total_coins = self.db.query(MarketplaceCredit).filter(
-            MarketplaceCredit.issuer_id == issuer_id,
-            MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
-        ).with_entities(MarketplaceCredit.coins_issued).all()
-        
-        total_coins_issued = sum([coin[0] for coin in total_coins]) if total_coins else 0
+        rollup = RollupService(self.db).get_issuer(issuer_id)
+        total_credits = rollup.credits_total
+        verified_credits = rollup.credits_verified
+        total_coins_issued = rollup.coins_verified
         
         return {
             "total_credits": total_credits,
@@ -138,3 +144,16 @@ class MarketplaceService:
             "total_coins_issued": total_coins_issued,
             "verification_rate": (verified_credits / total_credits * 100) if total_credits > 0 else 0
         }
+
+    def get_marketplace_summary(self) -> dict:
+        """Totals over all verified credits"""
+        rollup = RollupService(self.db).get_marketplace()
+        total = rollup.credits_verified
+        return {
+            "total_verified_credits": total,
+            "total_coins_issued": rollup.coins_verified,
+            "forestation_coins": rollup.forestation_coins,
+            "solar_panel_coins": rollup.solar_coins,
+            "unique_issuers": rollup.verified_issuers,
+            "average_coins_per_credit": rollup.coins_verified / total if total else 0
+        }
@@ -0,0 +1,59 @@
+# app/services/ocr.py
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Tesseract binary; the Windows installer doesn't put it on PATH
+TESSERACT_CMD = os.getenv(
+    "TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe" if os.name == "nt" else "tesseract"
+)
+
+# Tesseract is an external binary and needs a real file; keep that file in RAM when possible
+SHM_DIR = "/dev/shm"
+SPILL_PREFIX = "ocr_"
+
+
+def spill_dir():
+    directory = os.getenv("OCR_SPILL_DIR")
+    if directory:
+        return directory
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return SHM_DIR
+    return None  # fall back to the default temp directory
+
+
+@contextmanager
+def spill_to_file(data, suffix: str = ".jpg"):
+    """Write a buffer to a short-lived file (tmpfs when available) and yield its path"""
+    # Closed before tesseract opens it: Windows won't open a file that is still open for delete-on-close
+    with tempfile.NamedTemporaryFile(prefix=SPILL_PREFIX, suffix=suffix, dir=spill_dir(), delete=False) as spill_file:
+        spill_file.write(data)
+    try:
+        yield spill_file.name
+    finally:
+        os.unlink(spill_file.name)
+
+
+def image_bytes_to_string(data, suffix: str = ".jpg", config: str = "") -> str:
+    """OCR an encoded image buffer without re-encoding it"""
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    with spill_to_file(data, suffix) as path:
+        # A str path is handed to tesseract as-is, so pytesseract skips its own temp copy
+        return pytesseract.image_to_string(path, config=config)
+
+
+def array_to_string(image: "np.ndarray", config: str = "") -> str:
+    """OCR a decoded grayscale/BGR array"""
+    import cv2
+
+    # PNG is lossless and cheap to encode for mostly flat, thresholded images
+    ok, encoded = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise ValueError("Could not encode image for OCR")
+    return image_bytes_to_string(encoded, ".png", config)
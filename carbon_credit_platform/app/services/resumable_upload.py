@@ -0,0 +1,236 @@
+# app/services/resumable_upload.py
+"""
+Resumable uploads (tus-like): create a session, PATCH chunks at an offset,
+then complete it.
+
+Chunks are appended to a staging file on disk, and the file's size is the
+session offset. A dropped connection keeps every byte that reached the disk,
+so the client asks for the offset and sends only the rest. Completing an
+upload hashes the staged file and moves it into the content-addressed
+store; the resulting key is attached to an application like any other
+`*_key` upload.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent PATCHes are not detected
+    fcntl = None
+
+from app.services.blob_store import STAGING_DIR
+from app.services.upload_writer import (
+    StoredUpload,
+    UploadTooLargeError,
+    discard,
+    MAX_UPLOAD_SIZE,
+    UPLOAD_CHUNK_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_DIR = os.getenv("RESUMABLE_UPLOAD_DIR", os.path.join(STAGING_DIR, "resumable"))
+RESUMABLE_UPLOAD_TTL = int(os.getenv("RESUMABLE_UPLOAD_TTL", str(24 * 60 * 60)))  # 24 hours
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadNotFoundError(ValueError):
+    """Unknown, expired or already completed upload session"""
+
+
+class UploadOffsetError(ValueError):
+    """The client's offset doesn't match what the server has stored"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload offset mismatch; server has {offset} bytes")
+        self.offset = offset
+
+
+class UploadBusyError(ValueError):
+    """Another request is writing to the same upload"""
+
+
+@dataclass
+class ResumableUpload:
+    upload_id: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: Optional[str]
+    created_at: float
+    expires_at: float
+    offset: int = 0
+
+
+class ResumableUploadStore:
+    """Upload sessions kept as `<id>.part` (data) and `<id>.json` (metadata) files"""
+
+    def __init__(self, directory: str = RESUMABLE_DIR, ttl: int = RESUMABLE_UPLOAD_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def create(self, filename: str, content_type: str, size: int, sha256: Optional[str] = None,
+               max_size: int = MAX_UPLOAD_SIZE) -> ResumableUpload:
+        """Start a session for a file of a known size"""
+        if size > max_size:
+            raise UploadTooLargeError(f"File size too large. Maximum {max_size // (1024 * 1024)}MB allowed.")
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.purge_expired()
+
+        now = time.time()
+        upload = ResumableUpload(
+            upload_id=uuid.uuid4().hex,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            sha256=sha256,
+            created_at=now,
+            expires_at=now + self.ttl
+        )
+        open(self._part_path(upload.upload_id), "wb").close()
+
+        # Metadata goes in last and atomically: a session without it doesn't exist
+        meta = asdict(upload)
+        meta.pop("offset")
+        temp_path = self._meta_path(upload.upload_id) + ".tmp"
+        with open(temp_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temp_path, self._meta_path(upload.upload_id))
+        return upload
+
+    def get(self, upload_id: str) -> ResumableUpload:
+        """Load a session with its current offset"""
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise UploadNotFoundError("Upload not found")
+        try:
+            with open(self._meta_path(upload_id)) as meta_file:
+                upload = ResumableUpload(**json.load(meta_file))
+            upload.offset = os.path.getsize(self._part_path(upload_id))
+        except (OSError, ValueError, TypeError):
+            raise UploadNotFoundError("Upload not found")
+
+        if upload.expires_at < time.time():
+            self.delete(upload_id)
+            raise UploadNotFoundError("Upload expired")
+        return upload
+
+    @contextmanager
+    def _locked(self, upload_id: str, mode: str):
+        """Open the data file with an exclusive lock so two PATCHes can't interleave"""
+        part_file = open(self._part_path(upload_id), mode)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(part_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise UploadBusyError("Upload is already receiving data")
+            yield part_file
+        finally:
+            part_file.close()
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Append a request body at `offset` and return the new offset.
+
+        Bytes are fsynced even when the body is cut off, so a retry resumes
+        from whatever actually arrived.
+        """
+        upload = self.get(upload_id)
+
+        with self._locked(upload_id, "ab") as part_file:
+            current = os.fstat(part_file.fileno()).st_size
+            if offset != current:
+                raise UploadOffsetError(current)
+
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if current + len(chunk) > upload.size:
+                        raise UploadTooLargeError(f"Chunk exceeds the declared upload size of {upload.size} bytes")
+                    await asyncio.to_thread(part_file.write, chunk)
+                    current += len(chunk)
+            finally:
+                await asyncio.to_thread(part_file.flush)
+                await asyncio.to_thread(os.fsync, part_file.fileno())
+
+        return current
+
+    def complete(self, upload_id: str) -> StoredUpload:
+        """Verify a fully received upload and hand its staged file to the caller"""
+        upload = self.get(upload_id)
+
+        with self._locked(upload_id, "rb") as part_file:
+            size = os.fstat(part_file.fileno()).st_size
+            if size != upload.size:
+                raise ValueError(f"Upload incomplete: received {size} of {upload.size} bytes")
+
+            hasher = hashlib.sha256()
+            for chunk in iter(lambda: part_file.read(UPLOAD_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+            sha256 = hasher.hexdigest()
+
+        if upload.sha256 and sha256 != upload.sha256:
+            self.delete(upload_id)
+            raise ValueError("Upload does not match the declared checksum")
+
+        # The session ends here; the staged data now belongs to the caller
+        discard(self._meta_path(upload_id))
+        return StoredUpload(path=self._part_path(upload_id), size=size, sha256=sha256)
+
+    def delete(self, upload_id: str):
+        discard(self._meta_path(upload_id))
+        discard(self._part_path(upload_id))
+
+    def purge_expired(self) -> Dict[str, int]:
+        """Remove sessions past their expiry, plus data files whose metadata is gone.
+
+        Returns {upload_id: bytes freed}.
+        """
+        removed = {}
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return removed
+
+        for name in names:
+            upload_id, extension = os.path.splitext(name)
+            if extension != ".part" or not _UPLOAD_ID.match(upload_id):
+                continue
+            try:
+                with open(self._meta_path(upload_id)) as meta_file:
+                    expires_at = json.load(meta_file)["expires_at"]
+            except (OSError, ValueError, KeyError):
+                # Orphaned data file; leave fresh ones alone in case create() is mid-way
+                try:
+                    expires_at = os.path.getmtime(self._part_path(upload_id)) + self.ttl
+                except OSError:
+                    continue
+            if expires_at < now:
+                try:
+                    size = os.path.getsize(self._part_path(upload_id))
+                except OSError:
+                    size = 0
+                self.delete(upload_id)
+                removed[upload_id] = size
+
+        if removed:
+            logger.info(f"Removed {len(removed)} expired resumable uploads ({sum(removed.values())} bytes)")
+        return removed
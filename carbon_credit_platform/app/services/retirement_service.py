@@ -1,24 +1,26 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List, Dict
 from datetime import datetime
 import uuid
 
+from app.core.aggregates import aggregate_async
 from app.models.user_wallets import UserWallet
 from app.models.credit_retirement import CreditRetirement, RetirementStatus
+from app.models.rollup import UserRollup
 from app.schemas.retirement_schemas import RetirementRequestSchema, RetirementUpdateSchema, RetirementResponseSchema, DashboardStatsSchema, RetirementHistorySchema, PurchaseHistorySchema
 
 class CreditRetirementService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def retire_credits(self, retirement_request: RetirementRequestSchema) -> Dict:
+    async def retire_credits(self, retirement_request: RetirementRequestSchema) -> Dict:
         """Retire credits for carbon offset"""
         try:
             # Get user wallet
-            wallet = self.db.query(UserWallet).filter(
+            wallet = await self.db.scalar(select(UserWallet).where(
                 UserWallet.user_id == retirement_request.user_id
-            ).first()
+            ))
             
             if not wallet:
                 return {
@@ -60,13 +62,14 @@ class CreditRetirementService:
                 wallet.updated_at = datetime.utcnow()
             
             # Commit changes
-            self.db.commit()
-            self.db.refresh(retirement)
+            await self.db.commit()
+            await self.db.refresh(retirement)
             
             status_message = "completed" if retirement_request.auto_confirm else "pending confirmation"
             
             return {
                 'success': True,
+                'retirement': retirement,
                 'retirement_id': retirement_id,
                 'coins_retired': retirement_request.coins_to_retire,
                 'co2_offset_tons': retirement_request.coins_to_retire,
@@ -77,46 +80,38 @@ class CreditRetirementService:
             }
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             return {
                 'success': False,
                 'error': f'Retirement transaction failed: {str(e)}'
             }
     
-    def get_user_retirement_summary(self, user_id: int) -> DashboardStatsSchema:
+    async def get_user_retirement_summary(self, user_id: int) -> DashboardStatsSchema:
         """Get summary of user's retirement activities"""
-        # Get total retired coins
-        total_retired = self.db.query(func.sum(CreditRetirement.coins_retired)).filter(
-            CreditRetirement.user_id == user_id,
-            CreditRetirement.retirement_status == RetirementStatus.COMPLETED
-        ).scalar() or 0.0
-        
-        # Get retirement count
-        retirement_count = self.db.query(func.count(CreditRetirement.id)).filter(
-            CreditRetirement.user_id == user_id,
-            CreditRetirement.retirement_status == RetirementStatus.COMPLETED
-        ).scalar() or 0
-        
-        # Get user wallet
-        wallet = self.db.query(UserWallet).filter(UserWallet.user_id == user_id).first()
-        remaining_coins = wallet.available_coins if wallet else 0.0
+        def rollup(column):
+            return select(column).where(UserRollup.user_id == user_id).scalar_subquery()
+
+        def wallet(column):
+            return select(column).where(UserWallet.user_id == user_id).scalar_subquery()
+
+        # The user's rollup row and wallet balance in one round-trip
+        stats = await aggregate_async(
+            self.db,
+            total_retired=rollup(UserRollup.coins_retired),
+            retirement_count=rollup(UserRollup.retirements_completed),
+            pending_count=rollup(UserRollup.retirements_pending),
+            remaining_coins=wallet(UserWallet.available_coins),
+            total_coins=wallet(UserWallet.total_coins)
+        )
+        total_retired = stats['total_retired'] or 0.0
+        retirement_count = stats['retirement_count'] or 0
+        pending_count = stats['pending_count'] or 0
+        remaining_coins = stats['remaining_coins'] or 0.0
         
         # Calculate net zero progress (assuming company needs to offset all their coins)
-        total_coins = wallet.total_coins if wallet else 0.0
+        total_coins = stats['total_coins'] or 0.0
         progress_percentage = (total_retired / total_coins * 100) if total_coins > 0 else 0.0
         
-        # Get last retirement date
-        last_retirement = self.db.query(CreditRetirement).filter(
-            CreditRetirement.user_id == user_id,
-            CreditRetirement.retirement_status == RetirementStatus.COMPLETED
-        ).order_by(CreditRetirement.retirement_date.desc()).first()
-        
-        # Get pending retirements count
-        pending_count = self.db.query(func.count(CreditRetirement.id)).filter(
-            CreditRetirement.user_id == user_id,
-            CreditRetirement.retirement_status == RetirementStatus.PENDING
-        ).scalar() or 0
-        
         return DashboardStatsSchema(
             total_retired=total_retired,
             available_for_retirement=remaining_coins,
@@ -127,11 +122,11 @@ class CreditRetirementService:
             completed_retirements=retirement_count
         )
     
-    def get_retirement_history(self, user_id: int, limit: int = 50) -> List[RetirementHistorySchema]:
+    async def get_retirement_history(self, user_id: int, limit: int = 50) -> List[RetirementHistorySchema]:
         """Get user's retirement history"""
-        retirements = self.db.query(CreditRetirement).filter(
+        retirements = await self.db.scalars(select(CreditRetirement).where(
             CreditRetirement.user_id == user_id
-        ).order_by(CreditRetirement.retirement_date.desc()).limit(limit).all()
+        ).order_by(CreditRetirement.retirement_date.desc()).limit(limit))
         
         return [
             RetirementHistorySchema(
@@ -148,27 +143,15 @@ class CreditRetirementService:
             for retirement in retirements
         ]
     
-    def get_dashboard_stats(self, user_id: int) -> Dict:
-        """Get retirement stats for dashboard"""
-        summary = self.get_user_retirement_summary(user_id)
-        
-        return {
-            'total_retired': summary.total_coins_retired,
-            'available_for_retirement': summary.remaining_coins,
-            'co2_offset_tons': summary.total_co2_offset_tons,
-            'progress_percentage': summary.net_zero_progress_percentage,
-            'certificates_issued': summary.total_retirements
-        }
-    
-    def update_retirement_request(self, retirement_id: str, user_id: int, update_request: RetirementUpdateSchema) -> Dict:
+    async def update_retirement_request(self, retirement_id: str, user_id: int, update_request: RetirementUpdateSchema) -> Dict:
         """Update a pending retirement request"""
         try:
             # Get the retirement record
-            retirement = self.db.query(CreditRetirement).filter(
+            retirement = await self.db.scalar(select(CreditRetirement).where(
                 CreditRetirement.retirement_id == retirement_id,
                 CreditRetirement.user_id == user_id,
                 CreditRetirement.retirement_status == RetirementStatus.PENDING
-            ).first()
+            ))
             
             if not retirement:
                 return {
@@ -177,7 +160,7 @@ class CreditRetirementService:
                 }
             
             # Get user wallet for validation
-            wallet = self.db.query(UserWallet).filter(UserWallet.user_id == user_id).first()
+            wallet = await self.db.scalar(select(UserWallet).where(UserWallet.user_id == user_id))
             if not wallet:
                 return {
                     'success': False,
@@ -201,8 +184,8 @@ class CreditRetirementService:
             if update_request.retirement_reason is not None:
                 retirement.retirement_reason = update_request.retirement_reason
             
-            self.db.commit()
-            self.db.refresh(retirement)
+            await self.db.commit()
+            await self.db.refresh(retirement)
             
             return {
                 'success': True,
@@ -214,21 +197,21 @@ class CreditRetirementService:
             }
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             return {
                 'success': False,
                 'error': f'Update failed: {str(e)}'
             }
     
-    def confirm_retirement(self, retirement_id: str, user_id: int) -> Dict:
+    async def confirm_retirement(self, retirement_id: str, user_id: int) -> Dict:
         """Confirm a pending retirement request"""
         try:
             # Get the retirement record
-            retirement = self.db.query(CreditRetirement).filter(
+            retirement = await self.db.scalar(select(CreditRetirement).where(
                 CreditRetirement.retirement_id == retirement_id,
                 CreditRetirement.user_id == user_id,
                 CreditRetirement.retirement_status == RetirementStatus.PENDING
-            ).first()
+            ))
             
             if not retirement:
                 return {
@@ -237,7 +220,7 @@ class CreditRetirementService:
                 }
             
             # Get user wallet
-            wallet = self.db.query(UserWallet).filter(UserWallet.user_id == user_id).first()
+            wallet = await self.db.scalar(select(UserWallet).where(UserWallet.user_id == user_id))
             if not wallet:
                 return {
                     'success': False,
@@ -265,8 +248,8 @@ class CreditRetirementService:
             wallet.available_coins -= retirement.coins_retired
             wallet.updated_at = datetime.utcnow()
             
-            self.db.commit()
-            self.db.refresh(retirement)
+            await self.db.commit()
+            await self.db.refresh(retirement)
             
             return {
                 'success': True,
@@ -279,21 +262,21 @@ class CreditRetirementService:
             }
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             return {
                 'success': False,
                 'error': f'Confirmation failed: {str(e)}'
             }
     
-    def cancel_retirement(self, retirement_id: str, user_id: int) -> Dict:
+    async def cancel_retirement(self, retirement_id: str, user_id: int) -> Dict:
         """Cancel a pending retirement request"""
         try:
             # Get the retirement record
-            retirement = self.db.query(CreditRetirement).filter(
+            retirement = await self.db.scalar(select(CreditRetirement).where(
                 CreditRetirement.retirement_id == retirement_id,
                 CreditRetirement.user_id == user_id,
                 CreditRetirement.retirement_status == RetirementStatus.PENDING
-            ).first()
+            ))
             
             if not retirement:
                 return {
@@ -305,7 +288,7 @@ class CreditRetirementService:
             retirement.retirement_status = RetirementStatus.FAILED
             retirement.updated_at = datetime.utcnow()
             
-            self.db.commit()
+            await self.db.commit()
             
             return {
                 'success': True,
@@ -314,18 +297,18 @@ class CreditRetirementService:
             }
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             return {
                 'success': False,
                 'error': f'Cancellation failed: {str(e)}'
             }
     
-    def get_pending_retirements(self, user_id: int) -> List[RetirementHistorySchema]:
+    async def get_pending_retirements(self, user_id: int) -> List[RetirementHistorySchema]:
         """Get user's pending retirement requests"""
-        retirements = self.db.query(CreditRetirement).filter(
+        retirements = await self.db.scalars(select(CreditRetirement).where(
             CreditRetirement.user_id == user_id,
             CreditRetirement.retirement_status == RetirementStatus.PENDING
-        ).order_by(CreditRetirement.retirement_date.desc()).all()
+        ).order_by(CreditRetirement.retirement_date.desc()))
         
         return [
             RetirementHistorySchema(
@@ -0,0 +1,373 @@
+# app/services/rollups.py
+"""
+Rollup tables for dashboards.
+
+Marketplace-wide, per-issuer and per-user totals are kept in step with the
+raw tables by a session flush hook: whenever a MarketplaceCredit,
+CarbonCoinIssue or CreditRetirement is added, changed or deleted, the
+difference it makes is applied to the rollup rows in the same transaction
+(`col = col + delta`, so concurrent writers don't lose updates). Mint,
+purchase, verify and retire paths need no changes of their own, sync or
+async.
+
+Writes that bypass the ORM (bulk UPDATE/DELETE, manual SQL) are not seen.
+rebuild_rollups() recomputes everything from the raw tables, and
+find_rollup_drift() reports rows that no longer match.
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, delete, distinct, event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.aggregates import aggregate, aggregate_by, count_where, sum_where
+from app.models.carbon_coins import CarbonCoinIssue, CoinSource
+from app.models.credit_retirement import CreditRetirement, RetirementStatus
+from app.models.marketplace import MarketplaceCredit, SourceType, VerificationStatus
+from app.models.rollup import IssuerRollup, MarketplaceRollup, UserRollup
+
+logger = logging.getLogger(__name__)
+
+MARKETPLACE_ROLLUP_ID = 1
+
+# Columns whose changes move the totals
+TRACKED_COLUMNS = {
+    MarketplaceCredit: ("issuer_id", "verification_status", "source_type", "coins_issued"),
+    CarbonCoinIssue: ("user_id", "source", "coins_issued"),
+    CreditRetirement: ("user_id", "retirement_status", "coins_retired"),
+}
+
+ROLLUP_KEYS = {
+    MarketplaceRollup: MarketplaceRollup.id,
+    IssuerRollup: IssuerRollup.issuer_id,
+    UserRollup: UserRollup.user_id,
+}
+
+_PENDING_DELTAS = "rollup_deltas"
+
+
+def _as_enum(value, enum_class):
+    """Enum member for a member, value or name (raw rows may hold any of them)"""
+    if value is None or isinstance(value, enum_class):
+        return value
+    try:
+        return enum_class(value)
+    except ValueError:
+        return enum_class[value]
+
+
+def _credit_totals(values: Dict) -> Dict[str, float]:
+    verified = _as_enum(values["verification_status"], VerificationStatus) == VerificationStatus.VERIFIED
+    source = _as_enum(values["source_type"], SourceType)
+    coins = (values["coins_issued"] or 0.0) if verified else 0.0
+    return {
+        "credits_total": 1,
+        "credits_verified": int(verified),
+        "coins_verified": coins,
+        "forestation_credits": int(verified and source == SourceType.FORESTATION),
+        "forestation_coins": coins if source == SourceType.FORESTATION else 0.0,
+        "solar_credits": int(verified and source == SourceType.SOLAR_PANEL),
+        "solar_coins": coins if source == SourceType.SOLAR_PANEL else 0.0,
+    }
+
+
+def _contributions(model, values: Dict) -> List[tuple]:
+    """(rollup model, key, totals) that one row adds to the rollups"""
+    if model is MarketplaceCredit:
+        totals = _credit_totals(values)
+        return [(IssuerRollup, values["issuer_id"], totals), (MarketplaceRollup, MARKETPLACE_ROLLUP_ID, totals)]
+
+    if model is CarbonCoinIssue:
+        source = _as_enum(values["source"], CoinSource)
+        coins = values["coins_issued"] or 0.0
+        return [(UserRollup, values["user_id"], {
+            "coin_issues": 1,
+            "coins_minted": coins,
+            "solar_coins_minted": coins if source == CoinSource.SOLAR_PANEL else 0.0,
+            "forestation_coins_minted": coins if source == CoinSource.FORESTATION else 0.0,
+        })]
+
+    status = _as_enum(values["retirement_status"], RetirementStatus)
+    retired = (values["coins_retired"] or 0.0) if status == RetirementStatus.COMPLETED else 0.0
+    return [
+        (UserRollup, values["user_id"], {
+            "coins_retired": retired,
+            "retirements_completed": int(status == RetirementStatus.COMPLETED),
+            "retirements_pending": int(status == RetirementStatus.PENDING),
+        }),
+        (MarketplaceRollup, MARKETPLACE_ROLLUP_ID, {"coins_retired": retired}),
+    ]
+
+
+def _previous_values(obj, columns) -> Dict:
+    """Column values as of the last flush"""
+    attrs = inspect(obj).attrs
+    values = {}
+    for column in columns:
+        history = attrs[column].history
+        if history.empty():
+            # Expired since the last commit (e.g. deleted without being read); load it
+            getattr(obj, column)
+            history = attrs[column].history
+        if history.deleted:
+            values[column] = history.deleted[0]
+        elif history.unchanged:
+            values[column] = history.unchanged[0]
+        else:
+            values[column] = None
+    return values
+
+
+def _collect_deltas(session: Session) -> Dict[tuple, Dict[str, float]]:
+    deltas = defaultdict(lambda: defaultdict(float))
+
+    def add(model, values, sign):
+        # A row without its owner can't be attributed (the NOT NULL constraint will reject it anyway)
+        for rollup, key, totals in _contributions(model, values):
+            if key is None:
+                continue
+            for name, amount in totals.items():
+                deltas[(rollup, key)][name] += sign * amount
+
+    for obj in session.new:
+        columns = TRACKED_COLUMNS.get(type(obj))
+        if columns:
+            add(type(obj), {column: getattr(obj, column) for column in columns}, 1)
+
+    for obj in session.dirty:
+        columns = TRACKED_COLUMNS.get(type(obj))
+        if columns and session.is_modified(obj, include_collections=False):
+            add(type(obj), _previous_values(obj, columns), -1)
+            add(type(obj), {column: getattr(obj, column) for column in columns}, 1)
+
+    for obj in session.deleted:
+        columns = TRACKED_COLUMNS.get(type(obj))
+        if columns:
+            add(type(obj), _previous_values(obj, columns), -1)
+
+    return {
+        target: {name: amount for name, amount in totals.items() if amount}
+        for target, totals in deltas.items()
+        if any(totals.values())
+    }
+
+
+def _insert_missing(connection, model, key):
+    """Create a zeroed rollup row unless it already exists"""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    key_column = ROLLUP_KEYS[model]
+    zeros = {
+        column.name: 0
+        for column in model.__table__.columns
+        if not column.primary_key and column.name != "updated_at"
+    }
+    connection.execute(dialect_insert(model).values({key_column.name: key, **zeros}).on_conflict_do_nothing())
+
+
+def _apply_deltas(connection, deltas: Dict[tuple, Dict[str, float]]):
+    issuer_transitions = 0
+    for (model, key), totals in deltas.items():
+        _insert_missing(connection, model, key)
+        key_column = ROLLUP_KEYS[model]
+        statement = update(model).where(key_column == key).values({
+            name: getattr(model, name) + amount for name, amount in totals.items()
+        })
+
+        if model is IssuerRollup and "credits_verified" in totals:
+            # An issuer counts once while it has any verified credit
+            after = connection.execute(statement.returning(IssuerRollup.credits_verified)).scalar_one()
+            before = after - totals["credits_verified"]
+            if before <= 0 < after:
+                issuer_transitions += 1
+            elif after <= 0 < before:
+                issuer_transitions -= 1
+        else:
+            connection.execute(statement)
+
+    if issuer_transitions:
+        _insert_missing(connection, MarketplaceRollup, MARKETPLACE_ROLLUP_ID)
+        connection.execute(update(MarketplaceRollup).where(MarketplaceRollup.id == MARKETPLACE_ROLLUP_ID).values(
+            verified_issuers=MarketplaceRollup.verified_issuers + issuer_transitions
+        ))
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_rollup_deltas(session, flush_context, instances):
+    # Computed before the flush, while previous values (and deleted rows) are still loaded
+    pending = session.info.setdefault(_PENDING_DELTAS, [])
+    deltas = _collect_deltas(session)
+    if deltas:
+        pending.append(deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_rollup_deltas(session, flush_context):
+    pending = session.info.pop(_PENDING_DELTAS, None)
+    if pending:
+        connection = session.connection()
+        for deltas in pending:
+            _apply_deltas(connection, deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rollup_deltas(session, previous_transaction):
+    session.info.pop(_PENDING_DELTAS, None)
+
+
+def _track_previous_values(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old value when a tracked column is assigned without having been read first,
+# so its previous contribution can be taken back out of the totals
+for _model, _columns in TRACKED_COLUMNS.items():
+    for _column in _columns:
+        event.listen(getattr(_model, _column), "set", _track_previous_values, active_history=True, retval=True)
+
+
+def _credit_measures():
+    verified = MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
+    forestation = MarketplaceCredit.source_type == SourceType.FORESTATION
+    solar = MarketplaceCredit.source_type == SourceType.SOLAR_PANEL
+    return {
+        "credits_total": count_where(),
+        "credits_verified": count_where(verified),
+        "coins_verified": sum_where(MarketplaceCredit.coins_issued, verified),
+        "forestation_credits": count_where(verified, forestation),
+        "forestation_coins": sum_where(MarketplaceCredit.coins_issued, verified, forestation),
+        "solar_credits": count_where(verified, solar),
+        "solar_coins": sum_where(MarketplaceCredit.coins_issued, verified, solar),
+    }
+
+
+def _expected_rollups(db: Session) -> Dict[type, Dict[int, Dict[str, float]]]:
+    """Every rollup row recomputed from the raw tables"""
+    completed = CreditRetirement.retirement_status == RetirementStatus.COMPLETED
+
+    marketplace = aggregate(
+        db,
+        **_credit_measures(),
+        verified_issuers=func.count(distinct(case(
+            (MarketplaceCredit.verification_status == VerificationStatus.VERIFIED, MarketplaceCredit.issuer_id)
+        )))
+    )
+    marketplace["coins_retired"] = aggregate(
+        db, coins_retired=sum_where(CreditRetirement.coins_retired, completed)
+    )["coins_retired"]
+
+    issuers = aggregate_by(db, MarketplaceCredit.issuer_id, **_credit_measures())
+
+    users = defaultdict(lambda: {
+        name: 0 for name in ("coin_issues", "coins_minted", "solar_coins_minted", "forestation_coins_minted",
+                             "coins_retired", "retirements_completed", "retirements_pending")
+    })
+    for user_id, totals in aggregate_by(
+        db,
+        CarbonCoinIssue.user_id,
+        coin_issues=count_where(),
+        coins_minted=sum_where(CarbonCoinIssue.coins_issued),
+        solar_coins_minted=sum_where(CarbonCoinIssue.coins_issued, CarbonCoinIssue.source == CoinSource.SOLAR_PANEL),
+        forestation_coins_minted=sum_where(CarbonCoinIssue.coins_issued, CarbonCoinIssue.source == CoinSource.FORESTATION)
+    ).items():
+        users[user_id].update(totals)
+    for user_id, totals in aggregate_by(
+        db,
+        CreditRetirement.user_id,
+        coins_retired=sum_where(CreditRetirement.coins_retired, completed),
+        retirements_completed=count_where(completed),
+        retirements_pending=count_where(CreditRetirement.retirement_status == RetirementStatus.PENDING)
+    ).items():
+        users[user_id].update(totals)
+
+    return {
+        MarketplaceRollup: {MARKETPLACE_ROLLUP_ID: marketplace},
+        IssuerRollup: issuers,
+        UserRollup: dict(users),
+    }
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Recompute every rollup row from the raw tables (in the caller's transaction)"""
+    expected = _expected_rollups(db)
+    counts = {}
+    for model, rows in expected.items():
+        key_column = ROLLUP_KEYS[model]
+        db.execute(delete(model))
+        if rows:
+            db.execute(insert(model), [{key_column.name: key, **totals} for key, totals in rows.items()])
+        counts[model.__tablename__] = len(rows)
+    logger.info(f"Rebuilt rollups: {counts}")
+    return counts
+
+
+def find_rollup_drift(db: Session, tolerance: float = 1e-6) -> List[Dict]:
+    """Rollup rows that differ from the raw tables"""
+    drift = []
+    for model, rows in _expected_rollups(db).items():
+        key_column = ROLLUP_KEYS[model]
+        stored = {getattr(row, key_column.name): row for row in db.query(model)}
+        for key in set(rows) | set(stored):
+            expected = rows.get(key)
+            row = stored.get(key)
+            for name in (expected or {}):
+                actual = getattr(row, name) if row is not None else None
+                if actual is None or abs(actual - expected[name]) > tolerance:
+                    drift.append({"table": model.__tablename__, "key": key, "column": name,
+                                  "stored": actual, "expected": expected[name]})
+            if expected is None and row is not None and any(
+                getattr(row, column.name) for column in model.__table__.columns
+                if not column.primary_key and column.name != "updated_at"
+            ):
+                drift.append({"table": model.__tablename__, "key": key, "column": None,
+                              "stored": "row", "expected": None})
+    return drift
+
+
+def ensure_rollups(db: Session) -> bool:
+    """Build the rollups if they have never been built; returns True when it did.
+
+    Every worker runs this at startup. On a fresh database several can find
+    no rollups and build them at once; the ones that lose the race on the
+    marketplace row keep the winner's rows.
+    """
+    if db.get(MarketplaceRollup, MARKETPLACE_ROLLUP_ID) is not None:
+        return False
+    try:
+        rebuild_rollups(db)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if db.get(MarketplaceRollup, MARKETPLACE_ROLLUP_ID) is None:
+            raise
+        return False
+    return True
+
+
+class RollupService:
+    """Constant-time reads of the rollup tables"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_marketplace(self) -> MarketplaceRollup:
+        return self.db.get(MarketplaceRollup, MARKETPLACE_ROLLUP_ID) or _empty(MarketplaceRollup, id=MARKETPLACE_ROLLUP_ID)
+
+    def get_issuer(self, issuer_id: int) -> IssuerRollup:
+        return self.db.get(IssuerRollup, issuer_id) or _empty(IssuerRollup, issuer_id=issuer_id)
+
+    def get_user(self, user_id: int) -> UserRollup:
+        return self.db.get(UserRollup, user_id) or _empty(UserRollup, user_id=user_id)
+
+
+def _empty(model, **key):
+    """Transient all-zero rollup for keys with no activity yet"""
+    return model(**key, **{
+        column.name: 0
+        for column in model.__table__.columns
+        if not column.primary_key and column.name != "updated_at"
+    })
@@ -1,11 +1,11 @@
-from app.services.carbon_calculator import carbon_calculator
+from app.services.carbon_calculator import get_carbon_calculator
 import json
 from datetime import datetime
 
 def validate_geotag_photo(self, file_path: str) -> GeotagValidationResponse:
     """Extract and validate GPS coordinates from photo"""
     try:
-        lat, lon = carbon_calculator.extract_gps_from_image(file_path)
+        lat, lon = get_carbon_calculator().extract_gps_from_image(file_path)
         
         if lat is not None and lon is not None:
             return GeotagValidationResponse(
@@ -44,7 +44,7 @@ def calculate_carbon_credits(self, application_id: int, user_id: int) -> Dict:
         longitude = application.longitude or 77.5877
         
         # Calculate carbon credits
-        result = carbon_calculator.calculate_solar_carbon_credits(
+        result = get_carbon_calculator().calculate_solar_carbon_credits(
             latitude=latitude,
             longitude=longitude,
             image_path=application.geotag_photo_path
@@ -2,9 +2,13 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 import os
-import uuid
 from typing import Optional, List
 
+from app.core.aggregates import aggregate_by, count_where, sum_where
+from app.core.pagination import Page, paginate
+from app.core.serialization import Field, Projection
+from app.services.blob_store import BlobStore
+from app.services.document_index import get_document_indexer
 from app.models.solar_panel import SolarPanelApplication, SolarAnalysisResult, CarbonToken
 from app.schemas.solar_panel import (
     SolarPanelApplicationCreate,
@@ -12,11 +16,24 @@ from app.schemas.solar_panel import (
     CarbonTokenCreate
 )
 
+# Listed minted coin fields, selectable with ?fields=
+TOKEN_FIELDS = Projection({
+    "id": CarbonToken.id,
+    "name": CarbonToken.name,
+    "credits": CarbonToken.credits,
+    "source": CarbonToken.source,
+    "tokenized_date": Field(CarbonToken.tokenized_date, lambda tokenized_date: tokenized_date.isoformat()),
+    "application_id": CarbonToken.application_id
+})
+
 class SolarPanelService:
     def __init__(self, db: Session):
         self.db = db
         self.upload_dir = "uploads/solar_panel"
         self._ensure_upload_dir()
+        self.blob_store = BlobStore(db)
+        # Photos stored by this request; derivatives are rendered once their references commit
+        self._pending_derivatives: List[str] = []
     
     def _ensure_upload_dir(self):
         """Ensure upload directory exists"""
@@ -24,49 +41,61 @@ class SolarPanelService:
         os.makedirs(f"{self.upload_dir}/documents", exist_ok=True)
         os.makedirs(f"{self.upload_dir}/photos", exist_ok=True)
     
-    def _save_file(self, file, file_type: str) -> str:
+    async def _save_file(self, file, file_type: str) -> str:
         """Save uploaded file and return file path"""
-        # Generate unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        
-        # Determine subdirectory based on file type
-        subdir = "documents" if file_type in ["pdf", "doc", "docx"] else "photos"
-        file_path = os.path.join(self.upload_dir, subdir, unique_filename)
-        
-        # Save file with proper resource management
-        file.file.seek(0)  # Reset file pointer
-        content = file.file.read()
-        
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        # Content-addressed: identical files are stored once and reference-counted
+        blob = await self.blob_store.put(file)
+        if file_type == "image" or (blob.content_type or "").startswith("image/"):
+            self._pending_derivatives.append(blob.sha256)
         
-        return file_path
+        return blob.path
+    
+    def _register_upload(self, key: str, file_type: str) -> str:
+        """Reference a file the client uploaded directly to storage and return its path"""
+        blob = self.blob_store.register(key)
+        if file_type == "image":
+            self._pending_derivatives.append(blob.sha256)
+        return blob.path
+    
+    def _schedule_derivatives(self):
+        """Render thumbnails and the OCR variant of saved photos; call after the references commit"""
+        for sha256 in self._pending_derivatives:
+            self.blob_store.schedule_derivatives(sha256)
+        self._pending_derivatives = []
     
     # API 1: Create Application
-    def create_application(
+    async def create_application(
         self, 
         user_id: int, 
         application_data: SolarPanelApplicationCreate,
         ownership_document=None,
         energy_certification=None,
-        geotag_photo=None
+        geotag_photo=None,
+        ownership_document_key: Optional[str] = None,
+        energy_certification_key: Optional[str] = None,
+        geotag_photo_key: Optional[str] = None
     ) -> SolarPanelApplication:
         """Create a new solar panel application"""
         
-        # Handle file uploads
+        # Handle file uploads; `*_key` files were uploaded directly to storage
         ownership_doc_path = None
         energy_cert_path = None
         geotag_photo_path = None
         
-        if ownership_document:
-            ownership_doc_path = self._save_file(ownership_document, "document")
+        if ownership_document_key:
+            ownership_doc_path = self._register_upload(ownership_document_key, "document")
+        elif ownership_document:
+            ownership_doc_path = await self._save_file(ownership_document, "document")
         
-        if energy_certification:
-            energy_cert_path = self._save_file(energy_certification, "document")
+        if energy_certification_key:
+            energy_cert_path = self._register_upload(energy_certification_key, "document")
+        elif energy_certification:
+            energy_cert_path = await self._save_file(energy_certification, "document")
         
-        if geotag_photo:
-            geotag_photo_path = self._save_file(geotag_photo, "image")
+        if geotag_photo_key:
+            geotag_photo_path = self._register_upload(geotag_photo_key, "image")
+        elif geotag_photo:
+            geotag_photo_path = await self._save_file(geotag_photo, "image")
         
         # Create application record
         db_application = SolarPanelApplication(
@@ -84,6 +113,10 @@ class SolarPanelService:
         self.db.commit()
         self.db.refresh(db_application)
         
+        self._schedule_derivatives()
+        # Extract document text for review/search in the background
+        get_document_indexer().schedule_application("solar_panel", db_application)
+        
         return db_application
     
     # API 2: Save Analysis Results
@@ -132,9 +165,10 @@ class SolarPanelService:
         ).first()
     
     # Get all applications
-    def get_all_applications(self, skip: int = 0, limit: int = 100) -> List[SolarPanelApplication]:
-        """Get all applications with pagination"""
-        return self.db.query(SolarPanelApplication).offset(skip).limit(limit).all()
+    def get_all_applications(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get all applications with pagination, newest first"""
+        query = self.db.query(SolarPanelApplication)
+        return paginate(query, SolarPanelApplication.created_at, SolarPanelApplication.id, limit, cursor=cursor, skip=skip)
     
     # Get analysis by application ID
     def get_analysis_by_application(self, application_id: int) -> Optional[SolarAnalysisResult]:
@@ -144,9 +178,10 @@ class SolarPanelService:
         ).first()
     
     # Get all analysis results
-    def get_all_analysis(self, skip: int = 0, limit: int = 100) -> List[SolarAnalysisResult]:
-        """Get all analysis results with pagination"""
-        return self.db.query(SolarAnalysisResult).offset(skip).limit(limit).all()
+    def get_all_analysis(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get all analysis results with pagination, newest first"""
+        query = self.db.query(SolarAnalysisResult)
+        return paginate(query, SolarAnalysisResult.created_at, SolarAnalysisResult.id, limit, cursor=cursor, skip=skip)
     
     # Get token by ID
     def get_token(self, token_id: int) -> Optional[CarbonToken]:
@@ -163,9 +198,21 @@ class SolarPanelService:
         ).first()
     
     # Get all tokens
-    def get_all_tokens(self, skip: int = 0, limit: int = 100) -> List[CarbonToken]:
-        """Get all carbon tokens with pagination"""
-        return self.db.query(CarbonToken).offset(skip).limit(limit).all()
+    def get_all_tokens(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get all carbon tokens with pagination, newest first"""
+        query = self.db.query(CarbonToken)
+        return paginate(query, CarbonToken.tokenized_date, CarbonToken.id, limit, cursor=cursor, skip=skip)
+    
+    def get_token_rows(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                       fields: Optional[str] = None) -> Page:
+        """Page of carbon tokens as plain dicts, newest first, selecting only the listed columns"""
+        plan = TOKEN_FIELDS.plan(fields)
+        page = paginate(
+            self.db.query(*plan.columns), CarbonToken.tokenized_date, CarbonToken.id,
+            limit, cursor=cursor, skip=skip, rows=True
+        )
+        page.items = plan.to_dicts(page.items)
+        return page
     
     # Get total token count
     def get_token_count(self) -> int:
@@ -173,14 +220,30 @@ class SolarPanelService:
         return self.db.query(CarbonToken).count()
     
     # Get tokens by name
-    def get_tokens_by_name(self, name: str, skip: int = 0, limit: int = 100) -> List[CarbonToken]:
-        """Get carbon tokens by name with pagination"""
-        return self.db.query(CarbonToken).filter(
+    def get_tokens_by_name(self, name: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get carbon tokens by name with pagination, newest first"""
+        query = self.db.query(CarbonToken).filter(
             CarbonToken.name == name
-        ).offset(skip).limit(limit).all()
+        )
+        return paginate(query, CarbonToken.tokenized_date, CarbonToken.id, limit, cursor=cursor, skip=skip)
     
     # Get total credits sum
     def get_total_credits(self) -> float:
         """Get sum of all carbon credits"""
         result = self.db.query(func.sum(CarbonToken.credits)).scalar()
-        return float(result) if result is not None else 0.0
\ No newline at end of file
+        return float(result) if result is not None else 0.0
+    
+    # Get token summary
+    def get_token_summary(self) -> dict:
+        """Token count, credit total and per-source counts in one GROUP BY"""
+        by_source = aggregate_by(
+            self.db,
+            CarbonToken.source,
+            tokens=count_where(),
+            credits=sum_where(CarbonToken.credits)
+        )
+        return {
+            "total_tokens": sum(group["tokens"] for group in by_source.values()),
+            "total_credits": float(sum(group["credits"] for group in by_source.values())),
+            "source_distribution": {source: group["tokens"] for source, group in by_source.items()}
+        }
\ No newline at end of file
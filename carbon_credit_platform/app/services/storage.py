@@ -0,0 +1,338 @@
+# app/services/storage.py
+import os
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlencode
+
+from app.services.upload_writer import StoredUpload, publish, discard
+
+logger = logging.getLogger(__name__)
+
+# Storage settings
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # local | s3
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "uploads")
+S3_BUCKET = os.getenv("S3_BUCKET", "ecoswap-uploads")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+PRESIGN_EXPIRES_SECONDS = int(os.getenv("PRESIGN_EXPIRES_SECONDS", "900"))
+
+# Public base URL of this API, used for local presigned uploads
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "http://localhost:8000")
+LOCAL_UPLOAD_PATH = "/api/v1/storage/upload"
+
+# Signs local presigned upload URLs; every worker must share it, so there is no per-process fallback
+STORAGE_SIGNING_SECRET = os.getenv("STORAGE_SIGNING_SECRET") or os.getenv("SECRET_KEY")
+
+
+class StorageError(Exception):
+    """Raised when an object can't be stored, found or signed"""
+
+
+def sha256_to_base64(sha256_hex: str) -> str:
+    """Hex digest -> base64 digest (the form S3 checksum headers use)"""
+    return base64.b64encode(bytes.fromhex(sha256_hex)).decode("ascii")
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float  # epoch seconds
+
+
+class StorageBackend:
+    """Where upload bytes live. Keys are relative, slash-separated object names."""
+
+    name = "base"
+
+    def put_file(self, staged: StoredUpload, key: str, content_type: Optional[str] = None,
+                 cache_control: Optional[str] = None) -> str:
+        """Move a staged local file into storage under `key` and return its stored path"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def read_bytes(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def open_read(self, key: str):
+        """Seekable binary file object for reading an object incrementally"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def move(self, key: str, dest_key: str):
+        raise NotImplementedError
+
+    def iter_objects(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[StoredObject]:
+        """Objects under a prefix in key order, resuming after `start_after`"""
+        raise NotImplementedError
+
+    def path_for(self, key: str) -> str:
+        """Value stored in application rows for this key"""
+        raise NotImplementedError
+
+    def key_for(self, path: str) -> Optional[str]:
+        """Inverse of path_for; None if the path is not in this backend"""
+        raise NotImplementedError
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict:
+        """Return {'url', 'method', 'headers'} the client uses to upload directly"""
+        raise NotImplementedError
+
+    def presign_download(self, key: str) -> Optional[str]:
+        """Direct download URL, or None if the API serves the file itself"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Local filesystem storage; presigned uploads go to an HMAC-signed API endpoint"""
+
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_ROOT):
+        self.root = root
+
+    def _file_path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise StorageError(f"Invalid object key: {key}")
+        return path
+
+    def put_file(self, staged: StoredUpload, key: str, content_type: Optional[str] = None,
+                 cache_control: Optional[str] = None) -> str:
+        path = self._file_path(key)
+        if os.path.exists(path):
+            discard(staged.path)
+        else:
+            publish(staged, path)
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._file_path(key))
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._file_path(key))
+        except OSError:
+            return None
+
+    def read_bytes(self, key: str) -> bytes:
+        with open(self._file_path(key), "rb") as stored_file:
+            return stored_file.read()
+
+    def open_read(self, key: str):
+        return open(self._file_path(key), "rb")
+
+    def delete(self, key: str):
+        discard(self._file_path(key))
+
+    def move(self, key: str, dest_key: str):
+        dest_path = self._file_path(dest_key)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        os.replace(self._file_path(key), dest_path)
+
+    def iter_objects(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[StoredObject]:
+        # Hidden directories (staging, quarantine) are only listed when asked for by prefix
+        directory = self._file_path(prefix) if prefix.strip("/") else self.root
+        yield from self._walk(directory, prefix.strip("/"), start_after)
+
+    def _walk(self, directory: str, key_prefix: str, start_after: Optional[str]) -> Iterator[StoredObject]:
+        try:
+            with os.scandir(directory) as scanner:
+                entries = [(entry, entry.is_dir(follow_symlinks=False)) for entry in scanner]
+        except OSError:
+            return
+
+        # "a/" sorts after "a.b", as it does in S3 listings
+        entries.sort(key=lambda item: item[0].name + "/" if item[1] else item[0].name)
+        for entry, is_dir in entries:
+            key = f"{key_prefix}/{entry.name}" if key_prefix else entry.name
+            if is_dir:
+                if entry.name.startswith("."):
+                    continue
+                # Skip whole subtrees that sort before the resume point
+                if start_after and key + "/" < start_after and not start_after.startswith(key + "/"):
+                    continue
+                yield from self._walk(entry.path, key, start_after)
+            elif not start_after or key > start_after:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue  # removed while listing
+                yield StoredObject(key=key, size=stat.st_size, modified=stat.st_mtime)
+
+    def path_for(self, key: str) -> str:
+        return self._file_path(key)
+
+    def key_for(self, path: str) -> Optional[str]:
+        if not path:
+            return None
+        root = os.path.normpath(self.root)
+        normalized = os.path.normpath(path)
+        if not normalized.startswith(root + os.sep):
+            return None
+        return os.path.relpath(normalized, root).replace(os.sep, "/")
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict:
+        expires = int(time.time()) + PRESIGN_EXPIRES_SECONDS
+        signature = sign_local_upload(key, size, sha256, expires)
+        query = urlencode({"key": key, "size": size, "sha256": sha256, "expires": expires, "signature": signature})
+        return {
+            "url": f"{PUBLIC_API_URL}{LOCAL_UPLOAD_PATH}?{query}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type}
+        }
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible storage (AWS S3, MinIO, ...). Requires boto3."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: Optional[str] = S3_ENDPOINT_URL, region: str = S3_REGION):
+        try:
+            import boto3
+        except ImportError as e:
+            raise StorageError("boto3 is required for STORAGE_BACKEND=s3") from e
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def put_file(self, staged: StoredUpload, key: str, content_type: Optional[str] = None,
+                 cache_control: Optional[str] = None) -> str:
+        try:
+            if not self.exists(key):
+                extra_args = {"ContentType": content_type} if content_type else {}
+                if cache_control:
+                    extra_args["CacheControl"] = cache_control
+                self.client.upload_file(staged.path, self.bucket, key, ExtraArgs=extra_args)
+        finally:
+            discard(staged.path)
+        return self.path_for(key)
+
+    def _head(self, key: str) -> Optional[Dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def read_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def open_read(self, key: str):
+        # Response bodies aren't seekable; spool to memory, or disk for large objects
+        spooled = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        self.client.download_fileobj(self.bucket, key, spooled)
+        spooled.seek(0)
+        return spooled
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def move(self, key: str, dest_key: str):
+        self.client.copy_object(Bucket=self.bucket, Key=dest_key, CopySource={"Bucket": self.bucket, "Key": key})
+        self.delete(key)
+
+    def iter_objects(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[StoredObject]:
+        params = {"Bucket": self.bucket, "Prefix": prefix}
+        if start_after:
+            params["StartAfter"] = start_after
+        for page in self.client.get_paginator("list_objects_v2").paginate(**params):
+            for item in page.get("Contents", []):
+                yield StoredObject(key=item["Key"], size=item["Size"], modified=item["LastModified"].timestamp())
+
+    def path_for(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def key_for(self, path: str) -> Optional[str]:
+        prefix = f"s3://{self.bucket}/"
+        if not path or not path.startswith(prefix):
+            return None
+        return path[len(prefix):]
+
+    def presign_download(self, key: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=PRESIGN_EXPIRES_SECONDS
+        )
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict:
+        # Content length and checksum are part of the signature, so S3 rejects
+        # bodies that are larger than declared or don't match the hash
+        checksum = sha256_to_base64(sha256)
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum
+            },
+            ExpiresIn=PRESIGN_EXPIRES_SECONDS
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {
+                "Content-Type": content_type,
+                "x-amz-checksum-sha256": checksum
+            }
+        }
+
+
+def check_signing_secret():
+    """Refuse to run local storage without a shared secret for presigned uploads"""
+    if STORAGE_BACKEND == "local" and not STORAGE_SIGNING_SECRET:
+        raise StorageError("Local storage needs STORAGE_SIGNING_SECRET (or SECRET_KEY) to sign upload URLs")
+
+
+def sign_local_upload(key: str, size: int, sha256: str, expires: int) -> str:
+    check_signing_secret()
+    message = f"{key}\n{size}\n{sha256}\n{expires}".encode("utf-8")
+    return hmac.new(STORAGE_SIGNING_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_local_upload(key: str, size: int, sha256: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign_local_upload(key, size, sha256, expires), signature)
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Return the configured storage backend (STORAGE_BACKEND=local|s3)"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "s3":
+            _storage = S3Storage()
+        else:
+            _storage = LocalStorage()
+        logger.info(f"Using {_storage.name} upload storage")
+    return _storage
@@ -0,0 +1,403 @@
+# app/services/upload_gc.py
+"""
+Garbage collection for upload storage.
+
+Files can outlive every row that points at them: presigned or resumable
+uploads that are never attached to an application, a crash between storing
+a file and committing its row, temp files of interrupted writes, legacy
+files of deleted applications. The sweeper walks storage in key order one
+batch at a time and checks each batch against `upload_blobs` and the
+application path columns with one IN query per table. Orphans older than
+the grace period are moved to a quarantine prefix (or deleted). A run stops
+after a file or time budget and the next run resumes from the same key, so
+large stores are covered incrementally.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.forestation import ForestationApplication
+from app.models.solar_panel import SolarPanelApplication
+from app.models.upload_blob import UploadBlob
+from app.services import ocr
+from app.services.blob_store import STAGING_DIR, sha256_for_key
+from app.services.derivatives import DERIVATIVES
+from app.services.resumable_upload import ResumableUploadStore
+from app.services.storage import StorageBackend, StoredObject, get_storage
+from app.services.upload_writer import discard
+
+logger = logging.getLogger(__name__)
+
+# Sweeper settings
+UPLOAD_GC_INTERVAL = int(os.getenv("UPLOAD_GC_INTERVAL", "0"))  # seconds between background runs, 0 = off
+UPLOAD_GC_MODE = os.getenv("UPLOAD_GC_MODE", "quarantine")  # quarantine | delete
+UPLOAD_GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", str(24 * 60 * 60)))  # time to attach an upload
+UPLOAD_GC_MAX_FILES = int(os.getenv("UPLOAD_GC_MAX_FILES", "10000"))  # per run
+UPLOAD_GC_QUARANTINE_DAYS = int(os.getenv("UPLOAD_GC_QUARANTINE_DAYS", "7"))
+UPLOAD_GC_BATCH_SIZE = 500
+TEMP_FILE_TTL = int(os.getenv("TEMP_FILE_TTL", str(60 * 60)))  # interrupted writes and OCR spill files
+
+QUARANTINE_PREFIX = ".quarantine"
+
+# Application columns holding stored upload paths; a file is live if any of them points at it
+REFERENCE_COLUMNS = [
+    ForestationApplication.ownership_document_path,
+    ForestationApplication.geotag_photo_path,
+    SolarPanelApplication.ownership_document_path,
+    SolarPanelApplication.energy_certification_path,
+    SolarPanelApplication.geotag_photo_path,
+]
+
+
+class SweepInProgressError(Exception):
+    """Raised when a sweep is started while another one is running"""
+
+
+@dataclass
+class SweepReport:
+    scanned: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    deleted: int = 0
+    quarantined: int = 0
+    quarantined_bytes: int = 0
+    temp_files: int = 0
+    stale_blob_rows: int = 0
+    reclaimed_bytes: int = 0
+    errors: int = 0
+
+    def add(self, other: "SweepReport"):
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+
+def original_key(key: str) -> Optional[str]:
+    """Key of the stored original for an object or derivative key; None outside the object store"""
+    if sha256_for_key(key):
+        return key
+    parts = key.rsplit(".", 2)
+    if len(parts) == 3 and parts[1] in DERIVATIVES and DERIVATIVES[parts[1]].extension == parts[2]:
+        if sha256_for_key(parts[0]):
+            return parts[0]
+    return None
+
+
+def is_temp_file(key: str) -> bool:
+    """Staged `.<uuid>.part` file left by an interrupted write"""
+    name = key.rsplit("/", 1)[-1]
+    return name.startswith(".") and name.endswith(".part")
+
+
+def quarantine_key(key: str, now: float) -> str:
+    day = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%d")
+    return f"{QUARANTINE_PREFIX}/{day}/{key}"
+
+
+class UploadSweeper:
+    """Finds upload files that nothing references and quarantines or deletes them"""
+
+    def __init__(self, session_factory=SessionLocal, storage: Optional[StorageBackend] = None,
+                 mode: str = UPLOAD_GC_MODE, grace_seconds: int = UPLOAD_GC_GRACE_SECONDS,
+                 batch_size: int = UPLOAD_GC_BATCH_SIZE):
+        if mode not in ("quarantine", "delete"):
+            raise ValueError(f"Unknown upload GC mode: {mode}")
+        self.session_factory = session_factory
+        self.storage = storage or get_storage()
+        self.mode = mode
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+
+        # Resume point of the current pass; None starts a new pass
+        self.cursor: Optional[str] = None
+        self.totals = SweepReport()
+        self.runs = 0
+        self.passes = 0
+        self.last_run_at: Optional[float] = None
+        self.last_run_seconds: Optional[float] = None
+        self.last_pass_completed_at: Optional[float] = None
+
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def sweep(self, max_files: int = UPLOAD_GC_MAX_FILES, time_budget: Optional[float] = None,
+              dry_run: bool = False) -> SweepReport:
+        """Sweep up to `max_files` objects from the cursor on.
+
+        A dry run reports what would be reclaimed from the start of storage
+        without changing anything, including the cursor.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            raise SweepInProgressError("An upload sweep is already running")
+
+        try:
+            started = time.monotonic()
+            now = time.time()
+            report = SweepReport()
+            start_after = None if dry_run else self.cursor
+            last_key = None
+            finished = True
+
+            db = self.session_factory()
+            try:
+                if start_after is None:
+                    self._sweep_temp_files(report, now, dry_run)
+                    self._expire_quarantine(report, now, dry_run)
+
+                batch_size = min(self.batch_size, max_files)
+                batch: List[StoredObject] = []
+                for stored in self.storage.iter_objects(start_after=start_after):
+                    if stored.key.startswith(QUARANTINE_PREFIX + "/"):
+                        continue
+                    batch.append(stored)
+                    if len(batch) < batch_size:
+                        continue
+
+                    self._sweep_batch(db, batch, report, now, dry_run)
+                    last_key = batch[-1].key
+                    batch = []
+                    if report.scanned >= max_files or (time_budget and time.monotonic() - started >= time_budget):
+                        finished = False
+                        break
+
+                if batch:
+                    self._sweep_batch(db, batch, report, now, dry_run)
+            finally:
+                db.close()
+
+            elapsed = time.monotonic() - started
+            if not dry_run:
+                with self._stats_lock:
+                    self.cursor = None if finished else last_key
+                    self.totals.add(report)
+                    self.runs += 1
+                    self.last_run_at = now
+                    self.last_run_seconds = round(elapsed, 3)
+                    if finished:
+                        self.passes += 1
+                        self.last_pass_completed_at = time.time()
+
+            if report.orphans or report.temp_files or report.errors:
+                logger.info(
+                    f"Upload sweep{' (dry run)' if dry_run else ''}: scanned {report.scanned}, "
+                    f"{report.orphans} orphan(s), {report.temp_files} temp file(s), "
+                    f"{report.reclaimed_bytes} bytes reclaimed, {report.quarantined_bytes} bytes quarantined, "
+                    f"{report.errors} error(s) in {elapsed:.1f}s"
+                )
+            return report
+        finally:
+            self._run_lock.release()
+
+    def _sweep_batch(self, db: Session, batch: List[StoredObject], report: SweepReport, now: float, dry_run: bool):
+        report.scanned += len(batch)
+
+        # Interrupted writes in legacy upload folders
+        for stored in batch:
+            if not is_temp_file(stored.key) or now - stored.modified < TEMP_FILE_TTL:
+                continue
+            report.temp_files += 1
+            if dry_run:
+                continue
+            try:
+                self.storage.delete(stored.key)
+                report.reclaimed_bytes += stored.size
+            except Exception as e:
+                report.errors += 1
+                logger.warning(f"Could not delete temp file {stored.key}: {str(e)}")
+
+        expired = [
+            stored for stored in batch
+            if now - stored.modified >= self.grace_seconds and not is_temp_file(stored.key)
+        ]
+        if not expired:
+            return
+
+        objects: Dict[str, str] = {}  # key -> sha256 of its original
+        legacy: Dict[str, str] = {}  # key -> path stored in application rows
+        for stored in expired:
+            original = original_key(stored.key)
+            if original:
+                objects[stored.key] = sha256_for_key(original)
+            else:
+                legacy[stored.key] = self.storage.path_for(stored.key)
+
+        live = self._live_blobs(db, set(objects.values()), now, report, dry_run)
+        legacy_referenced = self._referenced_paths(db, list(legacy.values()))
+
+        for stored in expired:
+            if stored.key in objects:
+                if objects[stored.key] in live:
+                    continue
+                # Re-check right before removing: the same content may have been attached since
+                if not dry_run and db.query(UploadBlob.sha256).filter(UploadBlob.sha256 == objects[stored.key]).first():
+                    continue
+            elif stored.key in legacy:
+                if legacy[stored.key] in legacy_referenced:
+                    continue
+            else:
+                continue
+
+            report.orphans += 1
+            report.orphan_bytes += stored.size
+            self._remove(stored, report, now, dry_run)
+
+    def _live_blobs(self, db: Session, shas: Set[str], now: float, report: SweepReport, dry_run: bool) -> Set[str]:
+        """Hashes in `shas` whose blob row exists and is referenced by an application"""
+        if not shas:
+            return set()
+        rows = dict(db.query(UploadBlob.sha256, UploadBlob.path).filter(UploadBlob.sha256.in_(shas)).all())
+        referenced = self._referenced_paths(db, list(rows.values()))
+
+        live = set()
+        cutoff = datetime.fromtimestamp(now - self.grace_seconds, timezone.utc)
+        for sha256, path in rows.items():
+            if path in referenced:
+                live.add(sha256)
+                continue
+
+            # Reference count drifted: no application points at the blob any more
+            report.stale_blob_rows += 1
+            if dry_run:
+                continue
+            # Only if the row hasn't been touched within the grace period (an upload in flight bumps it)
+            deleted = db.execute(
+                delete(UploadBlob).where(
+                    UploadBlob.sha256 == sha256,
+                    func.coalesce(UploadBlob.updated_at, UploadBlob.created_at) < cutoff
+                )
+            ).rowcount
+            if not deleted:
+                live.add(sha256)
+        db.commit()
+        return live
+
+    def _referenced_paths(self, db: Session, paths: List[str]) -> Set[str]:
+        """Subset of `paths` stored in any application row"""
+        referenced = set()
+        if not paths:
+            return referenced
+        for column in REFERENCE_COLUMNS:
+            referenced.update(value for (value,) in db.query(column).filter(column.in_(paths)).distinct())
+        return referenced
+
+    def _remove(self, stored: StoredObject, report: SweepReport, now: float, dry_run: bool):
+        if dry_run:
+            return
+        try:
+            if self.mode == "quarantine":
+                self.storage.move(stored.key, quarantine_key(stored.key, now))
+                report.quarantined += 1
+                report.quarantined_bytes += stored.size
+            else:
+                self.storage.delete(stored.key)
+                report.deleted += 1
+                report.reclaimed_bytes += stored.size
+        except Exception as e:
+            report.errors += 1
+            logger.warning(f"Could not remove orphaned upload {stored.key}: {str(e)}")
+
+    def _sweep_temp_files(self, report: SweepReport, now: float, dry_run: bool):
+        """Staged uploads, resumable sessions and OCR spill files left behind by dead requests"""
+        candidates = [(STAGING_DIR, lambda name: name.startswith(".") and name.endswith(".part"))]
+        candidates.append((ocr.spill_dir() or tempfile.gettempdir(), lambda name: name.startswith(ocr.SPILL_PREFIX)))
+
+        for directory, matches in candidates:
+            try:
+                with os.scandir(directory) as scanner:
+                    entries = [entry for entry in scanner if entry.is_file(follow_symlinks=False) and matches(entry.name)]
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if now - stat.st_mtime < TEMP_FILE_TTL:
+                    continue
+                report.temp_files += 1
+                if not dry_run:
+                    discard(entry.path)
+                    report.reclaimed_bytes += stat.st_size
+
+        if not dry_run:
+            purged = ResumableUploadStore().purge_expired()
+            report.temp_files += len(purged)
+            report.reclaimed_bytes += sum(purged.values())
+
+    def _expire_quarantine(self, report: SweepReport, now: float, dry_run: bool):
+        """Delete quarantined files once they are older than UPLOAD_GC_QUARANTINE_DAYS"""
+        if dry_run:
+            return
+        oldest_kept = quarantine_key("", now - UPLOAD_GC_QUARANTINE_DAYS * 24 * 60 * 60)
+        for stored in self.storage.iter_objects(prefix=QUARANTINE_PREFIX + "/"):
+            if stored.key >= oldest_kept:
+                break  # keys are ordered by quarantine day
+            try:
+                self.storage.delete(stored.key)
+                report.deleted += 1
+                report.reclaimed_bytes += stored.size
+            except Exception as e:
+                report.errors += 1
+                logger.warning(f"Could not delete quarantined upload {stored.key}: {str(e)}")
+
+    def snapshot(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "mode": self.mode,
+                "grace_seconds": self.grace_seconds,
+                "interval_seconds": UPLOAD_GC_INTERVAL,
+                "running": self._run_lock.locked(),
+                "runs": self.runs,
+                "passes": self.passes,
+                "cursor": self.cursor,
+                "last_run_at": self.last_run_at,
+                "last_run_seconds": self.last_run_seconds,
+                "last_pass_completed_at": self.last_pass_completed_at,
+                **asdict(self.totals)
+            }
+
+    def start(self, interval: int = UPLOAD_GC_INTERVAL) -> bool:
+        """Run sweeps every `interval` seconds in a daemon thread; returns False if disabled"""
+        if interval <= 0 or self._thread is not None:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, args=(interval,), name="upload-gc", daemon=True)
+        self._thread.start()
+        logger.info(f"Upload sweeper running every {interval}s ({self.mode} mode)")
+        return True
+
+    def _run_forever(self, interval: int):
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except SweepInProgressError:
+                pass
+            except Exception as e:
+                logger.error(f"Upload sweep failed: {str(e)}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=30)
+        self._thread = None
+
+
+_sweeper: Optional[UploadSweeper] = None
+
+
+def get_upload_sweeper() -> UploadSweeper:
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = UploadSweeper()
+    return _sweeper
@@ -0,0 +1,140 @@
+# app/services/upload_writer.py
+import os
+import uuid
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+# Upload limits
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))  # 10MB
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size limit while it is being written"""
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+def _fsync_directory(directory: str):
+    """Make the rename itself durable (not supported on Windows)"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def stage_stream(source, directory: str, max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredUpload:
+    """Copy a file object into a temporary file in `directory` in fixed-size chunks.
+
+    The data is hashed and size-checked as it streams and fsynced before
+    returning; the caller moves the staged file into place with `publish`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+
+    hasher = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    size = 0
+
+    try:
+        with open(temp_path, "wb") as out:
+            while True:
+                count = source.readinto(buffer)
+                if not count:
+                    break
+                size += count
+                if size > max_size:
+                    raise UploadTooLargeError(
+                        f"File size too large. Maximum {max_size // (1024 * 1024)}MB allowed."
+                    )
+                chunk = view[:count]
+                hasher.update(chunk)
+                out.write(chunk)
+
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        discard(temp_path)
+        raise
+
+    return StoredUpload(path=temp_path, size=size, sha256=hasher.hexdigest())
+
+
+async def stage_chunks(chunks: AsyncIterator[bytes], directory: str, max_size: int = MAX_UPLOAD_SIZE) -> StoredUpload:
+    """Async counterpart of stage_stream for request bodies read with `request.stream()`"""
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        out = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(
+                        f"File size too large. Maximum {max_size // (1024 * 1024)}MB allowed."
+                    )
+                hasher.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+
+            await asyncio.to_thread(out.flush)
+            await asyncio.to_thread(os.fsync, out.fileno())
+        finally:
+            out.close()
+    except BaseException:
+        discard(temp_path)
+        raise
+
+    return StoredUpload(path=temp_path, size=size, sha256=hasher.hexdigest())
+
+
+def publish(staged: StoredUpload, dest_path: str) -> StoredUpload:
+    """Atomically move a staged file to its final path"""
+    directory = os.path.dirname(dest_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    try:
+        os.replace(staged.path, dest_path)
+    except BaseException:
+        discard(staged.path)
+        raise
+    _fsync_directory(directory)
+    return StoredUpload(path=dest_path, size=staged.size, sha256=staged.sha256)
+
+
+def discard(path: str):
+    """Remove a staged file, ignoring files that are already gone"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def write_stream(source, dest_path: str, max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredUpload:
+    """Copy a file object to dest_path in chunks; readers never see a partial file"""
+    staged = stage_stream(source, os.path.dirname(dest_path) or ".", max_size, chunk_size)
+    return publish(staged, dest_path)
+
+
+async def save_upload(upload_file, dest_path: str, max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredUpload:
+    """Stream an UploadFile to disk off the event loop"""
+    upload_file.file.seek(0)
+    try:
+        return await asyncio.to_thread(write_stream, upload_file.file, dest_path, max_size, chunk_size)
+    finally:
+        upload_file.file.seek(0)
@@ -0,0 +1,325 @@
+# app/services/vision_client.py
+import os
+import io
+import time
+import random
+import asyncio
+import base64
+import hashlib
+import logging
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.services.image_ingest import pil_image, probe_bytes
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Vision API settings (all overridable from the environment)
+VISION_MODEL = os.getenv("OPENAI_VISION_MODEL", "gpt-4o")
+VISION_MAX_CONCURRENCY = int(os.getenv("OPENAI_VISION_MAX_CONCURRENCY", "4"))
+VISION_MAX_RETRIES = int(os.getenv("OPENAI_VISION_MAX_RETRIES", "3"))
+VISION_DEADLINE_SECONDS = float(os.getenv("OPENAI_VISION_DEADLINE_SECONDS", "45"))
+VISION_CACHE_SIZE = int(os.getenv("OPENAI_VISION_CACHE_SIZE", "512"))
+
+# Payload settings: overlay text stays readable well below the original resolution
+VISION_MAX_SIDE = int(os.getenv("OPENAI_VISION_MAX_SIDE", "1024"))
+JPEG_QUALITY_STEPS = (40, 55, 70, 85)
+MIN_TEXT_PSNR_DB = 30.0
+
+# Backoff settings for retryable failures
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+
+
+class VisionClientError(Exception):
+    """Raised when the vision API can't produce an answer for an image"""
+
+
+def _text_psnr(reference: "np.ndarray", candidate: "np.ndarray") -> float:
+    """PSNR measured only on high-gradient pixels, where overlay text lives"""
+    import numpy as np
+
+    ref = reference.astype(np.float32)
+    grad_x = np.abs(np.diff(ref, axis=1, prepend=ref[:, :1]))
+    grad_y = np.abs(np.diff(ref, axis=0, prepend=ref[:1, :]))
+    gradient = grad_x + grad_y
+
+    mask = gradient >= np.percentile(gradient, 90)
+    if not mask.any():
+        return float("inf")
+
+    mse = np.mean((ref[mask] - candidate.astype(np.float32)[mask]) ** 2)
+    if mse == 0:
+        return float("inf")
+    return 10 * np.log10((255.0 ** 2) / mse)
+
+
+def prepare_image_for_vision(image_bytes: bytes) -> bytes:
+    """Downscale and re-encode to the smallest JPEG that keeps overlay text legible"""
+    import numpy as np
+    from PIL import ImageOps
+
+    probe_bytes(image_bytes)
+    Image = pil_image()
+    image = Image.open(io.BytesIO(image_bytes))
+    # Let the JPEG decoder scale down in the DCT domain instead of decoding full size
+    image.draft("RGB", (VISION_MAX_SIDE, VISION_MAX_SIDE))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+
+    if max(image.size) > VISION_MAX_SIDE:
+        image.thumbnail((VISION_MAX_SIDE, VISION_MAX_SIDE), Image.LANCZOS)
+
+    reference = np.asarray(image.convert("L"))
+
+    encoded = None
+    for quality in JPEG_QUALITY_STEPS:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        encoded = buffer.getvalue()
+
+        decoded = np.asarray(Image.open(io.BytesIO(encoded)).convert("L"))
+        if _text_psnr(reference, decoded) >= MIN_TEXT_PSNR_DB:
+            break
+
+    logger.info(
+        f"Prepared vision payload: {len(image_bytes)} -> {len(encoded)} bytes "
+        f"at {image.size[0]}x{image.size[1]}, quality {quality}"
+    )
+    return encoded
+
+
+class _ResponseCache:
+    """Small LRU cache of vision responses keyed by image hash and prompt"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: str):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class VisionClient:
+    """Shared async OpenAI Vision client with a global concurrency limit,
+    jittered retries, a per-request deadline and a response cache"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: str = VISION_MODEL,
+        max_concurrency: int = VISION_MAX_CONCURRENCY,
+        max_retries: int = VISION_MAX_RETRIES,
+        deadline_seconds: float = VISION_DEADLINE_SECONDS,
+        cache_size: int = VISION_CACHE_SIZE
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.cache = _ResponseCache(cache_size)
+
+        self._client = None
+        # asyncio primitives are bound to the loop that first waits on them
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self):
+        if self._client is None:
+            if not self.is_configured:
+                raise VisionClientError("OPENAI_API_KEY environment variable is required")
+
+            from openai import AsyncOpenAI
+
+            # Retries are handled here so they share the deadline and the limiter
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0
+            )
+        return self._client
+
+    def open(self):
+        """Create the API client up front (no-op without an API key)"""
+        if self.is_configured:
+            self._get_client()
+
+    async def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    def snapshot(self) -> Dict:
+        return {
+            "configured": self.is_configured,
+            "client_open": self._client is not None,
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _cache_key(self, image_bytes: bytes, prompt: str, max_tokens: int, detail: str) -> str:
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        request_digest = hashlib.sha256(
+            f"{self.model}|{detail}|{max_tokens}|{prompt}".encode("utf-8")
+        ).hexdigest()
+        return f"{digest}:{request_digest}"
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code >= 500
+        return isinstance(error, asyncio.TimeoutError)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    async def _request(self, payload: bytes, prompt: str, max_tokens: int, detail: str, deadline: float) -> str:
+        client = self._get_client()
+        base64_image = base64.b64encode(payload).decode("utf-8")
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{base64_image}",
+                            "detail": detail
+                        }
+                    }
+                ]
+            }
+        ]
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise VisionClientError("Vision request deadline exceeded")
+
+            try:
+                async with self._get_semaphore():
+                    remaining = deadline - time.monotonic()
+                    self.in_flight += 1
+                    self.requests += 1
+                    try:
+                        response = await asyncio.wait_for(
+                            client.chat.completions.create(
+                                model=self.model,
+                                messages=messages,
+                                max_tokens=max_tokens,
+                                timeout=remaining
+                            ),
+                            timeout=remaining
+                        )
+                    finally:
+                        self.in_flight -= 1
+                return response.choices[0].message.content or ""
+
+            except Exception as e:
+                self.failures += 1
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise VisionClientError(f"Vision request failed: {str(e)}") from e
+
+                # Full jitter, but never sleep less than the server asked for
+                backoff = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+                backoff = max(backoff, self._retry_after(e) or 0)
+                if time.monotonic() + backoff >= deadline:
+                    raise VisionClientError("Vision request deadline exceeded") from e
+
+                attempt += 1
+                logger.warning(f"Vision request failed ({str(e)}), retry {attempt} in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+
+    async def complete(
+        self,
+        image_bytes: bytes,
+        prompt: str,
+        max_tokens: int = 300,
+        detail: str = "high"
+    ) -> str:
+        """Send one image and prompt to the vision model and return the text answer"""
+        key = self._cache_key(image_bytes, prompt, max_tokens, detail)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("Vision response served from cache")
+            return cached
+
+        deadline = time.monotonic() + self.deadline_seconds
+        payload = await asyncio.to_thread(prepare_image_for_vision, image_bytes)
+        try:
+            # The deadline also covers time spent queued behind the limiter
+            content = await asyncio.wait_for(
+                self._request(payload, prompt, max_tokens, detail, deadline),
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+        except asyncio.TimeoutError as e:
+            raise VisionClientError("Vision request deadline exceeded") from e
+
+        self.cache.put(key, content)
+        return content
+
+
+_vision_client: Optional[VisionClient] = None
+
+
+def get_vision_client() -> VisionClient:
+    """Return the process-wide vision client"""
+    global _vision_client
+    if _vision_client is None:
+        _vision_client = VisionClient()
+    return _vision_client
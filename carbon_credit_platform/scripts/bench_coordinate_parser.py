@@ -0,0 +1,75 @@
+"""
+Benchmark the coordinate parser against the OCR sample corpus.
+
+Compares app.services.coordinate_parser with the older per-pattern regex
+approach (still used by simple_gps_extractor.py) on speed and accuracy.
+
+    python scripts/bench_coordinate_parser.py --rounds 200
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import argparse
+import contextlib
+
+from app.services.coordinate_parser import parse_coordinates
+from simple_gps_extractor import SimpleGPSExtractor
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "ocr_coordinate_samples.jsonl")
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def score(parse, corpus):
+    correct = missed = wrong = 0
+    for sample in corpus:
+        result = parse(sample["text"])
+        expected = sample["expected"]
+        if expected is None:
+            if result is None:
+                correct += 1
+            else:
+                wrong += 1
+        elif result is None:
+            missed += 1
+        elif abs(result["latitude"] - expected[0]) < 1e-5 and abs(result["longitude"] - expected[1]) < 1e-5:
+            correct += 1
+        else:
+            wrong += 1
+    return correct, missed, wrong
+
+
+def time_parser(parse, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for sample in corpus:
+            parse(sample["text"])
+    return (time.perf_counter() - started) / (rounds * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinate parser benchmark")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    legacy = SimpleGPSExtractor()
+
+    print(f"Corpus: {len(corpus)} samples ({sum(1 for s in corpus if s['expected'] is None)} without coordinates)\n")
+    for name, parse in (("legacy regex list", legacy.extract_coordinates), ("compiled scanner", parse_coordinates)):
+        # The legacy extractor prints every step; keep the benchmark output readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            correct, missed, wrong = score(parse, corpus)
+            per_call = time_parser(parse, corpus, args.rounds)
+        print(f"{name:18} correct {correct:3}/{len(corpus)}  missed {missed:2}  wrong accepted {wrong:2}  "
+              f"{per_call * 1e6:7.1f} us/text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark the shared vision client against the local OpenAI stub.
+
+Runs fully offline: starts scripts/openai_stub_server.py in-process, sends a
+batch of synthetic geotag photos through VisionClient and reports payload
+size, latency percentiles, throughput and cache behaviour.
+
+    python scripts/bench_vision_client.py --images 40 --concurrency 4 --latency 0.2
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import time
+import asyncio
+import argparse
+import statistics
+
+import cv2
+import numpy as np
+from aiohttp import web
+
+from scripts.openai_stub_server import create_app
+from app.services.vision_client import VisionClient, prepare_image_for_vision
+
+
+def make_geotag_photo(seed: int, width: int = 4000, height: int = 3000) -> bytes:
+    """Noisy full-resolution photo with a GPS Map Camera style text overlay"""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    img = cv2.GaussianBlur(img, (9, 9), 0)
+
+    cv2.rectangle(img, (0, height - 420), (width, height), (20, 20, 20), -1)
+    lines = [
+        "New Delhi, Delhi, India",
+        f"Lat 28.{586847 + seed:06d} Long 77.{71348 + seed:06d}",
+        "25/09/2025 10:28 PM GMT +05:30"
+    ]
+    for i, line in enumerate(lines):
+        cv2.putText(img, line, (60, height - 300 + i * 110), cv2.FONT_HERSHEY_SIMPLEX, 3.0, (255, 255, 255), 6)
+
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return encoded.tobytes()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_pass(client: VisionClient, images, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(image_bytes):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.complete(image_bytes, "Return the coordinates", max_tokens=100)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(image) for image in images))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def report(name, latencies, errors, elapsed):
+    print(f"\n{name}")
+    print(f"  requests:   {len(latencies)} ({errors} errors)")
+    print(f"  throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency:    p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+async def main(args):
+    app = create_app(latency=args.latency, fail_rate=args.fail_rate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    try:
+        images = [make_geotag_photo(seed) for seed in range(args.images)]
+
+        sample = images[0]
+        started = time.perf_counter()
+        prepared = prepare_image_for_vision(sample)
+        prep_ms = (time.perf_counter() - started) * 1000
+        print(f"Original payload: {len(sample) / 1024:.0f} KiB "
+              f"(base64 {len(sample) * 4 / 3 / 1024:.0f} KiB)")
+        print(f"Prepared payload: {len(prepared) / 1024:.0f} KiB in {prep_ms:.0f} ms "
+              f"({len(prepared) / len(sample) * 100:.1f}% of original)")
+
+        client = VisionClient(
+            api_key="stub",
+            base_url=f"http://127.0.0.1:{args.port}/v1",
+            max_concurrency=args.concurrency
+        )
+
+        report("Cold pass", *await run_pass(client, images, args.images))
+        report("Cached pass", *await run_pass(client, images, args.images))
+
+        stats = app["stats"]
+        print(f"\nStub saw {stats['requests']} requests ({stats['failures']} injected failures), "
+              f"{stats['payload_bytes'] / 1024 / max(stats['requests'], 1):.0f} KiB per request body")
+        print(f"Cache: {client.cache.hits} hits, {client.cache.misses} misses")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vision client benchmark against the offline stub")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Global vision concurrency limit")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub latency per request in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="Fraction of stub requests that fail")
+    parser.add_argument("--port", type=int, default=8089)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Bulk-load marketplace credits, coin issues, transactions, applications,
+users and wallets from CSV, NDJSON or Parquet files, or generate fixture rows.
+
+Tables are loaded in the order given, in one transaction: a bad row or a
+reference to a missing parent rolls everything back. Rollups are rebuilt
+before commit.
+
+    python scripts/bulk_import.py marketplace_credits=legacy.csv [--rename old_name=column ...]
+    python scripts/bulk_import.py --generate users=10000 --generate marketplace_credits=2000000
+    python scripts/bulk_import.py --list-tables
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import engine
+from app.services.bulk_import import (
+    BULK_IMPORT_BATCH_SIZE, FORMATS, IMPORT_TABLES, BulkImportError, BulkImporter, FixtureGenerator, read_records
+)
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+
+def pair(value: str):
+    name, separator, argument = value.partition("=")
+    if not separator or not name or not argument:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value!r}")
+    return name, argument
+
+
+def print_tables():
+    for name, table in IMPORT_TABLES.items():
+        required = [
+            column.name for column in table.columns
+            if not column.nullable and not column.primary_key and column.default is None and column.server_default is None
+        ]
+        print(f"{name} ({table.name})")
+        print(f"  columns:  {', '.join(table.columns.keys())}")
+        print(f"  required: {', '.join(required) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", type=pair, metavar="TABLE=PATH", help="file to load into a table")
+    parser.add_argument("--generate", action="append", type=pair, default=[], metavar="TABLE=COUNT",
+                        help="generate COUNT fixture rows (after the files)")
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--rename", action="append", type=pair, default=[], metavar="FIELD=COLUMN",
+                        help="map an input field to a column name")
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=None, help="random seed for generated rows")
+    parser.add_argument("--no-copy", action="store_true", help="use executemany on PostgreSQL instead of COPY")
+    parser.add_argument("--disable-fk-triggers", action="store_true",
+                        help="PostgreSQL: skip per-row foreign key triggers (superuser); still checked at the end")
+    parser.add_argument("--dry-run", action="store_true", help="load and check everything, then roll back")
+    parser.add_argument("--list-tables", action="store_true", help="show importable tables and their columns")
+    args = parser.parse_args()
+
+    if args.list_tables:
+        print_tables()
+        return
+    if not args.sources and not args.generate:
+        parser.error("give at least one TABLE=PATH or --generate TABLE=COUNT")
+
+    last_printed = [0.0]
+
+    def progress(report):
+        now = time.perf_counter()
+        if now - last_printed[0] >= PROGRESS_INTERVAL:
+            last_printed[0] = now
+            print(f"  {report.table}: {report.rows:,} rows ({report.rows_per_second:,.0f} rows/s)", flush=True)
+
+    started = time.perf_counter()
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        importer = BulkImporter(connection, batch_size=args.batch_size, use_copy=not args.no_copy, progress=progress)
+        importer.defer_constraints(disable_fk_triggers=args.disable_fk_triggers)
+        method = "COPY" if importer.copies else "executemany"
+        renames = dict(args.rename)
+
+        for table_name, path in args.sources:
+            print(f"Loading {path} into {table_name} ({method}, batches of {args.batch_size})...")
+            report = importer.load(table_name, read_records(path, args.format), renames)
+            print(f"  {report.table}: {report.rows:,} rows in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/s)")
+
+        generator = FixtureGenerator(connection, seed=args.seed)
+        for table_name, count in args.generate:
+            print(f"Generating {int(count):,} {table_name} ({method}, batches of {args.batch_size})...")
+            report = importer.load(table_name, generator.records(table_name, int(count)))
+            print(f"  {report.table}: {report.rows:,} rows in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/s)")
+
+        print("Checking foreign keys and rebuilding rollups...")
+        for table, rows in importer.finish().items():
+            print(f"  {table}: {rows} row(s)")
+
+        if args.dry_run:
+            transaction.rollback()
+            print("Dry run: rolled back")
+        else:
+            transaction.commit()
+
+        total = sum(report.rows for report in importer.reports)
+        elapsed = time.perf_counter() - started
+        print(f"{total:,} row(s) in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s overall)")
+    except (BulkImportError, SQLAlchemyError, ValueError, OSError) as e:
+        transaction.rollback()
+        print(f"Import failed, nothing was committed: {str(e)}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Report where `import app.main` spends its time (python -X importtime).
+
+Each run imports the app in a fresh interpreter; the median run is reported
+by package and by module. Fails (exit 1) if a deferred heavy library is
+imported at startup, or if the total exceeds --budget-ms, so it can guard
+cold start in CI.
+
+    python scripts/import_time_report.py [--runs 5] [--top 15] [--budget-ms 2500] [--json]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import json
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use by the services that need them; never at import
+DEFERRED_MODULES = ("cv2", "numpy", "PIL", "pytesseract", "openai", "aiohttp", "pypdf", "exifread")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent>\s+)(?P<module>\S+)$")
+
+
+def measure(target: str):
+    """[(module, self_us, cumulative_us, depth)] for one import of `target` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            depth = (len(match.group("indent")) - 1) // 2
+            modules.append((match.group("module"), int(match.group("self")), int(match.group("cumulative")), depth))
+    return modules
+
+
+def total_us(modules, target: str) -> int:
+    return next(cumulative for module, _, cumulative, _ in modules if module == target)
+
+
+def summarize(modules, target: str, top: int):
+    by_package = defaultdict(int)
+    for module, self_us, _, _ in modules:
+        by_package[module.split(".")[0]] += self_us
+
+    imported = {module.split(".")[0] for module, _, _, _ in modules}
+    return {
+        "target": target,
+        "total_ms": round(total_us(modules, target) / 1000, 1),
+        "modules_imported": len(modules),
+        "deferred_imported": sorted(name for name in DEFERRED_MODULES if name in imported),
+        "packages": [
+            {"package": package, "self_ms": round(self_us / 1000, 1)}
+            for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        ],
+        "modules": [
+            {"module": module, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative / 1000, 1)}
+            for module, self_us, cumulative, _ in sorted(modules, key=lambda item: -item[1])[:top]
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time; the median is reported")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median import takes longer")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    runs = sorted((measure(args.target) for _ in range(max(1, args.runs))), key=lambda run: total_us(run, args.target))
+    report = summarize(runs[len(runs) // 2], args.target, args.top)
+    report["runs_ms"] = [round(total_us(run, args.target) / 1000, 1) for run in runs]
+    report["stdev_ms"] = round(statistics.pstdev(report["runs_ms"]), 1)
+
+    failures = []
+    if report["deferred_imported"]:
+        failures.append(f"deferred libraries imported at startup: {', '.join(report['deferred_imported'])}")
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        failures.append(f"import took {report['total_ms']}ms (budget {args.budget_ms}ms)")
+
+    if args.json:
+        print(json.dumps(dict(report, failures=failures), indent=2))
+    else:
+        print(f"import {args.target}: {report['total_ms']}ms median of {len(runs)} run(s) "
+              f"(stdev {report['stdev_ms']}ms), {report['modules_imported']} modules")
+        print("\nSelf time by package:")
+        for row in report["packages"]:
+            print(f"  {row['self_ms']:>8.1f}ms  {row['package']}")
+        print("\nSlowest modules (self / cumulative):")
+        for row in report["modules"]:
+            print(f"  {row['self_ms']:>8.1f}ms  {row['cumulative_ms']:>8.1f}ms  {row['module']}")
+        for failure in failures:
+            print(f"\nFAIL: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
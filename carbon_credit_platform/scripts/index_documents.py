@@ -0,0 +1,62 @@
+"""
+Backfill the document text index for existing applications.
+
+New uploads are indexed automatically; run this once after deploying the
+index, or with --force after changing the extraction rules.
+
+    python scripts/index_documents.py [--force] [--type forestation|solar_panel]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from collections import Counter
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import SessionLocal
+from app.models.document_text import DocumentText
+from app.services.document_index import APPLICATION_MODELS, INDEXED_DOCUMENTS, get_document_indexer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="re-extract documents that are already indexed")
+    parser.add_argument("--type", choices=sorted(APPLICATION_MODELS), help="only this application type")
+    args = parser.parse_args()
+
+    indexer = get_document_indexer()
+    db = SessionLocal()
+    futures = []
+    try:
+        for application_type, model in APPLICATION_MODELS.items():
+            if args.type and application_type != args.type:
+                continue
+
+            if args.force:
+                db.query(DocumentText).filter(DocumentText.application_type == application_type).delete()
+                db.commit()
+
+            indexed = {
+                (row.application_id, row.document_type)
+                for row in db.query(DocumentText.application_id, DocumentText.document_type).filter(
+                    DocumentText.application_type == application_type,
+                    DocumentText.status == "done"
+                )
+            }
+            for application in db.query(model).yield_per(500):
+                for document_type, column in INDEXED_DOCUMENTS[application_type]:
+                    path = getattr(application, column)
+                    if path and (application.id, document_type) not in indexed:
+                        futures.append(indexer.schedule(application_type, application.id, document_type, path))
+    finally:
+        db.close()
+
+    print(f"Indexing {len(futures)} document(s) with {indexer.workers} worker(s)...")
+    statuses = Counter(future.result() for future in futures)
+    indexer.shutdown()
+    print(", ".join(f"{count} {status}" for status, count in sorted(statuses.items())) or "Nothing to index")
+
+
+if __name__ == "__main__":
+    main()
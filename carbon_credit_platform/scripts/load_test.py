@@ -0,0 +1,334 @@
+"""
+Load test the marketplace, purchase and retirement flows.
+
+Seeds a database with synthetic users, wallets, marketplace credits,
+transactions and applications, starts the app on it with REQUEST_METRICS=1
+and drives a mixed workload from concurrent virtual users: browsing the
+marketplace, purchasing credits, retiring coins and loading the dashboard.
+Reports throughput, error rates and p50/p95/p99 latency per route, with the
+database time and lock waits the app measured for the same requests.
+
+    python scripts/load_test.py --duration 30 --concurrency 32
+    python scripts/load_test.py --mix browse=1,purchase=1 --users 2000 --credits 100000
+    python scripts/load_test.py --database-url postgresql://... --base-url http://127.0.0.1:8000 --no-seed
+
+Without --database-url a throwaway SQLite database is created and removed
+afterwards; a database given explicitly must already be migrated.
+Against --base-url, the app must run with REQUEST_METRICS=1 for database
+figures, and with a single worker so they cover every request.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import random
+import shutil
+import secrets
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+import aiohttp
+from sqlalchemy import func, select
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import Base, create_db_engine
+from app.models.marketplace import MarketplaceCredit, VerificationStatus
+from app.models.user_wallets import UserWallet
+from app.services.bulk_import import BulkImporter, FixtureGenerator
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Share of requests per scenario unless --mix says otherwise
+DEFAULT_MIX = {"browse": 60, "purchase": 15, "retire": 10, "dashboard": 15}
+
+# Route template each scenario requests, as the app's request metrics name it
+SCENARIO_ROUTES = {
+    "browse": "GET /api/v1/marketplace/credits",
+    "purchase": "POST /api/v1/credit-purchase/purchase",
+    "retire": "POST /api/v1/credit-retirement/retire",
+    "dashboard": "GET /api/v1/credit-retirement/dashboard-stats/{user_id}",
+}
+
+
+class Workload:
+    """Builds requests for each scenario from the seeded users and credits"""
+
+    def __init__(self, user_ids, credits, browse_pages: int):
+        self.user_ids = user_ids
+        self.credits = credits  # (id, price_per_coin) of verified credits
+        self.browse_pages = browse_pages
+
+    def browse(self, rng: random.Random):
+        params = {"page": rng.randint(1, self.browse_pages), "size": 20}
+        if rng.random() < 0.5:
+            params["verification_status"] = VerificationStatus.VERIFIED.value
+        return "GET", "/api/v1/marketplace/credits", params, None
+
+    def purchase(self, rng: random.Random):
+        credit_id, price = rng.choice(self.credits)
+        body = {"user_id": rng.choice(self.user_ids), "credit_id": credit_id,
+                "credits_to_purchase": 1, "coin_cost": price or 10.0}
+        return "POST", "/api/v1/credit-purchase/purchase", None, body
+
+    def retire(self, rng: random.Random):
+        body = {"user_id": rng.choice(self.user_ids), "coins_to_retire": rng.randint(1, 5),
+                "retirement_reason": "Load test", "auto_confirm": True}
+        return "POST", "/api/v1/credit-retirement/retire", None, body
+
+    def dashboard(self, rng: random.Random):
+        return "GET", f"/api/v1/credit-retirement/dashboard-stats/{rng.choice(self.user_ids)}", None, None
+
+
+def parse_mix(value: str):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIO_ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; use {', '.join(SCENARIO_ROUTES)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected SCENARIO=WEIGHT, got {part!r}")
+    return mix
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed_database(engine, args):
+    """Synthetic users with wallets, marketplace credits, transactions and applications"""
+    with engine.begin() as connection:
+        importer = BulkImporter(connection)
+        generator = FixtureGenerator(connection, seed=args.seed)
+        for table_name, count in (
+            ("users", args.users), ("user_wallets", args.users), ("marketplace_credits", args.credits),
+            ("credit_transactions", args.credits // 2), ("forestation_applications", args.users),
+            ("solar_panel_applications", args.users),
+        ):
+            report = importer.load(table_name, generator.records(table_name, count))
+            print(f"  {report.table}: {report.rows:,} rows ({report.rows_per_second:,.0f} rows/s)")
+        importer.finish()
+
+
+def load_workload(engine, args) -> Workload:
+    with engine.connect() as connection:
+        user_ids = connection.execute(select(UserWallet.user_id)).scalars().all()
+        credits = connection.execute(
+            select(MarketplaceCredit.id, MarketplaceCredit.price_per_coin)
+            .where(MarketplaceCredit.verification_status == VerificationStatus.VERIFIED)
+        ).all()
+        total_credits = connection.scalar(select(func.count()).select_from(MarketplaceCredit))
+    if not user_ids or not credits:
+        raise SystemExit("The database has no users with wallets or no verified credits; seed it first")
+    # Browse the first pages most; deep pages are rare in practice
+    pages = max(1, min(total_credits // 20, args.browse_pages))
+    return Workload(user_ids, [tuple(credit) for credit in credits], pages)
+
+
+def start_app(database_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, REQUEST_METRICS="1")
+    env.pop("ASYNC_DATABASE_URL", None)
+    if not (env.get("STORAGE_SIGNING_SECRET") or env.get("SECRET_KEY")):
+        # The app refuses to start without one; a single worker can use a throwaway secret
+        env["STORAGE_SIGNING_SECRET"] = secrets.token_hex(32)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_ROOT, env=env
+    )
+
+
+async def wait_until_ready(session: aiohttp.ClientSession, base_url: str, process=None, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"The app exited with code {process.returncode}")
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"The app did not become ready within {timeout:.0f}s")
+
+
+async def request_metrics(session: aiohttp.ClientSession, base_url: str):
+    """The app's per-route totals, or None when it doesn't collect them"""
+    try:
+        async with session.get(f"{base_url}/health/requests") as response:
+            if response.status != 200:
+                return None
+            snapshot = await response.json()
+    except aiohttp.ClientError:
+        return None
+    return snapshot["routes"] if snapshot.get("enabled") else None
+
+
+async def drive(session, base_url, workload, mix, concurrency, duration, seed):
+    """Run virtual users for `duration` seconds; (latency, status) per request by scenario"""
+    results = defaultdict(list)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(rng: random.Random):
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, params, body = getattr(workload, name)(rng)
+            started = time.perf_counter()
+            try:
+                async with session.request(method, f"{base_url}{path}", params=params, json=body) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = None  # no response
+            results[name].append((time.perf_counter() - started, status))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(random.Random(f"{seed}-{n}")) for n in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed, before, after):
+    """Per-scenario client figures, joined with the app's database figures for the same route"""
+    summary = {}
+    for name, samples in results.items():
+        latencies = [latency for latency, _ in samples]
+        statuses = [status for _, status in samples]
+        route = SCENARIO_ROUTES[name]
+        row = {
+            "route": route,
+            "requests": len(samples),
+            "throughput": len(samples) / elapsed,
+            "client_errors": sum(1 for status in statuses if status is not None and 400 <= status < 500),
+            "server_errors": sum(1 for status in statuses if status is None or status >= 500),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+        row["error_rate"] = (row["client_errors"] + row["server_errors"]) / len(samples)
+
+        if after is not None and route in after:
+            totals = {key: value - (before or {}).get(route, {}).get(key, 0) for key, value in after[route].items()}
+            served = totals["requests"] or 1
+            row.update({
+                "db_statements_per_request": totals["statements"] / served,
+                "db_ms_per_request": totals["seconds"] / served * 1000,
+                "lock_wait_ms_per_request": totals["lock_wait_seconds"] / served * 1000,
+                "lock_wait_seconds": totals["lock_wait_seconds"],
+                "lock_errors": totals["lock_errors"],
+            })
+        summary[name] = row
+    return summary
+
+
+def print_report(summary, elapsed, concurrency):
+    total = sum(row["requests"] for row in summary.values())
+    errors = sum(row["client_errors"] + row["server_errors"] for row in summary.values())
+    print(f"\n{total:,} requests in {elapsed:.1f}s from {concurrency} virtual users: "
+          f"{total / elapsed:,.1f} req/s, {errors / max(total, 1) * 100:.2f}% errors\n")
+
+    header = f"{'scenario':<10} {'requests':>9} {'req/s':>8} {'4xx':>6} {'5xx':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    with_db = any("db_ms_per_request" in row for row in summary.values())
+    if with_db:
+        header += f" {'stmts':>6} {'db ms':>7} {'lock ms':>8} {'lock err':>8}"
+    print(header)
+    for name, row in summary.items():
+        line = (f"{name:<10} {row['requests']:>9,} {row['throughput']:>8.1f} {row['client_errors']:>6} "
+                f"{row['server_errors']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+        if "db_ms_per_request" in row:
+            line += (f" {row['db_statements_per_request']:>6.1f} {row['db_ms_per_request']:>7.2f} "
+                     f"{row['lock_wait_ms_per_request']:>8.2f} {row['lock_errors']:>8}")
+        print(line)
+    if with_db:
+        print("\nstmts, db ms and lock ms are per request, as measured by the app; "
+              "lock ms is time spent waiting to take a write lock")
+    else:
+        print("\nNo database figures: the app isn't collecting them (run it with REQUEST_METRICS=1)")
+
+
+async def run(args, base_url, workload, process=None):
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    # Virtual users are separate clients; a shared cookie jar would make them share read-your-writes windows
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as session:
+        await wait_until_ready(session, base_url, process)
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:.0f}s...")
+            await drive(session, base_url, workload, args.mix, args.concurrency, args.warmup, f"{args.seed}-warmup")
+
+        before = await request_metrics(session, base_url)
+        print(f"Running {args.concurrency} virtual users for {args.duration:.0f}s "
+              f"({', '.join(f'{name}={weight:g}' for name, weight in args.mix.items())})...")
+        results, elapsed = await drive(session, base_url, workload, args.mix, args.concurrency, args.duration, args.seed)
+        after = await request_metrics(session, base_url)
+
+    summary = summarize(results, elapsed, before, after)
+    print_report(summary, elapsed, args.concurrency)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duration": elapsed, "concurrency": args.concurrency, "mix": args.mix, "scenarios": summary}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of load before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users, each with one request in flight")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, metavar="SCENARIO=WEIGHT,...",
+                        help=f"scenario weights (default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--users", type=int, default=500, help="users (with wallets) to seed")
+    parser.add_argument("--credits", type=int, default=20000, help="marketplace credits to seed")
+    parser.add_argument("--browse-pages", type=int, default=50, help="marketplace pages browsing spreads over")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="database to seed and load (default: a throwaway SQLite file)")
+    parser.add_argument("--no-seed", action="store_true", help="use the users and credits already in the database")
+    parser.add_argument("--base-url", help="load an app that is already running instead of starting one")
+    parser.add_argument("--port", type=int, default=8091, help="port for the app this script starts")
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url is None:
+        if args.no_seed:
+            parser.error("--no-seed needs --database-url")
+        scratch = tempfile.mkdtemp(prefix="load_test_")
+        args.database_url = f"sqlite:///{os.path.join(scratch, 'load_test.db')}"
+
+    process = None
+    engine = create_db_engine(args.database_url)
+    try:
+        if scratch is not None:
+            Base.metadata.create_all(engine)
+        if not args.no_seed:
+            print(f"Seeding {engine.url.render_as_string(hide_password=True)}...")
+            seed_database(engine, args)
+        workload = load_workload(engine, args)
+
+        base_url = args.base_url
+        if base_url is None:
+            process = start_app(args.database_url, args.port)
+            base_url = f"http://127.0.0.1:{args.port}"
+        asyncio.run(run(args, base_url.rstrip("/"), workload, process))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        engine.dispose()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
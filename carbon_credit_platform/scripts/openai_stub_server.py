@@ -0,0 +1,96 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Lets tests and benchmarks exercise the vision client offline:
+
+    python scripts/openai_stub_server.py --port 8089 --latency 0.2 --fail-rate 0.1
+    export OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    export OPENAI_API_KEY=stub
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import random
+import asyncio
+import argparse
+import json
+
+from aiohttp import web
+
+DEFAULT_REPLY = json.dumps({
+    "has_coordinates": True,
+    "latitude": 28.586847,
+    "longitude": 77.071348,
+    "confidence": "high",
+    "method": "Coordinates read from the GPS Map Camera overlay",
+    "location_description": "Stub response"
+})
+
+
+def create_app(reply: str = DEFAULT_REPLY, latency: float = 0.0, fail_rate: float = 0.0) -> web.Application:
+    """Build the stub app; failures are 429/503 so client retries get exercised"""
+    stats = {"requests": 0, "failures": 0, "payload_bytes": 0}
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        body = await request.read()
+        stats["requests"] += 1
+        stats["payload_bytes"] += len(body)
+
+        if latency:
+            await asyncio.sleep(latency)
+
+        if fail_rate and random.random() < fail_rate:
+            stats["failures"] += 1
+            status = random.choice([429, 503])
+            return web.json_response(
+                {"error": {"message": "Stub failure", "type": "server_error"}},
+                status=status,
+                headers={"retry-after": "0"}
+            )
+
+        payload = json.loads(body)
+        return web.json_response({
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop"
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["stats"] = stats
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI chat completions stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Assistant message content to return")
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(reply=args.reply, latency=args.latency, fail_rate=args.fail_rate),
+        host=args.host,
+        port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Recompute the dashboard rollup tables from the raw credit, coin and
+retirement tables.
+
+The rollups are kept current on every write through the ORM; run this after
+bulk SQL changes, restores or anything else that bypassed it. --check only
+reports rows that have drifted.
+
+    python scripts/rebuild_rollups.py [--check]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import SessionLocal
+from app.services.rollups import find_rollup_drift, rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report drifted rows without rebuilding")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            drift = find_rollup_drift(db)
+            for row in drift:
+                print(f"  {row['table']}[{row['key']}].{row['column']}: stored {row['stored']}, expected {row['expected']}")
+            print(f"{len(drift)} drifted value(s)")
+            sys.exit(1 if drift else 0)
+
+        counts = rebuild_rollups(db)
+        db.commit()
+        for table, rows in counts.items():
+            print(f"  {table}: {rows} row(s)")
+        print("Rollups rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Find and remove upload files that no application references.
+
+Runs a full pass over upload storage (the API's background sweeper covers
+it a slice at a time when UPLOAD_GC_INTERVAL is set). Start with --dry-run
+to see what would be reclaimed.
+
+    python scripts/sweep_uploads.py [--dry-run] [--mode quarantine|delete] [--grace-hours 24]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from dataclasses import asdict
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.services.upload_gc import UPLOAD_GC_GRACE_SECONDS, UPLOAD_GC_MODE, UploadSweeper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without touching them")
+    parser.add_argument("--mode", choices=["quarantine", "delete"], default=UPLOAD_GC_MODE)
+    parser.add_argument("--grace-hours", type=float, default=UPLOAD_GC_GRACE_SECONDS / 3600,
+                        help="leave files younger than this alone (uploads not attached yet)")
+    args = parser.parse_args()
+
+    sweeper = UploadSweeper(mode=args.mode, grace_seconds=int(args.grace_hours * 3600))
+    report = sweeper.sweep(max_files=sys.maxsize, dry_run=args.dry_run)
+
+    print(f"{'Dry run' if args.dry_run else args.mode.capitalize()}: scanned {report.scanned} file(s)")
+    for name, value in asdict(report).items():
+        if name != "scanned":
+            print(f"  {name.replace('_', ' ')}: {value}")
+
+
+if __name__ == "__main__":
+    main()
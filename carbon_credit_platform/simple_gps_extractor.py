@@ -100,6 +100,25 @@ class SimpleGPSExtractor:
         print("❌ No valid GPS coordinates found")
         return None
     
+    def extract_from_image(self, context) -> Optional[Dict]:
+        """Extract GPS coordinates from an ImageContext using only its metadata (no OCR)"""
+        # EXIF GPS tags first, then any location text the camera app stored in comments
+        if context.gps_coordinates:
+            lat, lon = context.gps_coordinates
+            return {
+                'latitude': lat,
+                'longitude': lon,
+                'method': 'exif',
+                'confidence': 'high',
+                'pattern_used': None,
+                'raw_match': None
+            }
+
+        if context.metadata_text:
+            return self.extract_coordinates(context.metadata_text)
+
+        return None
+
     def _calculate_confidence(self, text: str, method: str) -> str:
         """Calculate confidence level based on text context and method"""
         confidence_score = 0.5  # Base confidence
@@ -0,0 +1,32 @@
+"""
+Maintenance endpoints are off unless ADMIN_API_TOKEN is set, and then need
+it in the X-Admin-Token header.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.main import app
+
+ADMIN_ENDPOINTS = [
+    "/api/v1/storage/gc/run?dry_run=true",
+    "/api/v1/documents/forestation/1/reindex",
+]
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ADMIN_ENDPOINTS)
+def test_admin_endpoints_do_not_exist_without_a_token(client, monkeypatch, path):
+    monkeypatch.setattr(deps, "ADMIN_API_TOKEN", None)
+    assert client.post(path, headers={"X-Admin-Token": "anything"}).status_code == 404
+
+
+@pytest.mark.parametrize("path", ADMIN_ENDPOINTS)
+def test_admin_endpoints_need_the_token(client, monkeypatch, path):
+    monkeypatch.setattr(deps, "ADMIN_API_TOKEN", "s3cret")
+    assert client.post(path).status_code == 403
+    assert client.post(path, headers={"X-Admin-Token": "wrong"}).status_code == 403
@@ -0,0 +1,133 @@
+"""
+count_where/sum_where against plain Python over the same seeded rows: every
+measure in one statement must equal counting and summing the rows by hand,
+overall and per group.
+"""
+import asyncio
+import random
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.core.aggregates import aggregate, aggregate_async, aggregate_by, count_where, sum_where
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models.marketplace import MarketplaceCredit, SourceType, VerificationStatus
+from app.models.user import User
+
+USER_IDS = (1, 2, 3, 4)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'aggregates.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(43)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com", "hashed_password": "x"}
+            for user_id in USER_IDS
+        ])
+        connection.execute(MarketplaceCredit.__table__.insert(), [
+            {
+                "issuer_name": f"user{issuer_id}",
+                "issuer_id": issuer_id,
+                "coins_issued": round(rng.uniform(0.5, 100), 2),
+                "verification_status": rng.choice(list(VerificationStatus)),
+                "source_type": rng.choice(list(SourceType)),
+                # Some rows have no price: SUM skips NULLs, like the Python sums below
+                "price_per_coin": rng.choice([None, round(rng.uniform(1, 20), 2)]),
+            }
+            for issuer_id in rng.choices(USER_IDS[:3], k=300)  # user 4 has no credits
+        ])
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def db(database_url):
+    engine = create_db_engine(database_url)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def measures():
+    verified = MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
+    solar = MarketplaceCredit.source_type == SourceType.SOLAR_PANEL
+    return {
+        "total": count_where(),
+        "verified": count_where(verified),
+        "verified_solar": count_where(verified, solar),
+        "priced": count_where(MarketplaceCredit.price_per_coin.isnot(None)),
+        "coins": sum_where(MarketplaceCredit.coins_issued),
+        "coins_verified": sum_where(MarketplaceCredit.coins_issued, verified),
+        "coins_verified_solar": sum_where(MarketplaceCredit.coins_issued, verified, solar),
+        "price_total": sum_where(MarketplaceCredit.price_per_coin),
+        "coins_over_1000": sum_where(MarketplaceCredit.coins_issued, MarketplaceCredit.coins_issued > 1000),
+    }
+
+
+def by_hand(credits):
+    verified = [credit for credit in credits if credit.verification_status == VerificationStatus.VERIFIED]
+    verified_solar = [credit for credit in verified if credit.source_type == SourceType.SOLAR_PANEL]
+    return {
+        "total": len(credits),
+        "verified": len(verified),
+        "verified_solar": len(verified_solar),
+        "priced": sum(1 for credit in credits if credit.price_per_coin is not None),
+        "coins": sum(credit.coins_issued for credit in credits),
+        "coins_verified": sum(credit.coins_issued for credit in verified),
+        "coins_verified_solar": sum(credit.coins_issued for credit in verified_solar),
+        "price_total": sum(credit.price_per_coin for credit in credits if credit.price_per_coin is not None),
+        "coins_over_1000": 0,
+    }
+
+
+def assert_same(computed, expected):
+    assert computed.keys() == expected.keys()
+    for name, value in expected.items():
+        assert computed[name] == pytest.approx(value), name
+
+
+def test_aggregate_matches_python(db):
+    credits = db.query(MarketplaceCredit).all()
+    assert_same(aggregate(db, **measures()), by_hand(credits))
+
+    issuer_two = [credit for credit in credits if credit.issuer_id == 2]
+    assert_same(aggregate(db, MarketplaceCredit.issuer_id == 2, **measures()), by_hand(issuer_two))
+
+
+def test_no_matching_rows_gives_zeros_not_nulls(db):
+    computed = aggregate(db, MarketplaceCredit.issuer_id == 4, **measures())
+    assert computed == {name: 0 for name in measures()}
+
+
+def test_aggregate_by_matches_python_per_group(db):
+    credits = db.query(MarketplaceCredit).all()
+    computed = aggregate_by(db, MarketplaceCredit.issuer_id, **measures())
+    assert set(computed) == {credit.issuer_id for credit in credits}
+    for issuer_id, values in computed.items():
+        assert_same(values, by_hand([credit for credit in credits if credit.issuer_id == issuer_id]))
+
+    by_source = aggregate_by(db, MarketplaceCredit.source_type, MarketplaceCredit.issuer_id != 1, **measures())
+    for source_type, values in by_source.items():
+        assert_same(values, by_hand([
+            credit for credit in credits if credit.source_type == source_type and credit.issuer_id != 1
+        ]))
+
+
+def test_aggregate_async_matches_the_sync_statement(db, database_url):
+    expected = aggregate(db, MarketplaceCredit.issuer_id == 1, **measures())
+    async_engine = create_async_db_engine(database_url.replace("sqlite://", "sqlite+aiosqlite://"))
+
+    async def run():
+        try:
+            async with AsyncSession(async_engine) as session:
+                return await aggregate_async(session, MarketplaceCredit.issuer_id == 1, **measures())
+        finally:
+            await async_engine.dispose()
+
+    assert_same(asyncio.run(run()), expected)
@@ -0,0 +1,120 @@
+"""
+Async sessions: the engine is created on first use through the asyncio
+driver for the same database, gets the same pool and SQLite tuning as the
+sync engine, and its sessions keep attributes loaded after commit.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.main  # noqa: F401  (configures all mappers)
+from app import database
+from app.database import (
+    ENGINE_PROFILES,
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    RoutingSession,
+    _engine_options,
+    async_database_url,
+    create_async_db_engine
+)
+from app.models.user import User
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./carbon_credits.db", "sqlite+aiosqlite:///./carbon_credits.db"),
+    ("postgresql://app:p%40ss@db/carbon", "postgresql+asyncpg://app:p%40ss@db/carbon"),
+    ("postgresql+psycopg2://app@db/carbon", "postgresql+asyncpg://app@db/carbon"),
+])
+def test_async_url_uses_the_asyncio_driver(url, expected):
+    assert async_database_url(url) == expected
+
+
+def test_databases_without_an_async_driver_need_an_explicit_url():
+    with pytest.raises(ValueError, match="ASYNC_DATABASE_URL"):
+        async_database_url("mysql://app@db/carbon")
+
+
+def test_asyncpg_statement_timeout_is_a_server_setting():
+    profile = ENGINE_PROFILES["production"]
+    url = "postgresql+asyncpg://app@db/carbon"
+    options = _engine_options(url, profile, InstrumentedAsyncQueuePool, is_async=True)
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": str(profile.statement_timeout_ms)}}
+    assert options["poolclass"] is InstrumentedAsyncQueuePool
+    assert _engine_options(url, profile, InstrumentedQueuePool)["connect_args"] != options["connect_args"]
+
+
+def test_async_sqlite_engine_gets_the_pool_and_pragmas(tmp_path):
+    profile = ENGINE_PROFILES["production"]
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}", profile)
+
+    async def run():
+        try:
+            async with async_engine.connect() as connection:
+                return [
+                    (await connection.exec_driver_sql(f"PRAGMA {name}")).scalar()
+                    for name in ("journal_mode", "busy_timeout", "cache_size")
+                ]
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(run()) == ["wal", profile.sqlite_busy_timeout_ms, -profile.sqlite_cache_size_kb]
+    assert isinstance(async_engine.pool, InstrumentedAsyncQueuePool)
+    assert async_engine.pool.size() == profile.pool_size
+
+
+@pytest.fixture
+def lazy_engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    sync_engine = database.create_db_engine(url)
+    database.Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", async_database_url(url))
+    monkeypatch.setattr(database, "replica_engine", None)
+    for name in ("_async_engine", "_async_replica_engine", "_async_sessionmaker"):
+        monkeypatch.setattr(database, name, None)
+    yield
+    asyncio.run(database.dispose_async_engine())
+
+
+def test_async_engine_is_created_on_first_use(lazy_engine):
+    assert database.async_pool_status() is None
+
+    async def run():
+        session = database.AsyncSessionLocal()
+        async with session:
+            assert isinstance(session, AsyncSession)
+            assert isinstance(session.sync_session, RoutingSession)
+            assert not session.sync_session.use_replica
+        # Later sessions share the engine
+        first = database._async_engine
+        async with database.AsyncSessionLocal():
+            pass
+        return first
+
+    first = asyncio.run(run())
+    assert first is database._async_engine
+    assert first.url.drivername == "sqlite+aiosqlite"
+    assert database.async_pool_status()["pool"] == "InstrumentedAsyncQueuePool"
+    asyncio.run(database.dispose_async_engine())
+    assert database._async_engine is None and database.async_pool_status() is None
+
+
+def test_async_session_reads_and_writes(lazy_engine):
+    async def run():
+        dependency = database.get_async_db()
+        db = await dependency.__anext__()
+        try:
+            user = User(username="async", email="async@example.com", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            # Loaded attributes survive the commit; reading them needs no IO
+            assert user.username == "async" and user.id is not None
+            return list(await db.scalars(select(User.username)))
+        finally:
+            await dependency.aclose()
+
+    assert asyncio.run(run()) == ["async"]
+    assert database.async_pool_status()["checkouts"] >= 1
@@ -0,0 +1,152 @@
+"""
+Reference counting in the blob store: one object per distinct content,
+freed after the commit that drops its last reference, and never deleted
+from under a reference added by a concurrent upload of the same content.
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import Base, create_db_engine
+from app.models.upload_blob import UploadBlob
+from app.services import blob_store
+from app.services.blob_store import BlobStore, object_key
+from app.services.storage import LocalStorage
+
+PHOTO = b"\xff\xd8 not really a jpeg \xff\xd9"
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "STAGING_DIR", str(tmp_path / "uploads" / ".staging"))
+    return LocalStorage(str(tmp_path / "uploads"))
+
+
+@pytest.fixture
+def make_store(tmp_path, storage):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    Base.metadata.create_all(engine)
+    make_session = sessionmaker(bind=engine)
+    sessions = []
+
+    def make():
+        sessions.append(make_session())
+        return BlobStore(sessions[-1], storage)
+
+    yield make
+    for session in sessions:
+        session.close()
+    engine.dispose()
+
+
+def put(store, data=PHOTO) -> str:
+    blob = asyncio.run(store.put(UploadFile(file=io.BytesIO(data), filename="photo.jpg")))
+    store.db.commit()
+    return blob.sha256
+
+
+def release(store, sha256):
+    assert store.release(store.path_for(sha256))
+    store.db.commit()
+    return store.purge_released()
+
+
+def ref_count(store, sha256):
+    store.db.expire_all()
+    row = store.db.get(UploadBlob, sha256)
+    return None if row is None else row.ref_count
+
+
+def test_same_content_is_stored_once_and_counted(make_store, storage):
+    store = make_store()
+    sha256 = put(store)
+    assert put(store) == sha256
+    assert ref_count(store, sha256) == 2
+    assert storage.read_bytes(object_key(sha256)) == PHOTO
+
+    assert release(store, sha256) == 0
+    assert ref_count(store, sha256) == 1
+    assert storage.exists(object_key(sha256))
+
+    assert release(store, sha256) == 1
+    assert ref_count(store, sha256) is None
+    assert not storage.exists(object_key(sha256))
+
+
+def test_release_ignores_paths_outside_the_store(make_store):
+    store = make_store()
+    assert not store.release("uploads/forestation/legacy.jpg")
+    assert not store.release(None)
+    assert store.purge_released() == 0
+
+
+def test_rollback_keeps_the_reference_and_the_object(make_store, storage):
+    store = make_store()
+    sha256 = put(store)
+    store.release(store.path_for(sha256))
+    store.db.rollback()
+    store._released = []
+    assert ref_count(store, sha256) == 1
+    assert storage.exists(object_key(sha256))
+
+
+def test_reference_added_after_the_release_keeps_the_object(make_store, storage):
+    releasing, uploading = make_store(), make_store()
+    sha256 = put(releasing)
+    releasing.release(releasing.path_for(sha256))
+    releasing.db.commit()
+    assert ref_count(releasing, sha256) == 0  # tombstone until purged
+
+    put(uploading)
+    assert releasing.purge_released() == 0
+    assert ref_count(releasing, sha256) == 1
+    assert storage.read_bytes(object_key(sha256)) == PHOTO
+
+
+def test_upload_after_a_purge_stores_the_object_again(make_store, storage):
+    store = make_store()
+    sha256 = put(store)
+    assert release(store, sha256) == 1
+    put(store)
+    assert ref_count(store, sha256) == 1
+    assert storage.read_bytes(object_key(sha256)) == PHOTO
+
+
+def test_register_references_a_direct_upload(make_store, storage):
+    store = make_store()
+    key = object_key(hashlib.sha256(PHOTO).hexdigest())
+    with pytest.raises(ValueError, match="Upload not found"):
+        store.register(key)
+
+    # Written by a presigned upload, with no row yet
+    os.makedirs(os.path.dirname(storage.path_for(key)))
+    with open(storage.path_for(key), "wb") as uploaded:
+        uploaded.write(PHOTO)
+    assert store.register(key).ref_count == 1
+    with pytest.raises(ValueError, match="Invalid upload key"):
+        store.register("objects/zz/../../etc/passwd")
+    with pytest.raises(ValueError, match="too large"):
+        store.register(key, max_size=len(PHOTO) - 1)
+
+
+def test_register_fails_when_a_purge_deleted_the_object_first(make_store, storage, monkeypatch):
+    purging, registering = make_store(), make_store()
+    sha256 = put(purging)
+    purging.release(purging.path_for(sha256))
+    purging.db.commit()
+    add_reference = registering.add_reference
+
+    def purge_then_add_reference(*args, **kwargs):
+        # The purge claims the tombstone between register()'s size check and its reference
+        assert purging.purge_released() == 1
+        return add_reference(*args, **kwargs)
+
+    monkeypatch.setattr(registering, "add_reference", purge_then_add_reference)
+    with pytest.raises(ValueError, match="Upload not found"):
+        registering.register(object_key(sha256))
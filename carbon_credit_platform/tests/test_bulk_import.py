@@ -0,0 +1,56 @@
+"""
+Bulk import into a local SQLite database: file records are converted to
+column values in batches, and rows whose parents are missing fail the whole
+import instead of being committed.
+"""
+import pytest
+from sqlalchemy import func, select
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import Base, create_db_engine
+from app.models.credit_transaction import CreditTransaction
+from app.models.marketplace import MarketplaceCredit, VerificationStatus
+from app.services.bulk_import import BulkImporter, BulkImportError, FixtureGenerator, read_records
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_csv_records_are_converted_and_loaded_in_batches(engine, tmp_path):
+    path = tmp_path / "credits.csv"
+    path.write_text(
+        "legacy_issuer,issuer_id,coins_issued,source_type,verification_status,description\n"
+        "Alpha,1,150.5,SOLAR_PANEL,verified,\n"
+        "Beta,1,20,forestation,Pending,Mangroves\n"
+        "Gamma,1,5,solar_panel,VERIFIED,\n"
+    )
+    with engine.begin() as connection:
+        importer = BulkImporter(connection, batch_size=2)
+        importer.load("users", FixtureGenerator(connection, seed=1).records("users", 1))
+        report = importer.load("marketplace_credits", read_records(str(path)), renames={"legacy_issuer": "issuer_name"})
+        importer.finish()
+
+    assert (report.rows, report.batches) == (3, 2)
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(MarketplaceCredit.issuer_name, MarketplaceCredit.verification_status, MarketplaceCredit.description)
+            .order_by(MarketplaceCredit.id)
+        ).all()
+    assert rows[0] == ("Alpha", VerificationStatus.VERIFIED, None)
+    assert rows[1] == ("Beta", VerificationStatus.PENDING, "Mangroves")
+
+
+def test_rows_with_missing_parents_fail_the_import(engine):
+    with pytest.raises(BulkImportError, match="credit_transactions"):
+        with engine.begin() as connection:
+            importer = BulkImporter(connection)
+            importer.load("credit_transactions", [{"user_id": 1, "credit_id": 999, "credits_amount": 1, "coins_amount": 1}])
+            importer.finish()
+
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(CreditTransaction.__table__)) == 0
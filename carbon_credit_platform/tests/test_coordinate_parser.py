@@ -0,0 +1,41 @@
+import os
+import json
+
+import pytest
+
+from app.services.coordinate_parser import parse_coordinates
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "ocr_coordinate_samples.jsonl")
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+@pytest.mark.parametrize("sample", load_corpus(), ids=lambda sample: sample["source"])
+def test_corpus_sample(sample):
+    result = parse_coordinates(sample["text"])
+
+    if sample["expected"] is None:
+        assert result is None, f"accepted wrong coordinates from {sample['text']!r}"
+    else:
+        assert result is not None, f"missed coordinates in {sample['text']!r}"
+        assert result["latitude"] == pytest.approx(sample["expected"][0], abs=1e-5)
+        assert result["longitude"] == pytest.approx(sample["expected"][1], abs=1e-5)
+
+
+def test_dates_and_times_are_not_coordinates():
+    assert parse_coordinates("25/09/2025 10:28 PM GMT +05:30") is None
+
+
+def test_hemisphere_letter_applies_per_coordinate():
+    result = parse_coordinates("33.868820° S 151.209296° E")
+    assert result["latitude"] < 0
+    assert result["longitude"] > 0
+
+
+def test_labels_override_order():
+    result = parse_coordinates("Long 77.071348 Lat 28.586847")
+    assert result["latitude"] == pytest.approx(28.586847)
+    assert result["longitude"] == pytest.approx(77.071348)
@@ -0,0 +1,198 @@
+"""
+Batch GPS extraction: uploads and zip members are read lazily and checked
+against the per-image limit, process_batch streams each result as soon as it
+finishes, and the endpoint writes one NDJSON line per image plus a summary.
+"""
+import asyncio
+import io
+import json
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import solar_panel
+from app.api.v1.solar_panel import _iter_batch_sources, _read_zip_member
+from app.main import app
+from app.services.gps_extraction_service import GPSExtractionService, get_gps_extraction_service
+
+
+class FakeGPSService(GPSExtractionService):
+    """Answers from the image bytes: b"slow..." takes longer, b"fail..." finds nothing"""
+
+    def __init__(self):
+        super().__init__(vision_client=object())
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def process_image_bytes(self, content, filename=None):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.2 if content.startswith(b"slow") else 0.01)
+        finally:
+            self.in_flight -= 1
+        success = not content.startswith(b"fail")
+        return {'success': success, 'latitude': 18.5 if success else None, 'longitude': 73.8 if success else None,
+                'message': content.decode(), 'method': 'fake', 'confidence': 'high' if success else 'none'}
+
+
+def zip_of(members) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            if name.endswith("/"):
+                archive.mkdir(name)
+            else:
+                archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def upload(filename, data, content_type="image/jpeg"):
+    return SimpleNamespace(filename=filename, content_type=content_type, file=io.BytesIO(data))
+
+
+def collect(service, sources, **kwargs):
+    async def run():
+        return [result async for result in service.process_batch(sources, **kwargs)]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def service():
+    return FakeGPSService()
+
+
+@pytest.fixture
+def client(service):
+    app.dependency_overrides[get_gps_extraction_service] = lambda: service
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_gps_extraction_service, None)
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_sources_are_uploads_then_image_members_of_the_archive():
+    archive = zip_of({
+        "site/": b"",
+        "site/roof.JPG": b"roof",
+        "site/panel.png": b"panel",
+        "site/notes.txt": b"notes",
+        "__MACOSX/site/._roof.JPG": b"resource fork",
+        "site/.hidden.jpg": b"hidden",
+    })
+    sources = list(_iter_batch_sources([upload("front.jpg", b"front")], archive))
+    assert [filename for filename, _ in sources] == ["front.jpg", "site/roof.JPG", "site/panel.png"]
+
+
+def test_readers_reject_non_images_and_oversize_files(monkeypatch):
+    monkeypatch.setattr(solar_panel, "MAX_GPS_FILE_SIZE", 8)
+    (_, read), = _iter_batch_sources([upload("ok.jpg", b"12345678")], None)
+    assert read() == b"12345678"
+    for photo, message in [
+        (upload("big.jpg", b"123456789"), "too large"),
+        (upload("doc.pdf", b"pdf", content_type="application/pdf"), "must be an image"),
+    ]:
+        (_, read), = _iter_batch_sources([photo], None)
+        with pytest.raises(ValueError, match=message):
+            read()
+
+    with zipfile.ZipFile(zip_of({"small.jpg": b"12345678", "big.jpg": b"x" * 4096})) as archive:
+        assert _read_zip_member(archive, archive.getinfo("small.jpg"))() == b"12345678"
+        big = archive.getinfo("big.jpg")
+        with pytest.raises(ValueError, match="too large"):
+            _read_zip_member(archive, big)()
+        # A member whose header understates its size is cut off there and fails its CRC
+        big.file_size = 8
+        with pytest.raises(zipfile.BadZipFile):
+            _read_zip_member(archive, big)()
+
+
+def test_too_many_archive_members_are_refused(monkeypatch):
+    monkeypatch.setattr(solar_panel, "MAX_BATCH_FILES", 2)
+    archive = zip_of({"a.jpg": b"a", "b.jpg": b"b"})
+    with pytest.raises(ValueError, match="Too many images"):
+        list(_iter_batch_sources([upload("front.jpg", b"front")], archive))
+
+
+def test_results_stream_in_completion_order_with_their_index(service):
+    reads = []
+
+    def reader(data):
+        def read():
+            reads.append(data)
+            return data
+        return read
+
+    sources = [("slow.jpg", reader(b"slow")), ("quick.jpg", reader(b"quick")), ("none.jpg", reader(b"fail"))]
+    results = collect(service, iter(sources), max_concurrency=2)
+    assert [(result['index'], result['filename']) for result in results] == [
+        (1, "quick.jpg"), (2, "none.jpg"), (0, "slow.jpg")
+    ]
+    assert [result['success'] for result in results] == [True, False, True]
+    assert service.peak_in_flight == 2
+    assert len(reads) == 3
+
+
+def test_read_errors_become_results_and_source_errors_propagate(service):
+    def unreadable():
+        raise ValueError("File must be an image")
+
+    results = collect(service, [("doc.pdf", unreadable), ("ok.jpg", lambda: b"ok")])
+    failed = next(result for result in results if result['filename'] == "doc.pdf")
+    assert (failed['index'], failed['success'], failed['message']) == (0, False, "File must be an image")
+    assert failed['method'] == 'error'
+
+    def broken_sources():
+        yield "ok.jpg", lambda: b"ok"
+        raise zipfile.BadZipFile("corrupt archive")
+
+    with pytest.raises(zipfile.BadZipFile):
+        collect(service, broken_sources())
+
+
+def test_endpoint_streams_mixed_uploads_and_archive_members(client, monkeypatch):
+    monkeypatch.setattr(solar_panel, "MAX_GPS_FILE_SIZE", 64)
+    archive = zip_of({"roof.jpg": b"quick roof", "huge.jpg": b"x" * 128, "readme.md": b"skip"})
+    response = client.post("/api/v1/solar-panel/extract-gps/batch", files=[
+        ("photos", ("first.jpg", b"slow first", "image/jpeg")),
+        ("photos", ("notes.txt", b"text", "text/plain")),
+        ("archive", ("site.zip", archive.getvalue(), "application/zip")),
+    ])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    *results, summary = ndjson(response)
+
+    assert sorted(result['filename'] for result in results) == ["first.jpg", "huge.jpg", "notes.txt", "roof.jpg"]
+    # The slow upload was submitted first but is streamed last
+    assert results[-1]['filename'] == "first.jpg"
+    by_name = {result['filename']: result for result in results}
+    assert "must be an image" in by_name["notes.txt"]['message']
+    assert "too large" in by_name["huge.jpg"]['message']
+    assert summary == {"summary": True, "total": 4, "succeeded": 2, "failed": 2}
+
+
+def test_endpoint_reports_archive_errors_in_the_summary_line(client, monkeypatch):
+    monkeypatch.setattr(solar_panel, "MAX_BATCH_FILES", 1)
+    archive = zip_of({"a.jpg": b"a", "b.jpg": b"b"})
+    response = client.post("/api/v1/solar-panel/extract-gps/batch",
+                           files=[("archive", ("site.zip", archive.getvalue(), "application/zip"))])
+    assert response.status_code == 200
+    (summary,) = ndjson(response)
+    assert summary["summary"] and "Too many images" in summary["error"]
+    assert summary["total"] == 0
+
+
+@pytest.mark.parametrize("files, detail", [
+    ([], "Upload images"),
+    ([("archive", ("site.zip", b"not a zip", "application/zip"))], "must be a zip"),
+])
+def test_endpoint_rejects_bad_requests_up_front(client, files, detail):
+    response = client.post("/api/v1/solar-panel/extract-gps/batch", files=files or None,
+                           data=None if files else {"note": "nothing"})
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
@@ -0,0 +1,76 @@
+"""
+ImageContext shares one uploaded image between extractors: the header is
+parsed once and each representation is decoded at most once.
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import image_context, image_ingest
+from app.services.image_context import ImageContext
+from app.services.image_ingest import DecodeStats
+from app.services.upload_writer import UploadTooLargeError
+
+
+def encode(width: int, height: int, format: str = "JPEG") -> bytes:
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(image_ingest, "_stats", DecodeStats())
+    return image_ingest._stats
+
+
+def counters(stats):
+    return stats.decodes, stats.downscaled, stats.rejected
+
+
+def test_each_representation_is_decoded_once(stats, monkeypatch):
+    headers = []
+
+    def counting_open_header(data):
+        headers.append(data)
+        return image_ingest.open_header(data)
+
+    monkeypatch.setattr(image_context, "open_header", counting_open_header)
+    context = ImageContext(encode(320, 240), filename="panel.jpg")
+
+    assert context.pil is context.pil
+    # Later representations are converted from the first decode instead of decoding again
+    bgr, gray = context.bgr, context.gray
+    assert context.bgr is bgr and context.gray is gray
+    assert bgr.shape == (240, 320, 3) and gray.shape == (240, 320)
+    assert context.exif is context.exif
+
+    assert len(headers) == 1
+    assert counters(stats) == (3, 0, 0)
+    assert context.peak_decode_bytes == 320 * 240 * (3 + 3 + 1)
+    assert context.ocr_source == (context.data, ".jpg")
+
+
+def test_from_upload_reads_into_one_buffer_and_checks_the_size():
+    class Upload:
+        filename = "photo.jpg"
+
+        def __init__(self, data):
+            self.file = io.BytesIO(data)
+
+    data = encode(64, 48)
+    context = ImageContext.from_upload(Upload(data))
+    assert isinstance(context.data, memoryview)
+    assert bytes(context.data) == data
+    assert (context.check().width, context.check().height) == (64, 48)
+
+    with pytest.raises(UploadTooLargeError):
+        ImageContext.from_upload(Upload(data), max_bytes=len(data) - 1)
+
+
+def test_unreadable_data_is_a_value_error():
+    with pytest.raises(ValueError, match="not a readable image"):
+        ImageContext(b"not an image", filename="notes.txt").check()
@@ -0,0 +1,108 @@
+"""
+Decode limits for untrusted images: dimensions are checked from the header
+before any pixels exist, large JPEGs are decoded at reduced scale, and the
+DecodeStats counters record decodes, downscales and rejections.
+"""
+import io
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import image_ingest
+from app.services.image_context import ImageContext
+from app.services.image_ingest import DecodeStats, ImageTooLargeError, probe_bytes
+
+
+def encode(width: int, height: int, format: str = "JPEG") -> bytes:
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def png_header(width: int, height: int) -> bytes:
+    """A PNG that declares width x height but carries no pixel data"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b"")
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS)
+    monkeypatch.setattr(image_ingest, "_stats", DecodeStats())
+    return image_ingest._stats
+
+
+@pytest.fixture
+def limits(monkeypatch, stats):
+    # 1600x1200 JPEGs decode at 1/4 scale
+    monkeypatch.setattr(image_ingest, "MAX_IMAGE_PIXELS", 4_000_000)
+    monkeypatch.setattr(image_ingest, "DECODE_PIXEL_BUDGET", 150_000)
+
+
+def counters(stats):
+    return stats.decodes, stats.downscaled, stats.rejected
+
+
+def test_decompression_bomb_header_is_rejected_before_decoding(stats):
+    # 100000 x 100000 declared in a 57-byte file: PIL itself refuses to open it
+    bomb = png_header(100_000, 100_000)
+    with pytest.raises(ImageTooLargeError, match="too large"):
+        probe_bytes(bomb)
+    with pytest.raises(ImageTooLargeError):
+        ImageContext(bomb).check()
+    assert counters(stats) == (0, 0, 2)
+
+
+@pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+def test_images_over_max_pixels_are_rejected_from_the_header(limits, stats):
+    # Over MAX_IMAGE_PIXELS but under PIL's own 2x hard limit: probe() rejects it
+    with pytest.raises(ImageTooLargeError, match="maximum 4 MP"):
+        probe_bytes(png_header(2500, 2000))
+    assert counters(stats) == (0, 0, 1)
+
+
+def test_only_jpegs_may_exceed_the_decode_budget(limits, stats, monkeypatch):
+    with pytest.raises(ImageTooLargeError, match="PNG of 1 MP exceeds"):
+        probe_bytes(png_header(1000, 1000))
+
+    # A JPEG beyond what 1/8 scale can bring under the budget is rejected too
+    monkeypatch.setattr(image_ingest, "DECODE_PIXEL_BUDGET", 40_000)
+    with pytest.raises(ImageTooLargeError, match="too large to decode"):
+        probe_bytes(encode(3200, 1000))
+    assert counters(stats) == (0, 0, 2)
+
+
+@pytest.mark.parametrize("size, scale", [((300, 200), 1), ((600, 400), 2), ((1600, 1200), 4)])
+def test_decode_scale_brings_jpegs_under_the_budget(limits, size, scale):
+    info = probe_bytes(encode(*size))
+    assert (info.format, info.scale) == ("JPEG", scale)
+    assert info.decoded_size[0] * info.decoded_size[1] <= image_ingest.DECODE_PIXEL_BUDGET
+
+
+def test_large_jpeg_is_decoded_at_reduced_scale(limits, stats):
+    context = ImageContext(encode(1600, 1200), filename="roof.jpg")
+    assert context.check().scale == 4
+
+    image = context.pil
+    assert image.size == (400, 300)
+    assert context.gray.shape == (300, 400)
+    assert context.decode_report()["decoded_width"] == 400
+    # Large originals are not handed to tesseract at full size
+    assert context.ocr_source is None
+
+    assert counters(stats) == (2, 2, 0)
+    assert stats.peak_bytes == 400 * 300 * 3 + 400 * 300
+    assert image_ingest.decode_stats()["peak_decode_bytes"] == stats.peak_bytes
+
+
+def test_opencv_decode_uses_the_same_reduced_scale(limits, stats):
+    context = ImageContext(encode(1600, 1200))
+    assert context.bgr.shape == (300, 400, 3)
+    assert context.gray.shape == (300, 400)
+    assert counters(stats) == (2, 2, 0)
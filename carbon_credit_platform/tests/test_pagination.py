@@ -0,0 +1,57 @@
+"""
+Keyset pagination walks every row exactly once, including rows without a
+sort key (e.g. imported with an empty created_at), which come last by id.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.core.pagination import paginate
+from app.database import Base, create_db_engine
+from app.models.marketplace import MarketplaceCredit, SourceType
+
+# created_at per credit id; None is stored as NULL
+CREATED = {1: 0, 2: None, 3: 2, 4: None, 5: 2, 6: 5, 7: None}
+EXPECTED_ORDER = [6, 5, 3, 1, 7, 4, 2]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    Base.metadata.create_all(engine)
+    start = datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(MarketplaceCredit.__table__.insert(), [
+            {"id": credit_id, "issuer_name": "issuer", "issuer_id": 1, "coins_issued": 1.0,
+             "source_type": SourceType.FORESTATION,
+             "created_at": None if offset is None else start + timedelta(hours=offset)}
+            for credit_id, offset in CREATED.items()
+        ])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def page_of(db, limit, **kwargs):
+    return paginate(db.query(MarketplaceCredit), MarketplaceCredit.created_at, MarketplaceCredit.id, limit, **kwargs)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_cursor_pages_reach_rows_without_a_sort_key(db, limit):
+    seen, cursor = [], None
+    while True:
+        page = page_of(db, limit, cursor=cursor)
+        seen += [credit.id for credit in page.items]
+        if page.next_cursor is None:
+            break
+        assert page.items, "a page with a next_cursor must not be empty"
+        cursor = page.next_cursor
+    assert seen == EXPECTED_ORDER
+
+
+@pytest.mark.parametrize("skip", range(len(EXPECTED_ORDER) + 1))
+def test_offset_pages_follow_the_same_order(db, skip):
+    assert [credit.id for credit in page_of(db, 2, skip=skip).items] == EXPECTED_ORDER[skip:skip + 2]
@@ -0,0 +1,146 @@
+"""
+Each hot listing/stats query must be answered from an index.
+
+The queries are captured from the real service methods and run through
+SQLite's EXPLAIN QUERY PLAN. A plan that scans a table without an index
+means a full table read on every request.
+"""
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import encode_cursor
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models import ForestationApplication, MarketplaceCredit  # noqa: F401  (registers all tables)
+from app.models.marketplace import SourceType, VerificationStatus
+from app.services.carbon_coin_service import CarbonCoinService
+from app.services.forestation_service import ForestationService
+from app.services.marketplace_service import MarketplaceService
+from app.services.retirement_service import CreditRetirementService
+from app.services.solar_panel_service import SolarPanelService
+
+# Full table reads; "SCAN t USING [COVERING] INDEX ..." walks an index instead,
+# and "SCAN CONSTANT ROW" is a SELECT without FROM (e.g. only scalar subqueries)
+TABLE_SCAN = re.compile(r"^SCAN (?!.*\bUSING\b)(?!CONSTANT ROW$)(?P<table>\w+)")
+
+# Subqueries are scanned as temporary results, not tables
+SUBQUERY = re.compile(r"^anon_\d+$")
+
+# A page deep into a list; keyset pages must seek the index, not scan
+CURSOR = encode_cursor("2026-01-01 00:00:00", 1000)
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return tmp_path / "plans.db"
+
+
+@pytest.fixture
+def engine(database_path):
+    engine = create_db_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def capture_selects(engine):
+    """Record every SELECT the engine executes with its parameters"""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    return statements
+
+
+def assert_indexed(engine, statements):
+    assert statements, "no queries were captured"
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            details = [row[-1] for row in plan]
+            for detail in details:
+                scan = TABLE_SCAN.match(detail)
+                assert not (scan and not SUBQUERY.match(scan.group("table"))), (
+                    f"full table scan ({detail}) for:\n{statement}\nplan: {details}"
+                )
+            assert any("INDEX" in detail or "PRIMARY KEY" in detail for detail in details), (
+                f"no index used for:\n{statement}\nplan: {details}"
+            )
+
+
+SYNC_QUERIES = {
+    "forestation_user_applications": lambda db: ForestationService(db).get_user_applications(1),
+    "forestation_by_status": lambda db: ForestationService(db).get_all_applications(status="pending"),
+    "forestation_all": lambda db: ForestationService(db).get_all_applications(),
+    "forestation_stats": lambda db: ForestationService(db).get_application_stats(1),
+    "marketplace_verified": lambda db: MarketplaceService(db).get_marketplace_credits(
+        verification_status=VerificationStatus.VERIFIED
+    ),
+    "marketplace_verified_by_source": lambda db: MarketplaceService(db).get_marketplace_credits(
+        verification_status=VerificationStatus.VERIFIED, source_type=SourceType.SOLAR_PANEL
+    ),
+    "marketplace_all": lambda db: MarketplaceService(db).get_marketplace_credits(),
+    "marketplace_display": lambda db: MarketplaceService(db).get_verified_credits_for_marketplace(),
+    "marketplace_source_type": lambda db: MarketplaceService(db).get_credits_by_source_type(SourceType.FORESTATION),
+    "marketplace_issuer_stats": lambda db: MarketplaceService(db).get_issuer_stats(1),
+    "marketplace_summary": lambda db: MarketplaceService(db).get_marketplace_summary(),
+    "coins_user": lambda db: CarbonCoinService(db).get_user_carbon_coins(1),
+    "coins_user_by_source": lambda db: CarbonCoinService(db).get_user_carbon_coins(1, source_filter="solar_panel"),
+    "coins_by_source": lambda db: CarbonCoinService(db).get_all_carbon_coins(source_filter="forestation"),
+    "coins_stats": lambda db: CarbonCoinService(db).get_carbon_coin_stats(1),
+    "solar_analysis": lambda db: SolarPanelService(db).get_analysis_by_application(1),
+    "solar_token": lambda db: SolarPanelService(db).get_token_by_application(1),
+    "solar_tokens_by_name": lambda db: SolarPanelService(db).get_tokens_by_name("Solar Token"),
+    "forestation_user_after_cursor": lambda db: ForestationService(db).get_user_applications(1, cursor=CURSOR),
+    "forestation_all_after_cursor": lambda db: ForestationService(db).get_all_applications(cursor=CURSOR),
+    "marketplace_verified_after_cursor": lambda db: MarketplaceService(db).get_marketplace_credits(
+        verification_status=VerificationStatus.VERIFIED, cursor=CURSOR
+    ),
+    "coins_by_source_after_cursor": lambda db: CarbonCoinService(db).get_all_carbon_coins(
+        source_filter="solar_panel", cursor=CURSOR
+    ),
+    "coins_all_after_cursor": lambda db: CarbonCoinService(db).get_all_carbon_coins(cursor=CURSOR),
+    "solar_analysis_after_cursor": lambda db: SolarPanelService(db).get_all_analysis(cursor=CURSOR),
+    "solar_applications_after_cursor": lambda db: SolarPanelService(db).get_all_applications(cursor=CURSOR),
+    "solar_tokens_after_cursor": lambda db: SolarPanelService(db).get_all_tokens(cursor=CURSOR),
+    "solar_token_rows_after_cursor": lambda db: SolarPanelService(db).get_token_rows(cursor=CURSOR, fields="name"),
+}
+
+
+@pytest.mark.parametrize("query", SYNC_QUERIES.values(), ids=SYNC_QUERIES.keys())
+def test_service_query_uses_index(engine, query):
+    statements = capture_selects(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        query(db)
+    finally:
+        db.close()
+    assert_indexed(engine, statements)
+
+
+ASYNC_QUERIES = {
+    "retirement_summary": lambda db: CreditRetirementService(db).get_user_retirement_summary(1),
+    "retirement_history": lambda db: CreditRetirementService(db).get_retirement_history(1),
+    "retirement_pending": lambda db: CreditRetirementService(db).get_pending_retirements(1),
+}
+
+
+@pytest.mark.parametrize("query", ASYNC_QUERIES.values(), ids=ASYNC_QUERIES.keys())
+def test_async_service_query_uses_index(engine, database_path, query):
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{database_path}")
+    statements = capture_selects(async_engine.sync_engine)
+
+    async def run():
+        async with AsyncSession(async_engine) as db:
+            await query(db)
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert_indexed(engine, statements)
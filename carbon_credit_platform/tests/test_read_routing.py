@@ -0,0 +1,51 @@
+"""
+Read replica routing against two local SQLite databases: the "replica" is a
+separate file that never receives the primary's writes, so where a read
+went shows in what it returns.
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import Base, RoutingSession, create_db_engine, read_routing_state
+from app.models.user import User
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    primary = create_db_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, name in ((primary, "primary"), (replica, "replica")):
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(User.__table__.insert().values(username=name, email=f"{name}@example.com", hashed_password="x"))
+    yield sessionmaker(class_=RoutingSession, bind=primary, replica=replica, autoflush=False)
+    primary.dispose()
+    replica.dispose()
+
+
+def usernames(db):
+    return sorted(db.scalars(select(User.username)))
+
+
+def test_read_only_session_reads_from_replica(make_session):
+    with make_session(use_replica=True) as db:
+        assert usernames(db) == ["replica"]
+    with make_session() as db:
+        assert usernames(db) == ["primary"]
+
+
+def test_session_moves_to_primary_once_it_writes(make_session):
+    state = {"prefer_primary": False, "wrote": False}
+    token = read_routing_state.set(state)
+    try:
+        with make_session(use_replica=True) as db:
+            db.add(User(username="new", email="new@example.com", hashed_password="x"))
+            db.flush()
+            # Reads its own write, and the request is marked for read-your-writes
+            assert usernames(db) == ["new", "primary"]
+            db.commit()
+    finally:
+        read_routing_state.reset(token)
+    assert state["wrote"]
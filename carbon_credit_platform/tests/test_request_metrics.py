@@ -0,0 +1,57 @@
+"""
+Per-route request metrics: requests are counted under their route template,
+and the statements they run (including the write that takes the lock) are
+attributed to them.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.request_metrics import RequestMetrics, RequestMetricsMiddleware, enable_statement_metrics
+from app.database import create_db_engine
+
+
+@pytest.fixture
+def client(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    enable_statement_metrics()
+    metrics = RequestMetrics()
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+
+    @app.post("/items/{name}")
+    def create_item(name: str):
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": name})
+            connection.execute(text("UPDATE items SET name = upper(name) WHERE name = :name"), {"name": name})
+        return {"name": name}
+
+    @app.get("/items")
+    def list_items():
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT name FROM items")).scalars().all()
+
+    yield TestClient(app), metrics
+    engine.dispose()
+
+
+def test_database_work_is_attributed_to_the_route(client):
+    client, metrics = client
+    for name in ("a", "b"):
+        assert client.post(f"/items/{name}").status_code == 200
+    assert client.get("/items").json() == ["A", "B"]
+    assert client.get("/missing").status_code == 404
+
+    routes = metrics.snapshot()["routes"]
+    writes = routes["POST /items/{name}"]
+    assert writes["requests"] == 2
+    assert writes["statements"] >= 4
+    # Only the first write of each transaction takes the lock
+    assert 0 < writes["lock_wait_seconds"] < writes["seconds"]
+    assert routes["GET /items"]["statements"] >= 1
+    assert routes["GET /items"]["lock_wait_seconds"] == 0
+    assert routes["unmatched"] == {**routes["unmatched"], "requests": 1, "client_errors": 1, "statements": 0}
@@ -0,0 +1,70 @@
+"""
+Lifespan resource registry: start order, reverse stop order, and a resource
+that fails or hangs doesn't take the others down with it.
+"""
+import asyncio
+import time
+
+from app.core.resources import ResourceRegistry
+
+
+class FakeResource:
+    def __init__(self, name, events, fail_start=False, stop_delay=0.0):
+        self.name = name
+        self.events = events
+        self.fail_start = fail_start
+        self.stop_delay = stop_delay
+
+    async def start(self):
+        if self.fail_start:
+            raise RuntimeError("unavailable")
+        self.events.append(f"start {self.name}")
+
+    def stop(self):
+        time.sleep(self.stop_delay)
+        self.events.append(f"stop {self.name}")
+
+    def snapshot(self):
+        return {"name": self.name}
+
+
+def register(registry, resource):
+    registry.register(resource.name, lambda: resource, start=FakeResource.start,
+                      stop=FakeResource.stop, stats=FakeResource.snapshot)
+
+
+def test_resources_start_in_order_and_stop_in_reverse():
+    events = []
+    registry = ResourceRegistry()
+    for name in ("database", "pool", "client"):
+        register(registry, FakeResource(name, events))
+    registry.register("unconfigured", lambda: None)
+
+    asyncio.run(registry.startup())
+    snapshot = registry.snapshot()
+    asyncio.run(registry.shutdown())
+
+    assert events == ["start database", "start pool", "start client", "stop client", "stop pool", "stop database"]
+    assert snapshot["status"] == "healthy"
+    assert snapshot["resources"]["pool"]["stats"] == {"name": "pool"}
+    assert snapshot["resources"]["unconfigured"]["state"] == "disabled"
+
+
+def test_failed_and_hung_resources_are_reported():
+    events = []
+    registry = ResourceRegistry(shutdown_timeout=0.05)
+    register(registry, FakeResource("database", events))
+    register(registry, FakeResource("broken", events, fail_start=True))
+    register(registry, FakeResource("slow", events, stop_delay=0.5))
+
+    asyncio.run(registry.startup())
+    snapshot = registry.snapshot()
+    assert snapshot["status"] == "degraded"
+    assert snapshot["resources"]["broken"]["state"] == "failed"
+    assert snapshot["resources"]["broken"]["error"] == "unavailable"
+
+    asyncio.run(registry.shutdown())
+    resources = registry.snapshot()["resources"]
+    assert resources["slow"]["state"] == "failed"
+    assert resources["database"]["state"] == "stopped"
+    assert "stop database" in events
@@ -0,0 +1,167 @@
+"""
+Resumable uploads: chunks append at the stored offset, a wrong offset is a
+409 that tells the client where to resume, two writers can't interleave, and
+completing checks the size and the declared checksum.
+"""
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import storage as storage_api
+from app.main import app
+from app.services.blob_store import object_key
+from app.services.resumable_upload import (
+    ResumableUploadStore,
+    UploadBusyError,
+    UploadNotFoundError,
+    UploadOffsetError
+)
+from app.services.storage import LocalStorage
+from app.services.upload_writer import UploadTooLargeError
+
+DATA = os.urandom(10_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumableUploadStore(str(tmp_path / "resumable"))
+
+
+@pytest.fixture
+def client(store, tmp_path, monkeypatch):
+    local = LocalStorage(str(tmp_path / "uploads"))
+    monkeypatch.setattr(storage_api, "ResumableUploadStore", lambda: store)
+    monkeypatch.setattr(storage_api, "get_storage", lambda: local)
+    return TestClient(app), local
+
+
+def create(client, size=len(DATA), sha256=SHA256):
+    response = client.post("/api/v1/storage/uploads", json={
+        "filename": "report.pdf", "content_type": "application/pdf", "size": size, "sha256": sha256
+    })
+    assert response.status_code == 201
+    return f"/api/v1/storage/uploads/{response.json()['upload_id']}"
+
+
+def patch(client, url, offset, content):
+    return client.patch(url, content=content, headers={"Upload-Offset": str(offset)})
+
+
+def test_upload_in_chunks_and_complete(client):
+    client, local = client
+    url = create(client)
+    assert patch(client, url, 0, DATA[:4000]).json()["offset"] == 4000
+    assert client.head(url).headers["Upload-Offset"] == "4000"
+    assert patch(client, url, 4000, DATA[4000:]).json()["offset"] == len(DATA)
+
+    response = client.post(f"{url}/complete")
+    assert response.status_code == 200
+    assert response.json() == {"key": object_key(SHA256), "size": len(DATA), "sha256": SHA256}
+    assert local.read_bytes(object_key(SHA256)) == DATA
+    # The session is gone once completed
+    assert client.get(url).status_code == 404
+
+
+def test_wrong_offset_is_409_with_the_stored_offset(client):
+    client, _ = client
+    url = create(client)
+    patch(client, url, 0, DATA[:4000])
+    for offset in (0, 5000):
+        response = patch(client, url, offset, DATA[offset:])
+        assert response.status_code == 409
+        assert response.headers["Upload-Offset"] == "4000"
+    assert client.get(url).json()["offset"] == 4000
+
+
+def test_oversize_uploads_are_413(client):
+    client, _ = client
+    response = client.post("/api/v1/storage/uploads", json={
+        "filename": "huge.pdf", "content_type": "application/pdf", "size": storage_api.MAX_UPLOAD_SIZE + 1
+    })
+    assert response.status_code == 413
+
+    url = create(client)
+    assert patch(client, url, 0, DATA + b"extra").status_code == 413
+
+
+def test_checksum_mismatch_on_complete_discards_the_upload(client):
+    client, local = client
+    url = create(client, sha256=hashlib.sha256(b"something else").hexdigest())
+    patch(client, url, 0, DATA)
+    response = client.post(f"{url}/complete")
+    assert response.status_code == 400
+    assert "checksum" in response.json()["detail"]
+    assert client.get(url).status_code == 404
+    assert not local.exists(object_key(SHA256))
+
+
+def test_incomplete_upload_cannot_be_completed(client):
+    client, _ = client
+    url = create(client)
+    patch(client, url, 0, DATA[:4000])
+    response = client.post(f"{url}/complete")
+    assert response.status_code == 400
+    assert "received 4000" in response.json()["detail"]
+
+
+def test_concurrent_append_is_refused(store):
+    upload = store.create("report.pdf", "application/pdf", len(DATA))
+
+    async def run():
+        first_chunk_written = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_body():
+            yield DATA[:4000]
+            first_chunk_written.set()
+            await release.wait()
+            yield DATA[4000:]
+
+        first = asyncio.create_task(store.append(upload.upload_id, 0, slow_body()))
+        await first_chunk_written.wait()
+        with pytest.raises(UploadBusyError):
+            await store.append(upload.upload_id, 0, body(DATA))
+        release.set()
+        return await first
+
+    assert asyncio.run(run()) == len(DATA)
+    assert store.complete(upload.upload_id).sha256 == SHA256
+
+
+def test_interrupted_body_keeps_what_arrived(store):
+    upload = store.create("report.pdf", "application/pdf", len(DATA))
+
+    async def dropped_connection():
+        yield DATA[:4000]
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(store.append(upload.upload_id, 0, dropped_connection()))
+    assert store.get(upload.upload_id).offset == 4000
+    with pytest.raises(UploadOffsetError) as error:
+        asyncio.run(store.append(upload.upload_id, 0, body(DATA)))
+    assert error.value.offset == 4000
+    assert asyncio.run(store.append(upload.upload_id, 4000, body(DATA[4000:]))) == len(DATA)
+
+
+def test_expired_and_unknown_sessions_are_not_found(store):
+    upload = store.create("report.pdf", "application/pdf", len(DATA))
+    with pytest.raises(UploadTooLargeError):
+        store.create("huge.pdf", "application/pdf", 100, max_size=99)
+    with pytest.raises(UploadNotFoundError):
+        store.get("../../etc/passwd")
+
+    store.ttl = -1
+    expired = store.create("old.pdf", "application/pdf", len(DATA))
+    assert set(store.purge_expired()) == {expired.upload_id}
+    store.ttl = 60
+    assert store.get(upload.upload_id).offset == 0
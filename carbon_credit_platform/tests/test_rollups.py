@@ -0,0 +1,155 @@
+"""
+The flush hooks keep the rollup tables equal to a rebuild from the raw
+tables through inserts, updates, deletes and rollbacks, and startup builds
+them once even when workers race.
+"""
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (configures all mappers)
+from app.database import Base, create_db_engine
+from app.models.carbon_coins import CarbonCoinIssue, CoinSource
+from app.models.credit_retirement import CreditRetirement, RetirementStatus
+from app.models.marketplace import MarketplaceCredit, SourceType, VerificationStatus
+from app.models.rollup import MarketplaceRollup
+from app.models.user import User
+from app.services import rollups
+from app.services.rollups import MARKETPLACE_ROLLUP_ID, RollupService, ensure_rollups, find_rollup_drift
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com", "hashed_password": "x"}
+            for user_id in (1, 2, 3)
+        ])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(make_session):
+    session = make_session()
+    assert ensure_rollups(session)
+    yield session
+    session.close()
+
+
+def credit(issuer_id, coins, status=VerificationStatus.PENDING, source=SourceType.FORESTATION):
+    return MarketplaceCredit(issuer_name=f"user{issuer_id}", issuer_id=issuer_id, coins_issued=coins,
+                             verification_status=status, source_type=source)
+
+
+def coin_issue(user_id, coins, source=CoinSource.SOLAR_PANEL):
+    return CarbonCoinIssue(user_id=user_id, full_name=f"user{user_id}", coins_issued=coins, source=source,
+                           source_application_id=1)
+
+
+def retirement(user_id, coins, status=RetirementStatus.PENDING):
+    return CreditRetirement(user_id=user_id, coins_retired=coins, co2_offset_tons=coins, retirement_status=status)
+
+
+def seed(db):
+    rows = {
+        "pending": credit(1, 10.0),
+        "verified": credit(1, 20.0, VerificationStatus.VERIFIED),
+        "solar": credit(2, 5.0, VerificationStatus.VERIFIED, SourceType.SOLAR_PANEL),
+        "issue": coin_issue(1, 7.0),
+        "forest_issue": coin_issue(2, 3.0, CoinSource.FORESTATION),
+        "retirement": retirement(1, 4.0),
+        "completed": retirement(2, 2.0, RetirementStatus.COMPLETED),
+    }
+    db.add_all(rows.values())
+    db.commit()
+    return rows
+
+
+def test_inserts_match_a_rebuild(db):
+    seed(db)
+    assert find_rollup_drift(db) == []
+    marketplace = RollupService(db).get_marketplace()
+    assert (marketplace.credits_total, marketplace.credits_verified, marketplace.verified_issuers) == (3, 2, 2)
+    assert (marketplace.coins_verified, marketplace.coins_retired) == (25.0, 2.0)
+    assert RollupService(db).get_user(1).coins_minted == 7.0
+
+
+def test_updates_move_contributions_between_rows(db):
+    rows = seed(db)
+    # After the commit every attribute is expired: these are set without being read first
+    rows["pending"].verification_status = VerificationStatus.VERIFIED
+    rows["verified"].issuer_id = 3
+    rows["solar"].coins_issued = 8.0
+    rows["issue"].user_id = 3
+    rows["issue"].source = CoinSource.FORESTATION
+    rows["retirement"].retirement_status = RetirementStatus.COMPLETED
+    rows["completed"].user_id = 3
+    db.commit()
+    assert find_rollup_drift(db) == []
+    assert RollupService(db).get_marketplace().verified_issuers == 3
+
+    rows["verified"].verification_status = VerificationStatus.REJECTED
+    rows["solar"].verification_status = VerificationStatus.REJECTED
+    db.commit()
+    assert find_rollup_drift(db) == []
+    assert RollupService(db).get_marketplace().verified_issuers == 1
+
+
+def test_deletes_take_contributions_back_out(db):
+    rows = seed(db)
+    for name in ("verified", "solar", "forest_issue", "completed"):
+        db.delete(rows[name])
+    db.commit()
+    assert find_rollup_drift(db) == []
+    marketplace = RollupService(db).get_marketplace()
+    assert (marketplace.credits_verified, marketplace.verified_issuers, marketplace.coins_retired) == (0, 0, 0.0)
+
+
+def test_rollback_discards_flushed_and_pending_changes(db):
+    rows = seed(db)
+    db.add(credit(2, 50.0, VerificationStatus.VERIFIED))
+    rows["retirement"].retirement_status = RetirementStatus.COMPLETED
+    db.flush()
+    db.delete(rows["issue"])
+    db.rollback()
+    assert find_rollup_drift(db) == []
+
+    rows["pending"].coins_issued = 12.0
+    db.commit()
+    assert find_rollup_drift(db) == []
+    assert RollupService(db).get_issuer(2).coins_verified == 5.0
+
+
+def test_ensure_rollups_builds_once(db):
+    seed(db)
+    assert not ensure_rollups(db)
+    assert find_rollup_drift(db) == []
+
+
+def test_ensure_rollups_keeps_the_rows_of_a_worker_that_won_the_race(make_session, monkeypatch):
+    rebuild_rollups = rollups.rebuild_rollups
+
+    def build_after_another_worker(db):
+        with make_session() as other:
+            rebuild_rollups(other)
+            other.commit()
+        # Our marketplace row now collides with the one the other worker committed
+        db.execute(insert(MarketplaceRollup).values(id=MARKETPLACE_ROLLUP_ID))
+
+    monkeypatch.setattr(rollups, "rebuild_rollups", build_after_another_worker)
+    with make_session() as db:
+        assert not ensure_rollups(db)
+        assert db.get(MarketplaceRollup, MARKETPLACE_ROLLUP_ID) is not None
+
+
+def test_ensure_rollups_reraises_when_no_worker_built_them(make_session, monkeypatch):
+    def fail(db):
+        raise IntegrityError("INSERT INTO marketplace_rollups", {}, Exception("NOT NULL constraint failed"))
+
+    monkeypatch.setattr(rollups, "rebuild_rollups", fail)
+    with make_session() as db, pytest.raises(IntegrityError):
+        ensure_rollups(db)
@@ -0,0 +1,72 @@
+"""
+The column-only list fast path must produce the same JSON as the response
+models it replaces, and ?fields= must select only what was asked for.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.serialization import InvalidFieldsError, dumps
+from app.database import Base, create_db_engine
+from app.models import MarketplaceCredit, User  # noqa: F401  (registers all tables)
+from app.models.marketplace import SourceType, VerificationStatus
+from app.schemas.marketplace import MarketplaceCreditResponse
+from app.services.marketplace_service import MarketplaceService
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'lists.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, username="issuer", email="issuer@example.com", hashed_password="x"))
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(6):
+        session.add(MarketplaceCredit(
+            issuer_name=f"issuer {i}",
+            issuer_id=1,
+            coins_issued=float(i) + 0.25,
+            source_type=SourceType.FORESTATION if i % 2 else SourceType.SOLAR_PANEL,
+            source_project_id=i if i % 3 else None,
+            description=None if i == 4 else f"credit {i}",
+            verification_status=VerificationStatus.VERIFIED if i % 3 else VerificationStatus.PENDING,
+            verified_at=created + timedelta(microseconds=i) if i % 3 else None,
+            created_at=created + timedelta(seconds=i)
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_fast_path_matches_response_model(db):
+    service = MarketplaceService(db)
+    fast = json.loads(dumps(service.get_verified_credits_for_marketplace()))
+
+    credits = db.query(MarketplaceCredit).filter(
+        MarketplaceCredit.verification_status == VerificationStatus.VERIFIED
+    ).order_by(MarketplaceCredit.created_at.desc()).all()
+    models = TypeAdapter(List[MarketplaceCreditResponse]).validate_python(credits, from_attributes=True)
+    expected = json.loads(TypeAdapter(List[MarketplaceCreditResponse]).dump_json(models))
+
+    assert fast == expected
+
+
+def test_fields_select_only_requested_columns(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    rows = MarketplaceService(db).get_credit_rows(fields="id, coins_issued,id")
+
+    assert rows[0] == {"id": 6, "coins_issued": 5.25}
+    select_list = statements[-1].split("FROM")[0]
+    assert "coins_issued" in select_list and "description" not in select_list
+
+    with pytest.raises(InvalidFieldsError):
+        MarketplaceService(db).get_credit_rows(fields="id,password")
@@ -0,0 +1,61 @@
+"""
+Presigned direct uploads: the response never reveals whether content is
+already stored, and local storage refuses to sign without a shared secret.
+"""
+import hashlib
+import os
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from app.services import storage
+from app.services.blob_store import BlobStore, object_key
+from app.services.storage import LocalStorage, StorageError, check_signing_secret, verify_local_upload
+
+PHOTO = b"stored photo"
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_SIGNING_SECRET", "test-secret")
+    return LocalStorage(str(tmp_path))
+
+
+def presign(store, sha256):
+    return store.presign(sha256, len(PHOTO), "image/jpeg")
+
+
+def test_presign_looks_the_same_for_stored_and_new_content(local_storage):
+    store = BlobStore(None, local_storage)
+    stored = hashlib.sha256(PHOTO).hexdigest()
+    path = local_storage.path_for(object_key(stored))
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as stored_file:
+        stored_file.write(PHOTO)
+    new = hashlib.sha256(b"new photo").hexdigest()
+
+    for sha256 in (stored, new):
+        response = presign(store, sha256)
+        assert set(response) == {"key", "upload"}
+        assert response["key"] == object_key(sha256)
+        assert response["upload"]["method"] == "PUT"
+
+
+def test_presigned_url_verifies_only_unchanged(local_storage):
+    upload = presign(BlobStore(None, local_storage), hashlib.sha256(PHOTO).hexdigest())["upload"]
+    params = dict(parse_qsl(urlsplit(upload["url"]).query))
+    key, size, sha256, expires = params["key"], int(params["size"]), params["sha256"], int(params["expires"])
+    assert verify_local_upload(key, size, sha256, expires, params["signature"])
+    assert not verify_local_upload(key, size + 1, sha256, expires, params["signature"])
+
+
+def test_local_storage_needs_a_signing_secret(monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_SIGNING_SECRET", None)
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "local")
+    with pytest.raises(StorageError, match="STORAGE_SIGNING_SECRET"):
+        check_signing_secret()
+    with pytest.raises(StorageError):
+        storage.sign_local_upload("objects/ab/cd/abcd", 1, "abcd", 0)
+
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "s3")
+    check_signing_secret()
@@ -0,0 +1,116 @@
+"""
+Chunked upload writing: files are hashed and size-checked while they stream,
+nothing partial is left behind when a limit is hit, and the presigned local
+upload endpoint answers 413 for oversize bodies.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import time
+from urllib.parse import urlencode
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import storage as storage_api
+from app.main import app
+from app.services import storage
+from app.services.blob_store import object_key
+from app.services.storage import LocalStorage, sign_local_upload
+from app.services.upload_writer import (
+    UploadTooLargeError,
+    save_upload,
+    stage_chunks,
+    stage_stream,
+    write_stream
+)
+
+DATA = os.urandom(10_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+async def chunks_of(data: bytes, size: int = 3000):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_stage_stream_hashes_while_copying_in_chunks(tmp_path):
+    staged = stage_stream(io.BytesIO(DATA), str(tmp_path), chunk_size=4096)
+    assert (staged.size, staged.sha256) == (len(DATA), SHA256)
+    with open(staged.path, "rb") as staged_file:
+        assert staged_file.read() == DATA
+
+
+def test_stage_chunks_hashes_a_request_body(tmp_path):
+    staged = asyncio.run(stage_chunks(chunks_of(DATA), str(tmp_path)))
+    assert (staged.size, staged.sha256) == (len(DATA), SHA256)
+    assert os.path.getsize(staged.path) == len(DATA)
+
+
+def test_oversize_uploads_stop_and_leave_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLargeError, match="too large"):
+        stage_stream(io.BytesIO(DATA), str(tmp_path), max_size=len(DATA) - 1, chunk_size=4096)
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(stage_chunks(chunks_of(DATA), str(tmp_path), max_size=len(DATA) - 1))
+    with pytest.raises(UploadTooLargeError):
+        write_stream(io.BytesIO(DATA), str(tmp_path / "photo.jpg"), max_size=len(DATA) - 1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_write_stream_publishes_the_whole_file(tmp_path):
+    dest = tmp_path / "forestation" / "photo.jpg"
+    stored = write_stream(io.BytesIO(DATA), str(dest), chunk_size=4096)
+    assert (stored.path, stored.sha256) == (str(dest), SHA256)
+    assert dest.read_bytes() == DATA
+    # Only the published file remains; the staging file was renamed into place
+    assert os.listdir(dest.parent) == ["photo.jpg"]
+
+
+def test_save_upload_rewinds_the_upload(tmp_path):
+    class Upload:
+        file = io.BytesIO(DATA)
+
+    stored = asyncio.run(save_upload(Upload, str(tmp_path / "photo.jpg")))
+    assert stored.sha256 == SHA256
+    assert Upload.file.tell() == 0
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_SIGNING_SECRET", "test-secret")
+    monkeypatch.setattr(storage_api, "STAGING_DIR", str(tmp_path / "staging"))
+    local = LocalStorage(str(tmp_path / "uploads"))
+    monkeypatch.setattr(storage_api, "get_storage", lambda: local)
+    return TestClient(app), local
+
+
+def signed_upload_url(size: int, sha256: str = SHA256) -> str:
+    key = object_key(sha256)
+    expires = int(time.time()) + 60
+    query = urlencode({"key": key, "size": size, "sha256": sha256, "expires": expires,
+                       "signature": sign_local_upload(key, size, sha256, expires)})
+    return f"/api/v1/storage/upload?{query}"
+
+
+def test_presigned_upload_is_stored_under_its_key(client):
+    client, local = client
+    response = client.put(signed_upload_url(len(DATA)), content=DATA)
+    assert response.status_code == 200
+    assert local.read_bytes(object_key(SHA256)) == DATA
+
+
+def test_body_larger_than_signed_size_is_413(client, tmp_path):
+    client, local = client
+    response = client.put(signed_upload_url(len(DATA) - 1), content=DATA)
+    assert response.status_code == 413
+    assert not local.exists(object_key(SHA256))
+    assert os.listdir(tmp_path / "staging") == []
+
+
+def test_body_that_does_not_match_the_signature_is_rejected(client):
+    client, local = client
+    assert client.put(signed_upload_url(len(DATA)), content=DATA[:-1]).status_code == 400
+    assert client.put(signed_upload_url(len(DATA)).replace("signature=", "signature=0"),
+                      content=DATA).status_code == 403
+    assert not local.exists(object_key(SHA256))
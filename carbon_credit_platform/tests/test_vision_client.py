@@ -0,0 +1,209 @@
+"""
+VisionClient against a fake AsyncOpenAI: the concurrency limit, retries with
+backoff and Retry-After, the overall deadline, and the response cache; plus
+the payload shrinking in prepare_image_for_vision.
+"""
+import asyncio
+import io
+import time
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+import pytest
+from PIL import Image
+
+from app.services import vision_client
+from app.services.vision_client import VisionClient, VisionClientError, _ResponseCache, prepare_image_for_vision
+
+
+class FakeCompletions:
+    """Answers with `outcomes` in turn: an exception is raised, a string is the answer"""
+
+    def __init__(self, outcomes=(), delay: float = 0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=outcome))])
+
+
+def make_client(completions: FakeCompletions, **kwargs) -> VisionClient:
+    client = VisionClient(api_key="test", **kwargs)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def api_error(error_class, status: int, retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1"), headers=headers)
+    return error_class(f"status {status}", response=response, body=None)
+
+
+def jpeg(width: int, height: int, seed: int = 0, quality: int = 95) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(vision_client, "BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(vision_client, "BACKOFF_CAP_SECONDS", 0.01)
+
+
+@pytest.fixture(scope="module")
+def photo():
+    return jpeg(64, 48)
+
+
+def test_concurrent_requests_are_limited(photo):
+    completions = FakeCompletions(delay=0.05)
+    client = make_client(completions, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(client.complete(photo, f"prompt {index}") for index in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert completions.calls == 6
+    assert completions.peak_in_flight == 2
+    assert client.in_flight == 0
+
+
+@pytest.mark.parametrize("error", [
+    api_error(openai.RateLimitError, 429),
+    api_error(openai.InternalServerError, 503),
+    openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1")),
+])
+def test_retryable_errors_are_retried(photo, error):
+    completions = FakeCompletions([error, "answer"])
+    client = make_client(completions)
+    assert asyncio.run(client.complete(photo, "prompt")) == "answer"
+    assert (completions.calls, client.failures) == (2, 1)
+
+
+@pytest.mark.parametrize("error", [
+    api_error(openai.BadRequestError, 400),
+    api_error(openai.AuthenticationError, 401),
+    ValueError("malformed response"),
+])
+def test_other_errors_fail_at_once(photo, error):
+    completions = FakeCompletions([error, "answer"])
+    client = make_client(completions)
+    with pytest.raises(VisionClientError, match="Vision request failed"):
+        asyncio.run(client.complete(photo, "prompt"))
+    assert completions.calls == 1
+
+
+def test_retries_stop_after_max_retries(photo):
+    completions = FakeCompletions([api_error(openai.RateLimitError, 429)] * 5)
+    client = make_client(completions, max_retries=2)
+    with pytest.raises(VisionClientError, match="Vision request failed"):
+        asyncio.run(client.complete(photo, "prompt"))
+    assert completions.calls == 3
+
+
+def test_retry_waits_at_least_retry_after(photo):
+    completions = FakeCompletions([api_error(openai.RateLimitError, 429, retry_after=0.2), "answer"])
+    client = make_client(completions)
+    started = time.monotonic()
+    assert asyncio.run(client.complete(photo, "prompt")) == "answer"
+    assert time.monotonic() - started >= 0.2
+
+
+def test_retry_after_past_the_deadline_fails_without_waiting(photo):
+    completions = FakeCompletions([api_error(openai.RateLimitError, 429, retry_after=30), "answer"])
+    client = make_client(completions, deadline_seconds=5)
+    started = time.monotonic()
+    with pytest.raises(VisionClientError, match="deadline exceeded"):
+        asyncio.run(client.complete(photo, "prompt"))
+    assert time.monotonic() - started < 1
+    assert completions.calls == 1
+
+
+def test_slow_request_fails_at_the_deadline(photo):
+    client = make_client(FakeCompletions(delay=5), deadline_seconds=0.2)
+    started = time.monotonic()
+    with pytest.raises(VisionClientError, match="deadline exceeded"):
+        asyncio.run(client.complete(photo, "prompt"))
+    assert time.monotonic() - started < 1
+    assert client.in_flight == 0
+
+
+def test_deadline_covers_time_queued_behind_the_limiter(photo, monkeypatch):
+    # Only the wait for the limiter and the request itself count here
+    monkeypatch.setattr(vision_client, "prepare_image_for_vision", lambda image_bytes: image_bytes)
+    client = make_client(FakeCompletions(delay=0.4), max_concurrency=1, deadline_seconds=0.6)
+
+    async def run():
+        return await asyncio.gather(*(client.complete(photo, f"prompt {index}") for index in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[0] == "ok"
+    assert all(isinstance(result, VisionClientError) for result in results[1:])
+
+
+def test_answers_are_cached_per_image_and_prompt(photo):
+    completions = FakeCompletions(["first", "second", "third"])
+    client = make_client(completions)
+
+    assert asyncio.run(client.complete(photo, "prompt")) == "first"
+    assert asyncio.run(client.complete(photo, "prompt")) == "first"
+    assert asyncio.run(client.complete(photo, "other prompt")) == "second"
+    assert asyncio.run(client.complete(jpeg(64, 48, seed=1), "prompt")) == "third"
+    assert completions.calls == 3
+    assert (client.cache.hits, client.cache.misses) == (1, 3)
+
+
+def test_failures_are_not_cached(photo):
+    completions = FakeCompletions([api_error(openai.BadRequestError, 400), "answer"])
+    client = make_client(completions)
+    with pytest.raises(VisionClientError):
+        asyncio.run(client.complete(photo, "prompt"))
+    assert asyncio.run(client.complete(photo, "prompt")) == "answer"
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = _ResponseCache(2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), len(cache)) == ("1", "3", 2)
+
+
+def test_payload_is_downscaled_below_max_side():
+    original = jpeg(2400, 1600)
+    payload = prepare_image_for_vision(original)
+    image = Image.open(io.BytesIO(payload))
+    assert image.format == "JPEG"
+    assert max(image.size) <= vision_client.VISION_MAX_SIDE
+    assert image.size[0] / image.size[1] == pytest.approx(1.5, rel=0.01)
+    assert len(payload) < len(original)
+
+
+def test_quality_rises_until_text_edges_survive(monkeypatch):
+    original = jpeg(400, 300)
+    monkeypatch.setattr(vision_client, "MIN_TEXT_PSNR_DB", 0.0)
+    lowest = prepare_image_for_vision(original)
+    monkeypatch.setattr(vision_client, "MIN_TEXT_PSNR_DB", float("inf"))
+    highest = prepare_image_for_vision(original)
+    # The first step is accepted when any quality will do; otherwise every step is tried
+    assert len(highest) > len(lowest)
@@ -1,3 +1,5 @@
+import storageApiService from './storageApi';
+
 // API base URL - update this to match your backend server
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
@@ -29,12 +31,12 @@ class ForestationApiService {
     formDataToSend.append('full_name', formData.fullName);
     formDataToSend.append('aadhar_card', formData.aadharCardNumber);
 
-    // Add files
+    // Upload files directly to storage; the API only registers their keys
     if (formData.ownershipDocument) {
-      formDataToSend.append('ownership_document', formData.ownershipDocument);
+      formDataToSend.append('ownership_document_key', await storageApiService.uploadFile(formData.ownershipDocument, { resumable: true }));
     }
     if (formData.geotagPhoto) {
-      formDataToSend.append('geotag_photo', formData.geotagPhoto);
+      formDataToSend.append('geotag_photo_key', await storageApiService.uploadFile(formData.geotagPhoto));
     }
 
     console.log('API Service: Making request to:', `${this.baseURL}/forestation/applications`);
@@ -1,3 +1,5 @@
+import storageApiService from './storageApi';
+
 // API base URL - update this to match your backend server
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
@@ -46,15 +48,20 @@ class SolarPanelApiService {
     }
     formDataToSend.append('api_link', apiLink);
 
-    // Add files
-    if (formData.ownershipDocument) {
-      formDataToSend.append('ownership_document', formData.ownershipDocument);
+    // Upload files directly to storage; the API only registers their keys
+    const [ownershipKey, energyCertKey, geotagKey] = await Promise.all([
+      formData.ownershipDocument ? storageApiService.uploadFile(formData.ownershipDocument, { resumable: true }) : null,
+      formData.energyCertification ? storageApiService.uploadFile(formData.energyCertification, { resumable: true }) : null,
+      formData.geotagPhoto ? storageApiService.uploadFile(formData.geotagPhoto) : null,
+    ]);
+    if (ownershipKey) {
+      formDataToSend.append('ownership_document_key', ownershipKey);
     }
-    if (formData.energyCertification) {
-      formDataToSend.append('energy_certification', formData.energyCertification);
+    if (energyCertKey) {
+      formDataToSend.append('energy_certification_key', energyCertKey);
     }
-    if (formData.geotagPhoto) {
-      formDataToSend.append('geotag_photo', formData.geotagPhoto);
+    if (geotagKey) {
+      formDataToSend.append('geotag_photo_key', geotagKey);
     }
 
     console.log('API Service: Making request to:', `${this.baseURL}/solar-panel/applications`);
@@ -0,0 +1,136 @@
+// API base URL - update this to match your backend server
+const API_BASE_URL = 'http://localhost:8000/api/v1';
+
+// Resumable uploads: chunk size and retries per chunk before giving up
+const RESUMABLE_CHUNK_SIZE = 1024 * 1024;
+const MAX_CHUNK_RETRIES = 5;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+class StorageApiService {
+  constructor() {
+    this.baseURL = API_BASE_URL;
+  }
+
+  // Helper method to handle API responses
+  async handleResponse(response) {
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  // Hex SHA-256 of a File/Blob (the storage key is derived from it)
+  async sha256(file) {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest))
+      .map((byte) => byte.toString(16).padStart(2, '0'))
+      .join('');
+  }
+
+  // Upload a file straight to storage and return its key.
+  // The API only sees the key; content it already has is stored once under the same key.
+  // With `resumable`, the file is sent in chunks and a retry only resends missing bytes.
+  async uploadFile(file, { resumable = false } = {}) {
+    const contentType = file.type || 'application/octet-stream';
+    const sha256 = await this.sha256(file);
+    if (resumable) {
+      return this.uploadResumable(file, sha256);
+    }
+
+    const presignResponse = await fetch(`${this.baseURL}/storage/presign`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        filename: file.name || 'upload',
+        content_type: contentType,
+        size: file.size,
+        sha256,
+      }),
+    });
+    const presigned = await this.handleResponse(presignResponse);
+
+    const { url, method, headers } = presigned.upload;
+    const uploadResponse = await fetch(url, { method, headers, body: file });
+    if (!uploadResponse.ok) {
+      throw new Error(`Upload failed for ${file.name}: status ${uploadResponse.status}`);
+    }
+
+    return presigned.key;
+  }
+
+  async getUploadStatus(uploadId) {
+    const response = await fetch(`${this.baseURL}/storage/uploads/${uploadId}`);
+    return this.handleResponse(response);
+  }
+
+  // Chunked upload that survives dropped connections and page reloads
+  async uploadResumable(file, sha256) {
+    // Remember the session so a reload picks up where the last attempt stopped
+    const sessionKey = `resumableUpload:${sha256}`;
+    let status = null;
+
+    const savedId = localStorage.getItem(sessionKey);
+    if (savedId) {
+      status = await this.getUploadStatus(savedId).catch(() => null);
+    }
+    if (!status) {
+      const response = await fetch(`${this.baseURL}/storage/uploads`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          filename: file.name || 'upload',
+          content_type: file.type || 'application/octet-stream',
+          size: file.size,
+          sha256,
+        }),
+      });
+      status = await this.handleResponse(response);
+      localStorage.setItem(sessionKey, status.upload_id);
+    }
+
+    const uploadUrl = `${this.baseURL}/storage/uploads/${status.upload_id}`;
+    let offset = status.offset;
+    let retries = 0;
+
+    while (offset < file.size) {
+      try {
+        const response = await fetch(uploadUrl, {
+          method: 'PATCH',
+          headers: {
+            'Content-Type': 'application/offset+octet-stream',
+            'Upload-Offset': String(offset),
+          },
+          body: file.slice(offset, offset + RESUMABLE_CHUNK_SIZE),
+        });
+        offset = (await this.handleResponse(response)).offset;
+        retries = 0;
+      } catch (error) {
+        retries += 1;
+        if (retries > MAX_CHUNK_RETRIES) {
+          throw error;
+        }
+        console.warn(`Chunk upload failed at byte ${offset}, retrying:`, error.message);
+        await sleep(Math.min(1000 * 2 ** retries, 15000));
+        // Part of the chunk may have arrived; ask the server where to continue
+        offset = await this.getUploadStatus(status.upload_id)
+          .then((current) => current.offset)
+          .catch(() => offset);
+      }
+    }
+
+    const completeResponse = await fetch(`${uploadUrl}/complete`, { method: 'POST' });
+    const result = await this.handleResponse(completeResponse);
+    localStorage.removeItem(sessionKey);
+    return result.key;
+  }
+}
+
+// Create and export a singleton instance
+const storageApiService = new StorageApiService();
+export default storageApiService;